@@ -0,0 +1,49 @@
+"""Add pdf_storage_stats counters for the receipts bucket
+
+Revision ID: 3d9a6c2e8f51
+Revises: 5b8e1f3c6a47
+Create Date: 2026-01-15 09:41:12.318044
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3d9a6c2e8f51"
+down_revision: str | None = "5b8e1f3c6a47"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create pdf_storage_stats.
+
+    store_pdf() and delete_pdf() keep the object count and byte totals of
+    the receipts bucket here (overall, per vendor and per month), so the
+    storage status endpoint no longer lists the bucket. The table starts
+    empty and is filled by the first reconciliation.
+    """
+    op.create_table(
+        "pdf_storage_stats",
+        sa.Column("scope", sa.String(length=20), nullable=False),
+        sa.Column("scope_key", sa.String(length=255), nullable=False),
+        sa.Column("object_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column(
+            "total_size_bytes", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("scope", "scope_key"),
+    )
+
+
+def downgrade() -> None:
+    """Drop pdf_storage_stats."""
+    op.drop_table("pdf_storage_stats")
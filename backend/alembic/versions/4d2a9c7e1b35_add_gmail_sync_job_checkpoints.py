@@ -0,0 +1,89 @@
+"""Add resume checkpoints and chunk parents to gmail_sync_jobs
+
+Revision ID: 4d2a9c7e1b35
+Revises: 6f11c72e76a6
+Create Date: 2026-01-05 10:12:41.503118
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "4d2a9c7e1b35"
+down_revision: str | None = "6f11c72e76a6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add checkpoint/parent_job_id columns, 'chunk' jobs and 'retrying' status.
+
+    checkpoint holds the list page token, the committed offset within that
+    page and the date cursor so an interrupted full sync can resume.
+    parent_job_id links month-sized chunk jobs to the sync that created them.
+    A chunk waiting for its Celery retry is 'retrying', so its parent is not
+    finalized while it is still due to run.
+    """
+    op.add_column(
+        "gmail_sync_jobs",
+        sa.Column("checkpoint", postgresql.JSONB(), nullable=True),
+    )
+    op.add_column(
+        "gmail_sync_jobs",
+        sa.Column(
+            "parent_job_id",
+            sa.Integer(),
+            sa.ForeignKey("gmail_sync_jobs.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "idx_gmail_sync_jobs_parent",
+        "gmail_sync_jobs",
+        ["parent_job_id"],
+        unique=False,
+    )
+
+    op.drop_constraint(
+        "gmail_sync_jobs_job_type_check", "gmail_sync_jobs", type_="check"
+    )
+    op.create_check_constraint(
+        "gmail_sync_jobs_job_type_check",
+        "gmail_sync_jobs",
+        "job_type IN ('full', 'incremental', 'chunk')",
+    )
+
+    op.drop_constraint("gmail_sync_jobs_status_check", "gmail_sync_jobs", type_="check")
+    op.create_check_constraint(
+        "gmail_sync_jobs_status_check",
+        "gmail_sync_jobs",
+        "status IN ('queued', 'running', 'retrying', 'completed', 'failed', "
+        "'cancelled')",
+    )
+
+
+def downgrade() -> None:
+    """Remove checkpoint/parent_job_id columns, 'chunk' jobs and 'retrying'."""
+    op.execute("DELETE FROM gmail_sync_jobs WHERE job_type = 'chunk'")
+    op.execute("UPDATE gmail_sync_jobs SET status = 'failed' WHERE status = 'retrying'")
+    op.drop_constraint("gmail_sync_jobs_status_check", "gmail_sync_jobs", type_="check")
+    op.create_check_constraint(
+        "gmail_sync_jobs_status_check",
+        "gmail_sync_jobs",
+        "status IN ('queued', 'running', 'completed', 'failed', 'cancelled')",
+    )
+    op.drop_constraint(
+        "gmail_sync_jobs_job_type_check", "gmail_sync_jobs", type_="check"
+    )
+    op.create_check_constraint(
+        "gmail_sync_jobs_job_type_check",
+        "gmail_sync_jobs",
+        "job_type IN ('full', 'incremental')",
+    )
+    op.drop_index("idx_gmail_sync_jobs_parent", table_name="gmail_sync_jobs")
+    op.drop_column("gmail_sync_jobs", "parent_job_id")
+    op.drop_column("gmail_sync_jobs", "checkpoint")
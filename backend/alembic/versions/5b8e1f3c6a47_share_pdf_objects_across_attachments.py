@@ -0,0 +1,37 @@
+"""Let pdf_attachments rows with identical content share one MinIO object
+
+Revision ID: 5b8e1f3c6a47
+Revises: e7b4d2a8c915
+Create Date: 2026-01-14 15:08:36.904512
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e1f3c6a47"
+down_revision: str | None = "e7b4d2a8c915"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Replace the unique constraint on object_key with a plain index.
+
+    store_pdf() no longer uploads a PDF whose content hash is already
+    stored; the new attachment row points at the existing object instead.
+    """
+    op.drop_constraint(
+        "pdf_attachments_object_key_key", "pdf_attachments", type_="unique"
+    )
+    op.create_index("idx_pdf_attachments_object_key", "pdf_attachments", ["object_key"])
+
+
+def downgrade() -> None:
+    """Restore the unique constraint (fails while objects are shared)."""
+    op.drop_index("idx_pdf_attachments_object_key", table_name="pdf_attachments")
+    op.create_unique_constraint(
+        "pdf_attachments_object_key_key", "pdf_attachments", ["object_key"]
+    )
@@ -0,0 +1,34 @@
+"""Add llm_latency_ms to gmail_receipts
+
+Revision ID: 5e1b7d9c3a24
+Revises: 8c4f2e7a1d93
+Create Date: 2026-01-20 10:12:44.618305
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e1b7d9c3a24"
+down_revision: str | None = "8c4f2e7a1d93"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add llm_latency_ms, the wall time of the LLM request per receipt.
+
+    Batched LLM parsing shares one request between several receipts; each
+    records the request's cost share in llm_cost_cents and its latency here.
+    """
+    op.add_column(
+        "gmail_receipts", sa.Column("llm_latency_ms", sa.Integer(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Drop llm_latency_ms."""
+    op.drop_column("gmail_receipts", "llm_latency_ms")
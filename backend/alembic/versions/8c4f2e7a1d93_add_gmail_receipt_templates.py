@@ -0,0 +1,68 @@
+"""Add gmail_receipt_templates learned from trusted receipt parses
+
+Revision ID: 8c4f2e7a1d93
+Revises: 3d9a6c2e8f51
+Create Date: 2026-01-19 14:06:37.552180
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4f2e7a1d93"
+down_revision: str | None = "3d9a6c2e8f51"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create gmail_receipt_templates.
+
+    One row per (sender domain, DOM fingerprint) with the paths an LLM or
+    user-confirmed parse took the amount, date and order ID from, so later
+    emails with the same layout are parsed without the LLM.
+    """
+    op.create_table(
+        "gmail_receipt_templates",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("sender_domain", sa.String(length=255), nullable=False),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("shingles", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "field_paths", postgresql.JSONB(astext_type=sa.Text()), nullable=False
+        ),
+        sa.Column("merchant_name", sa.String(length=255), nullable=True),
+        sa.Column("merchant_name_normalized", sa.String(length=255), nullable=True),
+        sa.Column("currency_code", sa.String(length=3), nullable=True),
+        sa.Column("source", sa.String(length=20), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.CheckConstraint(
+            "source IN ('llm', 'user')", name="ck_gmail_receipt_template_source"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "sender_domain",
+            "fingerprint",
+            name="uq_gmail_receipt_template_fingerprint",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Drop gmail_receipt_templates."""
+    op.drop_table("gmail_receipt_templates")
@@ -0,0 +1,58 @@
+"""Add gmail_parse_results cache and parser versions on gmail_receipts
+
+Revision ID: 9c3e5a1f7d24
+Revises: 4d2a9c7e1b35
+Create Date: 2026-01-12 09:41:17.226804
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3e5a1f7d24"
+down_revision: str | None = "4d2a9c7e1b35"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create gmail_parse_results and add content_hash/parser_version columns.
+
+    gmail_parse_results maps (content_hash, parser_version) to the parser
+    output so identical content is only parsed once per parser version.
+    The gmail_receipts columns record which version produced each receipt;
+    existing rows start as NULL and are picked up by the first reparse run.
+    """
+    op.create_table(
+        "gmail_parse_results",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("parser_version", sa.String(length=255), nullable=False),
+        sa.Column("parse_result", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("content_hash", "parser_version"),
+    )
+
+    op.add_column(
+        "gmail_receipts",
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+    )
+    op.add_column(
+        "gmail_receipts",
+        sa.Column("parser_version", sa.String(length=255), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Drop the parse result cache and the gmail_receipts version columns."""
+    op.drop_column("gmail_receipts", "parser_version")
+    op.drop_column("gmail_receipts", "content_hash")
+    op.drop_table("gmail_parse_results")
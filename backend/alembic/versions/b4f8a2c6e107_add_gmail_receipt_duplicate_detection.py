@@ -0,0 +1,69 @@
+"""Add near-duplicate detection columns to gmail_receipts
+
+Revision ID: b4f8a2c6e107
+Revises: 5e1b7d9c3a24
+Create Date: 2026-01-21 09:41:05.274913
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b4f8a2c6e107"
+down_revision: str | None = "5e1b7d9c3a24"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add duplicate blocking keys, line item MinHash and duplicate_of_id.
+
+    Existing receipts get their keys and flags from
+    database.receipt_duplicates.backfill_receipt_duplicates().
+    """
+    op.add_column(
+        "gmail_receipts", sa.Column("amount_pence", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "gmail_receipts", sa.Column("received_bucket", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "gmail_receipts",
+        sa.Column(
+            "line_items_minhash",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "gmail_receipts", sa.Column("duplicate_of_id", sa.Integer(), nullable=True)
+    )
+    op.create_foreign_key(
+        "fk_gmail_receipts_duplicate_of_id",
+        "gmail_receipts",
+        "gmail_receipts",
+        ["duplicate_of_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        "idx_gmail_receipts_duplicate_block",
+        "gmail_receipts",
+        ["merchant_name_normalized", "amount_pence", "received_bucket"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the duplicate detection columns."""
+    op.drop_index("idx_gmail_receipts_duplicate_block", table_name="gmail_receipts")
+    op.drop_constraint(
+        "fk_gmail_receipts_duplicate_of_id", "gmail_receipts", type_="foreignkey"
+    )
+    op.drop_column("gmail_receipts", "duplicate_of_id")
+    op.drop_column("gmail_receipts", "line_items_minhash")
+    op.drop_column("gmail_receipts", "received_bucket")
+    op.drop_column("gmail_receipts", "amount_pence")
@@ -0,0 +1,164 @@
+"""Add gmail_merchant_summary and derived merchant columns on gmail_receipts
+
+Revision ID: d7a3c9e5f218
+Revises: b4f8a2c6e107
+Create Date: 2026-01-23 10:12:47.518306
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3c9e5f218"
+down_revision: str | None = "b4f8a2c6e107"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add sender_domain/merchant_key and the per-merchant summary table.
+
+    The summary is filled from the existing receipts with the aggregate of
+    database.gmail_merchant_summary._summary_select(); afterwards writers
+    keep it current and rebuild_gmail_merchant_summary() corrects drift.
+    """
+    op.add_column(
+        "gmail_receipts",
+        sa.Column(
+            "sender_domain",
+            sa.String(length=255),
+            sa.Computed("substring(sender_email from '@(.+)$')", persisted=True),
+        ),
+    )
+    op.add_column(
+        "gmail_receipts",
+        sa.Column(
+            "merchant_key",
+            sa.String(length=255),
+            sa.Computed(
+                "coalesce(merchant_name_normalized, lower(split_part("
+                "coalesce(merchant_domain, substring(sender_email from '@(.+)$')), "
+                "'.', 1)))",
+                persisted=True,
+            ),
+        ),
+    )
+    op.create_index(
+        "idx_gmail_receipts_merchant_key", "gmail_receipts", ["merchant_key"]
+    )
+
+    op.create_table(
+        "gmail_merchant_summary",
+        sa.Column("connection_id", sa.Integer(), nullable=False),
+        sa.Column("merchant_normalized", sa.String(length=255), nullable=False),
+        sa.Column("merchant_domain", sa.String(length=255), nullable=True),
+        sa.Column("merchant_name", sa.String(length=255), nullable=True),
+        sa.Column("receipt_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("parsed_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("matched_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("pending_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("failed_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "unparseable_count", sa.Integer(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "vendor_parsed_count", sa.Integer(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "schema_parsed_count", sa.Integer(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "pattern_parsed_count", sa.Integer(), server_default="0", nullable=False
+        ),
+        sa.Column("llm_parsed_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "llm_cost_cents", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "total_amount",
+            sa.Numeric(precision=14, scale=2),
+            server_default="0",
+            nullable=False,
+        ),
+        sa.Column("earliest_receipt", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("latest_receipt", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("min_receipt_date", sa.Date(), nullable=True),
+        sa.Column("max_receipt_date", sa.Date(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["connection_id"], ["gmail_connections.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("connection_id", "merchant_normalized"),
+    )
+    op.create_index(
+        "idx_gmail_merchant_summary_merchant",
+        "gmail_merchant_summary",
+        ["merchant_normalized"],
+    )
+
+    op.execute(
+        """
+        INSERT INTO gmail_merchant_summary (
+            connection_id, merchant_normalized, merchant_domain, merchant_name,
+            receipt_count, parsed_count, matched_count, pending_count,
+            failed_count, unparseable_count, vendor_parsed_count,
+            schema_parsed_count, pattern_parsed_count, llm_parsed_count,
+            llm_cost_cents, total_amount, earliest_receipt, latest_receipt,
+            min_receipt_date, max_receipt_date
+        )
+        SELECT
+            r.connection_id,
+            r.merchant_key,
+            mode() WITHIN GROUP (
+                ORDER BY coalesce(r.merchant_domain, r.sender_domain)
+            ),
+            mode() WITHIN GROUP (
+                ORDER BY coalesce(r.merchant_name, r.sender_name, r.sender_domain)
+            ),
+            count(*),
+            count(*) FILTER (WHERE r.parsing_status = 'parsed'),
+            count(*) FILTER (
+                WHERE EXISTS (
+                    SELECT 1 FROM gmail_transaction_matches m
+                    WHERE m.gmail_receipt_id = r.id
+                )
+            ),
+            count(*) FILTER (WHERE r.parsing_status = 'pending'),
+            count(*) FILTER (WHERE r.parsing_status = 'failed'),
+            count(*) FILTER (WHERE r.parsing_status = 'unparseable'),
+            count(*) FILTER (WHERE r.parse_method LIKE 'vendor_%'),
+            count(*) FILTER (WHERE r.parse_method = 'schema_org'),
+            count(*) FILTER (WHERE r.parse_method = 'pattern'),
+            count(*) FILTER (WHERE r.parse_method = 'llm'),
+            coalesce(sum(r.llm_cost_cents), 0),
+            coalesce(sum(r.total_amount), 0),
+            min(r.received_at),
+            max(r.received_at),
+            min(r.receipt_date),
+            max(r.receipt_date)
+        FROM gmail_receipts r
+        WHERE r.deleted_at IS NULL
+          AND r.duplicate_of_id IS NULL
+          AND r.merchant_key IS NOT NULL
+        GROUP BY r.connection_id, r.merchant_key
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the summary table and the derived columns."""
+    op.drop_index(
+        "idx_gmail_merchant_summary_merchant", table_name="gmail_merchant_summary"
+    )
+    op.drop_table("gmail_merchant_summary")
+    op.drop_index("idx_gmail_receipts_merchant_key", table_name="gmail_receipts")
+    op.drop_column("gmail_receipts", "merchant_key")
+    op.drop_column("gmail_receipts", "sender_domain")
@@ -0,0 +1,71 @@
+"""Add gmail_email_bodies store and body hashes on gmail_email_content
+
+Revision ID: e7b4d2a8c915
+Revises: 9c3e5a1f7d24
+Create Date: 2026-01-13 10:22:48.531907
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b4d2a8c915"
+down_revision: str | None = "9c3e5a1f7d24"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create gmail_email_bodies and add body hash columns.
+
+    gmail_email_bodies holds each distinct email body once, compressed and
+    keyed by its SHA256. gmail_email_content rows reference their bodies
+    through the new hash columns. Existing inline bodies stay readable and
+    are moved into the store by database.email_bodies.migrate_inline_email_bodies().
+    last_seen_at is refreshed each time a body is stored again, so the
+    retention purge never deletes a body a writer is about to reference.
+    """
+    op.create_table(
+        "gmail_email_bodies",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("codec", sa.String(length=10), nullable=False),
+        sa.Column("body", sa.LargeBinary(), nullable=False),
+        sa.Column("raw_size", sa.Integer(), nullable=False),
+        sa.Column("stored_size", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "last_seen_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("content_hash"),
+    )
+
+    op.add_column(
+        "gmail_email_content",
+        sa.Column("body_html_hash", sa.String(length=64), nullable=True),
+    )
+    op.add_column(
+        "gmail_email_content",
+        sa.Column("body_text_hash", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Drop the body store and the gmail_email_content hash columns.
+
+    Run only before any bodies were moved into the store; moved bodies are
+    not copied back inline.
+    """
+    op.drop_column("gmail_email_content", "body_text_hash")
+    op.drop_column("gmail_email_content", "body_html_hash")
+    op.drop_table("gmail_email_bodies")
@@ -0,0 +1,57 @@
+"""Add resume checkpoints to truelayer_import_progress
+
+Revision ID: f2c8e4a6b913
+Revises: d7a3c9e5f218
+Create Date: 2026-01-27 09:41:18.220647
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c8e4a6b913"
+down_revision: str | None = "d7a3c9e5f218"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add the checkpoint column and make (job_id, account_id) unique.
+
+    checkpoint holds the date window and page cursor after an account's last
+    committed page, so a failed import job resumes instead of starting over.
+    Progress is upserted per (job, account), which needs the unique
+    constraint; earlier duplicate rows keep only the latest one.
+    """
+    op.add_column(
+        "truelayer_import_progress",
+        sa.Column("checkpoint", postgresql.JSONB(), nullable=True),
+    )
+    op.execute(
+        """
+        DELETE FROM truelayer_import_progress p
+        USING truelayer_import_progress newer
+        WHERE p.job_id = newer.job_id
+          AND p.account_id = newer.account_id
+          AND p.id < newer.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_import_progress_job_account",
+        "truelayer_import_progress",
+        ["job_id", "account_id"],
+    )
+
+
+def downgrade() -> None:
+    """Remove the checkpoint column and the unique constraint."""
+    op.drop_constraint(
+        "uq_import_progress_job_account",
+        "truelayer_import_progress",
+        type_="unique",
+    )
+    op.drop_column("truelayer_import_progress", "checkpoint")
@@ -4,6 +4,8 @@ import contextlib
 import os
 
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import task_postrun
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -32,6 +34,22 @@ celery_app.conf.update(
     result_expires=3600,  # Keep results for 1 hour
 )
 
+# Periodic tasks (run with: celery -A celery_app beat)
+celery_app.conf.beat_schedule = {
+    "reconcile-pdf-storage-stats": {
+        "task": "tasks.gmail_tasks.reconcile_pdf_storage_stats_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "apply-retention-policies": {
+        "task": "tasks.gmail_tasks.apply_retention_policies_task",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "rebuild-gmail-merchant-summary": {
+        "task": "tasks.gmail_tasks.rebuild_gmail_merchant_summary_task",
+        "schedule": crontab(hour=4, minute=30),
+    },
+}
+
 # Tasks are registered via @celery_app.task decorators in their respective modules
 # Import tasks to ensure they're registered with Celery
 with contextlib.suppress(ImportError):
@@ -45,3 +63,12 @@ with contextlib.suppress(ImportError):
 
 with contextlib.suppress(ImportError):
     from tasks import truelayer_tasks  # noqa: F401
+
+
+@task_postrun.connect
+def flush_telemetry_buffers(**kwargs):
+    """Write telemetry buffered during a task (parse statistics, errors)."""
+    with contextlib.suppress(ImportError):
+        from mcp.telemetry_buffer import flush_all_sinks
+
+        flush_all_sinks()
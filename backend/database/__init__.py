@@ -12,6 +12,10 @@ Usage:
 Organization:
     - base.py: Connection pool and utilities
     - gmail.py: Gmail receipt operations
+    - email_bodies.py: Compressed, content-addressed email body storage
+    - gmail_merchant_summary.py: Incrementally maintained Gmail merchant aggregates
+    - receipt_duplicates.py: Near-duplicate receipt detection
+    - retention.py: Chunked retention cleanup of expired rows
     - truelayer.py: TrueLayer bank sync operations
     - amazon.py: Amazon order operations
     - apple.py: Apple transaction operations
@@ -119,6 +123,14 @@ from .direct_debit import (
     save_direct_debit_mapping,
 )
 
+# Email body store operations
+from .email_bodies import (
+    delete_orphaned_email_bodies,
+    get_email_bodies,
+    get_email_body_storage_stats,
+    migrate_inline_email_bodies,
+)
+
 # Enrichment operations
 from .enrichment import (
     # Multi-source enrichment
@@ -151,26 +163,34 @@ from .gmail import (
     # Sync jobs
     complete_gmail_sync_job,
     confirm_gmail_match,
+    count_gmail_receipts_for_reparse,
     create_gmail_sync_job,
     delete_gmail_connection,
     delete_gmail_match,
     delete_old_unmatched_gmail_receipts,
+    finalize_gmail_parent_sync_job,
     get_amazon_order_for_transaction,
     get_apple_transaction_for_match,
+    get_existing_gmail_message_ids,
     get_gmail_connection,
     get_gmail_connection_by_id,
     get_gmail_email_content,
     get_gmail_error_summary,
+    get_gmail_match_receipt_id,
     get_gmail_matches,
     get_gmail_matches_for_transaction,
     get_gmail_merchant_alias,
     get_gmail_merchant_statistics,
     # Merchant aggregation
     get_gmail_merchants_summary,
+    get_gmail_message_ids_for_connection,
     get_gmail_oauth_state,
+    get_gmail_parse_results,
     get_gmail_receipt_by_id,
     get_gmail_receipt_by_message_id,
+    get_gmail_receipt_templates,
     get_gmail_receipts,
+    get_gmail_reparse_domains,
     get_gmail_sender_pattern,
     get_gmail_sender_patterns_list,
     # Statistics
@@ -179,6 +199,8 @@ from .gmail import (
     get_latest_active_gmail_sync_job,
     get_latest_gmail_sync_job,
     get_llm_queue_summary,
+    get_receipts_for_llm_processing,
+    get_resumable_gmail_sync_checkpoint,
     get_source_coverage_dates,
     get_transactions_for_matching,
     get_unmatched_gmail_receipts,
@@ -189,7 +211,9 @@ from .gmail import (
     get_user_by_username,
     # User management
     insert_user,
+    iter_gmail_receipts_for_reparse,
     log_security_event,
+    mark_gmail_sync_job_retrying,
     # Connection management
     save_gmail_connection,
     # Email content
@@ -197,12 +221,17 @@ from .gmail import (
     save_gmail_email_content_bulk,
     # Error tracking
     save_gmail_error,
+    save_gmail_errors_bulk,
     # Matching
     save_gmail_match,
+    save_gmail_parse_results,
     save_gmail_parse_statistic,
+    save_gmail_parse_statistics_bulk,
     # Receipt operations
     save_gmail_receipt,
     save_gmail_receipt_bulk,
+    save_gmail_receipt_template,
+    set_receipts_llm_status,
     soft_delete_gmail_receipt,
     # OAuth state
     store_gmail_oauth_state,
@@ -213,6 +242,10 @@ from .gmail import (
     update_gmail_receipt_parsed,
     update_gmail_receipt_pdf_status,
     update_gmail_receipt_status,
+    update_gmail_receipts_from_pdf_bulk,
+    update_gmail_receipts_parsed_bulk,
+    update_gmail_receipts_pdf_status_bulk,
+    update_gmail_sync_job_checkpoint,
     update_gmail_sync_job_dates,
     update_gmail_sync_job_progress,
     update_gmail_sync_job_stats,
@@ -222,6 +255,9 @@ from .gmail import (
     update_user_password,
     update_user_username,
 )
+
+# Gmail merchant summary
+from .gmail_merchant_summary import rebuild_gmail_merchant_summary
 from .matching import (
     add_category_rule,
     add_merchant_normalization,
@@ -244,14 +280,25 @@ from .matching import (
 
 # PDF attachment operations
 from .pdf import (
+    count_pdf_attachments_for_object,
     delete_pdf_attachment,
     get_pdf_attachment_by_hash,
     get_pdf_attachment_by_id,
     get_pdf_attachments_for_receipt,
+    get_pdf_storage_counters,
     get_pdf_storage_stats,
+    replace_pdf_storage_stats,
     save_pdf_attachment,
+    save_pdf_attachments_bulk,
+    update_pdf_storage_stats,
 )
 
+# Receipt duplicate detection
+from .receipt_duplicates import backfill_receipt_duplicates
+
+# Retention cleanup
+from .retention import run_retention
+
 # Core transaction operations
 from .transactions import (
     add_account_mapping,
@@ -300,6 +347,7 @@ from .truelayer import (
     get_connection,
     get_connection_accounts,
     get_connection_cards,
+    get_import_checkpoint,
     get_import_job,
     get_import_progress,
     get_job_transaction_ids,
@@ -319,7 +367,9 @@ from .truelayer import (
     insert_balance_snapshot,
     insert_card_balance_snapshot,
     insert_truelayer_card_transaction,
+    insert_truelayer_card_transactions_bulk,
     insert_truelayer_transaction,
+    insert_truelayer_transactions_bulk,
     # Webhook operations
     insert_webhook_event,
     mark_job_completed,
@@ -338,6 +388,7 @@ from .truelayer import (
     update_connection_status,
     update_connection_tokens,
     update_enrichment_job,
+    update_import_checkpoint,
     update_import_job_status,
 )
 
@@ -365,6 +416,8 @@ __all__ = [
     "get_gmail_receipts",
     "get_gmail_receipt_by_id",
     "get_gmail_receipt_by_message_id",
+    "get_existing_gmail_message_ids",
+    "get_gmail_message_ids_for_connection",
     "get_unmatched_gmail_receipts",
     "soft_delete_gmail_receipt",
     "get_pending_gmail_receipts",
@@ -374,12 +427,34 @@ __all__ = [
     "get_gmail_email_content",
     "get_receipt_with_email_content",
     "get_receipts_by_domain_with_content",
+    # Email body store operations
+    "get_email_bodies",
+    "get_email_body_storage_stats",
+    "delete_orphaned_email_bodies",
+    "migrate_inline_email_bodies",
+    # Gmail merchant summary
+    "rebuild_gmail_merchant_summary",
+    # Receipt duplicate detection
+    "backfill_receipt_duplicates",
+    # Retention cleanup
+    "run_retention",
     "update_gmail_receipt_parsed",
+    "get_gmail_reparse_domains",
+    "count_gmail_receipts_for_reparse",
+    "iter_gmail_receipts_for_reparse",
+    "update_gmail_receipts_parsed_bulk",
+    "get_gmail_parse_results",
+    "save_gmail_parse_results",
+    "get_gmail_receipt_templates",
+    "save_gmail_receipt_template",
     "update_gmail_receipt_status",
     "update_gmail_receipt_pdf_status",
     "update_gmail_receipt_from_pdf",
+    "update_gmail_receipts_pdf_status_bulk",
+    "update_gmail_receipts_from_pdf_bulk",
     "save_gmail_match",
     "get_gmail_matches_for_transaction",
+    "get_gmail_match_receipt_id",
     "get_amazon_order_for_transaction",
     "get_apple_transaction_for_match",
     "get_gmail_matches",
@@ -389,6 +464,10 @@ __all__ = [
     "update_gmail_sync_job_progress",
     "update_gmail_sync_job_dates",
     "complete_gmail_sync_job",
+    "mark_gmail_sync_job_retrying",
+    "update_gmail_sync_job_checkpoint",
+    "get_resumable_gmail_sync_checkpoint",
+    "finalize_gmail_parent_sync_job",
     "cleanup_stale_gmail_jobs",
     "get_gmail_sync_job",
     "get_latest_gmail_sync_job",
@@ -405,14 +484,23 @@ __all__ = [
     "get_llm_queue_summary",
     "update_receipt_llm_status",
     "get_receipt_for_llm_processing",
+    "get_receipts_for_llm_processing",
+    "set_receipts_llm_status",
     "save_pdf_attachment",
+    "save_pdf_attachments_bulk",
     "get_pdf_attachment_by_hash",
     "get_pdf_attachments_for_receipt",
     "get_pdf_attachment_by_id",
     "get_pdf_storage_stats",
+    "get_pdf_storage_counters",
+    "update_pdf_storage_stats",
+    "replace_pdf_storage_stats",
     "delete_pdf_attachment",
+    "count_pdf_attachments_for_object",
     "save_gmail_error",
+    "save_gmail_errors_bulk",
     "save_gmail_parse_statistic",
+    "save_gmail_parse_statistics_bulk",
     "update_gmail_sync_job_stats",
     "get_gmail_error_summary",
     "get_gmail_merchant_statistics",
@@ -446,6 +534,7 @@ __all__ = [
     "get_truelayer_transaction_by_id",
     "get_truelayer_transaction_by_pk",
     "insert_truelayer_transaction",
+    "insert_truelayer_transactions_bulk",
     "get_all_truelayer_transactions",
     "get_all_truelayer_transactions_with_enrichment",
     "insert_webhook_event",
@@ -459,6 +548,7 @@ __all__ = [
     "update_card_last_synced",
     "get_card_transaction_by_id",
     "insert_truelayer_card_transaction",
+    "insert_truelayer_card_transactions_bulk",
     "get_all_truelayer_card_transactions",
     "insert_card_balance_snapshot",
     "get_latest_card_balance_snapshots",
@@ -469,6 +559,8 @@ __all__ = [
     "get_import_job",
     "update_import_job_status",
     "add_import_progress",
+    "update_import_checkpoint",
+    "get_import_checkpoint",
     "get_import_progress",
     "mark_job_completed",
     "get_user_import_history",
@@ -519,11 +611,16 @@ __all__ = [
     "detect_new_direct_debits",
     # PDF attachment operations
     "save_pdf_attachment",
+    "save_pdf_attachments_bulk",
     "get_pdf_attachment_by_hash",
     "get_pdf_attachments_for_receipt",
     "get_pdf_attachment_by_id",
     "get_pdf_storage_stats",
+    "get_pdf_storage_counters",
+    "update_pdf_storage_stats",
+    "replace_pdf_storage_stats",
     "delete_pdf_attachment",
+    "count_pdf_attachments_for_object",
     # Amazon operations
     "import_amazon_orders",
     "get_amazon_orders",
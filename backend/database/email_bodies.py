@@ -0,0 +1,407 @@
+"""
+Email Bodies - Compressed Content-Addressed Storage
+
+Email bodies are stored once per distinct content in gmail_email_bodies,
+keyed by the SHA256 of the body text and zstd-compressed (zlib when the
+zstandard package is not installed; the codec is recorded per row).
+gmail_email_content rows reference their HTML and text bodies by hash, so
+a marketing template sent a thousand times is stored once, and listing
+queries never drag body text along. Bodies are loaded only by the parsing
+and debugging paths that need them.
+
+Storing a body that already exists refreshes its last_seen_at. The
+retention purge only deletes unreferenced bodies not seen within its
+retention period and rechecks that under the row lock, so a body reused by
+a writer whose content row hasn't committed yet is never purged.
+
+Rows written before the store keep their bodies inline (and older receipts
+in raw_schema_data) until migrate_inline_email_bodies() moves them:
+
+    python -m database.email_bodies
+"""
+
+import hashlib
+import json
+import zlib
+
+from sqlalchemy import Text, cast, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from .base import get_session
+from .models.gmail import GmailEmailBody, GmailEmailContent, GmailReceipt
+from .retention import RETENTION_POLICIES, purge_policy
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+# Bodies are written once and read rarely, so favour ratio over speed
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 6
+
+# Keys older receipts carried their bodies under in raw_schema_data
+LEGACY_BODY_KEYS = ("body_html", "body_text")
+
+
+# ============================================================================
+# CODEC
+# ============================================================================
+
+
+def hash_email_body(body: str) -> str | None:
+    """SHA256 hex digest of a body (None for a missing or empty body)."""
+    if not body:
+        return None
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def compress_email_body(body: str) -> tuple[str, bytes]:
+    """
+    Compress a body for storage.
+
+    Returns:
+        Tuple of (codec name, compressed bytes)
+    """
+    data = body.encode("utf-8")
+    if ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_email_body(codec: str, data: bytes) -> str:
+    """Decompress a stored body written by compress_email_body()."""
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard package required to read zstd bodies")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == "zlib":
+        data = zlib.decompress(data)
+    else:
+        raise ValueError(f"Unknown email body codec: {codec}")
+    return bytes(data).decode("utf-8")
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+
+def store_email_bodies(session, bodies: list) -> list:
+    """
+    Add bodies to the store within the caller's transaction.
+
+    Bodies already stored (by hash) are not recompressed; their last_seen_at
+    is refreshed instead. That row version (and its lock, held until the
+    caller commits) keeps the retention purge from deleting a body the
+    caller's content rows are about to reference.
+
+    Args:
+        session: Open SQLAlchemy session (caller commits)
+        bodies: List of body strings (None/empty entries allowed)
+
+    Returns:
+        List of content hashes in the same order (None for empty bodies)
+    """
+    hashes = [hash_email_body(body) for body in bodies]
+    distinct = {h: body for h, body in zip(hashes, bodies, strict=True) if h}
+    if not distinct:
+        return hashes
+
+    # A body the purge deleted before this runs is simply stored again
+    existing = set(
+        session.execute(
+            update(GmailEmailBody)
+            .where(GmailEmailBody.content_hash.in_(list(distinct)))
+            .values(last_seen_at=func.now())
+            .returning(GmailEmailBody.content_hash)
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+
+    rows = []
+    for content_hash, body in distinct.items():
+        if content_hash in existing:
+            continue
+        codec, data = compress_email_body(body)
+        rows.append(
+            {
+                "content_hash": content_hash,
+                "codec": codec,
+                "body": data,
+                "raw_size": len(body.encode("utf-8")),
+                "stored_size": len(data),
+            }
+        )
+
+    if rows:
+        # Another writer may have stored the same body meanwhile
+        session.execute(
+            insert(GmailEmailBody)
+            .values(rows)
+            .on_conflict_do_update(
+                index_elements=["content_hash"],
+                set_={"last_seen_at": func.now()},
+            )
+        )
+    return hashes
+
+
+def load_email_bodies(session, hashes) -> dict:
+    """
+    Load and decompress bodies within an open session.
+
+    Args:
+        session: Open SQLAlchemy session
+        hashes: Iterable of content hashes (None entries are ignored)
+
+    Returns:
+        Dict of content_hash -> body text for the hashes found
+    """
+    wanted = list({h for h in hashes if h})
+    if not wanted:
+        return {}
+    rows = session.query(
+        GmailEmailBody.content_hash, GmailEmailBody.codec, GmailEmailBody.body
+    ).filter(GmailEmailBody.content_hash.in_(wanted))
+    return {r[0]: decompress_email_body(r[1], r[2]) for r in rows}
+
+
+def resolve_email_body(bodies: dict, body_hash: str, inline_body: str) -> str:
+    """
+    Body of an email content row.
+
+    Args:
+        bodies: Bodies loaded by load_email_bodies()
+        body_hash: The row's body hash column
+        inline_body: The row's legacy inline body column
+
+    Returns:
+        Body from the store if the row references one, else the inline body
+    """
+    if body_hash:
+        return bodies.get(body_hash)
+    return inline_body
+
+
+def get_email_bodies(hashes: list) -> dict:
+    """
+    Load bodies from the store by content hash.
+
+    Returns:
+        Dict of content_hash -> body text for the hashes found
+    """
+    with get_session() as session:
+        return load_email_bodies(session, hashes)
+
+
+def get_email_body_storage_stats() -> dict:
+    """Stored body count and raw vs compressed size in bytes."""
+    with get_session() as session:
+        count, raw_size, stored_size = session.query(
+            func.count(GmailEmailBody.content_hash),
+            func.coalesce(func.sum(GmailEmailBody.raw_size), 0),
+            func.coalesce(func.sum(GmailEmailBody.stored_size), 0),
+        ).one()
+        return {
+            "bodies": count,
+            "raw_bytes": int(raw_size),
+            "stored_bytes": int(stored_size),
+        }
+
+
+def delete_orphaned_email_bodies() -> int:
+    """
+    Delete stored bodies no email content row references any more.
+
+    Deletes in chunks through the gmail_email_bodies retention policy, so
+    bodies stored within its retention period are kept (and removed by a
+    later run once they are still unreferenced).
+
+    Returns:
+        Number of bodies deleted
+    """
+    return purge_policy(RETENTION_POLICIES["gmail_email_bodies"])
+
+
+# ============================================================================
+# MIGRATION OF INLINE BODIES
+# ============================================================================
+
+
+def _legacy_receipt_bodies(raw_data) -> tuple:
+    """Split a receipt's raw_schema_data into (bodies dict, remaining data)."""
+    if isinstance(raw_data, str):
+        try:
+            raw_data = json.loads(raw_data)
+        except json.JSONDecodeError:
+            return {}, raw_data
+    if not isinstance(raw_data, dict):
+        return {}, raw_data
+    bodies = {key: raw_data.get(key) for key in LEGACY_BODY_KEYS}
+    remaining = {k: v for k, v in raw_data.items() if k not in LEGACY_BODY_KEYS}
+    return bodies, remaining
+
+
+def _migrate_content_batch(session, after_id: int, batch_size: int) -> tuple:
+    """Move one batch of inline gmail_email_content bodies into the store."""
+    rows = (
+        session.query(
+            GmailEmailContent.id,
+            GmailEmailContent.body_html,
+            GmailEmailContent.body_text,
+        )
+        .filter(
+            GmailEmailContent.id > after_id,
+            or_(
+                GmailEmailContent.body_html.isnot(None),
+                GmailEmailContent.body_text.isnot(None),
+            ),
+        )
+        .order_by(GmailEmailContent.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not rows:
+        return 0, None
+
+    html_hashes = store_email_bodies(session, [r.body_html for r in rows])
+    text_hashes = store_email_bodies(session, [r.body_text for r in rows])
+    session.execute(
+        update(GmailEmailContent),
+        [
+            {
+                "id": r.id,
+                "body_html_hash": html_hash,
+                "body_text_hash": text_hash,
+                "body_html": None,
+                "body_text": None,
+            }
+            for r, html_hash, text_hash in zip(
+                rows, html_hashes, text_hashes, strict=True
+            )
+        ],
+    )
+    return len(rows), rows[-1].id
+
+
+def _migrate_receipt_batch(session, after_id: int, batch_size: int) -> tuple:
+    """Move one batch of bodies held on gmail_receipts into the store."""
+    raw_text = cast(GmailReceipt.raw_schema_data, Text)
+    rows = (
+        session.query(
+            GmailReceipt.id,
+            GmailReceipt.message_id,
+            GmailReceipt.subject,
+            GmailReceipt.received_at,
+            GmailReceipt.body_html,
+            GmailReceipt.body_text,
+            GmailReceipt.raw_schema_data,
+        )
+        .filter(
+            GmailReceipt.id > after_id,
+            or_(
+                GmailReceipt.body_html.isnot(None),
+                GmailReceipt.body_text.isnot(None),
+                *[raw_text.like(f"%{key}%") for key in LEGACY_BODY_KEYS],
+            ),
+        )
+        .order_by(GmailReceipt.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not rows:
+        return 0, None
+
+    content_rows = []
+    receipt_updates = []
+    for r in rows:
+        legacy, remaining = _legacy_receipt_bodies(r.raw_schema_data)
+        html_hash, text_hash = store_email_bodies(
+            session,
+            [
+                r.body_html or legacy.get("body_html"),
+                r.body_text or legacy.get("body_text"),
+            ],
+        )
+        if html_hash or text_hash:
+            content_rows.append(
+                {
+                    "message_id": r.message_id,
+                    "subject": r.subject,
+                    "received_at": r.received_at,
+                    "list_unsubscribe": remaining.get("list_unsubscribe")
+                    if isinstance(remaining, dict)
+                    else None,
+                    "body_html_hash": html_hash,
+                    "body_text_hash": text_hash,
+                }
+            )
+        receipt_updates.append(
+            {
+                "id": r.id,
+                "body_html": None,
+                "body_text": None,
+                "raw_schema_data": remaining,
+            }
+        )
+
+    if content_rows:
+        # Keep the bodies of content rows the sync already stored
+        content = GmailEmailContent.__table__
+        stmt = insert(GmailEmailContent).values(content_rows)
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["message_id"],
+                set_={
+                    "body_html_hash": func.coalesce(
+                        content.c.body_html_hash, stmt.excluded.body_html_hash
+                    ),
+                    "body_text_hash": func.coalesce(
+                        content.c.body_text_hash, stmt.excluded.body_text_hash
+                    ),
+                },
+            )
+        )
+    session.execute(update(GmailReceipt), receipt_updates)
+    return len(rows), rows[-1].id
+
+
+def migrate_inline_email_bodies(batch_size: int = 500) -> dict:
+    """
+    Move inline email bodies into the compressed body store.
+
+    Covers gmail_email_content rows written before the store, then receipts
+    that still carry bodies in their own columns or in raw_schema_data (a
+    content row is created for them if the sync never stored one). Each
+    batch commits on its own, so the migration can be interrupted and rerun.
+    Run VACUUM on both tables afterwards to return the space.
+
+    Args:
+        batch_size: Rows moved per transaction
+
+    Returns:
+        dict with 'content_rows' and 'receipt_rows' migrated
+    """
+    stats = {"content_rows": 0, "receipt_rows": 0}
+    for key, migrate_batch in (
+        ("content_rows", _migrate_content_batch),
+        ("receipt_rows", _migrate_receipt_batch),
+    ):
+        after_id = 0
+        while True:
+            with get_session() as session:
+                count, after_id = migrate_batch(session, after_id, batch_size)
+                session.commit()
+            if not count:
+                break
+            stats[key] += count
+    return stats
+
+
+if __name__ == "__main__":
+    print(json.dumps(migrate_inline_email_bodies(), indent=2))
+    print(json.dumps(get_email_body_storage_stats(), indent=2))
@@ -21,12 +21,29 @@ import json
 import re
 from datetime import datetime
 
-from sqlalchemy import case, func, or_, text
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import (
+    Date,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    case,
+    cast,
+    column,
+    func,
+    or_,
+    text,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.exc import IntegrityError
 
 from .base import get_session
+from .email_bodies import load_email_bodies, resolve_email_body, store_email_bodies
 from .enrichment import save_rule_enrichment
+from .gmail_merchant_summary import receipt_merchant_keys, refresh_receipt_merchants
 from .models.category import (
     MatchingJob,
     NormalizedCategory,
@@ -41,15 +58,26 @@ from .models.gmail import (
     GmailConnection,
     GmailEmailContent,
     GmailMatch,
+    GmailMerchantSummary,
     GmailOAuthState,
+    GmailParseResult,
     GmailParseStatistic,
+    GmailProcessingError,
     GmailReceipt,
+    GmailReceiptTemplate,
     GmailSenderPattern,
     GmailSyncJob,
     PdfAttachment,
 )
 from .models.truelayer import TrueLayerTransaction
 from .models.user import User
+from .receipt_duplicates import (
+    duplicate_ids_of,
+    duplicate_keys,
+    flag_receipt_duplicates,
+    promote_duplicates,
+)
+from .retention import RETENTION_POLICIES, purge_policy
 
 # ============================================================================
 # GMAIL INTEGRATION FUNCTIONS
@@ -312,6 +340,25 @@ def cleanup_expired_gmail_oauth_states() -> int:
 
 
 # Gmail Receipts functions
+def _receipt_upsert_columns(stmt) -> dict:
+    """Columns a re-synced receipt takes from the new parse."""
+    return {
+        "merchant_name": stmt.excluded.merchant_name,
+        "merchant_name_normalized": stmt.excluded.merchant_name_normalized,
+        "total_amount": stmt.excluded.total_amount,
+        "parse_method": stmt.excluded.parse_method,
+        "parse_confidence": stmt.excluded.parse_confidence,
+        "parsing_status": stmt.excluded.parsing_status,
+        "pdf_processing_status": stmt.excluded.pdf_processing_status,
+        "content_hash": stmt.excluded.content_hash,
+        "parser_version": stmt.excluded.parser_version,
+        "amount_pence": stmt.excluded.amount_pence,
+        "received_bucket": stmt.excluded.received_bucket,
+        "line_items_minhash": stmt.excluded.line_items_minhash,
+        "updated_at": func.now(),
+    }
+
+
 def save_gmail_receipt(connection_id: int, message_id: str, receipt_data: dict) -> int:
     """Save a parsed Gmail receipt."""
     with get_session() as session:
@@ -338,23 +385,20 @@ def save_gmail_receipt(connection_id: int, message_id: str, receipt_data: dict)
             llm_cost_cents=receipt_data.get("llm_cost_cents"),
             parsing_status=receipt_data.get("parsing_status", "parsed"),
             pdf_processing_status=receipt_data.get("pdf_processing_status", "none"),
+            content_hash=receipt_data.get("content_hash"),
+            parser_version=receipt_data.get("parser_version"),
+            **duplicate_keys(receipt_data),
         )
         stmt = stmt.on_conflict_do_update(
             index_elements=["message_id"],
-            set_={
-                "merchant_name": stmt.excluded.merchant_name,
-                "merchant_name_normalized": stmt.excluded.merchant_name_normalized,
-                "total_amount": stmt.excluded.total_amount,
-                "parse_method": stmt.excluded.parse_method,
-                "parse_confidence": stmt.excluded.parse_confidence,
-                "parsing_status": stmt.excluded.parsing_status,
-                "pdf_processing_status": stmt.excluded.pdf_processing_status,
-                "updated_at": func.now(),
-            },
+            set_=_receipt_upsert_columns(stmt),
         ).returning(GmailReceipt.id)
 
+        previous_keys = receipt_merchant_keys(session, message_ids=[message_id])
         result = session.execute(stmt)
         receipt_id = result.scalar_one()
+        flag_receipt_duplicates(session, [receipt_id])
+        refresh_receipt_merchants(session, [receipt_id], previous_keys)
         session.commit()
         return receipt_id
 
@@ -367,10 +411,16 @@ def save_gmail_receipt_bulk(receipts: list) -> dict:
         receipts: List of tuples (connection_id, message_id, receipt_data)
 
     Returns:
-        dict with 'inserted' count, 'receipt_ids' list, 'message_to_id' mapping
+        dict with 'inserted' count, 'receipt_ids' list, 'message_to_id' mapping,
+        'duplicates_flagged' count
     """
     if not receipts:
-        return {"inserted": 0, "receipt_ids": [], "message_to_id": {}}
+        return {
+            "inserted": 0,
+            "receipt_ids": [],
+            "message_to_id": {},
+            "duplicates_flagged": 0,
+        }
 
     # Prepare data list
     data = []
@@ -403,6 +453,9 @@ def save_gmail_receipt_bulk(receipts: list) -> dict:
                 "pdf_processing_status": receipt_data.get(
                     "pdf_processing_status", "none"
                 ),
+                "content_hash": receipt_data.get("content_hash"),
+                "parser_version": receipt_data.get("parser_version"),
+                **duplicate_keys(receipt_data),
             }
         )
 
@@ -410,29 +463,29 @@ def save_gmail_receipt_bulk(receipts: list) -> dict:
         stmt = insert(GmailReceipt).values(data)
         stmt = stmt.on_conflict_do_update(
             index_elements=["message_id"],
-            set_={
-                "merchant_name": stmt.excluded.merchant_name,
-                "merchant_name_normalized": stmt.excluded.merchant_name_normalized,
-                "total_amount": stmt.excluded.total_amount,
-                "parse_method": stmt.excluded.parse_method,
-                "parse_confidence": stmt.excluded.parse_confidence,
-                "parsing_status": stmt.excluded.parsing_status,
-                "pdf_processing_status": stmt.excluded.pdf_processing_status,
-                "updated_at": func.now(),
-            },
+            set_=_receipt_upsert_columns(stmt),
         ).returning(GmailReceipt.id, GmailReceipt.message_id)
 
+        # Re-synced receipts may move to another merchant
+        previous_keys = receipt_merchant_keys(
+            session, message_ids=[row["message_id"] for row in data]
+        )
         results = session.execute(stmt).fetchall()
-        session.commit()
 
         # Build message_id -> receipt_id mapping
         receipt_ids = [row[0] for row in results]
         message_to_id = {row[1]: row[0] for row in results}
 
+        # Flag repeats of a purchase before matching can see them
+        duplicates = flag_receipt_duplicates(session, receipt_ids)
+        refresh_receipt_merchants(session, receipt_ids, previous_keys)
+        session.commit()
+
         return {
             "inserted": len(results),
             "receipt_ids": receipt_ids,
             "message_to_id": message_to_id,
+            "duplicates_flagged": duplicates,
         }
 
 
@@ -447,6 +500,10 @@ def save_gmail_email_content(message: dict) -> int:
         ID of stored content record
     """
     with get_session() as session:
+        # Bodies go to the compressed store; the row only keeps their hashes
+        body_html_hash, body_text_hash = store_email_bodies(
+            session, [message.get("body_html"), message.get("body_text")]
+        )
         stmt = insert(GmailEmailContent).values(
             message_id=message.get("message_id"),
             thread_id=message.get("thread_id"),
@@ -456,8 +513,8 @@ def save_gmail_email_content(message: dict) -> int:
             date_header=message.get("date"),
             list_unsubscribe=message.get("list_unsubscribe"),
             x_mailer=message.get("x_mailer"),
-            body_html=message.get("body_html"),
-            body_text=message.get("body_text"),
+            body_html_hash=body_html_hash,
+            body_text_hash=body_text_hash,
             snippet=message.get("snippet"),
             attachments=json.dumps(message.get("attachments", [])),
             size_estimate=message.get("size_estimate"),
@@ -466,8 +523,10 @@ def save_gmail_email_content(message: dict) -> int:
         stmt = stmt.on_conflict_do_update(
             index_elements=["message_id"],
             set_={
-                "body_html": stmt.excluded.body_html,
-                "body_text": stmt.excluded.body_text,
+                "body_html": None,
+                "body_text": None,
+                "body_html_hash": stmt.excluded.body_html_hash,
+                "body_text_hash": stmt.excluded.body_text_hash,
                 "attachments": stmt.excluded.attachments,
                 "fetched_at": func.now(),
             },
@@ -492,35 +551,47 @@ def save_gmail_email_content_bulk(messages: list) -> dict:
     if not messages:
         return {"inserted": 0, "failed": []}
 
-    # Prepare data list
-    data = []
-    for msg in messages:
-        data.append(
-            {
-                "message_id": msg.get("message_id"),
-                "thread_id": msg.get("thread_id"),
-                "subject": msg.get("subject"),
-                "from_header": msg.get("from"),
-                "to_header": msg.get("to"),
-                "date_header": msg.get("date"),
-                "list_unsubscribe": msg.get("list_unsubscribe"),
-                "x_mailer": msg.get("x_mailer"),
-                "body_html": msg.get("body_html"),
-                "body_text": msg.get("body_text"),
-                "snippet": msg.get("snippet"),
-                "attachments": json.dumps(msg.get("attachments", [])),
-                "size_estimate": msg.get("size_estimate"),
-                "received_at": msg.get("received_at"),
-            }
+    with get_session() as session:
+        # Bodies go to the compressed store (deduplicated across the batch)
+        html_hashes = store_email_bodies(
+            session, [msg.get("body_html") for msg in messages]
+        )
+        text_hashes = store_email_bodies(
+            session, [msg.get("body_text") for msg in messages]
         )
 
-    with get_session() as session:
+        # Prepare data list
+        data = []
+        for msg, body_html_hash, body_text_hash in zip(
+            messages, html_hashes, text_hashes, strict=True
+        ):
+            data.append(
+                {
+                    "message_id": msg.get("message_id"),
+                    "thread_id": msg.get("thread_id"),
+                    "subject": msg.get("subject"),
+                    "from_header": msg.get("from"),
+                    "to_header": msg.get("to"),
+                    "date_header": msg.get("date"),
+                    "list_unsubscribe": msg.get("list_unsubscribe"),
+                    "x_mailer": msg.get("x_mailer"),
+                    "body_html_hash": body_html_hash,
+                    "body_text_hash": body_text_hash,
+                    "snippet": msg.get("snippet"),
+                    "attachments": json.dumps(msg.get("attachments", [])),
+                    "size_estimate": msg.get("size_estimate"),
+                    "received_at": msg.get("received_at"),
+                }
+            )
+
         stmt = insert(GmailEmailContent).values(data)
         stmt = stmt.on_conflict_do_update(
             index_elements=["message_id"],
             set_={
-                "body_html": stmt.excluded.body_html,
-                "body_text": stmt.excluded.body_text,
+                "body_html": None,
+                "body_text": None,
+                "body_html_hash": stmt.excluded.body_html_hash,
+                "body_text_hash": stmt.excluded.body_text_hash,
                 "attachments": stmt.excluded.attachments,
                 "fetched_at": func.now(),
             },
@@ -543,6 +614,9 @@ def get_gmail_email_content(message_id: str) -> dict:
         if not content:
             return None
 
+        bodies = load_email_bodies(
+            session, [content.body_html_hash, content.body_text_hash]
+        )
         return {
             "id": content.id,
             "message_id": content.message_id,
@@ -553,14 +627,17 @@ def get_gmail_email_content(message_id: str) -> dict:
             "date_header": content.date_header,
             "list_unsubscribe": content.list_unsubscribe,
             "x_mailer": content.x_mailer,
-            "body_html": content.body_html,
-            "body_text": content.body_text,
+            "body_html": resolve_email_body(
+                bodies, content.body_html_hash, content.body_html
+            ),
+            "body_text": resolve_email_body(
+                bodies, content.body_text_hash, content.body_text
+            ),
             "snippet": content.snippet,
             "attachments": content.attachments,
             "size_estimate": content.size_estimate,
             "received_at": content.received_at,
             "fetched_at": content.fetched_at,
-            "created_at": content.created_at,
         }
 
 
@@ -579,6 +656,8 @@ def get_receipt_with_email_content(receipt_id: int) -> dict:
                 GmailEmailContent.to_header,
                 GmailEmailContent.date_header,
                 GmailEmailContent.attachments.label("email_attachments"),
+                GmailEmailContent.body_html_hash,
+                GmailEmailContent.body_text_hash,
             )
             .outerjoin(
                 GmailEmailContent,
@@ -595,13 +674,14 @@ def get_receipt_with_email_content(receipt_id: int) -> dict:
             return None
 
         receipt = result[0]
+        bodies = load_email_bodies(session, [result[7], result[8]])
         return {
             **{
                 col.name: getattr(receipt, col.name)
                 for col in receipt.__table__.columns
             },
-            "body_html": result[1],
-            "body_text": result[2],
+            "body_html": resolve_email_body(bodies, result[7], result[1]),
+            "body_text": resolve_email_body(bodies, result[8], result[2]),
             "from_header": result[3],
             "to_header": result[4],
             "date_header": result[5],
@@ -628,6 +708,8 @@ def get_receipts_by_domain_with_content(domain: str, limit: int = 10) -> list:
                 GmailReceipt.parsing_status,
                 GmailEmailContent.body_html,
                 GmailEmailContent.body_text,
+                GmailEmailContent.body_html_hash,
+                GmailEmailContent.body_text_hash,
             )
             .outerjoin(
                 GmailEmailContent,
@@ -642,6 +724,7 @@ def get_receipts_by_domain_with_content(domain: str, limit: int = 10) -> list:
             .all()
         )
 
+        bodies = load_email_bodies(session, [h for r in results for h in r[11:13]])
         return [
             {
                 "id": r[0],
@@ -653,8 +736,8 @@ def get_receipts_by_domain_with_content(domain: str, limit: int = 10) -> list:
                 "line_items": r[6],
                 "parse_method": r[7],
                 "parsing_status": r[8],
-                "body_html": r[9],
-                "body_text": r[10],
+                "body_html": resolve_email_body(bodies, r[11], r[9]),
+                "body_text": resolve_email_body(bodies, r[12], r[10]),
             }
             for r in results
         ]
@@ -786,8 +869,62 @@ def get_gmail_receipt_by_message_id(message_id: str) -> dict:
         }
 
 
+def get_existing_gmail_message_ids(message_ids: list) -> set:
+    """
+    Return which of the given Gmail message IDs are already stored as receipts.
+
+    Set-based replacement for calling get_gmail_receipt_by_message_id() once
+    per message. Uses the same semantics (soft-deleted receipts don't count).
+
+    Args:
+        message_ids: List of Gmail message IDs
+
+    Returns:
+        Set of message IDs that already have a receipt
+    """
+    if not message_ids:
+        return set()
+
+    with get_session() as session:
+        rows = (
+            session.query(GmailReceipt.message_id)
+            .filter(
+                GmailReceipt.message_id.in_(list(message_ids)),
+                GmailReceipt.deleted_at.is_(None),
+            )
+            .all()
+        )
+        return {row[0] for row in rows}
+
+
+def get_gmail_message_ids_for_connection(connection_id: int):
+    """
+    Stream all stored receipt message IDs for a connection.
+
+    Used to seed the in-memory known-message filter. Rows are streamed with
+    yield_per so large mailboxes don't materialise one big result list.
+
+    Args:
+        connection_id: Gmail connection ID
+
+    Yields:
+        Gmail message ID strings
+    """
+    with get_session() as session:
+        query = (
+            session.query(GmailReceipt.message_id)
+            .filter(
+                GmailReceipt.connection_id == connection_id,
+                GmailReceipt.deleted_at.is_(None),
+            )
+            .yield_per(5000)
+        )
+        for row in query:
+            yield row[0]
+
+
 def get_unmatched_gmail_receipts(user_id: int, limit: int = 100) -> list:
-    """Get receipts not yet matched to transactions."""
+    """Get receipts not yet matched to transactions (duplicates excluded)."""
     with get_session() as session:
         receipts = (
             session.query(GmailReceipt)
@@ -797,6 +934,7 @@ def get_unmatched_gmail_receipts(user_id: int, limit: int = 100) -> list:
                 GmailConnection.user_id == user_id,
                 GmailReceipt.parsing_status == "parsed",
                 GmailReceipt.deleted_at.is_(None),
+                GmailReceipt.duplicate_of_id.is_(None),
                 GmailMatch.id.is_(None),
             )
             .order_by(GmailReceipt.receipt_date.desc())
@@ -811,15 +949,24 @@ def get_unmatched_gmail_receipts(user_id: int, limit: int = 100) -> list:
 
 
 def soft_delete_gmail_receipt(receipt_id: int) -> bool:
-    """Soft delete a Gmail receipt (GDPR compliance)."""
+    """
+    Soft delete a Gmail receipt (GDPR compliance).
+
+    Receipts flagged as duplicates of it are re-flagged, so the earliest
+    of them takes its place as the original.
+    """
     with get_session() as session:
         receipt = session.get(GmailReceipt, receipt_id)
 
         if not receipt:
             return False
 
+        duplicate_ids = duplicate_ids_of(session, [receipt_id])
         receipt.deleted_at = datetime.now()
         receipt.updated_at = datetime.now()
+        session.flush()
+        promote_duplicates(session, duplicate_ids)
+        refresh_receipt_merchants(session, [receipt_id, *duplicate_ids])
 
         session.commit()
         return True
@@ -860,6 +1007,7 @@ def save_gmail_match(
 
         result = session.execute(stmt)
         match_id = result.scalar_one()
+        refresh_receipt_merchants(session, [gmail_receipt_id])
         session.commit()
 
         # Get Gmail receipt details for enrichment source
@@ -1161,14 +1309,18 @@ def delete_gmail_match(match_id: int) -> bool:
         if receipt:
             receipt.parsing_status = "parsed"
             receipt.updated_at = datetime.now()
+            session.flush()
+            refresh_receipt_merchants(session, [gmail_receipt_id])
             session.commit()
 
         return True
 
 
 # Gmail Sync Job functions
-def create_gmail_sync_job(connection_id: int, job_type: str = "full") -> int:
-    """Create a new sync job."""
+def create_gmail_sync_job(
+    connection_id: int, job_type: str = "full", parent_job_id: int = None
+) -> int:
+    """Create a new sync job (parent_job_id is set for month-sized chunk jobs)."""
     with get_session() as session:
         stmt = (
             insert(GmailSyncJob)
@@ -1176,6 +1328,7 @@ def create_gmail_sync_job(connection_id: int, job_type: str = "full") -> int:
                 connection_id=connection_id,
                 job_type=job_type,
                 status="queued",
+                parent_job_id=parent_job_id,
             )
             .returning(GmailSyncJob.id)
         )
@@ -1241,6 +1394,201 @@ def complete_gmail_sync_job(
         return True
 
 
+def mark_gmail_sync_job_retrying(job_id: int, error: str = None) -> bool:
+    """
+    Mark a failed sync job as waiting for its Celery retry.
+
+    The job keeps its checkpoint, so the retry resumes where it failed.
+
+    Args:
+        job_id: Sync job ID
+        error: Error that caused the retry
+
+    Returns:
+        True if the job exists
+    """
+    with get_session() as session:
+        job = session.get(GmailSyncJob, job_id)
+
+        if not job:
+            return False
+
+        job.status = "retrying"
+        job.error_message = error
+        job.completed_at = None
+
+        session.commit()
+        return True
+
+
+def update_gmail_sync_job_checkpoint(job_id: int, checkpoint: dict) -> bool:
+    """
+    Persist the resume checkpoint for a sync job.
+
+    Called when the sync starts and after each fully committed batch so a
+    replacement task can carry on from the same listing page, with the same
+    starting history ID, instead of starting over.
+
+    Args:
+        job_id: Sync job ID
+        checkpoint: Dict with page_token, page_offset, cursor_date, history_id
+            and counters
+
+    Returns:
+        True if the job exists
+    """
+    with get_session() as session:
+        job = session.get(GmailSyncJob, job_id)
+
+        if not job:
+            return False
+
+        job.checkpoint = checkpoint
+        session.commit()
+        return True
+
+
+def get_resumable_gmail_sync_checkpoint(
+    connection_id: int, from_date: str, to_date: str, job_id: int = None
+) -> dict:
+    """
+    Find a checkpoint to resume a full sync from.
+
+    A checkpoint qualifies if it was written for the same date range and
+    either belongs to job_id itself (a Celery retry of the same job) or to a
+    failed job that hasn't been superseded by a later completed sync of the
+    same range.
+
+    The default range ends today and starts a fixed number of months back,
+    so its start moves every day. Pass from_date=None for it: checkpoints
+    flagged 'default_range' then match on to_date alone, and the caller
+    resumes with the from_date stored in the checkpoint.
+
+    Args:
+        connection_id: Gmail connection ID
+        from_date: Sync start date (YYYY-MM-DD), or None for the default range
+        to_date: Sync end date (YYYY-MM-DD) or None
+        job_id: Current job ID, if any
+
+    Returns:
+        Checkpoint dict (with 'resumed_from_job_id') or None
+    """
+    with get_session() as session:
+        jobs = (
+            session.query(GmailSyncJob)
+            .filter(
+                GmailSyncJob.connection_id == connection_id,
+                GmailSyncJob.job_type.in_(["full", "chunk"]),
+            )
+            .order_by(GmailSyncJob.created_at.desc())
+            .limit(20)
+            .all()
+        )
+
+        for job in jobs:
+            checkpoint = job.checkpoint or {}
+            if checkpoint.get("to_date") != to_date:
+                continue
+            if from_date is None:
+                if not checkpoint.get("default_range"):
+                    continue
+            elif checkpoint.get("default_range") or (
+                checkpoint.get("from_date") != from_date
+            ):
+                continue
+
+            if job.id == job_id or job.status == "failed":
+                return {**checkpoint, "resumed_from_job_id": job.id}
+
+            if job.status == "completed":
+                # A later sync already covered this range
+                return None
+
+        return None
+
+
+def finalize_gmail_parent_sync_job(parent_job_id: int) -> dict:
+    """
+    Roll chunk job progress up into their parent job.
+
+    The parent is completed once no chunk is queued, running or waiting for
+    a retry, and marked failed if any chunk failed. The parent row is locked
+    first, so chunks finishing at the same time finalize one after another
+    and the last one sees every chunk's final status.
+
+    On completion the connection's history ID is set to the earliest one the
+    chunks recorded before listing, so mail that arrived while the chunks
+    ran is picked up by the next incremental sync.
+
+    Args:
+        parent_job_id: Parent sync job ID
+
+    Returns:
+        Dict with parent status and aggregated counters
+    """
+    with get_session() as session:
+        parent = (
+            session.query(GmailSyncJob)
+            .filter(GmailSyncJob.id == parent_job_id)
+            .with_for_update()
+            .one_or_none()
+        )
+        if not parent:
+            return None
+        was_completed = parent.status == "completed"
+
+        children = (
+            session.query(GmailSyncJob)
+            .filter(GmailSyncJob.parent_job_id == parent_job_id)
+            .all()
+        )
+
+        parent.total_messages = sum(c.total_messages or 0 for c in children)
+        parent.processed_messages = sum(c.processed_messages or 0 for c in children)
+        parent.parsed_receipts = sum(c.parsed_receipts or 0 for c in children)
+        parent.failed_messages = sum(c.failed_messages or 0 for c in children)
+
+        statuses = [c.status for c in children]
+        pending = sum(
+            1 for status in statuses if status in ("queued", "running", "retrying")
+        )
+        failed = sum(1 for status in statuses if status == "failed")
+
+        if pending:
+            parent.status = "running"
+            if parent.started_at is None:
+                parent.started_at = datetime.now()
+        else:
+            parent.status = "failed" if failed else "completed"
+            parent.error_message = f"{failed} chunk(s) failed" if failed else None
+            parent.completed_at = datetime.now()
+
+        history_ids = [
+            c.checkpoint["history_id"]
+            for c in children
+            if c.checkpoint and c.checkpoint.get("history_id")
+        ]
+        if parent.status == "completed" and not was_completed and history_ids:
+            connection = session.get(GmailConnection, parent.connection_id)
+            if connection:
+                connection.history_id = min(history_ids, key=int)
+                connection.last_synced_at = datetime.now()
+                connection.updated_at = datetime.now()
+
+        session.commit()
+
+        return {
+            "status": parent.status,
+            "chunks": len(children),
+            "pending_chunks": pending,
+            "failed_chunks": failed,
+            "total_messages": parent.total_messages,
+            "processed_messages": parent.processed_messages,
+            "parsed_receipts": parent.parsed_receipts,
+            "failed_messages": parent.failed_messages,
+        }
+
+
 def cleanup_stale_gmail_jobs(
     queued_timeout_minutes: int = 5, running_timeout_minutes: int = 10
 ) -> int:
@@ -1249,7 +1597,12 @@ def cleanup_stale_gmail_jobs(
 
     A job is considered stale if:
     - Status is 'queued' for longer than queued_timeout_minutes
-    - Status is 'running' but no progress for longer than running_timeout_minutes
+    - Status is 'running' (or 'retrying', waiting for a Celery retry) but no
+      progress for longer than running_timeout_minutes
+
+    Parents of chunked syncs are left to their chunks. A chunk that was
+    killed never finalizes its parent, so once cleanup has failed the last
+    pending chunk the parent is finalized here instead.
 
     Returns the number of jobs marked as failed.
     """
@@ -1263,9 +1616,13 @@ def cleanup_stale_gmail_jobs(
                     completed_at = NOW()
                 WHERE (
                     (status = 'queued' AND created_at < NOW() - INTERVAL ':queued_timeout minutes')
-                    OR (status = 'running' AND
+                    OR (status IN ('running', 'retrying') AND
                         COALESCE(started_at, created_at) < NOW() - INTERVAL ':running_timeout minutes')
                 )
+                AND NOT EXISTS (
+                    SELECT 1 FROM gmail_sync_jobs chunk
+                    WHERE chunk.parent_job_id = gmail_sync_jobs.id
+                )
             """),
             {
                 "queued_timeout": queued_timeout_minutes,
@@ -1273,7 +1630,33 @@ def cleanup_stale_gmail_jobs(
             },
         )
         session.commit()
-        return result.rowcount
+        failed_count = result.rowcount
+
+        # Parents whose chunks have all stopped but were never finalized
+        orphaned_parent_ids = (
+            session.execute(
+                text("""
+                    SELECT parent.id FROM gmail_sync_jobs parent
+                    WHERE parent.status IN ('queued', 'running')
+                    AND EXISTS (
+                        SELECT 1 FROM gmail_sync_jobs chunk
+                        WHERE chunk.parent_job_id = parent.id
+                    )
+                    AND NOT EXISTS (
+                        SELECT 1 FROM gmail_sync_jobs chunk
+                        WHERE chunk.parent_job_id = parent.id
+                        AND chunk.status IN ('queued', 'running', 'retrying')
+                    )
+                """)
+            )
+            .scalars()
+            .all()
+        )
+
+    for parent_job_id in orphaned_parent_ids:
+        finalize_gmail_parent_sync_job(parent_job_id)
+
+    return failed_count
 
 
 def get_gmail_sync_job(job_id: int) -> dict:
@@ -1295,6 +1678,8 @@ def get_gmail_sync_job(job_id: int) -> dict:
             "failed_messages": job.failed_messages,
             "sync_from_date": job.sync_from_date,
             "sync_to_date": job.sync_to_date,
+            "parent_job_id": job.parent_job_id,
+            "checkpoint": job.checkpoint,
             "error_message": job.error_message,
             "started_at": job.started_at,
             "completed_at": job.completed_at,
@@ -1401,55 +1786,27 @@ def get_latest_active_gmail_sync_job(user_id: int) -> dict:
 
 
 def get_gmail_statistics(user_id: int) -> dict:
-    """Get Gmail integration statistics for a user."""
-    from sqlalchemy import distinct
+    """
+    Get Gmail integration statistics for a user.
 
+    Reads the per-merchant summary (see database.gmail_merchant_summary),
+    so duplicate receipts are not counted.
+    """
+    s = GmailMerchantSummary
     with get_session() as session:
         result = (
             session.query(
-                func.sum(case((GmailReceipt.deleted_at.is_(None), 1), else_=0)).label(
-                    "total_receipts"
-                ),
-                func.sum(
-                    case(
-                        (
-                            (GmailReceipt.parsing_status == "parsed")
-                            & (GmailReceipt.deleted_at.is_(None)),
-                            1,
-                        ),
-                        else_=0,
-                    )
-                ).label("parsed_receipts"),
-                func.sum(
-                    case(
-                        (
-                            (GmailReceipt.parsing_status == "pending")
-                            & (GmailReceipt.deleted_at.is_(None)),
-                            1,
-                        ),
-                        else_=0,
-                    )
-                ).label("pending_receipts"),
-                func.sum(
-                    case(
-                        (
-                            (GmailReceipt.parsing_status == "failed")
-                            & (GmailReceipt.deleted_at.is_(None)),
-                            1,
-                        ),
-                        else_=0,
-                    )
-                ).label("failed_receipts"),
-                func.count(distinct(GmailMatch.gmail_receipt_id)).label(
-                    "matched_receipts"
-                ),
-                func.min(GmailReceipt.receipt_date).label("min_receipt_date"),
-                func.max(GmailReceipt.receipt_date).label("max_receipt_date"),
-                func.sum(GmailReceipt.llm_cost_cents).label("total_llm_cost_cents"),
+                func.sum(s.receipt_count).label("total_receipts"),
+                func.sum(s.parsed_count).label("parsed_receipts"),
+                func.sum(s.pending_count).label("pending_receipts"),
+                func.sum(s.failed_count).label("failed_receipts"),
+                func.sum(s.matched_count).label("matched_receipts"),
+                func.min(s.min_receipt_date).label("min_receipt_date"),
+                func.max(s.max_receipt_date).label("max_receipt_date"),
+                func.sum(s.llm_cost_cents).label("total_llm_cost_cents"),
             )
             .select_from(GmailConnection)
-            .outerjoin(GmailReceipt, GmailConnection.id == GmailReceipt.connection_id)
-            .outerjoin(GmailMatch, GmailReceipt.id == GmailMatch.gmail_receipt_id)
+            .outerjoin(s, GmailConnection.id == s.connection_id)
             .filter(
                 GmailConnection.user_id == user_id,
                 GmailConnection.connection_status == "active",
@@ -1648,14 +2005,23 @@ def update_gmail_receipt_parsed(
     parse_confidence: int,
     parsing_status: str = "parsed",
     llm_cost_cents: int = None,
+    content_hash: str = None,
+    parser_version: str = None,
 ) -> bool:
-    """Update receipt with parsed data."""
+    """
+    Update receipt with parsed data.
+
+    content_hash/parser_version record what produced the data. Callers that
+    don't pass them clear the stamp, so the next reparse run revisits the
+    receipt.
+    """
     with get_session() as session:
         receipt = session.get(GmailReceipt, receipt_id)
 
         if not receipt:
             return False
 
+        previous_keys = {receipt.merchant_key}
         receipt.merchant_name = merchant_name
         receipt.merchant_name_normalized = merchant_name_normalized
         receipt.order_id = order_id
@@ -1669,7 +2035,11 @@ def update_gmail_receipt_parsed(
         receipt.parsing_status = parsing_status
         if llm_cost_cents is not None:
             receipt.llm_cost_cents = llm_cost_cents
+        receipt.content_hash = content_hash
+        receipt.parser_version = parser_version
         receipt.updated_at = datetime.now()
+        session.flush()
+        refresh_receipt_merchants(session, [receipt_id], previous_keys)
 
         session.commit()
         return True
@@ -1689,6 +2059,8 @@ def update_gmail_receipt_status(
         receipt.parsing_error = parsing_error
         receipt.retry_count = receipt.retry_count + 1
         receipt.updated_at = datetime.now()
+        session.flush()
+        refresh_receipt_merchants(session, [receipt_id])
 
         session.commit()
         return True
@@ -1722,6 +2094,46 @@ def update_gmail_receipt_pdf_status(
         return True
 
 
+def update_gmail_receipts_pdf_status_bulk(updates: list) -> int:
+    """
+    Update the PDF processing status of many receipts in one statement.
+
+    Errors count towards pdf_retry_count exactly as in
+    update_gmail_receipt_pdf_status().
+
+    Args:
+        updates: List of dicts with id, status and optional error
+
+    Returns:
+        Number of receipts updated
+    """
+    if not updates:
+        return 0
+
+    rows = values(
+        column("id", Integer),
+        column("status", String),
+        column("error", Text),
+        name="pdf_status",
+    ).data([(u["id"], u["status"], u.get("error")) for u in updates])
+
+    stmt = (
+        update(GmailReceipt)
+        .where(GmailReceipt.id == rows.c.id)
+        .values(
+            pdf_processing_status=rows.c.status,
+            pdf_retry_count=GmailReceipt.pdf_retry_count
+            + case((rows.c.error.isnot(None), 1), else_=0),
+            pdf_last_error=func.coalesce(rows.c.error, GmailReceipt.pdf_last_error),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    with get_session() as session:
+        updated = session.execute(stmt).rowcount
+        session.commit()
+        return updated
+
+
 def update_gmail_receipt_from_pdf(
     receipt_id: int, pdf_data: dict, minio_object_key: str = None
 ) -> bool:
@@ -1742,37 +2154,74 @@ def update_gmail_receipt_from_pdf(
         if not receipt:
             return False
 
-        # Property-based updates for fields present in pdf_data
-        if "merchant_name" in pdf_data and pdf_data["merchant_name"]:
-            receipt.merchant_name = pdf_data["merchant_name"]
-            receipt.merchant_name_normalized = pdf_data["merchant_name"].lower()
+        previous_keys = {receipt.merchant_key}
+        _apply_pdf_data(receipt, pdf_data)
+        session.flush()
+        refresh_receipt_merchants(session, [receipt_id], previous_keys)
+        session.commit()
+        return True
+
+
+def _apply_pdf_data(receipt: GmailReceipt, pdf_data: dict) -> None:
+    """Copy the fields present in parsed PDF data onto a receipt."""
+    # Property-based updates for fields present in pdf_data
+    if "merchant_name" in pdf_data and pdf_data["merchant_name"]:
+        receipt.merchant_name = pdf_data["merchant_name"]
+        receipt.merchant_name_normalized = pdf_data["merchant_name"].lower()
+
+    if "total_amount" in pdf_data and pdf_data["total_amount"] is not None:
+        receipt.total_amount = float(pdf_data["total_amount"])
+
+    if "currency_code" in pdf_data and pdf_data["currency_code"]:
+        receipt.currency_code = pdf_data["currency_code"]
 
-        if "total_amount" in pdf_data and pdf_data["total_amount"] is not None:
-            receipt.total_amount = float(pdf_data["total_amount"])
+    if "receipt_date" in pdf_data and pdf_data["receipt_date"]:
+        receipt.receipt_date = pdf_data["receipt_date"]
 
-        if "currency_code" in pdf_data and pdf_data["currency_code"]:
-            receipt.currency_code = pdf_data["currency_code"]
+    if "order_id" in pdf_data and pdf_data["order_id"]:
+        receipt.order_id = pdf_data["order_id"]
 
-        if "receipt_date" in pdf_data and pdf_data["receipt_date"]:
-            receipt.receipt_date = pdf_data["receipt_date"]
+    if "line_items" in pdf_data and pdf_data["line_items"]:
+        receipt.line_items = pdf_data["line_items"]
 
-        if "order_id" in pdf_data and pdf_data["order_id"]:
-            receipt.order_id = pdf_data["order_id"]
+    if "parse_method" in pdf_data and pdf_data["parse_method"]:
+        receipt.parse_method = pdf_data["parse_method"]
 
-        if "line_items" in pdf_data and pdf_data["line_items"]:
-            receipt.line_items = pdf_data["line_items"]
+    if "parse_confidence" in pdf_data and pdf_data["parse_confidence"] is not None:
+        receipt.parse_confidence = int(pdf_data["parse_confidence"])
 
-        if "parse_method" in pdf_data and pdf_data["parse_method"]:
-            receipt.parse_method = pdf_data["parse_method"]
+    # Always update parsing status to 'parsed' if we got data
+    receipt.parsing_status = "parsed"
 
-        if "parse_confidence" in pdf_data and pdf_data["parse_confidence"] is not None:
-            receipt.parse_confidence = int(pdf_data["parse_confidence"])
 
-        # Always update parsing status to 'parsed' if we got data
-        receipt.parsing_status = "parsed"
+def update_gmail_receipts_from_pdf_bulk(pdf_results: dict) -> int:
+    """
+    Update many receipts with data parsed from their PDFs in one transaction.
+
+    Args:
+        pdf_results: Dict of receipt_id -> parsed PDF data
 
+    Returns:
+        Number of receipts updated
+    """
+    if not pdf_results:
+        return 0
+
+    with get_session() as session:
+        receipts = (
+            session.query(GmailReceipt)
+            .filter(GmailReceipt.id.in_(list(pdf_results)))
+            .all()
+        )
+        previous_keys = {receipt.merchant_key for receipt in receipts}
+        for receipt in receipts:
+            _apply_pdf_data(receipt, pdf_results[receipt.id])
+        session.flush()
+        refresh_receipt_merchants(
+            session, [receipt.id for receipt in receipts], previous_keys
+        )
         session.commit()
-        return True
+        return len(receipts)
 
 
 def get_pending_gmail_receipts(connection_id: int, limit: int = 100) -> list:
@@ -1806,6 +2255,447 @@ def get_pending_gmail_receipts(connection_id: int, limit: int = 100) -> list:
         ]
 
 
+def _reparseable_receipt_filters(connection_id: int = None) -> list:
+    """
+    Filters selecting the receipts a reparse may rewrite.
+
+    Receipts whose data came from somewhere other than the email body parse
+    (LLM extraction, manual edits, PDF attachments) are left out.
+    """
+    filters = [
+        GmailReceipt.deleted_at.is_(None),
+        or_(
+            GmailReceipt.parse_method.is_(None),
+            ~GmailReceipt.parse_method.in_(("llm", "manual")),
+        ),
+        or_(
+            GmailReceipt.parse_method.is_(None),
+            ~GmailReceipt.parse_method.like("%pdf%"),
+        ),
+        or_(
+            GmailReceipt.pdf_processing_status.is_(None),
+            GmailReceipt.pdf_processing_status != "completed",
+        ),
+    ]
+    if connection_id is not None:
+        filters.append(GmailReceipt.connection_id == connection_id)
+    return filters
+
+
+def _reparse_sender_domain():
+    """
+    Sender domain a reparse resolves parser versions for.
+
+    The merchant domain, or for receipts without one the lowercased domain
+    of the sender address ('' if neither), as the sync derived it.
+    """
+    return func.coalesce(
+        func.nullif(GmailReceipt.merchant_domain, ""),
+        case(
+            (
+                GmailReceipt.sender_email.contains("@"),
+                func.lower(func.substring(GmailReceipt.sender_email, "[^@]*$")),
+            ),
+        ),
+        "",
+    )
+
+
+def _stale_parser_version_filter(current_versions: dict):
+    """Filter matching receipts not stamped with their domain's current version."""
+    return or_(
+        GmailReceipt.parser_version.is_(None),
+        tuple_(_reparse_sender_domain(), GmailReceipt.parser_version).notin_(
+            list(current_versions.items())
+        ),
+    )
+
+
+def get_gmail_reparse_domains(connection_id: int = None) -> list:
+    """
+    Get the distinct sender domains of receipts a reparse may rewrite.
+
+    Receipts without a merchant_domain contribute their sender address's
+    domain, so every receipt's current parser version is known up front.
+
+    Args:
+        connection_id: Restrict to one Gmail connection (all if None)
+
+    Returns:
+        List of sender domains
+    """
+    with get_session() as session:
+        rows = (
+            session.query(_reparse_sender_domain())
+            .filter(*_reparseable_receipt_filters(connection_id))
+            .distinct()
+            .all()
+        )
+        return [row[0] for row in rows]
+
+
+def count_gmail_receipts_for_reparse(
+    connection_id: int = None, current_versions: dict = None
+) -> dict:
+    """
+    Count reparseable receipts and those not on their current parser version.
+
+    Args:
+        connection_id: Restrict to one Gmail connection (all if None)
+        current_versions: Dict of merchant domain -> current parser version
+
+    Returns:
+        dict with 'total' and 'stale' counts
+    """
+    stale_filter = _stale_parser_version_filter(current_versions or {})
+    with get_session() as session:
+        total, stale = (
+            session.query(
+                func.count(GmailReceipt.id),
+                func.count(GmailReceipt.id).filter(stale_filter),
+            )
+            .filter(*_reparseable_receipt_filters(connection_id))
+            .one()
+        )
+        return {"total": total, "stale": stale}
+
+
+def iter_gmail_receipts_for_reparse(
+    connection_id: int = None, current_versions: dict = None, batch_size: int = 500
+):
+    """
+    Stream the receipts to reparse together with their stored email content.
+
+    Only receipts not stamped with their domain's current parser version are
+    read. Rows come through a server-side cursor (yield_per), so a full
+    mailbox is never held in memory. Receipts without stored content come
+    back with body_html/body_text None.
+
+    Args:
+        connection_id: Restrict to one Gmail connection (all if None)
+        current_versions: Dict of merchant domain -> current parser version
+        batch_size: Rows fetched per round trip and yielded per batch
+
+    Yields:
+        Lists of dicts with the receipt's parser inputs and current stamp
+    """
+    with get_session() as session:
+        query = (
+            session.query(
+                GmailReceipt.id,
+                GmailReceipt.subject,
+                GmailReceipt.sender_email,
+                GmailReceipt.sender_name,
+                GmailReceipt.merchant_domain,
+                GmailReceipt.received_at,
+                GmailReceipt.content_hash,
+                GmailReceipt.parser_version,
+                GmailEmailContent.body_html,
+                GmailEmailContent.body_text,
+                GmailEmailContent.list_unsubscribe,
+                GmailEmailContent.body_html_hash,
+                GmailEmailContent.body_text_hash,
+            )
+            .outerjoin(
+                GmailEmailContent,
+                GmailReceipt.message_id == GmailEmailContent.message_id,
+            )
+            .filter(
+                *_reparseable_receipt_filters(connection_id),
+                _stale_parser_version_filter(current_versions or {}),
+            )
+            .order_by(GmailReceipt.id)
+            .yield_per(batch_size)
+        )
+
+        def to_dicts(rows):
+            # One body store lookup per batch
+            bodies = load_email_bodies(session, [h for r in rows for h in r[11:13]])
+            return [
+                {
+                    "id": r[0],
+                    "subject": r[1],
+                    "sender_email": r[2],
+                    "sender_name": r[3],
+                    "merchant_domain": r[4],
+                    "received_at": r[5],
+                    "content_hash": r[6],
+                    "parser_version": r[7],
+                    "body_html": resolve_email_body(bodies, r[11], r[8]),
+                    "body_text": resolve_email_body(bodies, r[12], r[9]),
+                    "list_unsubscribe": r[10],
+                }
+                for r in rows
+            ]
+
+        batch = []
+        for r in query:
+            batch.append(r)
+            if len(batch) >= batch_size:
+                yield to_dicts(batch)
+                batch = []
+        if batch:
+            yield to_dicts(batch)
+
+
+def update_gmail_receipts_parsed_bulk(updates: list) -> int:
+    """
+    Write parse results back to many receipts in one statement.
+
+    Issues a single UPDATE ... FROM (VALUES ...) instead of loading and
+    saving each receipt in turn.
+
+    Args:
+        updates: List of dicts with id, merchant_name, merchant_name_normalized,
+            order_id, total_amount, currency_code, receipt_date, line_items,
+            receipt_hash, parse_method, parse_confidence, parsing_status,
+            llm_cost_cents, content_hash, parser_version
+
+    Returns:
+        Number of receipts updated
+    """
+    if not updates:
+        return 0
+
+    rows = values(
+        column("id", Integer),
+        column("merchant_name", String),
+        column("merchant_name_normalized", String),
+        column("order_id", String),
+        column("total_amount", Numeric),
+        column("currency_code", String),
+        column("receipt_date", String),
+        column("line_items", Text),
+        column("receipt_hash", String),
+        column("parse_method", String),
+        column("parse_confidence", Integer),
+        column("parsing_status", String),
+        column("llm_cost_cents", Integer),
+        column("content_hash", String),
+        column("parser_version", String),
+        column("amount_pence", Integer),
+        column("line_items_minhash", Text),
+        name="parsed",
+    ).data(
+        [
+            (
+                u["id"],
+                u.get("merchant_name"),
+                u.get("merchant_name_normalized"),
+                u.get("order_id"),
+                u.get("total_amount"),
+                u.get("currency_code"),
+                u.get("receipt_date"),
+                json.dumps(u["line_items"])
+                if u.get("line_items") is not None
+                else None,
+                u.get("receipt_hash"),
+                u.get("parse_method"),
+                u.get("parse_confidence"),
+                u.get("parsing_status", "parsed"),
+                u.get("llm_cost_cents"),
+                u.get("content_hash"),
+                u.get("parser_version"),
+                keys["amount_pence"],
+                json.dumps(keys["line_items_minhash"])
+                if keys["line_items_minhash"]
+                else None,
+            )
+            for u, keys in zip(
+                updates, [duplicate_keys(u) for u in updates], strict=True
+            )
+        ]
+    )
+
+    # VALUES columns that are NULL in every row come back as text, so every
+    # non-text column is cast explicitly
+    stmt = (
+        update(GmailReceipt)
+        .where(GmailReceipt.id == rows.c.id)
+        .values(
+            merchant_name=rows.c.merchant_name,
+            merchant_name_normalized=rows.c.merchant_name_normalized,
+            order_id=rows.c.order_id,
+            total_amount=cast(rows.c.total_amount, Numeric(12, 2)),
+            currency_code=rows.c.currency_code,
+            receipt_date=cast(rows.c.receipt_date, Date),
+            line_items=cast(rows.c.line_items, JSONB),
+            receipt_hash=rows.c.receipt_hash,
+            parse_method=rows.c.parse_method,
+            parse_confidence=cast(rows.c.parse_confidence, Integer),
+            parsing_status=rows.c.parsing_status,
+            llm_cost_cents=func.coalesce(
+                cast(rows.c.llm_cost_cents, Integer), GmailReceipt.llm_cost_cents
+            ),
+            content_hash=rows.c.content_hash,
+            parser_version=rows.c.parser_version,
+            amount_pence=cast(rows.c.amount_pence, Integer),
+            line_items_minhash=cast(rows.c.line_items_minhash, JSONB),
+            updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    receipt_ids = [u["id"] for u in updates]
+    with get_session() as session:
+        previous_keys = receipt_merchant_keys(session, receipt_ids)
+        result = session.execute(stmt)
+        # A reparsed amount or item list can make or break a duplicate
+        flag_receipt_duplicates(session, receipt_ids)
+        refresh_receipt_merchants(session, receipt_ids, previous_keys)
+        session.commit()
+        return result.rowcount
+
+
+def get_gmail_parse_results(keys: list) -> dict:
+    """
+    Look up cached parse results.
+
+    Args:
+        keys: List of (content_hash, parser_version) tuples
+
+    Returns:
+        Dict mapping (content_hash, parser_version) -> parse result dict
+    """
+    if not keys:
+        return {}
+
+    with get_session() as session:
+        rows = (
+            session.query(GmailParseResult)
+            .filter(
+                tuple_(
+                    GmailParseResult.content_hash, GmailParseResult.parser_version
+                ).in_(keys)
+            )
+            .all()
+        )
+
+        return {(r.content_hash, r.parser_version): r.parse_result for r in rows}
+
+
+def save_gmail_parse_results(results: list) -> int:
+    """
+    Store parse results in the cache (existing entries are kept).
+
+    Args:
+        results: List of (content_hash, parser_version, parse_result) tuples
+
+    Returns:
+        Number of new cache entries
+    """
+    if not results:
+        return 0
+
+    with get_session() as session:
+        stmt = (
+            insert(GmailParseResult)
+            .values(
+                [
+                    {
+                        "content_hash": content_hash,
+                        "parser_version": parser_version,
+                        "parse_result": parse_result,
+                    }
+                    for content_hash, parser_version, parse_result in results
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["content_hash", "parser_version"])
+        )
+        result = session.execute(stmt)
+        session.commit()
+        return result.rowcount
+
+
+def get_gmail_receipt_templates(sender_domain: str) -> list:
+    """
+    Get the receipt templates learned for a sender domain.
+
+    Args:
+        sender_domain: Email sender domain
+
+    Returns:
+        List of template dicts (user-confirmed templates first)
+    """
+    with get_session() as session:
+        rows = (
+            session.query(GmailReceiptTemplate)
+            .filter(GmailReceiptTemplate.sender_domain == sender_domain)
+            .order_by(
+                (GmailReceiptTemplate.source == "user").desc(),
+                GmailReceiptTemplate.updated_at.desc(),
+            )
+            .all()
+        )
+
+        return [
+            {
+                "id": r.id,
+                "sender_domain": r.sender_domain,
+                "fingerprint": r.fingerprint,
+                "shingles": r.shingles,
+                "field_paths": r.field_paths,
+                "merchant_name": r.merchant_name,
+                "merchant_name_normalized": r.merchant_name_normalized,
+                "currency_code": r.currency_code,
+                "source": r.source,
+                "updated_at": r.updated_at,
+            }
+            for r in rows
+        ]
+
+
+def save_gmail_receipt_template(template: dict) -> int | None:
+    """
+    Insert or refresh a receipt template.
+
+    A template learned from an LLM parse never replaces a user-confirmed one
+    with the same fingerprint.
+
+    Args:
+        template: Dict with sender_domain, fingerprint, shingles, field_paths,
+            merchant_name, merchant_name_normalized, currency_code and source
+
+    Returns:
+        Template ID, or None if a user-confirmed template was kept
+    """
+    columns = (
+        "shingles",
+        "field_paths",
+        "merchant_name",
+        "merchant_name_normalized",
+        "currency_code",
+        "source",
+    )
+    with get_session() as session:
+        stmt = insert(GmailReceiptTemplate).values(
+            sender_domain=template["sender_domain"],
+            fingerprint=template["fingerprint"],
+            **{column: template.get(column) for column in columns},
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["sender_domain", "fingerprint"],
+            set_={
+                **{column: stmt.excluded[column] for column in columns},
+                "updated_at": func.now(),
+            },
+            where=or_(
+                GmailReceiptTemplate.source != "user",
+                stmt.excluded.source == "user",
+            ),
+        ).returning(GmailReceiptTemplate.id)
+        template_id = session.execute(stmt).scalar()
+        session.commit()
+        return template_id
+
+
+def get_gmail_match_receipt_id(match_id: int) -> int | None:
+    """Get the receipt ID of a Gmail match."""
+    with get_session() as session:
+        match = session.get(GmailMatch, match_id)
+        return match.gmail_receipt_id if match else None
+
+
 def get_gmail_merchant_alias(merchant_name: str) -> dict:
     """Get merchant alias mapping for matching."""
     with get_session() as session:
@@ -1838,30 +2728,13 @@ def delete_old_unmatched_gmail_receipts(cutoff_date) -> int:
     - Older than cutoff_date
     - Not matched to any transaction
     - Have parsing_status of 'unparseable'
+    - Have no stored PDF attachments
+
+    Deletes in chunks through the gmail_receipts retention policy.
 
     Returns count of deleted receipts.
     """
-    with get_session() as session:
-        # Subquery to find unmatched receipt IDs
-        unmatched_ids = (
-            session.query(GmailReceipt.id)
-            .outerjoin(GmailMatch, GmailReceipt.id == GmailMatch.gmail_receipt_id)
-            .filter(
-                GmailReceipt.created_at < cutoff_date,
-                GmailMatch.id.is_(None),
-                GmailReceipt.parsing_status == "unparseable",
-                GmailReceipt.is_deleted.is_(False),
-            )
-            .subquery()
-        )
-
-        deleted = (
-            session.query(GmailReceipt)
-            .filter(GmailReceipt.id.in_(unmatched_ids))
-            .delete(synchronize_session=False)
-        )
-        session.commit()
-        return deleted
+    return purge_policy(RETENTION_POLICIES["gmail_receipts"], cutoff=cutoff_date)
 
 
 # ============================================================================
@@ -2001,6 +2874,7 @@ def update_receipt_llm_status(
     estimated_cost: int = None,
     actual_cost: int = None,
     parsed_data: dict = None,
+    latency_ms: int = None,
 ) -> bool:
     """
     Update LLM parsing status and costs for a receipt.
@@ -2011,6 +2885,7 @@ def update_receipt_llm_status(
         estimated_cost: Estimated cost in cents
         actual_cost: Actual cost in cents (after processing)
         parsed_data: Optional parsed data to update receipt with
+        latency_ms: Wall time of the LLM request that parsed the receipt
 
     Returns:
         True if updated successfully
@@ -2021,6 +2896,8 @@ def update_receipt_llm_status(
         if not receipt:
             return False
 
+        previous_keys = {receipt.merchant_key}
+
         # Update LLM status
         receipt.llm_parse_status = status
 
@@ -2030,6 +2907,9 @@ def update_receipt_llm_status(
         if actual_cost is not None:
             receipt.llm_actual_cost_cents = actual_cost
 
+        if latency_ms is not None:
+            receipt.llm_latency_ms = latency_ms
+
         if status == "completed":
             receipt.llm_parsed_at = func.now()
 
@@ -2052,11 +2932,26 @@ def update_receipt_llm_status(
                 if parsed_data.get("line_items"):
                     receipt.line_items = parsed_data["line_items"]
 
+                if actual_cost is not None:
+                    receipt.llm_cost_cents = actual_cost
+
                 # Update parsing status to parsed
                 receipt.parsing_status = "parsed"
                 receipt.parse_method = parsed_data.get("parse_method", "llm")
                 receipt.parse_confidence = parsed_data.get("parse_confidence", 70)
 
+                for key, value in duplicate_keys(
+                    {
+                        "total_amount": receipt.total_amount,
+                        "received_at": receipt.received_at,
+                        "line_items": receipt.line_items,
+                    }
+                ).items():
+                    setattr(receipt, key, value)
+                session.flush()
+                flag_receipt_duplicates(session, [receipt_id])
+                refresh_receipt_merchants(session, [receipt_id], previous_keys)
+
         session.commit()
         return True
 
@@ -2098,6 +2993,94 @@ def get_receipt_for_llm_processing(receipt_id: int) -> dict:
         return None
 
 
+def set_receipts_llm_status(receipt_ids: list, status: str) -> int:
+    """
+    Set the LLM parsing status of several receipts in one UPDATE.
+
+    Args:
+        receipt_ids: Receipt IDs
+        status: 'pending', 'processing', 'completed', or 'failed'
+
+    Returns:
+        Number of receipts updated
+    """
+    if not receipt_ids:
+        return 0
+
+    with get_session() as session:
+        updated = (
+            session.query(GmailReceipt)
+            .filter(GmailReceipt.id.in_(receipt_ids))
+            .update({GmailReceipt.llm_parse_status: status}, synchronize_session=False)
+        )
+        session.commit()
+        return updated
+
+
+def get_receipts_for_llm_processing(receipt_ids: list) -> list:
+    """
+    Get several receipts for LLM processing with their stored email content.
+
+    Bodies come from gmail_email_content (decompressed in one query); they
+    are None for receipts whose content was never stored, which callers
+    re-fetch from Gmail.
+
+    Args:
+        receipt_ids: Receipt IDs
+
+    Returns:
+        List of receipt dicts (in receipt_ids order, unknown IDs omitted)
+    """
+    if not receipt_ids:
+        return []
+
+    with get_session() as session:
+        rows = (
+            session.query(
+                GmailReceipt.id,
+                GmailReceipt.message_id,
+                GmailReceipt.subject,
+                GmailReceipt.sender_email,
+                GmailReceipt.merchant_domain,
+                GmailReceipt.connection_id.label("gmail_connection_id"),
+                GmailEmailContent.from_header,
+                GmailEmailContent.list_unsubscribe,
+                GmailEmailContent.body_html_hash,
+                GmailEmailContent.body_text_hash,
+                GmailEmailContent.body_html,
+                GmailEmailContent.body_text,
+            )
+            .outerjoin(
+                GmailEmailContent,
+                GmailEmailContent.message_id == GmailReceipt.message_id,
+            )
+            .filter(GmailReceipt.id.in_(receipt_ids))
+            .all()
+        )
+
+        bodies = load_email_bodies(
+            session,
+            [h for r in rows for h in (r.body_html_hash, r.body_text_hash)],
+        )
+
+        receipts = {
+            r.id: {
+                "id": r.id,
+                "message_id": r.message_id,
+                "subject": r.subject,
+                "sender_email": r.sender_email,
+                "merchant_domain": r.merchant_domain,
+                "gmail_connection_id": r.gmail_connection_id,
+                "from_header": r.from_header,
+                "list_unsubscribe": r.list_unsubscribe,
+                "body_html": resolve_email_body(bodies, r.body_html_hash, r.body_html),
+                "body_text": resolve_email_body(bodies, r.body_text_hash, r.body_text),
+            }
+            for r in rows
+        }
+        return [receipts[i] for i in receipt_ids if i in receipts]
+
+
 # ============================================================================
 # GMAIL MERCHANTS AGGREGATION
 # ============================================================================
@@ -2109,6 +3092,7 @@ def get_gmail_merchants_summary(user_id: int = 1) -> dict:
 
     Groups by merchant_name_normalized to show separate entries for variants
     like Amazon, Amazon Business, Amazon Fresh (all share amazon.co.uk domain).
+    Receipt counts come from the incrementally maintained gmail_merchant_summary.
 
     Returns dict with:
         - merchants: List of merchant summaries
@@ -2120,38 +3104,29 @@ def get_gmail_merchants_summary(user_id: int = 1) -> dict:
             text("""
                 WITH receipt_stats AS (
                     SELECT
-                        COALESCE(r.merchant_name_normalized,
-                            LOWER(SPLIT_PART(COALESCE(r.merchant_domain,
-                                SUBSTRING(r.sender_email FROM '@(.+)$')), '.', 1))) as normalized_name,
-                        COALESCE(r.merchant_domain,
-                            SUBSTRING(r.sender_email FROM '@(.+)$')) as domain,
-                        COALESCE(r.merchant_name, r.sender_name,
-                            SUBSTRING(r.sender_email FROM '@(.+)$')) as display_name,
-                        COUNT(*) as receipt_count,
-                        COUNT(*) FILTER (WHERE r.parsing_status = 'parsed') as parsed_count,
-                        COUNT(DISTINCT m.id) as matched_count,
-                        COUNT(*) FILTER (WHERE r.parsing_status = 'pending') as pending_count,
-                        COUNT(*) FILTER (WHERE r.parsing_status IN ('failed', 'unparseable')) as failed_count,
-                        MIN(r.received_at) as earliest_receipt,
-                        MAX(r.received_at) as latest_receipt,
-                        SUM(COALESCE(r.llm_cost_cents, 0)) as llm_cost_cents,
-                        SUM(COALESCE(r.total_amount, 0)) as total_amount,
-                        COUNT(*) FILTER (WHERE r.parse_method LIKE 'vendor_%') as vendor_parsed_count,
-                        COUNT(*) FILTER (WHERE r.parse_method = 'schema_org') as schema_parsed_count,
-                        COUNT(*) FILTER (WHERE r.parse_method = 'pattern') as pattern_parsed_count,
-                        COUNT(*) FILTER (WHERE r.parse_method = 'llm') as llm_parsed_count
-                    FROM gmail_receipts r
-                    LEFT JOIN gmail_transaction_matches m ON r.id = m.gmail_receipt_id
-                    JOIN gmail_connections c ON r.connection_id = c.id
+                        s.merchant_normalized as normalized_name,
+                        (ARRAY_AGG(s.merchant_domain
+                            ORDER BY s.receipt_count DESC))[1] as domain,
+                        (ARRAY_AGG(s.merchant_name
+                            ORDER BY s.receipt_count DESC))[1] as display_name,
+                        SUM(s.receipt_count) as receipt_count,
+                        SUM(s.parsed_count) as parsed_count,
+                        SUM(s.matched_count) as matched_count,
+                        SUM(s.pending_count) as pending_count,
+                        SUM(s.failed_count + s.unparseable_count) as failed_count,
+                        MIN(s.earliest_receipt) as earliest_receipt,
+                        MAX(s.latest_receipt) as latest_receipt,
+                        SUM(s.llm_cost_cents)::bigint as llm_cost_cents,
+                        SUM(s.total_amount) as total_amount,
+                        SUM(s.vendor_parsed_count) as vendor_parsed_count,
+                        SUM(s.schema_parsed_count) as schema_parsed_count,
+                        SUM(s.pattern_parsed_count) as pattern_parsed_count,
+                        SUM(s.llm_parsed_count) as llm_parsed_count
+                    FROM gmail_merchant_summary s
+                    JOIN gmail_connections c ON s.connection_id = c.id
                     WHERE c.user_id = :user_id
                       AND c.connection_status = 'active'
-                      AND r.deleted_at IS NULL
-                    GROUP BY
-                        COALESCE(r.merchant_name_normalized,
-                            LOWER(SPLIT_PART(COALESCE(r.merchant_domain,
-                                SUBSTRING(r.sender_email FROM '@(.+)$')), '.', 1))),
-                        COALESCE(r.merchant_domain, SUBSTRING(r.sender_email FROM '@(.+)$')),
-                        COALESCE(r.merchant_name, r.sender_name, SUBSTRING(r.sender_email FROM '@(.+)$'))
+                    GROUP BY s.merchant_normalized
                 ),
                 template_info AS (
                     SELECT
@@ -2338,17 +3313,13 @@ def get_receipts_by_domain(
 
         # Filter by normalized name (preferred) or domain
         if merchant_normalized:
-            where_clauses.append(
-                """LOWER(COALESCE(r.merchant_name_normalized,
-                    LOWER(SPLIT_PART(COALESCE(r.merchant_domain,
-                        SUBSTRING(r.sender_email FROM '@(.+)$')), '.', 1)))) = LOWER(:merchant_normalized)"""
-            )
+            where_clauses.append("LOWER(r.merchant_key) = LOWER(:merchant_normalized)")
             params["merchant_normalized"] = merchant_normalized
             identifier = merchant_normalized
         elif merchant_domain:
             where_clauses.append(
                 """(LOWER(r.merchant_domain) = LOWER(:merchant_domain)
-                    OR LOWER(SUBSTRING(r.sender_email FROM '@(.+)$')) = LOWER(:merchant_domain))"""
+                    OR LOWER(r.sender_domain) = LOWER(:merchant_domain))"""
             )
             params["merchant_domain"] = merchant_domain
             identifier = merchant_domain
@@ -4824,6 +5795,39 @@ def save_gmail_error(
         return error_id
 
 
+def save_gmail_errors_bulk(errors: list) -> int:
+    """Save many Gmail processing errors with one INSERT.
+
+    Args:
+        errors: List of dicts with the save_gmail_error() arguments
+
+    Returns:
+        Number of errors saved
+    """
+    if not errors:
+        return 0
+
+    rows = [
+        {
+            "connection_id": e.get("connection_id"),
+            "sync_job_id": e.get("sync_job_id"),
+            "message_id": e.get("message_id"),
+            "receipt_id": e.get("receipt_id"),
+            "error_stage": e["error_stage"],
+            "error_type": e["error_type"],
+            "error_message": e["error_message"],
+            "stack_trace": e.get("stack_trace"),
+            "error_context": e.get("error_context") or {},
+            "is_retryable": e.get("is_retryable", False),
+        }
+        for e in errors
+    ]
+    with get_session() as session:
+        session.execute(insert(GmailProcessingError).values(rows))
+        session.commit()
+        return len(rows)
+
+
 def save_gmail_parse_statistic(
     connection_id: int,
     sync_job_id: int = None,
@@ -4903,6 +5907,56 @@ def save_gmail_parse_statistic(
         return stat_id
 
 
+PARSE_STATISTIC_COLUMNS = (
+    "connection_id",
+    "sync_job_id",
+    "message_id",
+    "sender_domain",
+    "merchant_normalized",
+    "parse_method",
+    "merchant_extracted",
+    "brand_extracted",
+    "amount_extracted",
+    "date_extracted",
+    "order_id_extracted",
+    "line_items_extracted",
+    "match_attempted",
+    "match_success",
+    "match_confidence",
+    "parse_duration_ms",
+    "llm_cost_cents",
+    "parsing_status",
+    "parsing_error",
+)
+
+
+def save_gmail_parse_statistics_bulk(statistics: list) -> int:
+    """Save parse statistics for many messages with one INSERT.
+
+    Args:
+        statistics: List of dicts with the save_gmail_parse_statistic()
+            arguments (missing keys take the same defaults)
+
+    Returns:
+        Number of statistics saved
+    """
+    if not statistics:
+        return 0
+
+    defaults = {"match_attempted": False, "parsing_status": "unparseable"}
+    rows = [
+        {
+            column: stat.get(column, defaults.get(column))
+            for column in PARSE_STATISTIC_COLUMNS
+        }
+        for stat in statistics
+    ]
+    with get_session() as session:
+        session.execute(insert(GmailParseStatistic).values(rows))
+        session.commit()
+        return len(rows)
+
+
 def update_gmail_sync_job_stats(sync_job_id: int, stats: dict) -> bool:
     """Update sync job with aggregated statistics.
 
@@ -0,0 +1,248 @@
+"""
+Gmail Merchant Summary - Incrementally Maintained Receipt Aggregates
+
+The Gmail merchants view and statistics used to aggregate every receipt
+(joined to matches, with regex-derived domains) on each page load. They
+now read gmail_merchant_summary: one row per (connection, merchant) with
+the receipt counts, totals and date range of that merchant's receipts.
+
+Receipts carry their grouping key as Postgres-generated columns:
+sender_domain (the domain of sender_email) and merchant_key (the
+normalised merchant name, else the first label of the merchant or sender
+domain). Writers that change receipts or matches call
+refresh_receipt_merchants() in their transaction; it re-aggregates only
+the merchants those receipts belonged to before and after the write,
+through the merchant_key index. Refreshes of a merchant are serialised by
+a transaction-level advisory lock on its key, so a writer re-aggregates
+only after a concurrent writer of the same merchant has committed, and
+never overwrites its row with counts that miss the other's receipts.
+
+Writes that bypass those functions (retention purges, bulk clears) are
+corrected by rebuild_gmail_merchant_summary(), which celery beat runs
+daily (the migration that adds the table fills it from the receipts):
+
+    python -m database.gmail_merchant_summary
+"""
+
+import json
+
+from sqlalchemy import delete, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from .base import get_session
+from .models.gmail import GmailMatch, GmailMerchantSummary, GmailReceipt
+
+# Advisory lock namespace of summary refreshes: (SUMMARY_LOCK_ID,
+# hashtext(merchant_key)) per merchant, SUMMARY_LOCK_ID alone for the table
+SUMMARY_LOCK_ID = 740218
+
+# ============================================================================
+# AGGREGATION
+# ============================================================================
+
+
+def _summarised_receipts():
+    """Receipts that count towards the summary."""
+    return [
+        GmailReceipt.deleted_at.is_(None),
+        GmailReceipt.duplicate_of_id.is_(None),
+        GmailReceipt.merchant_key.isnot(None),
+    ]
+
+
+def _summary_select():
+    """Summary rows aggregated from gmail_receipts, in key order."""
+    r = GmailReceipt
+    matched = exists().where(GmailMatch.gmail_receipt_id == r.id)
+    domain = func.coalesce(r.merchant_domain, r.sender_domain)
+
+    return (
+        select(
+            r.connection_id,
+            r.merchant_key,
+            func.mode().within_group(domain),
+            func.mode().within_group(
+                func.coalesce(r.merchant_name, r.sender_name, r.sender_domain)
+            ),
+            func.count(),
+            func.count().filter(r.parsing_status == "parsed"),
+            func.count().filter(matched),
+            func.count().filter(r.parsing_status == "pending"),
+            func.count().filter(r.parsing_status == "failed"),
+            func.count().filter(r.parsing_status == "unparseable"),
+            func.count().filter(r.parse_method.like("vendor_%")),
+            func.count().filter(r.parse_method == "schema_org"),
+            func.count().filter(r.parse_method == "pattern"),
+            func.count().filter(r.parse_method == "llm"),
+            func.coalesce(func.sum(r.llm_cost_cents), 0),
+            func.coalesce(func.sum(r.total_amount), 0),
+            func.min(r.received_at),
+            func.max(r.received_at),
+            func.min(r.receipt_date),
+            func.max(r.receipt_date),
+        )
+        .where(*_summarised_receipts())
+        .group_by(r.connection_id, r.merchant_key)
+        # Upserts lock summary rows in a fixed order
+        .order_by(r.connection_id, r.merchant_key)
+    )
+
+
+SUMMARY_COLUMNS = [
+    "connection_id",
+    "merchant_normalized",
+    "merchant_domain",
+    "merchant_name",
+    "receipt_count",
+    "parsed_count",
+    "matched_count",
+    "pending_count",
+    "failed_count",
+    "unparseable_count",
+    "vendor_parsed_count",
+    "schema_parsed_count",
+    "pattern_parsed_count",
+    "llm_parsed_count",
+    "llm_cost_cents",
+    "total_amount",
+    "earliest_receipt",
+    "latest_receipt",
+    "min_receipt_date",
+    "max_receipt_date",
+]
+
+
+def _lock(session, merchant_keys: list | None) -> None:
+    """
+    Take the advisory locks of a refresh until the transaction ends.
+
+    Merchant refreshes hold the table lock shared and their merchants'
+    locks exclusively (in key order, so writers can't deadlock); a full
+    rebuild holds the table lock exclusively.
+    """
+    if merchant_keys is None:
+        session.execute(select(func.pg_advisory_xact_lock(SUMMARY_LOCK_ID)))
+        return
+    session.execute(select(func.pg_advisory_xact_lock_shared(SUMMARY_LOCK_ID)))
+    for key in sorted(merchant_keys):
+        session.execute(
+            select(func.pg_advisory_xact_lock(SUMMARY_LOCK_ID, func.hashtext(key)))
+        )
+
+
+def _refresh(session, merchant_keys: list | None) -> None:
+    """Upsert the summary rows of some (None: all) merchants, drop empty ones."""
+    # Locked before aggregating: the aggregate then sees the receipts of a
+    # concurrent writer that held the lock, once that writer commits
+    _lock(session, merchant_keys)
+
+    query = _summary_select()
+    if merchant_keys is not None:
+        query = query.where(GmailReceipt.merchant_key.in_(merchant_keys))
+
+    stmt = insert(GmailMerchantSummary).from_select(SUMMARY_COLUMNS, query)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["connection_id", "merchant_normalized"],
+        set_={
+            **{name: stmt.excluded[name] for name in SUMMARY_COLUMNS[2:]},
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+    # Merchants whose receipts were all deleted, flagged or moved elsewhere
+    stale = delete(GmailMerchantSummary).where(
+        ~exists().where(
+            GmailReceipt.connection_id == GmailMerchantSummary.connection_id,
+            GmailReceipt.merchant_key == GmailMerchantSummary.merchant_normalized,
+            *_summarised_receipts(),
+        )
+    )
+    if merchant_keys is not None:
+        stale = stale.where(GmailMerchantSummary.merchant_normalized.in_(merchant_keys))
+    session.execute(stale.execution_options(synchronize_session=False))
+
+
+# ============================================================================
+# MAINTENANCE
+# ============================================================================
+
+
+def receipt_merchant_keys(
+    session, receipt_ids: list = None, message_ids: list = None
+) -> set:
+    """
+    Merchant keys of receipts, looked up by id or Gmail message id.
+
+    Writers call this before changing receipts, so a receipt moving to
+    another merchant also refreshes the one it left.
+
+    Args:
+        session: Open SQLAlchemy session
+        receipt_ids: Receipt IDs
+        message_ids: Gmail message IDs
+
+    Returns:
+        Set of merchant keys
+    """
+    conditions = []
+    if receipt_ids:
+        conditions.append(GmailReceipt.id.in_(receipt_ids))
+    if message_ids:
+        conditions.append(GmailReceipt.message_id.in_(message_ids))
+    if not conditions:
+        return set()
+
+    return set(
+        session.execute(
+            select(GmailReceipt.merchant_key)
+            .where(or_(*conditions), GmailReceipt.merchant_key.isnot(None))
+            .distinct()
+        ).scalars()
+    )
+
+
+def refresh_receipt_merchants(
+    session, receipt_ids: list, previous_keys: set = frozenset()
+) -> int:
+    """
+    Re-aggregate the summary of the merchants some receipts belong to.
+
+    Runs in the caller's transaction after its writes are flushed. All
+    connections of those merchants are refreshed, since duplicate flags
+    can move across connections.
+
+    Args:
+        session: Open SQLAlchemy session (caller commits)
+        receipt_ids: Receipts that were written
+        previous_keys: Merchant keys of those receipts before the write
+
+    Returns:
+        Number of merchants refreshed
+    """
+    keys = {key for key in previous_keys if key}
+    keys |= receipt_merchant_keys(session, receipt_ids)
+    if not keys:
+        return 0
+    _refresh(session, sorted(keys))
+    return len(keys)
+
+
+def rebuild_gmail_merchant_summary() -> dict:
+    """
+    Re-aggregate the whole summary from gmail_receipts.
+
+    Returns:
+        dict with the number of summary 'rows' afterwards
+    """
+    with get_session() as session:
+        _refresh(session, None)
+        session.commit()
+        rows = session.execute(
+            select(func.count()).select_from(GmailMerchantSummary)
+        ).scalar_one()
+    return {"rows": rows}
+
+
+if __name__ == "__main__":
+    print(json.dumps(rebuild_gmail_merchant_summary(), indent=2))
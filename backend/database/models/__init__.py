@@ -30,9 +30,14 @@ from .enrichment import (
 )
 from .gmail import (
     GmailConnection,
+    GmailEmailBody,
     GmailEmailContent,
+    GmailMerchantSummary,
+    GmailParseResult,
     GmailReceipt,
+    GmailReceiptTemplate,
     PDFAttachment,
+    PDFStorageStat,
 )
 from .truelayer import (
     BankConnection,
@@ -86,7 +91,12 @@ __all__ = [
     "GmailConnection",
     "GmailReceipt",
     "GmailEmailContent",
+    "GmailEmailBody",
+    "GmailParseResult",
+    "GmailReceiptTemplate",
+    "GmailMerchantSummary",
     "PDFAttachment",
+    "PDFStorageStat",
     "TransactionEnrichmentSource",
     "EnrichmentCache",
     "RuleEnrichmentResult",
@@ -5,7 +5,11 @@ Maps to:
 - gmail_connections table
 - gmail_receipts table
 - gmail_email_content table
+- gmail_email_bodies table
+- gmail_parse_results table
+- gmail_receipt_templates table
 - pdf_attachments table
+- gmail_merchant_summary table
 - gmail_oauth_state table
 - gmail_sync_jobs table
 - gmail_parse_statistics table
@@ -19,14 +23,17 @@ See: .claude/docs/database/DATABASE_SCHEMA.md#23-gmail_connections
 """
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     CheckConstraint,
     Column,
+    Computed,
     Date,
     DateTime,
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     Numeric,
     String,
     Text,
@@ -120,6 +127,8 @@ class GmailReceipt(Base):
     llm_estimated_cost_cents = Column(Integer, nullable=True)
     llm_actual_cost_cents = Column(Integer, nullable=True)
     llm_parsed_at = Column(DateTime(timezone=True), nullable=True)
+    llm_latency_ms = Column(Integer, nullable=True)
+    # Legacy inline bodies; bodies now live in gmail_email_bodies
     body_html = Column(Text, nullable=True)
     body_text = Column(Text, nullable=True)
 
@@ -134,11 +143,54 @@ class GmailReceipt(Base):
     pdf_retry_count = Column(Integer, nullable=True, default=0, server_default="0")
     pdf_last_error = Column(Text, nullable=True)
 
+    # Hash of the parser inputs and the parser version string that produced the
+    # parsed fields (see mcp.gmail_parsing.parse_cache)
+    content_hash = Column(String(64), nullable=True)
+    parser_version = Column(String(255), nullable=True)
+
+    # Near-duplicate detection (see database.receipt_duplicates): blocking
+    # keys, MinHash of the line items, and the receipt this one repeats
+    amount_pence = Column(Integer, nullable=True)
+    received_bucket = Column(Integer, nullable=True)
+    line_items_minhash = Column(JSONB, nullable=True)
+    duplicate_of_id = Column(
+        Integer,
+        ForeignKey(
+            "gmail_receipts.id",
+            ondelete="SET NULL",
+            name="fk_gmail_receipts_duplicate_of_id",
+        ),
+        nullable=True,
+    )
+
+    # Sender domain and merchant grouping key, derived by Postgres on write
+    # (see database.gmail_merchant_summary)
+    sender_domain = Column(
+        String(255),
+        Computed("substring(sender_email from '@(.+)$')", persisted=True),
+    )
+    merchant_key = Column(
+        String(255),
+        Computed(
+            "coalesce(merchant_name_normalized, lower(split_part("
+            "coalesce(merchant_domain, substring(sender_email from '@(.+)$')), "
+            "'.', 1)))",
+            persisted=True,
+        ),
+    )
+
     __table_args__ = (
         Index("idx_gmail_receipts_connection", "connection_id"),
+        Index("idx_gmail_receipts_merchant_key", "merchant_key"),
         Index("idx_gmail_receipts_connection_date", "connection_id", "receipt_date"),
         Index("idx_gmail_receipts_merchant", "merchant_name_normalized"),
         Index("idx_gmail_receipts_amount_date", "total_amount", "receipt_date"),
+        Index(
+            "idx_gmail_receipts_duplicate_block",
+            "merchant_name_normalized",
+            "amount_pence",
+            "received_bucket",
+        ),
         Index(
             "idx_gmail_receipts_not_deleted",
             "id",
@@ -187,8 +239,12 @@ class GmailEmailContent(Base):
     date_header = Column(Text, nullable=True)
     list_unsubscribe = Column(Text, nullable=True)
     x_mailer = Column(Text, nullable=True)
+    # Inline bodies of rows written before the body store; new rows reference
+    # their bodies in gmail_email_bodies by hash instead
     body_html = Column(Text, nullable=True)
     body_text = Column(Text, nullable=True)
+    body_html_hash = Column(String(64), nullable=True)
+    body_text_hash = Column(String(64), nullable=True)
     snippet = Column(Text, nullable=True)
     attachments = Column(JSONB, nullable=True)
     size_estimate = Column(Integer, nullable=True)
@@ -204,6 +260,74 @@ class GmailEmailContent(Base):
         return f"<GmailEmailContent(id={self.id}, message_id={self.message_id}, subject={self.subject})>"
 
 
+class GmailEmailBody(Base):
+    """Compressed email body, stored once per distinct content (see email_bodies)."""
+
+    __tablename__ = "gmail_email_bodies"
+
+    content_hash = Column(String(64), primary_key=True)
+    codec = Column(String(10), nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=False)
+    stored_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Refreshed whenever a writer stores this body again; retention keys on it
+    last_seen_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<GmailEmailBody(content_hash={self.content_hash}, codec={self.codec}, stored_size={self.stored_size})>"
+
+
+class GmailParseResult(Base):
+    """Cached parse output keyed by email content hash and parser version."""
+
+    __tablename__ = "gmail_parse_results"
+
+    content_hash = Column(String(64), primary_key=True)
+    parser_version = Column(String(255), primary_key=True)
+    parse_result = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<GmailParseResult(content_hash={self.content_hash}, parser_version={self.parser_version})>"
+
+
+class GmailReceiptTemplate(Base):
+    """HTML template learned from a trusted parse of a sender's receipt."""
+
+    __tablename__ = "gmail_receipt_templates"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sender_domain = Column(String(255), nullable=False)
+    # Hash of the DOM shingle set; shingles kept for near-duplicate matching
+    fingerprint = Column(String(64), nullable=False)
+    shingles = Column(JSONB, nullable=False)
+    # field -> {path, shape, label, label_source, pattern[, date_format]}
+    field_paths = Column(JSONB, nullable=False)
+    merchant_name = Column(String(255))
+    merchant_name_normalized = Column(String(255))
+    currency_code = Column(String(3), default="GBP")
+    source = Column(String(20), nullable=False)  # 'llm' or 'user'
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "sender_domain", "fingerprint", name="uq_gmail_receipt_template_fingerprint"
+        ),
+        CheckConstraint(
+            "source IN ('llm', 'user')", name="ck_gmail_receipt_template_source"
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<GmailReceiptTemplate(id={self.id}, sender_domain={self.sender_domain}, fingerprint={self.fingerprint})>"
+
+
 class PDFAttachment(Base):
     """Metadata for PDF attachments stored in MinIO object storage."""
 
@@ -217,7 +341,8 @@ class PDFAttachment(Base):
     )
     message_id = Column(String(255), nullable=False)
     bucket_name = Column(String(100), nullable=True, default="receipts")
-    object_key = Column(String(500), nullable=False, unique=True)
+    # Attachments with identical content share one object
+    object_key = Column(String(500), nullable=False)
     filename = Column(String(255), nullable=False)
     content_hash = Column(String(64), nullable=False)
     size_bytes = Column(Integer, nullable=False)
@@ -234,12 +359,73 @@ class PDFAttachment(Base):
         UniqueConstraint("message_id", "filename", name="uq_pdf_message_filename"),
         Index("idx_pdf_attachments_receipt", "gmail_receipt_id"),
         Index("idx_pdf_attachments_hash", "content_hash"),
+        Index("idx_pdf_attachments_object_key", "object_key"),
     )
 
     def __repr__(self) -> str:
         return f"<PDFAttachment(id={self.id}, filename={self.filename}, size={self.size_bytes})>"
 
 
+class PDFStorageStat(Base):
+    """Running object count and size of the receipts bucket, per scope."""
+
+    __tablename__ = "pdf_storage_stats"
+
+    # 'total' (scope_key ''), 'vendor' (merchant) or 'month' (YYYY-MM)
+    scope = Column(String(20), primary_key=True)
+    scope_key = Column(String(255), primary_key=True)
+    object_count = Column(BigInteger, nullable=False, server_default="0")
+    total_size_bytes = Column(BigInteger, nullable=False, server_default="0")
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<PDFStorageStat(scope={self.scope}, scope_key={self.scope_key}, object_count={self.object_count})>"
+
+
+class GmailMerchantSummary(Base):
+    """Receipt counts and totals per connection and merchant."""
+
+    __tablename__ = "gmail_merchant_summary"
+
+    connection_id = Column(
+        Integer,
+        ForeignKey("gmail_connections.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # GmailReceipt.merchant_key of the summarised receipts
+    merchant_normalized = Column(String(255), primary_key=True)
+    merchant_domain = Column(String(255), nullable=True)
+    merchant_name = Column(String(255), nullable=True)
+    receipt_count = Column(Integer, nullable=False, server_default="0")
+    parsed_count = Column(Integer, nullable=False, server_default="0")
+    matched_count = Column(Integer, nullable=False, server_default="0")
+    pending_count = Column(Integer, nullable=False, server_default="0")
+    failed_count = Column(Integer, nullable=False, server_default="0")
+    unparseable_count = Column(Integer, nullable=False, server_default="0")
+    vendor_parsed_count = Column(Integer, nullable=False, server_default="0")
+    schema_parsed_count = Column(Integer, nullable=False, server_default="0")
+    pattern_parsed_count = Column(Integer, nullable=False, server_default="0")
+    llm_parsed_count = Column(Integer, nullable=False, server_default="0")
+    llm_cost_cents = Column(BigInteger, nullable=False, server_default="0")
+    total_amount = Column(Numeric(14, 2), nullable=False, server_default="0")
+    earliest_receipt = Column(DateTime(timezone=True), nullable=True)
+    latest_receipt = Column(DateTime(timezone=True), nullable=True)
+    min_receipt_date = Column(Date, nullable=True)
+    max_receipt_date = Column(Date, nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (
+        Index("idx_gmail_merchant_summary_merchant", "merchant_normalized"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<GmailMerchantSummary(connection_id={self.connection_id}, merchant_normalized={self.merchant_normalized}, receipt_count={self.receipt_count})>"
+
+
 # Alias for compatibility with imports
 PdfAttachment = PDFAttachment
 
@@ -293,20 +479,30 @@ class GmailSyncJob(Base):
     sync_from_date = Column(Date, nullable=True)
     sync_to_date = Column(Date, nullable=True)
     stats = Column(JSONB, nullable=True, server_default="{}")
+    # Resume point: list page token, committed offset within it, date cursor
+    checkpoint = Column(JSONB, nullable=True)
+    # Set on month-sized chunk jobs created by a chunked full sync
+    parent_job_id = Column(
+        Integer,
+        ForeignKey("gmail_sync_jobs.id", ondelete="CASCADE"),
+        nullable=True,
+    )
 
     __table_args__ = (
         Index("idx_gmail_sync_jobs_connection", "connection_id"),
+        Index("idx_gmail_sync_jobs_parent", "parent_job_id"),
         Index(
             "idx_gmail_sync_jobs_status",
             "status",
             postgresql_where=Column("status").in_(["queued", "running"]),
         ),
         CheckConstraint(
-            "status IN ('queued', 'running', 'completed', 'failed', 'cancelled')",
+            "status IN ('queued', 'running', 'retrying', 'completed', 'failed', "
+            "'cancelled')",
             name="gmail_sync_jobs_status_check",
         ),
         CheckConstraint(
-            "job_type IN ('full', 'incremental')",
+            "job_type IN ('full', 'incremental', 'chunk')",
             name="gmail_sync_jobs_job_type_check",
         ),
     )
@@ -34,6 +34,7 @@ from sqlalchemy import (
     Numeric,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
@@ -452,6 +453,8 @@ class TrueLayerImportProgress(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(Text, nullable=True)
     metadata_ = Column("metadata", JSONB, nullable=True, server_default="{}")
+    # Date window and page cursor after the last committed page (for resuming)
+    checkpoint = Column(JSONB, nullable=True)
     created_at = Column(
         DateTime(timezone=True), server_default=func.current_timestamp()
     )
@@ -469,6 +472,7 @@ class TrueLayerImportProgress(Base):
         Index("idx_import_progress_job_id", "job_id"),
         Index("idx_import_progress_account_id", "account_id"),
         Index("idx_import_progress_status", "progress_status"),
+        UniqueConstraint("job_id", "account_id", name="uq_import_progress_job_account"),
         CheckConstraint(
             "progress_status IN ('pending', 'syncing', 'completed', 'failed')",
             name="valid_status",
@@ -10,7 +10,7 @@ from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import insert
 
 from .base import get_session
-from .models.gmail import GmailReceipt, PDFAttachment
+from .models.gmail import GmailReceipt, PDFAttachment, PDFStorageStat
 
 # ============================================================================
 # PDF ATTACHMENT FUNCTIONS (MinIO storage)
@@ -59,6 +59,53 @@ def save_pdf_attachment(
         return attachment_id
 
 
+def save_pdf_attachments_bulk(attachments: list) -> int:
+    """
+    Save many PDF attachment records in one statement.
+
+    Args:
+        attachments: List of dicts with the save_pdf_attachment() arguments
+
+    Returns:
+        Number of rows written
+    """
+    if not attachments:
+        return 0
+
+    # ON CONFLICT cannot touch the same row twice in one statement
+    unique = {(a["message_id"], a["filename"]): a for a in attachments}
+
+    with get_session() as session:
+        stmt = insert(PDFAttachment).values(
+            [
+                {
+                    "gmail_receipt_id": a["gmail_receipt_id"],
+                    "message_id": a["message_id"],
+                    "bucket_name": a["bucket_name"],
+                    "object_key": a["object_key"],
+                    "filename": a["filename"],
+                    "content_hash": a["content_hash"],
+                    "size_bytes": a["size_bytes"],
+                    "etag": a.get("etag"),
+                }
+                for a in unique.values()
+            ]
+        )
+        result = session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["message_id", "filename"],
+                set_={
+                    "object_key": stmt.excluded.object_key,
+                    "content_hash": stmt.excluded.content_hash,
+                    "size_bytes": stmt.excluded.size_bytes,
+                    "etag": stmt.excluded.etag,
+                },
+            )
+        )
+        session.commit()
+        return result.rowcount
+
+
 def get_pdf_attachment_by_hash(content_hash: str) -> dict | None:
     """Check if a PDF with this content hash already exists (for deduplication)."""
     with get_session() as session:
@@ -164,7 +211,12 @@ def get_pdf_storage_stats() -> dict:
 
 
 def delete_pdf_attachment(attachment_id: int) -> bool:
-    """Delete a PDF attachment record (MinIO object should be deleted separately)."""
+    """
+    Delete a PDF attachment record.
+
+    The MinIO object is deleted separately with minio_client.delete_pdf(),
+    which keeps it while other attachments still share it.
+    """
     with get_session() as session:
         attachment = session.get(PDFAttachment, attachment_id)
         if attachment:
@@ -174,4 +226,119 @@ def delete_pdf_attachment(attachment_id: int) -> bool:
         return False
 
 
+def count_pdf_attachments_for_object(object_key: str) -> int:
+    """Number of attachment records pointing at a MinIO object."""
+    with get_session() as session:
+        return (
+            session.query(func.count(PDFAttachment.id))
+            .filter(PDFAttachment.object_key == object_key)
+            .scalar()
+        )
+
+
+# ============================================================================
+# PDF STORAGE COUNTERS (receipts bucket totals)
+# ============================================================================
+
+
+def _storage_stat_rows(scopes: dict) -> list:
+    """Flatten {scope: {scope_key: (count, size)}} into table rows."""
+    return [
+        {
+            "scope": scope,
+            "scope_key": scope_key,
+            "object_count": count,
+            "total_size_bytes": size,
+        }
+        for scope, totals in scopes.items()
+        for scope_key, (count, size) in totals.items()
+    ]
+
+
+def update_pdf_storage_stats(
+    count_delta: int, size_delta: int, vendor: str, month: str
+) -> None:
+    """
+    Apply one stored or deleted object to the bucket counters.
+
+    The total, vendor and month counters move together in a single
+    INSERT ... ON CONFLICT statement.
+
+    Args:
+        count_delta: +1 for a stored object, -1 for a deleted one
+        size_delta: Object size in bytes, negative for a deleted object
+        vendor: Vendor scope key (merchant)
+        month: Month scope key (YYYY-MM)
+    """
+    delta = (count_delta, size_delta)
+    rows = _storage_stat_rows(
+        {"total": {"": delta}, "vendor": {vendor: delta}, "month": {month: delta}}
+    )
+    table = PDFStorageStat.__table__
+    stmt = insert(PDFStorageStat).values(rows)
+    with get_session() as session:
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["scope", "scope_key"],
+                set_={
+                    "object_count": table.c.object_count + stmt.excluded.object_count,
+                    "total_size_bytes": table.c.total_size_bytes
+                    + stmt.excluded.total_size_bytes,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        session.commit()
+
+
+def get_pdf_storage_counters() -> dict | None:
+    """
+    Read the bucket counters.
+
+    Returns:
+        Dict with object_count, total_size_bytes, by_vendor, by_month and
+        updated_at, or None if the counters were never reconciled.
+    """
+    with get_session() as session:
+        rows = session.query(PDFStorageStat).all()
+
+        total = next((r for r in rows if r.scope == "total"), None)
+        if total is None:
+            return None
+
+        def breakdown(scope):
+            return {
+                r.scope_key: {
+                    "object_count": r.object_count,
+                    "total_size_bytes": r.total_size_bytes,
+                }
+                for r in rows
+                if r.scope == scope and r.object_count > 0
+            }
+
+        return {
+            "object_count": total.object_count,
+            "total_size_bytes": total.total_size_bytes,
+            "by_vendor": breakdown("vendor"),
+            "by_month": breakdown("month"),
+            "updated_at": total.updated_at,
+        }
+
+
+def replace_pdf_storage_stats(scopes: dict) -> None:
+    """
+    Overwrite the bucket counters with freshly counted totals.
+
+    Args:
+        scopes: Dict of scope -> {scope_key: (object_count, total_size_bytes)}
+            for 'total' (key ''), 'vendor' and 'month'
+    """
+    rows = _storage_stat_rows(scopes)
+    with get_session() as session:
+        session.query(PDFStorageStat).delete(synchronize_session=False)
+        if rows:
+            session.execute(insert(PDFStorageStat).values(rows))
+        session.commit()
+
+
 # ============================================================================
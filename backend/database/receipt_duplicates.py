@@ -0,0 +1,403 @@
+"""
+Receipt Duplicates - Indexed Near-Duplicate Detection
+
+Several emails often describe one purchase (order confirmation, dispatch
+note, invoice). They share the merchant and amount, arrive within minutes
+of each other and list the same items. Receipts are flagged at insert time
+so matching and analytics only ever see the first email of a purchase:
+
+- Blocking: each receipt stores its amount in pence and a 5-minute bucket
+  of received_at, so candidates come from an index lookup on
+  (merchant_name_normalized, amount_pence, received_bucket) over the
+  receipt's bucket and its neighbours, never a scan of the merchant.
+- Similarity: each receipt stores a MinHash signature of its line items;
+  candidates within DUPLICATE_WINDOW_MINUTES whose signatures agree on at
+  least DUPLICATE_SIMILARITY of their positions are duplicates.
+
+The earliest receipt of a purchase is the original; later ones point at it
+through duplicate_of_id. Receipts without line items are never flagged,
+since two same-priced purchases minutes apart can't be told apart. When an
+original is deleted (soft or hard), its duplicates are re-flagged without
+it, so the earliest remaining one becomes the new original.
+
+Receipts stored before detection (or whose keys went stale) are flagged by
+backfill_receipt_duplicates():
+
+    python -m database.receipt_duplicates
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+from datetime import UTC, datetime
+from decimal import Decimal
+
+from sqlalchemy import select, tuple_, update
+
+from .base import get_session
+from .models.gmail import GmailReceipt
+
+DUPLICATE_WINDOW_MINUTES = 5
+DUPLICATE_SIMILARITY = float(os.getenv("GMAIL_DUPLICATE_SIMILARITY", "0.8"))
+
+# received_bucket width; a window spans the receipt's bucket and neighbours
+BUCKET_SECONDS = DUPLICATE_WINDOW_MINUTES * 60
+
+MINHASH_PERMUTATIONS = 64
+MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+    for rng in [random.Random(20240305)]
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# ============================================================================
+# KEYS
+# ============================================================================
+
+
+def _line_item_shingles(line_items) -> set:
+    """Words of the item names plus the item prices."""
+    if isinstance(line_items, str):
+        try:
+            line_items = json.loads(line_items)
+        except json.JSONDecodeError:
+            return set()
+    if isinstance(line_items, dict):
+        line_items = line_items.get("items")
+    if not isinstance(line_items, list):
+        return set()
+
+    shingles = set()
+    for item in line_items:
+        if isinstance(item, dict):
+            shingles.update(WORD_RE.findall(str(item.get("name") or "").lower()))
+            if item.get("price") is not None:
+                with contextlib.suppress(TypeError, ValueError):
+                    shingles.add(f"price:{float(item['price']):.2f}")
+        elif item:
+            shingles.update(WORD_RE.findall(str(item).lower()))
+    return shingles
+
+
+def line_items_minhash(line_items) -> list | None:
+    """
+    MinHash signature of a receipt's line items.
+
+    Args:
+        line_items: Line items list (or its JSON)
+
+    Returns:
+        List of MINHASH_PERMUTATIONS ints, or None without line items
+    """
+    shingles = _line_item_shingles(line_items)
+    if not shingles:
+        return None
+
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in shingles
+    ]
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def minhash_similarity(first: list, second: list) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not first or not second or len(first) != len(second):
+        return 0.0
+    return sum(a == b for a, b in zip(first, second, strict=True)) / len(first)
+
+
+def _amount_pence(amount) -> int | None:
+    """Total amount in pence (None for a missing or zero amount)."""
+    if not amount:
+        return None
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1)))
+
+
+def _received_bucket(received_at) -> int | None:
+    """5-minute bucket of a received timestamp (naive times are UTC)."""
+    if not received_at:
+        return None
+    if isinstance(received_at, str):
+        received_at = datetime.fromisoformat(received_at.replace("Z", "+00:00"))
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=UTC)
+    return int(received_at.timestamp()) // BUCKET_SECONDS
+
+
+def duplicate_keys(receipt_data: dict) -> dict:
+    """
+    Blocking and similarity columns for a receipt about to be stored.
+
+    Args:
+        receipt_data: Receipt dict with total_amount, received_at and line_items
+
+    Returns:
+        Dict with amount_pence, received_bucket and line_items_minhash
+    """
+    return {
+        "amount_pence": _amount_pence(receipt_data.get("total_amount")),
+        "received_bucket": _received_bucket(receipt_data.get("received_at")),
+        "line_items_minhash": line_items_minhash(receipt_data.get("line_items")),
+    }
+
+
+# ============================================================================
+# DETECTION
+# ============================================================================
+
+
+def _is_duplicate(original, receipt) -> bool:
+    """Check whether receipt repeats the purchase of an earlier original."""
+    gap = (receipt.received_at - original.received_at).total_seconds()
+    return (
+        gap <= DUPLICATE_WINDOW_MINUTES * 60
+        and minhash_similarity(original.line_items_minhash, receipt.line_items_minhash)
+        >= DUPLICATE_SIMILARITY
+    )
+
+
+def flag_receipt_duplicates(session, receipt_ids: list) -> int:
+    """
+    Flag receipts that repeat an earlier receipt's purchase.
+
+    Runs in the caller's transaction, so receipts inserted in it are seen.
+    Each receipt is compared with the receipts in its block (same merchant
+    and amount, own and neighbouring time buckets) and points at the
+    earliest one it duplicates, or at nothing. Existing originals in the
+    block that turn out to repeat one of these receipts are flagged too.
+
+    Args:
+        session: Open SQLAlchemy session (caller commits)
+        receipt_ids: Receipts to check
+
+    Returns:
+        Number of receipts whose duplicate_of_id changed
+    """
+    if not receipt_ids:
+        return 0
+
+    columns = (
+        GmailReceipt.id,
+        GmailReceipt.merchant_name_normalized,
+        GmailReceipt.amount_pence,
+        GmailReceipt.received_bucket,
+        GmailReceipt.received_at,
+        GmailReceipt.line_items_minhash,
+        GmailReceipt.duplicate_of_id,
+    )
+    targets = (
+        session.query(*columns)
+        .filter(
+            GmailReceipt.id.in_(receipt_ids),
+            GmailReceipt.merchant_name_normalized.isnot(None),
+            GmailReceipt.amount_pence.isnot(None),
+            GmailReceipt.received_bucket.isnot(None),
+        )
+        .all()
+    )
+
+    blocks = {
+        (t.merchant_name_normalized, t.amount_pence, t.received_bucket + offset)
+        for t in targets
+        for offset in (-1, 0, 1)
+    }
+    if not blocks:
+        return 0
+
+    rows = (
+        session.query(*columns)
+        .filter(
+            tuple_(
+                GmailReceipt.merchant_name_normalized,
+                GmailReceipt.amount_pence,
+                GmailReceipt.received_bucket,
+            ).in_(list(blocks)),
+            GmailReceipt.deleted_at.is_(None),
+        )
+        .all()
+    )
+
+    target_ids = {t.id for t in targets}
+    groups = {}
+    for row in rows:
+        key = (row.merchant_name_normalized, row.amount_pence)
+        groups.setdefault(key, []).append(row)
+
+    changes = {}
+    for group in groups.values():
+        group.sort(key=lambda r: (r.received_at, r.id))
+        originals = []
+        for row in group:
+            if row.id not in target_ids and row.duplicate_of_id is not None:
+                continue
+            original = next(
+                (o for o in originals if _is_duplicate(o, row)),
+                None,
+            )
+            # Existing originals only give way to one of the checked receipts
+            if row.id not in target_ids and (
+                original is None or original.id not in target_ids
+            ):
+                originals.append(row)
+                continue
+
+            duplicate_of_id = original.id if original else None
+            if duplicate_of_id != row.duplicate_of_id:
+                changes[row.id] = duplicate_of_id
+            if original is None:
+                originals.append(row)
+
+    if changes:
+        session.execute(
+            update(GmailReceipt),
+            [
+                {"id": receipt_id, "duplicate_of_id": duplicate_of_id}
+                for receipt_id, duplicate_of_id in changes.items()
+            ],
+        )
+        # Duplicates of a receipt that is now a duplicate itself follow it
+        for receipt_id, duplicate_of_id in changes.items():
+            if duplicate_of_id is not None:
+                session.query(GmailReceipt).filter(
+                    GmailReceipt.duplicate_of_id == receipt_id
+                ).update(
+                    {GmailReceipt.duplicate_of_id: duplicate_of_id},
+                    synchronize_session=False,
+                )
+    return len(changes)
+
+
+def duplicate_ids_of(session, receipt_ids: list) -> list:
+    """
+    IDs of the receipts flagged as duplicates of some receipts.
+
+    Args:
+        session: Open SQLAlchemy session
+        receipt_ids: Original receipt IDs
+
+    Returns:
+        List of duplicate receipt IDs (the originals themselves excluded)
+    """
+    if not receipt_ids:
+        return []
+    return list(
+        session.execute(
+            select(GmailReceipt.id).where(
+                GmailReceipt.duplicate_of_id.in_(receipt_ids),
+                GmailReceipt.id.notin_(receipt_ids),
+            )
+        ).scalars()
+    )
+
+
+def promote_duplicates(session, duplicate_ids: list) -> int:
+    """
+    Re-flag the duplicates of originals that were deleted.
+
+    Runs in the caller's transaction after the originals are soft deleted
+    (and flushed) or hard deleted. The duplicates are cleared and checked
+    again against the receipts still present: the earliest of them becomes
+    the original and the rest point at it (or at nothing, if it no longer
+    matches them).
+
+    Args:
+        session: Open SQLAlchemy session (caller commits)
+        duplicate_ids: Receipts from duplicate_ids_of(), taken before the
+            originals were deleted
+
+    Returns:
+        Number of receipts flagged as duplicates again
+    """
+    if not duplicate_ids:
+        return 0
+    session.execute(
+        update(GmailReceipt)
+        .where(GmailReceipt.id.in_(duplicate_ids))
+        .values(duplicate_of_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    return flag_receipt_duplicates(session, duplicate_ids)
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+
+def _backfill_batch(session, after_id: int, batch_size: int) -> tuple:
+    """Recompute the keys of one batch of receipts and flag its duplicates."""
+    rows = (
+        session.query(
+            GmailReceipt.id,
+            GmailReceipt.total_amount,
+            GmailReceipt.received_at,
+            GmailReceipt.line_items,
+        )
+        .filter(GmailReceipt.id > after_id, GmailReceipt.deleted_at.is_(None))
+        .order_by(GmailReceipt.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not rows:
+        return 0, None, 0
+
+    session.execute(
+        update(GmailReceipt),
+        [
+            {
+                "id": r.id,
+                **duplicate_keys(
+                    {
+                        "total_amount": r.total_amount,
+                        "received_at": r.received_at,
+                        "line_items": r.line_items,
+                    }
+                ),
+            }
+            for r in rows
+        ],
+    )
+    flagged = flag_receipt_duplicates(session, [r.id for r in rows])
+    return len(rows), rows[-1].id, flagged
+
+
+def backfill_receipt_duplicates(batch_size: int = 1000, progress_callback=None) -> dict:
+    """
+    Compute duplicate keys and flag duplicates across all stored receipts.
+
+    Walks gmail_receipts in id order; each batch commits on its own, so the
+    backfill can be interrupted and rerun. Rerun it after bulk edits that
+    bypass the save/reparse functions.
+
+    Args:
+        batch_size: Receipts per transaction
+        progress_callback: Optional callable receiving the running stats
+
+    Returns:
+        dict with 'receipts' checked and 'changed' duplicate flags
+    """
+    stats = {"receipts": 0, "changed": 0}
+    after_id = 0
+    while True:
+        with get_session() as session:
+            count, after_id, changed = _backfill_batch(session, after_id, batch_size)
+            session.commit()
+        if not count:
+            break
+        stats["receipts"] += count
+        stats["changed"] += changed
+        if progress_callback:
+            progress_callback(stats)
+    return stats
+
+
+if __name__ == "__main__":
+    print(json.dumps(backfill_receipt_duplicates(), indent=2))
@@ -0,0 +1,305 @@
+"""
+Retention - Chunked Cleanup of Expired Rows
+
+Each RetentionPolicy names a table, the rows it expires (age cutoff plus
+extra conditions) and how long they are kept. purge_policy() deletes them
+in keyset-ordered chunks: a chunk of keys is selected after the last key
+deleted, deleted and committed, then the purge sleeps before the next
+chunk. Locks are held for one chunk at a time and WAL is written at a
+steady rate, instead of one long transaction deleting everything.
+
+Retention periods come from RETENTION_<POLICY>_DAYS (0 disables a policy);
+chunk size and pause from RETENTION_CHUNK_SIZE and RETENTION_THROTTLE_SECONDS.
+run_retention() applies every policy and is scheduled daily by celery beat:
+
+    python -m database.retention
+"""
+
+import json
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, exists, or_, select
+
+from .base import get_session
+from .gmail_merchant_summary import refresh_receipt_merchants
+from .models.gmail import (
+    GmailEmailBody,
+    GmailEmailContent,
+    GmailMatch,
+    GmailOAuthState,
+    GmailParseStatistic,
+    GmailProcessingError,
+    GmailReceipt,
+    GmailSyncJob,
+    PDFAttachment,
+)
+from .models.truelayer import WebhookEvent
+from .receipt_duplicates import duplicate_ids_of, promote_duplicates
+
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "1000"))
+RETENTION_THROTTLE_SECONDS = float(os.getenv("RETENTION_THROTTLE_SECONDS", "0.2"))
+
+
+def _retention_days(name: str, default: int) -> int:
+    """Retention period of a policy, overridable per environment."""
+    return int(os.getenv(f"RETENTION_{name.upper()}_DAYS", str(default)))
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Rows of one table that expire.
+
+    Attributes:
+        name: Policy name (also the RETENTION_<NAME>_DAYS suffix)
+        model: Model whose rows are deleted
+        key: Unique, indexed column the purge walks in order
+        timestamp: Column compared with the cutoff (None: no age limit)
+        days: Retention period in days (0 disables the policy)
+        conditions: Extra conditions a row must meet to expire
+        dependents: Callable (session, keys) -> list of rows outside a chunk
+            that refer to it, collected before the chunk is deleted
+        after_delete: Called with (session, dependents) once a chunk is
+            deleted, in the same transaction
+    """
+
+    name: str
+    model: type
+    key: object
+    timestamp: object
+    days: int
+    conditions: Callable[[], list] = field(default=list)
+    dependents: Callable[[object, list], list] | None = None
+    after_delete: Callable[[object, list], None] | None = None
+
+    def filters(self, cutoff: datetime) -> list:
+        """WHERE conditions selecting expired rows."""
+        filters = list(self.conditions())
+        if self.timestamp is not None:
+            filters.append(self.timestamp < cutoff)
+        return filters
+
+
+def _unmatched_unparseable_receipt():
+    """Receipts nothing refers to and parsing gave up on."""
+    return [
+        GmailReceipt.parsing_status == "unparseable",
+        ~exists().where(GmailMatch.gmail_receipt_id == GmailReceipt.id),
+        # Stored PDFs are removed with their objects, not by the purge
+        ~exists().where(PDFAttachment.gmail_receipt_id == GmailReceipt.id),
+    ]
+
+
+def _promote_receipt_duplicates(session, duplicate_ids: list) -> None:
+    """Re-flag duplicates whose original was purged (the FK cleared them)."""
+    promote_duplicates(session, duplicate_ids)
+    refresh_receipt_merchants(session, duplicate_ids)
+
+
+def _content_without_receipt():
+    """Email content of messages that never became (or no longer are) receipts."""
+    return [
+        ~exists().where(GmailReceipt.message_id == GmailEmailContent.message_id),
+    ]
+
+
+def _unreferenced_body():
+    """Stored bodies no email content row references."""
+    return [
+        ~exists().where(
+            or_(
+                GmailEmailContent.body_html_hash == GmailEmailBody.content_hash,
+                GmailEmailContent.body_text_hash == GmailEmailBody.content_hash,
+            )
+        )
+    ]
+
+
+def _finished_sync_job():
+    """Top-level sync jobs that have finished (chunk jobs cascade with them)."""
+    return [
+        GmailSyncJob.status.in_(["completed", "failed", "cancelled"]),
+        GmailSyncJob.parent_job_id.is_(None),
+    ]
+
+
+# Applied in order: content goes before the bodies it references
+RETENTION_POLICIES = {
+    policy.name: policy
+    for policy in [
+        RetentionPolicy(
+            name="gmail_receipts",
+            model=GmailReceipt,
+            key=GmailReceipt.id,
+            timestamp=GmailReceipt.created_at,
+            days=_retention_days("gmail_receipts", 90),
+            conditions=_unmatched_unparseable_receipt,
+            dependents=duplicate_ids_of,
+            after_delete=_promote_receipt_duplicates,
+        ),
+        RetentionPolicy(
+            name="gmail_email_content",
+            model=GmailEmailContent,
+            key=GmailEmailContent.id,
+            timestamp=GmailEmailContent.fetched_at,
+            days=_retention_days("gmail_email_content", 30),
+            conditions=_content_without_receipt,
+        ),
+        RetentionPolicy(
+            name="gmail_email_bodies",
+            model=GmailEmailBody,
+            key=GmailEmailBody.content_hash,
+            # Writers refresh last_seen_at on bodies they reuse; the purge
+            # rechecks it under the row lock, so a body stored again while
+            # the purge runs survives until its content row commits
+            timestamp=GmailEmailBody.last_seen_at,
+            days=_retention_days("gmail_email_bodies", 1),
+            conditions=_unreferenced_body,
+        ),
+        RetentionPolicy(
+            name="gmail_parse_statistics",
+            model=GmailParseStatistic,
+            key=GmailParseStatistic.id,
+            timestamp=GmailParseStatistic.created_at,
+            days=_retention_days("gmail_parse_statistics", 90),
+        ),
+        RetentionPolicy(
+            name="gmail_processing_errors",
+            model=GmailProcessingError,
+            key=GmailProcessingError.id,
+            timestamp=GmailProcessingError.occurred_at,
+            days=_retention_days("gmail_processing_errors", 90),
+        ),
+        RetentionPolicy(
+            name="gmail_sync_jobs",
+            model=GmailSyncJob,
+            key=GmailSyncJob.id,
+            timestamp=GmailSyncJob.created_at,
+            days=_retention_days("gmail_sync_jobs", 30),
+            conditions=_finished_sync_job,
+        ),
+        RetentionPolicy(
+            name="gmail_oauth_state",
+            model=GmailOAuthState,
+            key=GmailOAuthState.id,
+            timestamp=GmailOAuthState.expires_at,
+            days=_retention_days("gmail_oauth_state", 1),
+        ),
+        RetentionPolicy(
+            name="webhook_events",
+            model=WebhookEvent,
+            key=WebhookEvent.id,
+            timestamp=WebhookEvent.received_at,
+            days=_retention_days("webhook_events", 30),
+            conditions=lambda: [WebhookEvent.processed.is_(True)],
+        ),
+    ]
+}
+
+
+def purge_policy(
+    policy: RetentionPolicy,
+    cutoff: datetime = None,
+    chunk_size: int = None,
+    throttle_seconds: float = None,
+    progress_callback=None,
+) -> int:
+    """
+    Delete a policy's expired rows in keyset-ordered chunks.
+
+    Each chunk commits on its own, so an interrupted purge keeps what it
+    deleted and a rerun continues with the rest.
+
+    Args:
+        policy: Policy to apply
+        cutoff: Rows older than this expire (default: now minus policy.days)
+        chunk_size: Rows deleted per transaction
+        throttle_seconds: Pause between chunks
+        progress_callback: Optional callable receiving (policy name, deleted)
+
+    Returns:
+        Number of rows deleted
+    """
+    chunk_size = chunk_size or RETENTION_CHUNK_SIZE
+    if throttle_seconds is None:
+        throttle_seconds = RETENTION_THROTTLE_SECONDS
+    if cutoff is None:
+        cutoff = datetime.now(UTC) - timedelta(days=policy.days)
+
+    filters = policy.filters(cutoff)
+    deleted = 0
+    after = None
+    while True:
+        with get_session() as session:
+            query = select(policy.key).where(*filters)
+            if after is not None:
+                query = query.where(policy.key > after)
+            keys = list(
+                session.execute(query.order_by(policy.key).limit(chunk_size)).scalars()
+            )
+            if not keys:
+                break
+
+            dependents = policy.dependents(session, keys) if policy.dependents else []
+
+            # Conditions are rechecked, rows may have changed since selection
+            result = session.execute(
+                delete(policy.model)
+                .where(policy.key.in_(keys), *filters)
+                .execution_options(synchronize_session=False)
+            )
+            if dependents and policy.after_delete:
+                policy.after_delete(session, dependents)
+            session.commit()
+
+        deleted += result.rowcount
+        after = keys[-1]
+        if progress_callback:
+            progress_callback(policy.name, deleted)
+        if len(keys) < chunk_size:
+            break
+        if throttle_seconds:
+            time.sleep(throttle_seconds)
+
+    return deleted
+
+
+def run_retention(
+    names: list = None,
+    chunk_size: int = None,
+    throttle_seconds: float = None,
+    progress_callback=None,
+) -> dict:
+    """
+    Apply retention policies.
+
+    Args:
+        names: Policies to apply (default: all enabled ones, in order)
+        chunk_size: Rows deleted per transaction
+        throttle_seconds: Pause between chunks
+        progress_callback: Optional callable receiving (policy name, deleted)
+
+    Returns:
+        Dict of policy name -> rows deleted
+    """
+    results = {}
+    for name, policy in RETENTION_POLICIES.items():
+        if names is not None and name not in names:
+            continue
+        if policy.days <= 0:
+            continue
+        results[name] = purge_policy(
+            policy,
+            chunk_size=chunk_size,
+            throttle_seconds=throttle_seconds,
+            progress_callback=progress_callback,
+        )
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_retention(), indent=2))
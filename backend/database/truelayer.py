@@ -8,7 +8,7 @@ Modules:
 - Bank connection management (save_bank_connection, get_bank_connection, etc.)
 - Account operations (save_account, get_accounts, etc.)
 - Card operations (save_card, get_cards, etc.)
-- Transaction operations (insert_truelayer_transaction, get_all_truelayer_transactions, etc.)
+- Transaction operations (insert_truelayer_transactions_bulk, get_all_truelayer_transactions, etc.)
 - Import job tracking (create_import_job, update_import_job_status, etc.)
 
 NOTE: Some functions reference tables without models (cards, webhooks, oauth_state, import_jobs).
@@ -377,6 +377,56 @@ def insert_truelayer_transaction(
             return None
 
 
+def insert_truelayer_transactions_bulk(transactions: list) -> list:
+    """Insert a page of TrueLayer transactions in one statement.
+
+    Transactions already stored (or repeated within the page) are skipped by
+    ON CONFLICT (normalised_provider_transaction_id) DO NOTHING, so callers
+    count duplicates as the difference between rows sent and IDs returned.
+
+    Args:
+        transactions: List of dicts with the insert_truelayer_transaction()
+            arguments (account_id, transaction_id, normalised_provider_id, ...)
+
+    Returns:
+        List of (id, normalised_provider_transaction_id) of inserted rows
+    """
+    if not transactions:
+        return []
+
+    rows = [
+        {
+            "account_id": t["account_id"],
+            "transaction_id": t.get("transaction_id"),
+            "normalised_provider_transaction_id": t["normalised_provider_id"],
+            "timestamp": t.get("timestamp"),
+            "description": t.get("description"),
+            "amount": t.get("amount"),
+            "currency": t.get("currency", "GBP"),
+            "transaction_type": t.get("transaction_type"),
+            "transaction_category": t.get("transaction_category"),
+            "merchant_name": t.get("merchant_name"),
+            "running_balance": t.get("running_balance"),
+            "metadata_": t.get("metadata"),
+            "pre_enrichment_status": t.get("pre_enrichment_status", "None"),
+        }
+        for t in transactions
+    ]
+    stmt = (
+        insert(TrueLayerTransaction)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["normalised_provider_transaction_id"])
+        .returning(
+            TrueLayerTransaction.id,
+            TrueLayerTransaction.normalised_provider_transaction_id,
+        )
+    )
+    with get_session() as session:
+        inserted = [tuple(row) for row in session.execute(stmt)]
+        session.commit()
+        return inserted
+
+
 def get_all_truelayer_transactions(account_id=None):
     """Get all transactions synced from TrueLayer."""
     with get_session() as session:
@@ -1050,6 +1100,76 @@ def insert_truelayer_card_transaction(
             return None
 
 
+def insert_truelayer_card_transactions_bulk(transactions: list) -> list:
+    """Insert a page of TrueLayer card transactions, skipping stored ones.
+
+    Card transactions have no unique key to conflict on, so the page's
+    normalised_provider_ids are checked in one query and only new rows are
+    inserted, in one statement.
+
+    Args:
+        transactions: List of dicts with the insert_truelayer_card_transaction()
+            arguments (card_id, transaction_id, normalised_provider_id, ...)
+
+    Returns:
+        List of (id, normalised_provider_id) of inserted rows
+    """
+    from .models.truelayer import TrueLayerCardTransaction
+
+    if not transactions:
+        return []
+
+    with get_session() as session:
+        provider_ids = {t["normalised_provider_id"] for t in transactions}
+        seen = set(
+            session.execute(
+                select(TrueLayerCardTransaction.normalised_provider_id).where(
+                    TrueLayerCardTransaction.normalised_provider_id.in_(provider_ids)
+                )
+            ).scalars()
+        )
+
+        rows = []
+        for t in transactions:
+            if t["normalised_provider_id"] in seen:
+                continue
+            seen.add(t["normalised_provider_id"])
+            metadata = t.get("metadata")
+            rows.append(
+                {
+                    "card_id": t["card_id"],
+                    "transaction_id": t.get("transaction_id"),
+                    "normalised_provider_id": t["normalised_provider_id"],
+                    "timestamp": t.get("timestamp"),
+                    "description": t.get("description"),
+                    "amount": t.get("amount"),
+                    "currency": t.get("currency", "GBP"),
+                    "transaction_type": t.get("transaction_type"),
+                    "category": t.get("category"),
+                    "merchant_name": t.get("merchant_name"),
+                    "running_balance": t.get("running_balance"),
+                    # Note: TEXT not JSONB
+                    "metadata_": str(metadata) if metadata else None,
+                }
+            )
+        if not rows:
+            return []
+
+        inserted = [
+            tuple(row)
+            for row in session.execute(
+                insert(TrueLayerCardTransaction)
+                .values(rows)
+                .returning(
+                    TrueLayerCardTransaction.id,
+                    TrueLayerCardTransaction.normalised_provider_id,
+                )
+            )
+        ]
+        session.commit()
+        return inserted
+
+
 def get_all_truelayer_card_transactions(card_id=None):
     """Get TrueLayer card transactions (all or for specific card).
 
@@ -1386,6 +1506,9 @@ def update_import_job_status(
 def add_import_progress(job_id, account_id, synced, duplicates, errors, error_msg=None):
     """Record per-account progress.
 
+    An account whose sync ended with an error is recorded as 'failed'; its
+    checkpoint is kept so the next run of the job resumes it.
+
     Converted to SQLAlchemy.
     """
     from datetime import datetime
@@ -1395,22 +1518,24 @@ def add_import_progress(job_id, account_id, synced, duplicates, errors, error_ms
     from .base import get_session
     from .models.truelayer import TrueLayerImportProgress
 
+    status = "failed" if error_msg else "completed"
+
     with get_session() as session:
         stmt = (
             insert(TrueLayerImportProgress)
             .values(
                 job_id=job_id,
                 account_id=account_id,
-                progress_status="completed",
+                progress_status=status,
                 synced_count=synced,
                 duplicates_count=duplicates,
                 errors_count=errors,
                 error_message=error_msg,
             )
             .on_conflict_do_update(
-                index_elements=["job_id", "account_id"],  # Need composite index
+                index_elements=["job_id", "account_id"],
                 set_={
-                    "progress_status": "completed",
+                    "progress_status": status,
                     "synced_count": synced,
                     "duplicates_count": duplicates,
                     "errors_count": errors,
@@ -1424,6 +1549,73 @@ def add_import_progress(job_id, account_id, synced, duplicates, errors, error_ms
         session.commit()
 
 
+def update_import_checkpoint(job_id, account_id, checkpoint):
+    """Record an account's resume checkpoint within an import job.
+
+    Called after each committed page, so a failed or interrupted import
+    resumes from the page after it instead of starting over.
+
+    Args:
+        job_id: Import job ID
+        account_id: Database account ID
+        checkpoint: Dict with the date range, window, cursor and counters
+    """
+    from datetime import datetime
+
+    from sqlalchemy.dialects.postgresql import insert
+
+    from .base import get_session
+    from .models.truelayer import TrueLayerImportProgress
+
+    now = datetime.now(UTC)
+
+    with get_session() as session:
+        stmt = (
+            insert(TrueLayerImportProgress)
+            .values(
+                job_id=job_id,
+                account_id=account_id,
+                progress_status="syncing",
+                started_at=now,
+                checkpoint=checkpoint,
+            )
+            .on_conflict_do_update(
+                index_elements=["job_id", "account_id"],
+                set_={
+                    "progress_status": "syncing",
+                    "checkpoint": checkpoint,
+                    "updated_at": now,
+                },
+            )
+        )
+        session.execute(stmt)
+        session.commit()
+
+
+def get_import_checkpoint(job_id, account_id):
+    """Get an account's resume checkpoint within an import job.
+
+    Args:
+        job_id: Import job ID
+        account_id: Database account ID
+
+    Returns:
+        Checkpoint dict, or None if the account has none
+    """
+    from .base import get_session
+    from .models.truelayer import TrueLayerImportProgress
+
+    with get_session() as session:
+        return (
+            session.query(TrueLayerImportProgress.checkpoint)
+            .filter(
+                TrueLayerImportProgress.job_id == job_id,
+                TrueLayerImportProgress.account_id == account_id,
+            )
+            .scalar()
+        )
+
+
 def get_import_progress(job_id):
     """Get progress for all accounts in a job.
 
@@ -1465,6 +1657,7 @@ def get_import_progress(job_id):
                 "completed_at": p.completed_at,
                 "error_message": p.error_message,
                 "metadata": p.metadata_,
+                "checkpoint": p.checkpoint,
                 "created_at": p.created_at,
                 "updated_at": p.updated_at,
                 # Account info from JOIN
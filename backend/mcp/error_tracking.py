@@ -2,7 +2,7 @@
 
 This module provides error tracking for the Gmail sync workflow with:
 - Automatic error classification by stage and type
-- Database persistence for queryable error history
+- Database persistence for queryable error history (buffered, written in bulk)
 - Retry tracking and decision support
 - Integration with structured logging
 
@@ -26,18 +26,41 @@ Usage:
         is_retryable=True
     )
     error.log(connection_id=conn_id)
+
+    # Write buffered errors (sync batches and Celery tasks do this for you)
+    flush_errors()
 """
 
+import json
 import traceback
 from enum import Enum
 from typing import Any
 
 import database as db
 from mcp.logging_config import get_logger
+from mcp.telemetry_buffer import BufferedSink
 
 logger = get_logger(__name__)
 
 
+def _write_errors(rows: list) -> None:
+    """Write buffered errors with one bulk insert."""
+    db.save_gmail_errors_bulk(rows)
+
+
+# Errors logged by GmailError.log(), written in bulk
+_error_sink = BufferedSink("gmail_processing_errors", _write_errors)
+
+
+def flush_errors() -> int:
+    """Write buffered errors to the database.
+
+    Returns:
+        Number of errors written
+    """
+    return _error_sink.flush()
+
+
 class ErrorStage(Enum):
     """Error stage classification for Gmail workflow."""
 
@@ -118,7 +141,7 @@ class GmailError:
     def log(
         self, connection_id: int | None = None, sync_job_id: int | None = None
     ) -> None:
-        """Log error and save to database.
+        """Log error and buffer it for the database.
 
         Args:
             connection_id: Gmail connection ID (optional)
@@ -136,26 +159,22 @@ class GmailError:
             exc_info=self.exception,
         )
 
-        # Save to database for querying and analytics
-        try:
-            db.save_gmail_error(
-                connection_id=connection_id,
-                sync_job_id=sync_job_id,
-                message_id=self.context.get("message_id"),
-                receipt_id=self.context.get("receipt_id"),
-                error_stage=self.stage.value,
-                error_type=self.error_type.value,
-                error_message=self.message,
-                stack_trace=self.stack_trace,
-                error_context=self.context,
-                is_retryable=self.is_retryable,
-            )
-        except Exception as e:
-            # Don't fail the workflow if error tracking fails
-            logger.warning(
-                f"Failed to save error to database: {e}",
-                extra={"sync_job_id": sync_job_id},
-            )
+        # Buffer for the database (querying and analytics); the context is
+        # made JSON-safe now so one odd value can't fail the whole bulk insert
+        _error_sink.add(
+            {
+                "connection_id": connection_id,
+                "sync_job_id": sync_job_id,
+                "message_id": self.context.get("message_id"),
+                "receipt_id": self.context.get("receipt_id"),
+                "error_stage": self.stage.value,
+                "error_type": self.error_type.value,
+                "error_message": self.message,
+                "stack_trace": self.stack_trace,
+                "error_context": json.loads(json.dumps(self.context, default=str)),
+                "is_retryable": self.is_retryable,
+            }
+        )
 
     @classmethod
     def from_exception(
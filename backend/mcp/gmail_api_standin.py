@@ -0,0 +1,728 @@
+"""
+Gmail API Stand-in
+
+Local HTTP server that answers the Gmail API endpoints the sync uses, so
+sync performance can be reproduced (and the client exercised) without a
+real mailbox:
+
+- GET  /gmail/v1/users/me/profile
+- GET  /gmail/v1/users/me/messages                   (messages.list, after:/before:)
+- GET  /gmail/v1/users/me/messages/{id}              (format=full or metadata)
+- GET  /gmail/v1/users/me/messages/{id}/attachments/{attachment_id}
+- GET  /gmail/v1/users/me/history                    (messageAdded records)
+- POST /batch/gmail/v1                               (multipart/mixed batch of GETs)
+- GET  /_standin/stats                               (request counters)
+
+Mailboxes are synthetic (generate_mailbox) or recorded from a real account
+(record_mailbox / load_recording). Every request can be delayed (latency_ms
+plus jitter) and a fraction of them answered with 429 (rate_limit_rate).
+
+Usage:
+    # Serve 500 synthetic messages with 40ms latency and 5% rate limiting:
+    python -m mcp.gmail_api_standin --messages 500 --latency-ms 40 --rate-limit 0.05
+
+    # From code (see scripts/benchmark_gmail_sync.py):
+    from mcp import gmail_client
+    from mcp.gmail_api_standin import GmailApiStandIn, generate_mailbox
+
+    with GmailApiStandIn(generate_mailbox(200), latency_ms=20) as standin:
+        gmail_client.GMAIL_API_BASE = standin.api_base
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# First history ID handed out; history.list before it answers 404 (expired)
+FIRST_HISTORY_ID = 1000
+
+# Page size of history.list (messages.list honours maxResults)
+HISTORY_PAGE_SIZE = 100
+
+BATCH_BOUNDARY = "batch_standin"
+
+# Fixture emails (tests/fixtures/sample_emails) and the senders they came from
+FIXTURE_SENDERS = {
+    "amazon_fresh.html": ("auto-confirm@amazon.co.uk", "Your Amazon.co.uk order"),
+    "amazon_business.html": ("auto-confirm@amazon.co.uk", "Your Amazon.co.uk order"),
+    "uber_receipt.html": ("noreply@uber.com", "Your Tuesday trip with Uber"),
+    "apple_receipt.html": ("no_reply@email.apple.com", "Your receipt from Apple."),
+    "paypal_receipt.html": ("service@paypal.co.uk", "Receipt for your payment"),
+}
+
+# Senders and subjects of generated receipts when no fixtures are given
+SYNTHETIC_SENDERS = (
+    ("orders@shop.example.co.uk", "Your order confirmation"),
+    ("receipts@cafe.example.com", "Your receipt"),
+    ("tickets@rail.example.co.uk", "Your booking confirmation"),
+    ("noreply@taxi.example.com", "Your trip receipt"),
+)
+
+NEWSLETTER_SENDER = ("news@offers.example.com", "Your order of savings is here")
+INVOICE_SENDER = ("billing@saas.example.com", "Your invoice")
+
+
+# ============================================================================
+# MESSAGE RESOURCES
+# ============================================================================
+
+
+def _b64(data: bytes) -> str:
+    """base64url as the Gmail API returns it."""
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def make_pdf(text: str) -> bytes:
+    """Build a one-page PDF showing a line of Helvetica text."""
+    stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode("latin-1") + b") Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [4 0 R] /Count 1 >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 3 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    pdf += b"startxref\n%d\n%%%%EOF\n" % xref
+    return pdf
+
+
+def build_message(
+    message_id: str,
+    sender: str,
+    subject: str,
+    html: str,
+    received_at: datetime,
+    attachments: dict = None,
+    list_unsubscribe: str = None,
+) -> tuple:
+    """
+    Build a Gmail message resource (format=full).
+
+    Args:
+        message_id: Gmail message ID
+        sender: From address
+        subject: Subject line
+        html: HTML body (a plain-text part is derived from it)
+        received_at: Received timestamp (UTC)
+        attachments: Dict of filename -> PDF bytes
+        list_unsubscribe: List-Unsubscribe header value (marketing mail)
+
+    Returns:
+        Tuple of (message resource, {attachment_id: bytes})
+    """
+    text = re.sub(r"<[^>]+>", " ", html)
+    headers = [
+        {"name": "From", "value": sender},
+        {"name": "To", "value": "me@example.com"},
+        {"name": "Subject", "value": subject},
+        {"name": "Date", "value": format_datetime(received_at)},
+    ]
+    if list_unsubscribe:
+        headers.append({"name": "List-Unsubscribe", "value": list_unsubscribe})
+
+    parts = [
+        {
+            "partId": "0",
+            "mimeType": "multipart/alternative",
+            "filename": "",
+            "body": {"size": 0},
+            "parts": [
+                {
+                    "partId": "0.0",
+                    "mimeType": "text/plain",
+                    "filename": "",
+                    "body": {"size": len(text), "data": _b64(text.encode())},
+                },
+                {
+                    "partId": "0.1",
+                    "mimeType": "text/html",
+                    "filename": "",
+                    "body": {"size": len(html), "data": _b64(html.encode())},
+                },
+            ],
+        }
+    ]
+    attachment_data = {}
+    for index, (filename, data) in enumerate((attachments or {}).items(), start=1):
+        attachment_id = f"att-{message_id}-{index}"
+        attachment_data[attachment_id] = data
+        parts.append(
+            {
+                "partId": str(index),
+                "mimeType": "application/pdf",
+                "filename": filename,
+                "body": {"attachmentId": attachment_id, "size": len(data)},
+            }
+        )
+
+    resource = {
+        "id": message_id,
+        "threadId": message_id,
+        "labelIds": ["INBOX", "CATEGORY_UPDATES"],
+        "snippet": " ".join(text.split())[:200],
+        "internalDate": str(int(received_at.timestamp() * 1000)),
+        "sizeEstimate": len(html) + sum(len(d) for d in attachment_data.values()),
+        "payload": {
+            "partId": "",
+            "mimeType": "multipart/mixed",
+            "filename": "",
+            "headers": headers,
+            "body": {"size": 0},
+            "parts": parts,
+        },
+    }
+    return resource, attachment_data
+
+
+# ============================================================================
+# MAILBOX
+# ============================================================================
+
+
+class Mailbox:
+    """Messages, attachments and history served by the stand-in.
+
+    Attributes:
+        email_address: Address reported by users.getProfile
+        messages: Dict of message_id -> message resource
+        attachments: Dict of (message_id, attachment_id) -> bytes
+        history: List of (history_id, message_id) in the order messages arrived
+        history_id: Current (latest) history ID
+    """
+
+    def __init__(self, email_address: str = "standin@example.com"):
+        self.email_address = email_address
+        self.messages = {}
+        self.attachments = {}
+        self.history = []
+        self.history_id = FIRST_HISTORY_ID
+        self._lock = threading.Lock()
+
+    def add_message(self, resource: dict, attachments: dict = None) -> int:
+        """
+        Add a message, as if it had just arrived.
+
+        Returns:
+            The history ID recorded for the arrival
+        """
+        with self._lock:
+            self.history_id += 1
+            resource = {**resource, "historyId": str(self.history_id)}
+            self.messages[resource["id"]] = resource
+            for attachment_id, data in (attachments or {}).items():
+                self.attachments[(resource["id"], attachment_id)] = data
+            self.history.append((self.history_id, resource["id"]))
+            return self.history_id
+
+    def list_ids(self, query: str = None) -> list:
+        """Message IDs matching the after:/before: terms of a query, newest first."""
+        after = before = None
+        for term, value in re.findall(
+            r"\b(after|before):(\d{4}/\d{2}/\d{2})", query or ""
+        ):
+            moment = datetime.strptime(value, "%Y/%m/%d").replace(tzinfo=UTC)
+            stamp = int(moment.timestamp() * 1000)
+            if term == "after":
+                after = stamp
+            else:
+                before = stamp
+
+        with self._lock:
+            resources = list(self.messages.values())
+        matching = [
+            r
+            for r in resources
+            if (after is None or int(r["internalDate"]) >= after)
+            and (before is None or int(r["internalDate"]) < before)
+        ]
+        matching.sort(key=lambda r: int(r["internalDate"]), reverse=True)
+        return [r["id"] for r in matching]
+
+
+def generate_mailbox(
+    count: int,
+    days: int = 90,
+    pdf_ratio: float = 0.1,
+    newsletter_ratio: float = 0.2,
+    templates_dir: str = None,
+    seed: int = 0,
+    mailbox: Mailbox = None,
+) -> Mailbox:
+    """
+    Fill a mailbox with synthetic receipts, PDF invoices and newsletters.
+
+    Args:
+        count: Number of messages to add
+        days: Spread received dates over the last N days
+        pdf_ratio: Fraction of messages that are invoices with a PDF attached
+        newsletter_ratio: Fraction of messages that are marketing mail
+        templates_dir: Directory of fixture emails (see FIXTURE_SENDERS) used
+            as receipt bodies instead of generated HTML
+        seed: Random seed, so a configuration always gets the same mailbox
+        mailbox: Mailbox to add to (a new one by default)
+
+    Returns:
+        The mailbox
+    """
+    rng = random.Random(seed)
+    mailbox = mailbox or Mailbox()
+    templates = []
+    if templates_dir:
+        for filename, (sender, subject) in FIXTURE_SENDERS.items():
+            path = Path(templates_dir) / filename
+            if path.exists():
+                templates.append((sender, subject, path.read_text(encoding="utf-8")))
+
+    now = datetime.now(UTC)
+    start = len(mailbox.messages)
+    for n in range(start, start + count):
+        message_id = f"standin{seed:04d}{n:08d}"
+        received_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+        amount = f"{rng.randint(1, 250)}.{rng.randint(0, 99):02d}"
+        attachments = None
+        list_unsubscribe = None
+        roll = rng.random()
+
+        if roll < pdf_ratio:
+            sender, subject = INVOICE_SENDER
+            html = (
+                f"<html><body><p>Your invoice INV-{n} is attached.</p>"
+                f"<p>Amount due: &pound;{amount}</p></body></html>"
+            )
+            attachments = {
+                f"invoice-{n}.pdf": make_pdf(f"Invoice No: INV-{n} Total: ${amount}")
+            }
+        elif roll < pdf_ratio + newsletter_ratio:
+            sender, subject = NEWSLETTER_SENDER
+            html = (
+                "<html><body><h1>This week's offers</h1>"
+                "<p>Up to 50% off. Unsubscribe at any time.</p></body></html>"
+            )
+            list_unsubscribe = "<mailto:unsubscribe@offers.example.com>"
+        elif templates:
+            sender, subject, html = rng.choice(templates)
+        else:
+            sender, subject = rng.choice(SYNTHETIC_SENDERS)
+            html = (
+                f"<html><body><h1>{subject}</h1>"
+                f"<p>Order number: {rng.randint(100000, 999999)}</p>"
+                f"<table><tr><td>Item</td><td>&pound;{amount}</td></tr></table>"
+                f"<p>Order Total: &pound;{amount}</p></body></html>"
+            )
+
+        resource, attachment_data = build_message(
+            message_id,
+            sender,
+            subject,
+            html,
+            received_at,
+            attachments=attachments,
+            list_unsubscribe=list_unsubscribe,
+        )
+        mailbox.add_message(resource, attachment_data)
+    return mailbox
+
+
+def record_mailbox(session, path: str, query: str = None, limit: int = 200) -> int:
+    """
+    Record messages from a real mailbox for replay by the stand-in.
+
+    Args:
+        session: AuthorizedSession for the real account
+        path: JSON file to write
+        query: messages.list query (defaults to the receipt query)
+        limit: Maximum messages to record
+
+    Returns:
+        Number of messages recorded
+    """
+    from mcp.gmail_client import (
+        GMAIL_API_BASE,
+        build_receipt_query,
+        fetch_with_backoff,
+        list_receipt_messages,
+    )
+
+    ids = []
+    page_token = None
+    while len(ids) < limit:
+        page = list_receipt_messages(
+            session, query=query or build_receipt_query(), page_token=page_token
+        )
+        ids.extend(m["id"] for m in page["messages"])
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+
+    messages = []
+    attachments = {}
+    for message_id in ids[:limit]:
+        url = f"{GMAIL_API_BASE}/users/me/messages/{message_id}"
+        resource = fetch_with_backoff(session, "GET", url, params={"format": "full"})
+        messages.append(resource)
+        for part in resource.get("payload", {}).get("parts", []):
+            attachment_id = part.get("body", {}).get("attachmentId")
+            if part.get("filename") and attachment_id:
+                data = fetch_with_backoff(
+                    session, "GET", f"{url}/attachments/{attachment_id}"
+                )
+                attachments[f"{message_id}/{attachment_id}"] = data.get("data", "")
+
+    Path(path).write_text(
+        json.dumps({"messages": messages, "attachments": attachments}),
+        encoding="utf-8",
+    )
+    return len(messages)
+
+
+def load_recording(path: str, mailbox: Mailbox = None) -> Mailbox:
+    """Load a mailbox written by record_mailbox(), oldest message first."""
+    recording = json.loads(Path(path).read_text(encoding="utf-8"))
+    mailbox = mailbox or Mailbox()
+    messages = sorted(recording["messages"], key=lambda m: int(m["internalDate"]))
+    for resource in messages:
+        prefix = f"{resource['id']}/"
+        attachment_data = {
+            key[len(prefix) :]: base64.urlsafe_b64decode(data)
+            for key, data in recording.get("attachments", {}).items()
+            if key.startswith(prefix)
+        }
+        mailbox.add_message(resource, attachment_data)
+    return mailbox
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+
+def _error(code: int, message: str) -> tuple:
+    return code, {"error": {"code": code, "message": message}}
+
+
+class GmailApiStandIn:
+    """Threaded HTTP server answering Gmail API requests from a Mailbox.
+
+    Attributes:
+        mailbox: Mailbox being served
+        latency_ms: Delay added to every request
+        jitter_ms: Extra random delay of up to this many milliseconds
+        rate_limit_rate: Fraction of requests answered with 429
+        counters: Counter of requests per endpoint (plus 'rate_limited')
+    """
+
+    def __init__(
+        self,
+        mailbox: Mailbox,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        rate_limit_rate: float = 0.0,
+        port: int = 0,
+        seed: int = 0,
+    ):
+        self.mailbox = mailbox
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_rate = rate_limit_rate
+        self.counters = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def api_base(self) -> str:
+        """Replacement for gmail_client.GMAIL_API_BASE."""
+        return f"{self.base_url}/gmail/v1"
+
+    def start(self) -> "GmailApiStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "GmailApiStandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        """Requests served per endpoint, including 429s."""
+        with self._lock:
+            return dict(self.counters)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.counters.clear()
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.counters[endpoint] += 1
+
+    def _throttle(self) -> bool:
+        """Apply latency; True if this request should be rate limited."""
+        with self._lock:
+            delay = self.latency_ms + self._rng.random() * self.jitter_ms
+            limited = self._rng.random() < self.rate_limit_rate
+        if delay:
+            time.sleep(delay / 1000)
+        if limited:
+            self._count("rate_limited")
+        return limited
+
+    # ------------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------------
+
+    def route(self, method: str, target: str) -> tuple:
+        """
+        Answer one API request.
+
+        Args:
+            method: HTTP method
+            target: Path and query string
+
+        Returns:
+            Tuple of (HTTP status, JSON-compatible body)
+        """
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        path = url.path.rstrip("/")
+
+        if method != "GET":
+            return _error(405, "Method not allowed")
+        if path == "/_standin/stats":
+            return 200, self.stats()
+
+        match = re.fullmatch(r"/gmail/v1/users/me/(.+)", path)
+        if not match:
+            return _error(404, "Not found")
+        resource = match.group(1)
+
+        if resource == "profile":
+            self._count("users.getProfile")
+            return 200, {
+                "emailAddress": self.mailbox.email_address,
+                "messagesTotal": len(self.mailbox.messages),
+                "threadsTotal": len(self.mailbox.messages),
+                "historyId": str(self.mailbox.history_id),
+            }
+        if resource == "messages":
+            self._count("messages.list")
+            return 200, self._list_messages(params)
+        if resource == "history":
+            self._count("history.list")
+            return self._list_history(params)
+
+        match = re.fullmatch(r"messages/([^/]+)/attachments/([^/]+)", resource)
+        if match:
+            self._count("attachments.get")
+            data = self.mailbox.attachments.get(match.groups())
+            if data is None:
+                return _error(404, "Requested entity was not found.")
+            return 200, {"size": len(data), "data": _b64(data)}
+
+        match = re.fullmatch(r"messages/([^/]+)", resource)
+        if match:
+            self._count("messages.get")
+            return self._get_message(match.group(1), params)
+
+        return _error(404, "Not found")
+
+    def _list_messages(self, params: dict) -> dict:
+        ids = self.mailbox.list_ids(params.get("q", [None])[0])
+        offset = int(params.get("pageToken", ["0"])[0])
+        page_size = min(int(params.get("maxResults", ["100"])[0]), 500)
+        page = ids[offset : offset + page_size]
+        body = {
+            "messages": [{"id": i, "threadId": i} for i in page],
+            "resultSizeEstimate": len(ids),
+        }
+        if offset + page_size < len(ids):
+            body["nextPageToken"] = str(offset + page_size)
+        return body
+
+    def _get_message(self, message_id: str, params: dict) -> tuple:
+        message = self.mailbox.messages.get(message_id)
+        if message is None:
+            return _error(404, "Requested entity was not found.")
+        if params.get("format", ["full"])[0] != "metadata":
+            return 200, message
+
+        wanted = {h.lower() for h in params.get("metadataHeaders", [])}
+        headers = [
+            h
+            for h in message["payload"]["headers"]
+            if not wanted or h["name"].lower() in wanted
+        ]
+        return 200, {
+            **{k: v for k, v in message.items() if k != "payload"},
+            "payload": {"mimeType": message["payload"]["mimeType"], "headers": headers},
+        }
+
+    def _list_history(self, params: dict) -> tuple:
+        start = int(params.get("startHistoryId", ["0"])[0])
+        if start < FIRST_HISTORY_ID:
+            return _error(404, "Requested entity was not found.")
+
+        added = [(h, m) for h, m in self.mailbox.history if h > start]
+        offset = int(params.get("pageToken", ["0"])[0])
+        page = added[offset : offset + HISTORY_PAGE_SIZE]
+        body = {
+            "history": [
+                {
+                    "id": str(history_id),
+                    "messages": [{"id": message_id, "threadId": message_id}],
+                    "messagesAdded": [
+                        {
+                            "message": {
+                                "id": message_id,
+                                "threadId": message_id,
+                                "labelIds": ["INBOX"],
+                            }
+                        }
+                    ],
+                }
+                for history_id, message_id in page
+            ],
+            "historyId": str(self.mailbox.history_id),
+        }
+        if offset + HISTORY_PAGE_SIZE < len(added):
+            body["nextPageToken"] = str(offset + HISTORY_PAGE_SIZE)
+        return 200, body
+
+    def route_batch(self, content_type: str, payload: bytes) -> bytes:
+        """Answer a multipart/mixed batch of GET requests."""
+        self._count("batch")
+        match = re.search(r"boundary=\"?([^\";]+)\"?", content_type or "")
+        if not match:
+            return b""
+
+        responses = []
+        for part in payload.decode("utf-8").split(f"--{match.group(1)}"):
+            request_line = re.search(r"^(GET|POST) (\S+)", part, re.MULTILINE)
+            if not request_line:
+                continue
+            content_id = re.search(r"Content-ID:\s*<?([^>\r\n]+)>?", part, re.I)
+            status, body = self.route(request_line.group(1), request_line.group(2))
+            responses.append(
+                f"--{BATCH_BOUNDARY}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.group(1) if content_id else ''}>\r\n"
+                "\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n"
+                "\r\n"
+                f"{json.dumps(body)}\r\n"
+            )
+        return ("".join(responses) + f"--{BATCH_BOUNDARY}--\r\n").encode("utf-8")
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status, body):
+                self._send(status, json.dumps(body).encode("utf-8"), "application/json")
+
+            def do_GET(self):
+                if not self.path.startswith("/_standin") and standin._throttle():
+                    self._send_json(*_error(429, "Rate Limit Exceeded"))
+                    return
+                self._send_json(*standin.route("GET", self.path))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = self.rfile.read(length)
+                if urlsplit(self.path).path != "/batch/gmail/v1":
+                    self._send_json(*_error(404, "Not found"))
+                    return
+                if standin._throttle():
+                    self._send_json(*_error(429, "Rate Limit Exceeded"))
+                    return
+                body = standin.route_batch(self.headers.get("Content-Type"), payload)
+                self._send(200, body, f"multipart/mixed; boundary={BATCH_BOUNDARY}")
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stand-in Gmail API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--recording", help="JSON file written by record_mailbox()")
+    parser.add_argument("--templates", help="Fixture email directory")
+    parser.add_argument("--pdf-ratio", type=float, default=0.1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.recording:
+        mailbox = load_recording(args.recording)
+    else:
+        mailbox = generate_mailbox(
+            args.messages, pdf_ratio=args.pdf_ratio, templates_dir=args.templates
+        )
+
+    standin = GmailApiStandIn(
+        mailbox,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_rate=args.rate_limit,
+        port=args.port,
+    )
+    print(f"Serving {len(mailbox.messages)} messages at {standin.api_base}")
+    print(f"Set GMAIL_API_BASE={standin.api_base} to point the sync at it")
+    try:
+        standin._server.serve_forever()
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
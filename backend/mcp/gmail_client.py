@@ -18,16 +18,19 @@ from google.oauth2.credentials import Credentials
 # Load environment variables (Docker env vars take precedence)
 load_dotenv(override=False)
 
-# Rate limiting configuration
-RATE_LIMIT_DELAY = 0.1  # 100ms between requests (10 req/sec)
+# Rate limiting configuration (100ms between requests = 10 req/sec)
+RATE_LIMIT_DELAY = float(os.getenv("GMAIL_RATE_LIMIT_DELAY", "0.1"))
 MAX_RETRIES = 3
 BACKOFF_MULTIPLIER = 2
 
 # Google OAuth configuration (needed for automatic token refresh)
 GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 
-# Gmail API base URL
-GMAIL_API_BASE = "https://gmail.googleapis.com/gmail/v1"
+# Gmail API base URL (override to point at mcp.gmail_api_standin)
+GMAIL_API_BASE = os.getenv("GMAIL_API_BASE", "https://gmail.googleapis.com/gmail/v1")
+
+# Headers requested for metadata-only fetches (enough for sender/subject filtering)
+METADATA_HEADERS = ["From", "Subject", "Date", "List-Unsubscribe", "X-Mailer"]
 
 
 def build_gmail_service(access_token: str, refresh_token: str = None):
@@ -229,6 +232,56 @@ def list_receipt_messages(
         raise
 
 
+def get_message_metadata(session, message_id: str) -> dict:
+    """
+    Fetch only headers and snippet for a message (format=metadata).
+
+    Used to pre-filter messages before downloading bodies and attachment
+    metadata. Returns the same keys as get_message_content() minus the body
+    and attachments, so the result can be passed to the same filters.
+
+    Args:
+        session: AuthorizedSession object
+        message_id: Gmail message ID
+
+    Returns:
+        Dictionary with email headers, snippet and received date
+    """
+    try:
+        url = f"{GMAIL_API_BASE}/users/me/messages/{message_id}"
+        params = {"format": "metadata", "metadataHeaders": METADATA_HEADERS}
+
+        message = fetch_with_backoff(session, "GET", url, params=params)
+
+        headers = {
+            h["name"].lower(): h["value"]
+            for h in message.get("payload", {}).get("headers", [])
+        }
+
+        internal_date = message.get("internalDate")
+        received_at = None
+        if internal_date:
+            received_at = datetime.utcfromtimestamp(int(internal_date) / 1000)
+
+        return {
+            "message_id": message_id,
+            "thread_id": message.get("threadId"),
+            "subject": headers.get("subject", ""),
+            "from": headers.get("from", ""),
+            "date": headers.get("date", ""),
+            "received_at": received_at,
+            "snippet": message.get("snippet", ""),
+            "label_ids": message.get("labelIds", []),
+            "size_estimate": message.get("sizeEstimate", 0),
+            "list_unsubscribe": headers.get("list-unsubscribe", ""),
+            "x_mailer": headers.get("x-mailer", ""),
+        }
+
+    except requests.HTTPError as e:
+        print(f"❌ Gmail get message metadata error: {e}")
+        raise
+
+
 def get_message_content(session, message_id: str) -> dict:
     """
     Fetch full email content including body using requests.
@@ -452,61 +505,113 @@ def get_message_batch(session, message_ids: list) -> list:
     return messages
 
 
-def get_history_changes(session, start_history_id: str) -> dict:
+def iter_history_pages(session, start_history_id: str):
     """
-    Get incremental changes since last sync using history API with requests.
+    Stream incremental changes since last sync, one history page at a time.
+
+    Each history.list page is yielded as soon as it arrives, with message IDs
+    de-duplicated within the page and against the page before it (a message
+    can appear in several history records, usually close together). Only two
+    pages of IDs are kept, however long the history gap; repeats further
+    apart are caught by the sync's known-ID check once the earlier page is
+    stored. Each page carries the history ID that is safe to persist once
+    its messages are committed: the last record's ID, or the mailbox's
+    latest history ID on the final page.
 
     Args:
         session: AuthorizedSession object
         start_history_id: History ID from last sync
 
-    Returns:
-        Dictionary with new/modified message IDs and latest history ID
+    Yields:
+        Dictionaries with 'message_ids' and 'history_id' (None when the
+        page moves no checkpoint). If the start
+        history ID has expired (404), a single page with
+        'full_sync_required': True is yielded instead.
     """
-    try:
-        new_messages = []
-        latest_history_id = start_history_id
-        page_token = None
-
-        while True:
-            url = f"{GMAIL_API_BASE}/users/me/history"
-            params = {
-                "startHistoryId": start_history_id,
-                "historyTypes": "messageAdded",
-            }
-            if page_token:
-                params["pageToken"] = page_token
+    previous_page_ids = set()
+    page_token = None
+
+    while True:
+        url = f"{GMAIL_API_BASE}/users/me/history"
+        params = {
+            "startHistoryId": start_history_id,
+            "historyTypes": "messageAdded",
+        }
+        if page_token:
+            params["pageToken"] = page_token
 
+        try:
             result = fetch_with_backoff(session, "GET", url, params=params)
+        except requests.HTTPError as e:
+            # History ID might be too old (404)
+            if e.response.status_code == 404 and page_token is None:
+                print("   ⚠️  History ID expired, full sync required")
+                yield {
+                    "message_ids": [],
+                    "history_id": None,
+                    "full_sync_required": True,
+                }
+                return
+            raise
+
+        message_ids = []
+        page_ids = set()
+        history_records = result.get("history", [])
+        for record in history_records:
+            for msg in record.get("messagesAdded", []):
+                msg_id = msg["message"]["id"]
+                if msg_id in page_ids:
+                    continue
+                page_ids.add(msg_id)
+                if msg_id not in previous_page_ids:
+                    message_ids.append(msg_id)
+        previous_page_ids = page_ids
+
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            page_history_id = result.get("historyId") or start_history_id
+        elif history_records:
+            page_history_id = history_records[-1].get("id")
+        else:
+            page_history_id = None  # Empty page: keep the previous checkpoint
+
+        yield {"message_ids": message_ids, "history_id": page_history_id}
+
+        if not page_token:
+            break
 
-            # Process history records
-            history_records = result.get("history", [])
-            for record in history_records:
-                messages_added = record.get("messagesAdded", [])
-                for msg in messages_added:
-                    new_messages.append(msg["message"]["id"])
 
-            # Update latest history ID
-            if result.get("historyId"):
-                latest_history_id = result["historyId"]
+def get_history_changes(session, start_history_id: str) -> dict:
+    """
+    Get incremental changes since last sync using history API with requests.
 
-            # Check for more pages
-            page_token = result.get("nextPageToken")
-            if not page_token:
-                break
+    Collects every page of iter_history_pages(), de-duplicated across all of
+    them; the sync streams the pages instead.
 
-        return {"new_message_ids": new_messages, "latest_history_id": latest_history_id}
+    Args:
+        session: AuthorizedSession object
+        start_history_id: History ID from last sync
 
-    except requests.HTTPError as e:
-        # History ID might be too old (404)
-        if e.response.status_code == 404:
-            print("   ⚠️  History ID expired, full sync required")
+    Returns:
+        Dictionary with new/modified message IDs and latest history ID
+    """
+    new_messages = []
+    latest_history_id = start_history_id
+
+    for page in iter_history_pages(session, start_history_id):
+        if page.get("full_sync_required"):
             return {
                 "new_message_ids": [],
                 "latest_history_id": None,
                 "full_sync_required": True,
             }
-        raise
+        new_messages.extend(page["message_ids"])
+        latest_history_id = page["history_id"] or latest_history_id
+
+    return {
+        "new_message_ids": list(dict.fromkeys(new_messages)),
+        "latest_history_id": latest_history_id,
+    }
 
 
 def get_user_profile(session) -> dict:
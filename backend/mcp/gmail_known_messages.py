@@ -0,0 +1,186 @@
+"""Known-message filtering for Gmail sync.
+
+Splits a page of listed Gmail message IDs into already-stored and new IDs
+before anything is downloaded, so re-syncs and overlapping date windows never
+re-fetch mail we already have.
+
+The check is one set-based query per page. An optional per-connection Bloom
+filter (GMAIL_KNOWN_ID_BLOOM=true) sits in front of it: IDs the filter has
+definitely never seen skip the database entirely, and only "maybe seen" IDs
+are confirmed with the query.
+
+Usage:
+    from mcp.gmail_known_messages import split_known_message_ids
+
+    new_ids, known_ids = split_known_message_ids(connection_id, page_ids)
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+
+import database
+from mcp.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+GMAIL_KNOWN_ID_BLOOM = os.getenv("GMAIL_KNOWN_ID_BLOOM", "false").lower() == "true"
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+BLOOM_MIN_CAPACITY = 10_000
+BLOOM_MAX_AGE_SECONDS = 600  # Rebuild so receipts stored by other workers show up
+
+
+class MessageIdBloomFilter:
+    """Fixed-size Bloom filter over Gmail message ID strings.
+
+    Attributes:
+        capacity: Number of items the filter was sized for
+        num_bits: Size of the bit array
+        num_hashes: Number of hash functions (double hashing over blake2b)
+        count: Number of items added
+    """
+
+    def __init__(
+        self, capacity: int, false_positive_rate: float = BLOOM_FALSE_POSITIVE_RATE
+    ):
+        """Size the filter for the expected number of items.
+
+        Args:
+            capacity: Expected number of message IDs
+            false_positive_rate: Target false positive rate at capacity
+        """
+        self.capacity = max(capacity, 1)
+        self.num_bits = max(
+            8,
+            int(-self.capacity * math.log(false_positive_rate) / (math.log(2) ** 2)),
+        )
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item)
+        )
+
+
+class _ConnectionFilter:
+    """Bloom filter for one connection plus its build time."""
+
+    def __init__(self, connection_id: int):
+        ids = list(database.get_gmail_message_ids_for_connection(connection_id))
+        self.bloom = MessageIdBloomFilter(max(len(ids) * 2, BLOOM_MIN_CAPACITY))
+        for message_id in ids:
+            self.bloom.add(message_id)
+        self.built_at = time.monotonic()
+
+    @property
+    def is_stale(self) -> bool:
+        return (
+            time.monotonic() - self.built_at > BLOOM_MAX_AGE_SECONDS
+            or self.bloom.count > self.bloom.capacity
+        )
+
+
+_filters: dict[int, _ConnectionFilter] = {}
+# IDs remembered while a connection's filter is being rebuilt
+_pending_ids: dict[int, list] = {}
+_build_locks: dict[int, threading.Lock] = {}
+# Guards the three dicts above; never held while a filter is built
+_filters_lock = threading.Lock()
+
+
+def _get_connection_filter(connection_id: int) -> _ConnectionFilter:
+    with _filters_lock:
+        entry = _filters.get(connection_id)
+        if entry is not None and not entry.is_stale:
+            return entry
+        build_lock = _build_locks.setdefault(connection_id, threading.Lock())
+
+    # One build per connection at a time; other connections aren't held up
+    with build_lock:
+        with _filters_lock:
+            entry = _filters.get(connection_id)
+            if entry is not None and not entry.is_stale:
+                return entry
+            _pending_ids[connection_id] = []
+
+        try:
+            entry = _ConnectionFilter(connection_id)
+        except Exception:
+            with _filters_lock:
+                _pending_ids.pop(connection_id, None)
+            raise
+        with _filters_lock:
+            # IDs stored while the ID set was streaming may be missing from it
+            for message_id in _pending_ids.pop(connection_id):
+                entry.bloom.add(message_id)
+            _filters[connection_id] = entry
+
+        logger.debug(
+            f"Built known-message filter: {entry.bloom.count} IDs",
+            extra={"connection_id": connection_id},
+        )
+        return entry
+
+
+def split_known_message_ids(connection_id: int, message_ids: list) -> tuple:
+    """
+    Split message IDs into new and already-stored.
+
+    Args:
+        connection_id: Gmail connection ID
+        message_ids: Page of Gmail message IDs (listing order is preserved)
+
+    Returns:
+        Tuple of (new_ids: list, known_ids: set)
+    """
+    if not message_ids:
+        return [], set()
+
+    candidates = message_ids
+    if GMAIL_KNOWN_ID_BLOOM:
+        bloom = _get_connection_filter(connection_id).bloom
+        candidates = [msg_id for msg_id in message_ids if msg_id in bloom]
+
+    known_ids = database.get_existing_gmail_message_ids(candidates)
+    new_ids = [msg_id for msg_id in message_ids if msg_id not in known_ids]
+    return new_ids, known_ids
+
+
+def remember_message_ids(connection_id: int, message_ids) -> None:
+    """
+    Record newly stored message IDs in the connection's Bloom filter.
+
+    No-op unless the Bloom filter is enabled and built or being built.
+
+    Args:
+        connection_id: Gmail connection ID
+        message_ids: Iterable of message IDs just written
+    """
+    if not GMAIL_KNOWN_ID_BLOOM:
+        return
+
+    message_ids = list(message_ids)
+    with _filters_lock:
+        if connection_id in _pending_ids:
+            _pending_ids[connection_id].extend(message_ids)
+        entry = _filters.get(connection_id)
+        if entry is None:
+            return
+        for message_id in message_ids:
+            entry.bloom.add(message_id)
@@ -4,11 +4,16 @@ Gmail LLM Queue Manager
 Handles queuing and processing of unparseable Gmail receipts for LLM parsing.
 Key features:
 - Cost estimation before processing
-- Re-fetches emails from Gmail (no body storage required)
+- Uses stored email bodies, re-fetching only missing ones from Gmail
+- Several receipts per LLM request, requests run concurrently per provider
 - Progress tracking during batch processing
 """
 
+import os
+import time
+from collections import defaultdict
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import database
 from config.llm_config import LLMProvider, load_llm_config
@@ -16,14 +21,35 @@ from mcp.gmail_auth import get_gmail_credentials
 from mcp.gmail_client import (
     build_gmail_service,
     extract_sender_domain,
+    get_message_batch,
     get_message_content,
     parse_sender_email,
 )
+from mcp.gmail_parsing import learn_template
+from mcp.gmail_parsing.llm_extraction import build_llm_provider, extract_batch_with_llm
 from mcp.gmail_parsing.orchestrator import parse_receipt_content
+from mcp.gmail_parsing.parsed_email import ParsedEmail
+from mcp.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 # Estimated output tokens for a parsed receipt JSON response
 ESTIMATED_OUTPUT_TOKENS = 200
 
+# Receipts packed into one LLM request and requests in flight per provider.
+# Local Ollama models get one receipt per request, one request at a time.
+PROVIDER_QUEUE_LIMITS = {
+    LLMProvider.ANTHROPIC: {"batch_size": 5, "concurrency": 4},
+    LLMProvider.OPENAI: {"batch_size": 5, "concurrency": 4},
+    LLMProvider.GOOGLE: {"batch_size": 5, "concurrency": 1},  # Free tier: 60 rpm
+    LLMProvider.DEEPSEEK: {"batch_size": 5, "concurrency": 4},
+    LLMProvider.OLLAMA: {"batch_size": 1, "concurrency": 1},
+}
+
+# Overrides of the provider limits (0 keeps the provider's)
+LLM_QUEUE_BATCH_SIZE = int(os.getenv("GMAIL_LLM_BATCH_SIZE", "0"))
+LLM_QUEUE_CONCURRENCY = int(os.getenv("GMAIL_LLM_CONCURRENCY", "0"))
+
 # Provider-specific cost per 1M tokens (input/output)
 # These are approximations - actual costs may vary
 PROVIDER_COSTS = {
@@ -278,12 +304,219 @@ def fetch_and_parse_receipt_with_llm(receipt_id: int) -> dict:
         }
 
 
+def get_queue_limits(provider: LLMProvider) -> tuple[int, int]:
+    """
+    Receipts per LLM request and concurrent requests for a provider.
+
+    Args:
+        provider: Configured LLM provider
+
+    Returns:
+        Tuple of (batch_size, concurrency)
+    """
+    limits = PROVIDER_QUEUE_LIMITS.get(provider, {"batch_size": 1, "concurrency": 1})
+    return (
+        LLM_QUEUE_BATCH_SIZE or limits["batch_size"],
+        LLM_QUEUE_CONCURRENCY or limits["concurrency"],
+    )
+
+
+def load_receipts_with_content(receipt_ids: list) -> list:
+    """
+    Load queued receipts with their email content.
+
+    Stored bodies are used where available. Receipts without one are
+    fetched from Gmail with one session per connection, and the fetched
+    content is stored so a retry doesn't fetch it again.
+
+    Args:
+        receipt_ids: Receipt IDs to load
+
+    Returns:
+        Receipt dicts (see database.get_receipts_for_llm_processing)
+    """
+    receipts = database.get_receipts_for_llm_processing(receipt_ids)
+
+    missing = defaultdict(list)
+    for receipt in receipts:
+        if not receipt["body_html"] and not receipt["body_text"]:
+            missing[receipt["gmail_connection_id"]].append(receipt)
+
+    for connection_id, connection_receipts in missing.items():
+        try:
+            access_token, refresh_token = get_gmail_credentials(connection_id)
+            service = build_gmail_service(access_token, refresh_token)
+            messages = get_message_batch(
+                service, [r["message_id"] for r in connection_receipts]
+            )
+        except Exception as e:
+            logger.warning(
+                f"Could not fetch {len(connection_receipts)} emails from Gmail "
+                f"for connection {connection_id}: {e}"
+            )
+            continue
+
+        if messages:
+            database.save_gmail_email_content_bulk(messages)
+
+        by_id = {m["message_id"]: m for m in messages if m}
+        for receipt in connection_receipts:
+            message = by_id.get(receipt["message_id"])
+            if message:
+                receipt["body_html"] = message.get("body_html")
+                receipt["body_text"] = message.get("body_text")
+                receipt["from_header"] = message.get("from")
+                receipt["list_unsubscribe"] = message.get("list_unsubscribe")
+
+    return receipts
+
+
+def prepare_receipt_for_llm(receipt: dict) -> dict:
+    """
+    Run the non-LLM parsers over a queued receipt.
+
+    A template learned since the receipt was queued may parse it now, and
+    pre-filtered emails never reach the LLM, exactly as in
+    parse_receipt_content(skip_llm=False).
+
+    Args:
+        receipt: Receipt dict from load_receipts_with_content()
+
+    Returns:
+        Dict with receipt_id plus either "result" (no LLM needed) or the
+        "email" to send to the LLM; "fallback" holds a merchant-only
+        pattern parse to use if the LLM fails
+    """
+    if not receipt["body_html"] and not receipt["body_text"]:
+        return {
+            "receipt_id": receipt["id"],
+            "result": {
+                "parsing_status": "unparseable",
+                "parsing_error": "Could not fetch email from Gmail",
+            },
+        }
+
+    sender_email, sender_name = parse_sender_email(
+        receipt.get("from_header") or receipt.get("sender_email") or ""
+    )
+    sender_domain = extract_sender_domain(sender_email)
+    parsed = ParsedEmail(receipt["body_html"], receipt["body_text"])
+
+    result = parse_receipt_content(
+        html_body=receipt["body_html"],
+        text_body=receipt["body_text"],
+        subject=receipt.get("subject") or "",
+        sender_email=sender_email,
+        sender_domain=sender_domain,
+        sender_name=sender_name,
+        list_unsubscribe=receipt.get("list_unsubscribe") or "",
+        skip_llm=True,
+        parsed=parsed,
+    )
+
+    # Parsed without the LLM, or pre-filtered (never sent to the LLM)
+    merchant_only = result.get("parse_method") == "pattern" and not result.get(
+        "total_amount"
+    )
+    if result.get("parse_method") == "pre_filter" or (
+        result.get("parsing_status") == "parsed" and not merchant_only
+    ):
+        return {"receipt_id": receipt["id"], "result": result}
+
+    return {
+        "receipt_id": receipt["id"],
+        "sender_domain": sender_domain,
+        "parsed": parsed,
+        "fallback": result if result.get("parsing_status") == "parsed" else None,
+        "email": {
+            "subject": receipt.get("subject") or "",
+            "sender": sender_email,
+            "body_text": receipt["body_text"] or parsed.text,
+        },
+    }
+
+
+def run_llm_batch(provider, items: list) -> list:
+    """
+    Parse a batch of prepared receipts with one LLM request.
+
+    Args:
+        provider: LLM provider instance
+        items: Dicts from prepare_receipt_for_llm() that need the LLM
+
+    Returns:
+        List of item dicts with result, actual_cost_cents and latency_ms
+    """
+    started = time.perf_counter()
+    answers = extract_batch_with_llm([item["email"] for item in items], provider)
+    latency_ms = int((time.perf_counter() - started) * 1000)
+
+    for item, (llm_result, cost_cents) in zip(items, answers, strict=True):
+        item["actual_cost_cents"] = cost_cents
+        item["latency_ms"] = latency_ms
+        if llm_result and llm_result.get("total_amount"):
+            # Next email with this layout is parsed from the template instead
+            learn_template(item["sender_domain"], item["parsed"], llm_result)
+            item["result"] = llm_result
+        elif item["fallback"]:
+            item["result"] = item["fallback"]
+        else:
+            item["result"] = {
+                "parsing_status": "unparseable",
+                "parsing_error": "LLM parsing failed",
+            }
+    return items
+
+
+def _record_llm_result(item: dict) -> dict:
+    """Store the outcome of one queued receipt and build its result dict."""
+    receipt_id = item["receipt_id"]
+    parsed_data = item["result"]
+    actual_cost = item.get("actual_cost_cents", 0)
+
+    if parsed_data.get("parsing_status") == "parsed":
+        database.update_receipt_llm_status(
+            receipt_id,
+            status="completed",
+            actual_cost=actual_cost,
+            parsed_data=parsed_data,
+            latency_ms=item.get("latency_ms"),
+        )
+        return {
+            "success": True,
+            "receipt_id": receipt_id,
+            "parsed_data": parsed_data,
+            "actual_cost_cents": actual_cost,
+            "latency_ms": item.get("latency_ms"),
+        }
+
+    database.update_receipt_llm_status(
+        receipt_id,
+        status="failed",
+        actual_cost=actual_cost,
+        latency_ms=item.get("latency_ms"),
+    )
+    return {
+        "success": False,
+        "receipt_id": receipt_id,
+        "error": parsed_data.get("parsing_error", "LLM parsing failed"),
+        "actual_cost_cents": actual_cost,
+        "latency_ms": item.get("latency_ms"),
+    }
+
+
 def process_llm_queue(
     receipt_ids: list, connection_id: int = None
 ) -> Generator[dict, None, dict]:
     """
     Process multiple receipts with LLM, yielding progress updates.
 
+    Receipts are loaded in bulk with their stored bodies, run through the
+    non-LLM parsers, and the rest are packed several to an LLM request with
+    requests running concurrently (limits per provider, see
+    get_queue_limits()). Each receipt records its share of the request's
+    cost and the request's latency.
+
     Args:
         receipt_ids: List of receipt IDs to process
         connection_id: Optional connection ID for credential lookup
@@ -310,20 +543,16 @@ def process_llm_queue(
         "total_cost_cents": 0,
     }
 
-    for receipt_id in receipt_ids:
-        # Process this receipt
-        result = fetch_and_parse_receipt_with_llm(receipt_id)
+    def progress(result):
+        nonlocal processed, succeeded, failed, total_cost
         results.append(result)
-
         processed += 1
         if result.get("success"):
             succeeded += 1
         else:
             failed += 1
-
         total_cost += result.get("actual_cost_cents", 0)
-
-        yield {
+        return {
             "status": "processing",
             "total": total,
             "processed": processed,
@@ -331,12 +560,70 @@ def process_llm_queue(
             "failed": failed,
             "total_cost_cents": total_cost,
             "current_receipt": {
-                "id": receipt_id,
+                "id": result["receipt_id"],
                 "success": result.get("success"),
                 "error": result.get("error"),
             },
         }
 
+    database.set_receipts_llm_status(receipt_ids, "processing")
+    receipts = load_receipts_with_content(receipt_ids)
+
+    found = {r["id"] for r in receipts}
+    for receipt_id in receipt_ids:
+        if receipt_id not in found:
+            yield progress(
+                {
+                    "success": False,
+                    "error": "Receipt not found",
+                    "receipt_id": receipt_id,
+                }
+            )
+
+    pending = []
+    for receipt in receipts:
+        try:
+            item = prepare_receipt_for_llm(receipt)
+        except Exception as e:
+            logger.error(f"LLM queue processing error for receipt {receipt['id']}: {e}")
+            item = {
+                "receipt_id": receipt["id"],
+                "result": {"parsing_status": "unparseable", "parsing_error": str(e)},
+            }
+        if "result" in item:
+            yield progress(_record_llm_result(item))
+        else:
+            pending.append(item)
+
+    if pending:
+        config = load_llm_config()
+        provider = build_llm_provider(config)
+        batch_size, concurrency = (
+            get_queue_limits(config.provider) if config else (1, 1)
+        )
+        batches = [
+            pending[i : i + batch_size] for i in range(0, len(pending), batch_size)
+        ]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(run_llm_batch, provider, batch): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                try:
+                    items = future.result()
+                except Exception as e:
+                    logger.error(f"LLM batch failed: {e}", exc_info=True)
+                    items = futures[future]
+                    for item in items:
+                        item["result"] = item["fallback"] or {
+                            "parsing_status": "unparseable",
+                            "parsing_error": str(e),
+                        }
+                for item in items:
+                    yield progress(_record_llm_result(item))
+
     final_result = {
         "status": "completed",
         "total": total,
@@ -13,6 +13,10 @@ This package contains vendor-specific email parsers organized by domain:
 - travel.py: Airbnb, British Airways, DHL
 - specialty.py: All other specialty vendors
 
+The domain modules are imported lazily: the first get_vendor_parser() call
+(or first access to VENDOR_PARSERS) loads them and runs their
+@register_vendor decorators.
+
 Usage:
     from mcp.gmail_parsers import VENDOR_PARSERS, get_vendor_parser
 
@@ -22,27 +26,25 @@ Usage:
         result = parser(html_body, text_body, subject)
 """
 
-# Import registry and utilities from base
-# Import all domain modules to trigger @register_vendor decorators
-# This registers all parsers into the VENDOR_PARSERS dict
-from . import (  # noqa: F401
-    amazon,
-    apple,
-    digital_services,
-    ecommerce,
-    financial,
-    food_delivery,
-    retail,
-    rides,
-    specialty,
-    travel,
+from .base import (
+    get_vendor_parser,
+    load_vendor_parsers,
+    parse_amount,
+    parse_date_text,
 )
-from .base import VENDOR_PARSERS, get_vendor_parser, parse_amount, parse_date_text
 
 # Export the registry and lookup function
 __all__ = [
     "VENDOR_PARSERS",
     "get_vendor_parser",
+    "load_vendor_parsers",
     "parse_amount",
     "parse_date_text",
 ]
+
+
+def __getattr__(name: str):
+    # The registry is only complete once every domain module is imported
+    if name == "VENDOR_PARSERS":
+        return load_vendor_parsers()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -11,10 +11,14 @@ Handles all Amazon email types:
 """
 
 import re
+from typing import TYPE_CHECKING
 
 from bs4 import BeautifulSoup
 
-from .base import parse_amount, parse_date_text, register_vendor
+from .base import get_soup, parse_amount, parse_date_text, register_vendor
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
 
 
 def detect_amazon_email_type(subject: str, text_body: str) -> str:
@@ -63,6 +67,12 @@ def detect_amazon_email_type(subject: str, text_body: str) -> str:
     return "order"
 
 
+AMAZON_CANCELLATION_ITEM_RE = re.compile(
+    r'cancelled successfully[:\s]*["\']?(.+?)["\']?\s*$', re.IGNORECASE
+)
+AMAZON_TRAILING_ELLIPSIS_RE = re.compile(r"\.{2,}$")
+
+
 def parse_amazon_cancellation(soup, subject: str) -> dict:
     """
     Parse Amazon order cancellation email.
@@ -78,13 +88,11 @@ def parse_amazon_cancellation(soup, subject: str) -> dict:
     """
     # Extract item name from subject: 'Item cancelled successfully: "WoodWick..."'
     item_name = None
-    item_match = re.search(
-        r'cancelled successfully[:\s]*["\']?(.+?)["\']?\s*$', subject, re.IGNORECASE
-    )
+    item_match = AMAZON_CANCELLATION_ITEM_RE.search(subject)
     if item_match:
         item_name = item_match.group(1).strip()
         # Clean up truncation markers
-        item_name = re.sub(r"\.{2,}$", "", item_name).strip()
+        item_name = AMAZON_TRAILING_ELLIPSIS_RE.sub("", item_name).strip()
 
     return {
         "email_type": "cancellation",
@@ -96,6 +104,31 @@ def parse_amazon_cancellation(soup, subject: str) -> dict:
     }
 
 
+AMAZON_REFUND_ITEM_RE = re.compile(r"refund for\s+(.+?)\.{0,3}$", re.IGNORECASE)
+AMAZON_REFUND_AMOUNT_PATTERNS = [
+    (
+        re.compile(
+            r"[£]([0-9,]+\.?\d*)\s*(?:will be credited|refunded|to your)", re.IGNORECASE
+        ),
+        "GBP",
+    ),
+    (
+        re.compile(
+            r"[$]([0-9,]+\.?\d*)\s*(?:will be credited|refunded|to your)", re.IGNORECASE
+        ),
+        "USD",
+    ),
+    (
+        re.compile(
+            r"[€]([0-9,]+\.?\d*)\s*(?:will be credited|refunded|to your)", re.IGNORECASE
+        ),
+        "EUR",
+    ),
+    (re.compile(r"Total refund\s*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE), None),
+    (re.compile(r"Refund subtotal\s*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE), None),
+]
+
+
 def parse_amazon_refund(soup, subject: str, text_body: str) -> dict:
     """
     Parse Amazon refund email.
@@ -114,7 +147,7 @@ def parse_amazon_refund(soup, subject: str, text_body: str) -> dict:
     """
     # Extract item name from subject: "Your refund for TERRAMASTER F4-424..."
     item_name = None
-    item_match = re.search(r"refund for\s+(.+?)\.{0,3}$", subject, re.IGNORECASE)
+    item_match = AMAZON_REFUND_ITEM_RE.search(subject)
     if item_match:
         item_name = item_match.group(1).strip()
 
@@ -123,16 +156,8 @@ def parse_amazon_refund(soup, subject: str, text_body: str) -> dict:
     currency_code = None
     text_to_search = text_body or ""
 
-    refund_patterns = [
-        (r"[£]([0-9,]+\.?\d*)\s*(?:will be credited|refunded|to your)", "GBP"),
-        (r"[$]([0-9,]+\.?\d*)\s*(?:will be credited|refunded|to your)", "USD"),
-        (r"[€]([0-9,]+\.?\d*)\s*(?:will be credited|refunded|to your)", "EUR"),
-        (r"Total refund\s*[£$€]?\s*([0-9,]+\.?\d*)", None),
-        (r"Refund subtotal\s*[£$€]?\s*([0-9,]+\.?\d*)", None),
-    ]
-
-    for pattern, currency in refund_patterns:
-        match = re.search(pattern, text_to_search, re.IGNORECASE)
+    for pattern, currency in AMAZON_REFUND_AMOUNT_PATTERNS:
+        match = pattern.search(text_to_search)
         if match:
             refund_amount = parse_amount(match.group(1))
             if currency:
@@ -161,6 +186,25 @@ def parse_amazon_refund(soup, subject: str, text_body: str) -> dict:
     }
 
 
+AMAZON_FRESH_TOTAL_PATTERNS = [
+    re.compile(r"Order\s+Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Grand\s+Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Your\s+order\s+total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+AMAZON_FRESH_DATE_PATTERNS = [
+    re.compile(r"Delivery\s+date[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE),
+    re.compile(r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE),
+    re.compile(
+        r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2}(?:,\s+\d{4})?)", re.IGNORECASE
+    ),
+    re.compile(
+        r"(\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4})",
+        re.IGNORECASE,
+    ),
+]
+
+
 def parse_amazon_fresh(soup, text_body: str) -> dict:
     """
     Parse Amazon Fresh grocery order email.
@@ -192,15 +236,8 @@ def parse_amazon_fresh(soup, text_body: str) -> dict:
 
     if text:
         # Amazon Fresh order total patterns
-        total_patterns = [
-            r"Order\s+Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-            r"Grand\s+Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-            r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"Your\s+order\s+total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-        ]
-
-        for pattern in total_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in AMAZON_FRESH_TOTAL_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["total_amount"] = parse_amount(match.group(1))
                 break
@@ -214,14 +251,8 @@ def parse_amazon_fresh(soup, text_body: str) -> dict:
             result["currency_code"] = "USD"
 
         # Extract date - Fresh orders have delivery date
-        date_patterns = [
-            r"Delivery\s+date[:\s]+(\d{1,2}\s+\w+\s+\d{4})",
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})",
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2}(?:,\s+\d{4})?)",
-            r"(\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4})",
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in AMAZON_FRESH_DATE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 parsed = parse_date_text(match.group(1))
                 if parsed:
@@ -231,6 +262,47 @@ def parse_amazon_fresh(soup, text_body: str) -> dict:
     return result
 
 
+AMAZON_ORDER_TOTAL_PATTERNS = [
+    re.compile(r"Order Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Grand Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Total for this order[:\s]*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+AMAZON_BUSINESS_DATE_PATTERNS = [
+    # Order placement dates
+    (re.compile(r"Order\s+placed[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Order\s+placed[:\s]+(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE), None),
+    # Arriving dates (with optional weekday)
+    (
+        re.compile(
+            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),
+    (
+        re.compile(
+            r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),
+    (re.compile(r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2})", re.IGNORECASE), None),
+    # Generic patterns
+    (
+        re.compile(
+            r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+    (
+        re.compile(
+            r"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2},?\s+\d{4})",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+]
+
+
 def parse_amazon_business(soup, text_body: str, subject: str) -> dict:
     """
     Parse Amazon Business order confirmation email.
@@ -263,13 +335,8 @@ def parse_amazon_business(soup, text_body: str, subject: str) -> dict:
     text = soup.get_text()
 
     # Extract total amount (same patterns as regular orders)
-    total_patterns = [
-        r"Order Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-        r"Grand Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-        r"Total for this order[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AMAZON_ORDER_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -283,26 +350,8 @@ def parse_amazon_business(soup, text_body: str, subject: str) -> dict:
         result["currency_code"] = "USD"
 
     # Extract date
-    date_patterns = [
-        # Order placement dates
-        (r"Order\s+placed[:\s]+(\d{1,2}\s+\w+\s+\d{4})", None),
-        (r"Order\s+placed[:\s]+(\w+\s+\d{1,2},?\s+\d{4})", None),
-        # Arriving dates (with optional weekday)
-        (r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})", None),
-        (r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})", None),
-        (r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2})", None),
-        # Generic patterns
-        (
-            r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
-            None,
-        ),
-        (
-            r"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2},?\s+\d{4})",
-            None,
-        ),
-    ]
-    for pattern, _ in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern, _ in AMAZON_BUSINESS_DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             parsed = parse_date_text(match.group(1))
             if parsed:
@@ -317,6 +366,51 @@ def parse_amazon_business(soup, text_body: str, subject: str) -> dict:
     return result
 
 
+AMAZON_ORDER_DATE_PATTERNS = [
+    # Explicit order/dispatch dates with full year
+    (re.compile(r"Order\s+placed[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Order\s+placed[:\s]+(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Ordered\s+on[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Ordered\s+on[:\s]+(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Dispatched\s+on[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Dispatched[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Delivered[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE), None),
+    (re.compile(r"Delivered\s+on[:\s]+(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE), None),
+    # Arriving dates - common in order confirmations (with optional weekday)
+    (
+        re.compile(
+            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),  # "Arriving: Saturday, June 14, 2025"
+    (
+        re.compile(
+            r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),  # "Arriving: Saturday 14 June 2025"
+    (
+        re.compile(r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2})", re.IGNORECASE),
+        None,
+    ),  # "Arriving: Saturday, June 14" (no year)
+    # Generic date patterns
+    (
+        re.compile(
+            r"(\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4})",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+    (
+        re.compile(
+            r"((?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4})",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+]
+
+
 def parse_amazon_order(soup, text_body: str, subject: str) -> dict:
     """
     Parse standard Amazon order confirmation email.
@@ -343,15 +437,9 @@ def parse_amazon_order(soup, text_body: str, subject: str) -> dict:
         return result
 
     # Find total amount - Amazon uses various table structures
-    total_patterns = [
-        r"Order Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-        r"Grand Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-        r"Total for this order[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-    ]
-
     text = soup.get_text()
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AMAZON_ORDER_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -365,42 +453,8 @@ def parse_amazon_order(soup, text_body: str, subject: str) -> dict:
         result["currency_code"] = "USD"
 
     # Try to find date - Amazon uses many formats
-    date_patterns = [
-        # Explicit order/dispatch dates with full year
-        (r"Order\s+placed[:\s]+(\d{1,2}\s+\w+\s+\d{4})", None),
-        (r"Order\s+placed[:\s]+(\w+\s+\d{1,2},?\s+\d{4})", None),
-        (r"Ordered\s+on[:\s]+(\d{1,2}\s+\w+\s+\d{4})", None),
-        (r"Ordered\s+on[:\s]+(\w+\s+\d{1,2},?\s+\d{4})", None),
-        (r"Dispatched\s+on[:\s]+(\d{1,2}\s+\w+\s+\d{4})", None),
-        (r"Dispatched[:\s]+(\d{1,2}\s+\w+\s+\d{4})", None),
-        (r"Delivered[:\s]+(\d{1,2}\s+\w+\s+\d{4})", None),
-        (r"Delivered\s+on[:\s]+(\d{1,2}\s+\w+\s+\d{4})", None),
-        # Arriving dates - common in order confirmations (with optional weekday)
-        (
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})",
-            None,
-        ),  # "Arriving: Saturday, June 14, 2025"
-        (
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})",
-            None,
-        ),  # "Arriving: Saturday 14 June 2025"
-        (
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2})",
-            None,
-        ),  # "Arriving: Saturday, June 14" (no year)
-        # Generic date patterns
-        (
-            r"(\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4})",
-            None,
-        ),
-        (
-            r"((?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4})",
-            None,
-        ),
-    ]
-
-    for pattern, _ in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern, _ in AMAZON_ORDER_DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             parsed = parse_date_text(match.group(1))
             if parsed:
@@ -421,6 +475,65 @@ def parse_amazon_order(soup, text_body: str, subject: str) -> dict:
     return result
 
 
+AMAZON_ORDERED_ORDER_RE = re.compile(r"Order\s*#\s*\n?\s*(\d{3}-\d{7}-\d{7})")
+AMAZON_ORDERED_TOTAL_RE = re.compile(r"Total\s*\n\s*([0-9,.]+)\s*(GBP|EUR|USD)")
+AMAZON_ORDERED_TOTAL_INLINE_RE = re.compile(r"Total[:\s]+([0-9,.]+)\s*(GBP|EUR|USD)")
+AMAZON_ORDERED_ITEM_RE = re.compile(
+    r"^\*\s*(.+?)\s+Quantity:\s*(\d+)\s+([0-9,.]+)\s*(GBP|EUR|USD)", re.MULTILINE
+)
+AMAZON_ORDERED_SUBJECT_ITEM_RE = re.compile(
+    r"Ordered:\s*(?:\d+\s*)?['\u2018]([^'\u2019]+)['\u2019]"
+)
+AMAZON_ORDERED_SUBJECT_ITEM_ASCII_RE = re.compile(r"Ordered:\s*(?:\d+\s*)?'([^']+)'")
+AMAZON_ORDERED_DATE_PATTERNS = [
+    # Arriving dates with full month/day (most common in "Ordered:" emails)
+    (
+        re.compile(
+            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),  # "Arriving: Saturday, June 14, 2025"
+    (
+        re.compile(
+            r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),  # "Arriving: Saturday 14 June 2025"
+    (
+        re.compile(r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2})", re.IGNORECASE),
+        None,
+    ),  # "Arriving: Saturday, June 14" (no year)
+    # Delivery dates
+    (
+        re.compile(
+            r"Delivery[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),
+    (
+        re.compile(
+            r"Delivery[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE
+        ),
+        None,
+    ),
+    # Generic full date patterns
+    (
+        re.compile(
+            r"(\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4})",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+    (
+        re.compile(
+            r"((?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4})",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+]
+
+
 def parse_amazon_ordered(soup, text_body: str, subject: str) -> dict:
     """
     Parse Amazon "Ordered:" notification emails.
@@ -452,18 +565,18 @@ def parse_amazon_ordered(soup, text_body: str, subject: str) -> dict:
         text = soup.get_text()
 
     # Extract order ID - format: "Order #\n206-7081774-1099517"
-    order_match = re.search(r"Order\s*#\s*\n?\s*(\d{3}-\d{7}-\d{7})", text)
+    order_match = AMAZON_ORDERED_ORDER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract total amount - format: "Total\n279.97 GBP" or "Total\n10.6 GBP"
-    total_match = re.search(r"Total\s*\n\s*([0-9,.]+)\s*(GBP|EUR|USD)", text)
+    total_match = AMAZON_ORDERED_TOTAL_RE.search(text)
     if total_match:
         result["total_amount"] = parse_amount(total_match.group(1))
         result["currency_code"] = total_match.group(2)
     else:
         # Fallback pattern for inline format
-        total_match2 = re.search(r"Total[:\s]+([0-9,.]+)\s*(GBP|EUR|USD)", text)
+        total_match2 = AMAZON_ORDERED_TOTAL_INLINE_RE.search(text)
         if total_match2:
             result["total_amount"] = parse_amount(total_match2.group(1))
             result["currency_code"] = total_match2.group(2)
@@ -475,8 +588,7 @@ def parse_amazon_ordered(soup, text_body: str, subject: str) -> dict:
     normalized_text = text.replace("\r\n", "\n").replace("\r", "\n")
     # Use ^* anchor with MULTILINE to match line-starting asterisks only (not asterisks within product names)
     # Use .+? non-greedy match to capture full product name including embedded asterisks (e.g., "3x stronger*")
-    item_pattern = r"^\*\s*(.+?)\s+Quantity:\s*(\d+)\s+([0-9,.]+)\s*(GBP|EUR|USD)"
-    for match in re.finditer(item_pattern, normalized_text, re.MULTILINE):
+    for match in AMAZON_ORDERED_ITEM_RE.finditer(normalized_text):
         item_name = match.group(1).strip()
         quantity = int(match.group(2))
         unit_price = parse_amount(match.group(3))
@@ -499,9 +611,7 @@ def parse_amazon_ordered(soup, text_body: str, subject: str) -> dict:
         # Fallback: Extract item name from subject
         # Format: "Ordered: 'Item Name...'" or "Ordered: 2 'Item Name...'"
         # Handle both straight quotes (') and curly quotes (\u2018, \u2019)
-        item_match = re.search(
-            r"Ordered:\s*(?:\d+\s*)?['\u2018]([^'\u2019]+)['\u2019]", subject
-        )
+        item_match = AMAZON_ORDERED_SUBJECT_ITEM_RE.search(subject)
         if item_match:
             item_name = item_match.group(1).strip()
             item = {"name": item_name}
@@ -511,7 +621,7 @@ def parse_amazon_ordered(soup, text_body: str, subject: str) -> dict:
             result["line_items"] = [item]
         else:
             # Additional fallback for straight quotes
-            item_match2 = re.search(r"Ordered:\s*(?:\d+\s*)?'([^']+)'", subject)
+            item_match2 = AMAZON_ORDERED_SUBJECT_ITEM_ASCII_RE.search(subject)
             if item_match2:
                 item_name = item_match2.group(1).strip()
                 item = {"name": item_name}
@@ -521,36 +631,8 @@ def parse_amazon_ordered(soup, text_body: str, subject: str) -> dict:
                 result["line_items"] = [item]
 
     # Try to extract date
-    date_patterns = [
-        # Arriving dates with full month/day (most common in "Ordered:" emails)
-        (
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})",
-            None,
-        ),  # "Arriving: Saturday, June 14, 2025"
-        (
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})",
-            None,
-        ),  # "Arriving: Saturday 14 June 2025"
-        (
-            r"Arriving[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2})",
-            None,
-        ),  # "Arriving: Saturday, June 14" (no year)
-        # Delivery dates
-        (r"Delivery[:\s]+(?:\w+day,?\s+)?(\w+\s+\d{1,2},?\s+\d{4})", None),
-        (r"Delivery[:\s]+(?:\w+day,?\s+)?(\d{1,2}\s+\w+\s+\d{4})", None),
-        # Generic full date patterns
-        (
-            r"(\d{1,2}\s+(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{4})",
-            None,
-        ),
-        (
-            r"((?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4})",
-            None,
-        ),
-    ]
-
-    for pattern, _ in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern, _ in AMAZON_ORDERED_DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             parsed = parse_date_text(match.group(1))
             if parsed:
@@ -560,8 +642,13 @@ def parse_amazon_ordered(soup, text_body: str, subject: str) -> dict:
     return result
 
 
+AMAZON_ORDER_RE = re.compile(r"(\d{3}-\d{7}-\d{7})")
+
+
 @register_vendor(["amazon.co.uk", "amazon.com", "amazon.de", "amazon.fr"])
-def parse_amazon_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_amazon_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Amazon emails - orders, cancellations, refunds, Fresh, shipments.
 
@@ -578,7 +665,7 @@ def parse_amazon_receipt(html_body: str, text_body: str, subject: str) -> dict |
     """
     # Detect email type and route to specialized parser
     email_type = detect_amazon_email_type(subject, text_body or "")
-    soup = BeautifulSoup(html_body, "html.parser") if html_body else None
+    soup = get_soup(html_body, parsed) if html_body else None
 
     # Route to specialized parser based on type
     if email_type == "ordered":
@@ -601,9 +688,8 @@ def parse_amazon_receipt(html_body: str, text_body: str, subject: str) -> dict |
     # Extract order ID (common to all Amazon email types)
     # Note: parse_amazon_ordered already extracts order_id, but this is a fallback
     if not result.get("order_id"):
-        order_pattern = r"(\d{3}-\d{7}-\d{7})"
-        order_match = re.search(order_pattern, subject) or re.search(
-            order_pattern, text_body or ""
+        order_match = AMAZON_ORDER_RE.search(subject) or AMAZON_ORDER_RE.search(
+            text_body or ""
         )
         if order_match:
             result["order_id"] = order_match.group(1)
@@ -625,6 +711,9 @@ def parse_amazon_receipt(html_body: str, text_body: str, subject: str) -> dict |
 # ============================================================================
 
 
+AMAZON_BRAND_RE = re.compile(r"^([A-Z][A-Za-z0-9]*(?:\s+[A-Z][A-Za-z0-9]*){0,2})")
+
+
 def extract_amazon_brand(product_name: str) -> str | None:
     """
     Extract brand name from Amazon product name.
@@ -647,9 +736,7 @@ def extract_amazon_brand(product_name: str) -> str | None:
 
     # Strategy 1: Extract first 1-3 capitalized words (most common)
     # Stop at lowercase word, punctuation, or numbers
-    brand_match = re.match(
-        r"^([A-Z][A-Za-z0-9]*(?:\s+[A-Z][A-Za-z0-9]*){0,2})", product_name
-    )
+    brand_match = AMAZON_BRAND_RE.match(product_name)
     if brand_match:
         brand = brand_match.group(1).strip()
         # Validate: brand should be 2-30 chars
@@ -667,6 +754,14 @@ def extract_amazon_brand(product_name: str) -> str | None:
     return None
 
 
+AMAZON_PRODUCT_LINK_RE = re.compile(r"/dp/|/gp/product/")
+PRICE_RE = re.compile(r"[£$€]\s*([0-9,]+\.?\d*)")
+AMAZON_NON_ITEM_TEXT_RE = re.compile(
+    r"[£$€]|\d{3}-\d{7}|order|total|subtotal|shipping|tax"
+)
+UPPERCASE_RE = re.compile(r"[A-Z]")
+
+
 def extract_amazon_line_items(soup: BeautifulSoup, text: str) -> list:
     """
     Extract structured line items from Amazon email HTML.
@@ -698,14 +793,14 @@ def extract_amazon_line_items(soup: BeautifulSoup, text: str) -> list:
                     items.append(item_data)
 
     # Strategy 2: Look for product links with nearby prices
-    for link in soup.find_all("a", href=re.compile(r"/dp/|/gp/product/")):
+    for link in soup.find_all("a", href=AMAZON_PRODUCT_LINK_RE):
         link_text = link.get_text(strip=True)
         if link_text and 10 < len(link_text) < 200:
             # Look for price in parent or nearby siblings
             parent = link.find_parent(["td", "div", "tr"])
             price = None
             if parent:
-                price_match = re.search(r"[£$€]\s*([0-9,]+\.?\d*)", parent.get_text())
+                price_match = PRICE_RE.search(parent.get_text())
                 if price_match:
                     price = parse_amount(price_match.group(1))
 
@@ -733,14 +828,11 @@ def extract_amazon_line_items(soup: BeautifulSoup, text: str) -> list:
             # Product names are typically 10-150 chars, no prices or order IDs
             if (
                 10 < len(elem_text) < 150
-                and not re.search(
-                    r"[£$€]|\d{3}-\d{7}|order|total|subtotal|shipping|tax",
-                    elem_text.lower(),
-                )
+                and not AMAZON_NON_ITEM_TEXT_RE.search(elem_text.lower())
                 and elem_text not in seen_names
             ):
                 # Check it's likely a product (has uppercase, reasonable structure)
-                if re.search(r"[A-Z]", elem_text) and not elem_text.isupper():
+                if UPPERCASE_RE.search(elem_text) and not elem_text.isupper():
                     seen_names.add(elem_text)
                     cleaned_name = clean_product_name(elem_text)
                     item = {
@@ -760,6 +852,13 @@ def extract_amazon_line_items(soup: BeautifulSoup, text: str) -> list:
     return items[:10]
 
 
+ITEM_FROM_ROW_QTY_RE = re.compile(r"(?:qty|quantity)[:\s]*(\d+)|x(\d+)", re.IGNORECASE)
+ITEM_FROM_ROW_WORD_RE = re.compile(r"[a-zA-Z]{3,}")
+ITEM_FROM_ROW_EXCLUDE_RE = re.compile(
+    r"order|total|subtotal|shipping|tax|delivery|amazon"
+)
+
+
 def extract_item_from_row(cells: list) -> dict | None:
     """
     Extract item data from a table row's cells.
@@ -782,26 +881,22 @@ def extract_item_from_row(cells: list) -> dict | None:
             continue
 
         # Check for price pattern
-        price_match = re.search(r"[£$€]\s*([0-9,]+\.?\d*)", cell_text)
+        price_match = PRICE_RE.search(cell_text)
         if price_match and not name:
             # Price cell - but might also contain product info
             price = parse_amount(price_match.group(1))
             continue
 
         # Check for quantity pattern (e.g., "Qty: 2" or "x2")
-        qty_match = re.search(
-            r"(?:qty|quantity)[:\s]*(\d+)|x(\d+)", cell_text, re.IGNORECASE
-        )
+        qty_match = ITEM_FROM_ROW_QTY_RE.search(cell_text)
         if qty_match:
             quantity = int(qty_match.group(1) or qty_match.group(2))
             continue
 
         # If it looks like a product name (reasonable length, not just numbers)
-        if 10 < len(cell_text) < 200 and re.search(r"[a-zA-Z]{3,}", cell_text):
+        if 10 < len(cell_text) < 200 and ITEM_FROM_ROW_WORD_RE.search(cell_text):
             # Avoid common non-product text
-            if not re.search(
-                r"order|total|subtotal|shipping|tax|delivery|amazon", cell_text.lower()
-            ):
+            if not ITEM_FROM_ROW_EXCLUDE_RE.search(cell_text.lower()):
                 name = cell_text
 
     if name:
@@ -822,6 +917,13 @@ def extract_item_from_row(cells: list) -> dict | None:
     return None
 
 
+PRODUCT_NAME_CTA_PREFIX_RE = re.compile(r"^(Buy|Shop|View|See)\s+", re.IGNORECASE)
+PRODUCT_NAME_CTA_SUFFIX_RE = re.compile(
+    r"\s+(Buy now|Shop now|View item)$", re.IGNORECASE
+)
+PRODUCT_NAME_WHITESPACE_RE = re.compile(r"\s+")
+
+
 def clean_product_name(name: str) -> str:
     """
     Clean up product name by removing noise.
@@ -836,13 +938,11 @@ def clean_product_name(name: str) -> str:
         return name
 
     # Remove common prefixes/suffixes
-    cleaned = re.sub(r"^(Buy|Shop|View|See)\s+", "", name, flags=re.IGNORECASE)
-    cleaned = re.sub(
-        r"\s+(Buy now|Shop now|View item)$", "", cleaned, flags=re.IGNORECASE
-    )
+    cleaned = PRODUCT_NAME_CTA_PREFIX_RE.sub("", name)
+    cleaned = PRODUCT_NAME_CTA_SUFFIX_RE.sub("", cleaned)
 
     # Remove excessive whitespace
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    cleaned = PRODUCT_NAME_WHITESPACE_RE.sub(" ", cleaned).strip()
 
     # Truncate very long names
     if len(cleaned) > 150:
@@ -851,6 +951,24 @@ def clean_product_name(name: str) -> str:
     return cleaned
 
 
+PRODUCT_DESCRIPTION_PATTERNS = [
+    (re.compile(r"headphone|earphone|earbud|airpod"), "audio headphones/earbuds"),
+    (re.compile(r"cable|charger|adapter|usb"), "charging/connectivity accessory"),
+    (re.compile(r"case|cover|screen protector"), "protective case/cover"),
+    (re.compile(r"battery|power bank"), "portable power/battery"),
+    (re.compile(r"book|kindle|paperback|hardcover"), "book"),
+    (re.compile(r"shirt|dress|pants|jeans|jacket|coat"), "clothing item"),
+    (re.compile(r"toy|lego|game|puzzle"), "toy/game"),
+    (re.compile(r"vitamin|supplement|medicine"), "health supplement"),
+    (re.compile(r"food|snack|chocolate|coffee|tea"), "food/beverage"),
+    (re.compile(r"cleaning|soap|detergent"), "cleaning product"),
+    (re.compile(r"phone|tablet|laptop|computer"), "electronic device"),
+    (re.compile(r"watch|clock"), "timepiece"),
+    (re.compile(r"light|lamp|bulb"), "lighting"),
+    (re.compile(r"kitchen|cooking|pan|pot"), "kitchen item"),
+]
+
+
 def infer_product_description(name: str) -> str | None:
     """
     Infer a brief description of what the product IS based on its name.
@@ -867,30 +985,42 @@ def infer_product_description(name: str) -> str | None:
     name_lower = name.lower()
 
     # Common product type mappings
-    type_patterns = [
-        (r"headphone|earphone|earbud|airpod", "audio headphones/earbuds"),
-        (r"cable|charger|adapter|usb", "charging/connectivity accessory"),
-        (r"case|cover|screen protector", "protective case/cover"),
-        (r"battery|power bank", "portable power/battery"),
-        (r"book|kindle|paperback|hardcover", "book"),
-        (r"shirt|dress|pants|jeans|jacket|coat", "clothing item"),
-        (r"toy|lego|game|puzzle", "toy/game"),
-        (r"vitamin|supplement|medicine", "health supplement"),
-        (r"food|snack|chocolate|coffee|tea", "food/beverage"),
-        (r"cleaning|soap|detergent", "cleaning product"),
-        (r"phone|tablet|laptop|computer", "electronic device"),
-        (r"watch|clock", "timepiece"),
-        (r"light|lamp|bulb", "lighting"),
-        (r"kitchen|cooking|pan|pot", "kitchen item"),
-    ]
-
-    for pattern, description in type_patterns:
-        if re.search(pattern, name_lower):
+    for pattern, description in PRODUCT_DESCRIPTION_PATTERNS:
+        if pattern.search(name_lower):
             return description
 
     return None
 
 
+AMAZON_CATEGORY_PATTERNS = [
+    (
+        re.compile(
+            r"headphone|speaker|audio|earphone|earbud|airpod|cable|charger|phone|tablet|laptop|computer|usb|hdmi|adapter|battery|power bank"
+        ),
+        "electronics",
+    ),
+    (re.compile(r"book|kindle|paperback|hardcover|novel|magazine"), "entertainment"),
+    (
+        re.compile(r"shirt|dress|pants|jeans|jacket|coat|shoe|sock|underwear|clothing"),
+        "clothing",
+    ),
+    (
+        re.compile(
+            r"food|snack|chocolate|coffee|tea|grocery|organic|vitamin|supplement"
+        ),
+        "groceries",
+    ),
+    (re.compile(r"toy|lego|game|puzzle|doll|action figure"), "entertainment"),
+    (re.compile(r"cleaning|soap|detergent|shampoo|toothpaste|tissue"), "home"),
+    (re.compile(r"medicine|pharmacy|health|first aid|bandage"), "health"),
+    (re.compile(r"kitchen|cooking|pan|pot|utensil|plate|bowl|cup"), "home"),
+    (re.compile(r"garden|plant|seed|outdoor|patio"), "home"),
+    (re.compile(r"pet|dog|cat|fish|bird"), "other"),
+    (re.compile(r"baby|diaper|infant|toddler"), "other"),
+    (re.compile(r"office|stationery|pen|paper|desk"), "other"),
+]
+
+
 def infer_amazon_category(name: str) -> str:
     """
     Infer category hint from product name for enrichment.
@@ -906,32 +1036,8 @@ def infer_amazon_category(name: str) -> str:
 
     name_lower = name.lower()
 
-    category_patterns = [
-        (
-            r"headphone|speaker|audio|earphone|earbud|airpod|cable|charger|phone|tablet|laptop|computer|usb|hdmi|adapter|battery|power bank",
-            "electronics",
-        ),
-        (r"book|kindle|paperback|hardcover|novel|magazine", "entertainment"),
-        (
-            r"shirt|dress|pants|jeans|jacket|coat|shoe|sock|underwear|clothing",
-            "clothing",
-        ),
-        (
-            r"food|snack|chocolate|coffee|tea|grocery|organic|vitamin|supplement",
-            "groceries",
-        ),
-        (r"toy|lego|game|puzzle|doll|action figure", "entertainment"),
-        (r"cleaning|soap|detergent|shampoo|toothpaste|tissue", "home"),
-        (r"medicine|pharmacy|health|first aid|bandage", "health"),
-        (r"kitchen|cooking|pan|pot|utensil|plate|bowl|cup", "home"),
-        (r"garden|plant|seed|outdoor|patio", "home"),
-        (r"pet|dog|cat|fish|bird", "other"),
-        (r"baby|diaper|infant|toddler", "other"),
-        (r"office|stationery|pen|paper|desk", "other"),
-    ]
-
-    for pattern, category in category_patterns:
-        if re.search(pattern, name_lower):
+    for pattern, category in AMAZON_CATEGORY_PATTERNS:
+        if pattern.search(name_lower):
             return category
 
     return "other"
@@ -6,10 +6,14 @@ Supports both new (2024+) and old (pre-2024) email formats.
 """
 
 import re
+from typing import TYPE_CHECKING
 
 from bs4 import BeautifulSoup
 
-from .base import parse_amount, parse_date_text, register_vendor
+from .base import get_soup, parse_amount, parse_date_text, register_vendor
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
 
 
 def decode_quoted_printable_amount(text: str) -> str:
@@ -45,7 +49,9 @@ def decode_quoted_printable_amount(text: str) -> str:
 
 
 @register_vendor(["apple.com", "itunes.com", "email.apple.com"])
-def parse_apple_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_apple_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Apple App Store and iTunes invoice/receipt emails.
 
@@ -71,7 +77,7 @@ def parse_apple_receipt(html_body: str, text_body: str, subject: str) -> dict |
 
     # Decode quoted-printable content first
     decoded_html = decode_quoted_printable_amount(html_body)
-    soup = BeautifulSoup(decoded_html, "html.parser")
+    soup = get_soup(decoded_html, parsed)
 
     # Detect format: new format has custom-* classes, old format has aapl-desktop-tbl
     is_new_format = (
@@ -204,6 +210,35 @@ def _parse_apple_new_format(soup: BeautifulSoup, result: dict) -> dict:
     return result
 
 
+APPLE_OLD_FORMAT_DATE_RE = re.compile(
+    r"INVOICE DATE</span>.*?<span[^>]*>(\d{1,2}\s+\w+\s+\d{4})</span>",
+    re.IGNORECASE | re.DOTALL,
+)
+APPLE_OLD_FORMAT_ORDER_RE = re.compile(
+    r"ORDER ID</span>.*?<a[^>]*>([A-Z0-9]+)</a>", re.IGNORECASE | re.DOTALL
+)
+APPLE_OLD_FORMAT_ORDER_BR_RE = re.compile(
+    r"ORDER ID</span>.*?<br[^>]*>\s*([A-Z0-9]+)", re.IGNORECASE | re.DOTALL
+)
+APPLE_OLD_FORMAT_DOC_RE = re.compile(
+    r"DOCUMENT NO\.</span>.*?<br[^>]*>\s*(\d+)", re.IGNORECASE | re.DOTALL
+)
+APPLE_OLD_FORMAT_SEQ_RE = re.compile(
+    r"SEQUENCE NO\.</span>.*?<br[^>]*>\s*([0-9-]+)", re.IGNORECASE | re.DOTALL
+)
+APPLE_OLD_FORMAT_PRODUCT_RE = re.compile(r"font-weight:\s*500[^>]*>\s*([^<]+)</span>")
+APPLE_OLD_FORMAT_TOTAL_RE = re.compile(
+    r">TOTAL</td>.*?£(\d+\.?\d*)", re.IGNORECASE | re.DOTALL
+)
+APPLE_OLD_FORMAT_AMOUNTS_RE = re.compile(
+    r"font-weight:\s*600[^>]*>\s*£(\d+\.?\d*)\s*</span>"
+)
+APPLE_OLD_FORMAT_VAT_RE = re.compile(r"VAT.*?£(\d+\.?\d*)", re.IGNORECASE)
+APPLE_OLD_FORMAT_SUBTOTAL_RE = re.compile(
+    r">Subtotal</span>.*?£(\d+\.?\d*)", re.IGNORECASE | re.DOTALL
+)
+
+
 def _parse_apple_old_format(soup: BeautifulSoup, html_body: str, result: dict) -> dict:
     """
     Parse Apple's old email format (pre-2024) with table-based layout.
@@ -214,83 +249,57 @@ def _parse_apple_old_format(soup: BeautifulSoup, html_body: str, result: dict) -
     - "TOTAL" label followed by amount in next cell
     """
     # Extract Invoice Date: <span style="...font-size:10px;">INVOICE DATE</span><br><span dir="auto">24 Dec 2024</span>
-    date_match = re.search(
-        r"INVOICE DATE</span>.*?<span[^>]*>(\d{1,2}\s+\w+\s+\d{4})</span>",
-        html_body,
-        re.IGNORECASE | re.DOTALL,
-    )
+    date_match = APPLE_OLD_FORMAT_DATE_RE.search(html_body)
     if date_match:
         parsed_date = parse_date_text(date_match.group(1))
         if parsed_date:
             result["receipt_date"] = parsed_date
 
     # Extract Order ID: <span style="...">ORDER ID</span><br><span...><a href="...">MM61N78HGZ</a></span>
-    order_match = re.search(
-        r"ORDER ID</span>.*?<a[^>]*>([A-Z0-9]+)</a>",
-        html_body,
-        re.IGNORECASE | re.DOTALL,
-    )
+    order_match = APPLE_OLD_FORMAT_ORDER_RE.search(html_body)
     if order_match:
         result["order_id"] = order_match.group(1)
     else:
         # Alternative: ORDER ID without link
-        order_match2 = re.search(
-            r"ORDER ID</span>.*?<br[^>]*>\s*([A-Z0-9]+)",
-            html_body,
-            re.IGNORECASE | re.DOTALL,
-        )
+        order_match2 = APPLE_OLD_FORMAT_ORDER_BR_RE.search(html_body)
         if order_match2:
             result["order_id"] = order_match2.group(1)
 
     # Extract Document No: <span style="...">DOCUMENT NO.</span><br>216891678188
-    doc_match = re.search(
-        r"DOCUMENT NO\.</span>.*?<br[^>]*>\s*(\d+)",
-        html_body,
-        re.IGNORECASE | re.DOTALL,
-    )
+    doc_match = APPLE_OLD_FORMAT_DOC_RE.search(html_body)
     if doc_match:
         result["document_id"] = doc_match.group(1)
 
     # Extract Sequence No: <span style="...">SEQUENCE NO.</span><br>2-6358439100
-    seq_match = re.search(
-        r"SEQUENCE NO\.</span>.*?<br[^>]*>\s*([0-9-]+)",
-        html_body,
-        re.IGNORECASE | re.DOTALL,
-    )
+    seq_match = APPLE_OLD_FORMAT_SEQ_RE.search(html_body)
     if seq_match:
         result["sequence_id"] = seq_match.group(1)
 
     # Extract Product name: <span style="font-size:14px;font-weight:500;">Apple TV</span>
-    product_match = re.search(r"font-weight:\s*500[^>]*>\s*([^<]+)</span>", html_body)
+    product_match = APPLE_OLD_FORMAT_PRODUCT_RE.search(html_body)
     if product_match:
         result["product_name"] = product_match.group(1).strip()
 
     # Extract Total amount: after "TOTAL" label, look for £X.XX
     # Pattern: <td...>TOTAL</td>...£8.99
-    total_match = re.search(
-        r">TOTAL</td>.*?£(\d+\.?\d*)", html_body, re.IGNORECASE | re.DOTALL
-    )
+    total_match = APPLE_OLD_FORMAT_TOTAL_RE.search(html_body)
     if total_match:
         result["total_amount"] = float(total_match.group(1))
     else:
         # Alternative: look for bold amount after item name
         # <span style="font-weight:600;white-space:nowrap;">£8.99</span>
-        amounts = re.findall(
-            r"font-weight:\s*600[^>]*>\s*£(\d+\.?\d*)\s*</span>", html_body
-        )
+        amounts = APPLE_OLD_FORMAT_AMOUNTS_RE.findall(html_body)
         if amounts:
             # Last bold amount is usually the total
             result["total_amount"] = float(amounts[-1])
 
     # Extract VAT: look for VAT pattern with amount
-    vat_match = re.search(r"VAT.*?£(\d+\.?\d*)", html_body, re.IGNORECASE)
+    vat_match = APPLE_OLD_FORMAT_VAT_RE.search(html_body)
     if vat_match:
         result["vat_amount"] = float(vat_match.group(1))
 
     # Extract Subtotal
-    subtotal_match = re.search(
-        r">Subtotal</span>.*?£(\d+\.?\d*)", html_body, re.IGNORECASE | re.DOTALL
-    )
+    subtotal_match = APPLE_OLD_FORMAT_SUBTOTAL_RE.search(html_body)
     if subtotal_match:
         result["subtotal"] = float(subtotal_match.group(1))
 
@@ -347,6 +356,24 @@ def extract_apple_subtotal(soup: BeautifulSoup) -> float | None:
     return None
 
 
+APPLE_DESCRIPTION_PATTERNS = [
+    (re.compile(r"icloud|storage"), "cloud storage subscription"),
+    (re.compile(r"apple music|music subscription"), "music streaming subscription"),
+    (re.compile(r"apple tv"), "video streaming subscription"),
+    (re.compile(r"tv\+"), "Apple TV+ subscription"),
+    (re.compile(r"apple arcade"), "gaming subscription"),
+    (re.compile(r"apple one"), "bundled services subscription"),
+    (re.compile(r"apple news"), "news subscription"),
+    (re.compile(r"apple fitness"), "fitness subscription"),
+    (re.compile(r"in-app purchase|in app"), "in-app purchase"),
+    (re.compile(r"bfi player"), "BFI streaming subscription"),
+    (re.compile(r"hazard perception"), "driving test preparation"),
+    (re.compile(r"subscription"), "subscription service"),
+    (re.compile(r"app$|\.app"), "mobile application"),
+    (re.compile(r"game"), "mobile game"),
+]
+
+
 def infer_apple_description(name: str) -> str | None:
     """
     Infer description for Apple items.
@@ -362,30 +389,21 @@ def infer_apple_description(name: str) -> str | None:
 
     name_lower = name.lower()
 
-    patterns = [
-        (r"icloud|storage", "cloud storage subscription"),
-        (r"apple music|music subscription", "music streaming subscription"),
-        (r"apple tv", "video streaming subscription"),
-        (r"tv\+", "Apple TV+ subscription"),
-        (r"apple arcade", "gaming subscription"),
-        (r"apple one", "bundled services subscription"),
-        (r"apple news", "news subscription"),
-        (r"apple fitness", "fitness subscription"),
-        (r"in-app purchase|in app", "in-app purchase"),
-        (r"bfi player", "BFI streaming subscription"),
-        (r"hazard perception", "driving test preparation"),
-        (r"subscription", "subscription service"),
-        (r"app$|\.app", "mobile application"),
-        (r"game", "mobile game"),
-    ]
-
-    for pattern, desc in patterns:
-        if re.search(pattern, name_lower):
+    for pattern, desc in APPLE_DESCRIPTION_PATTERNS:
+        if pattern.search(name_lower):
             return desc
 
     return "app/digital content"
 
 
+APPLE_SUBSCRIPTION_RE = re.compile(
+    r"icloud|storage|apple one|music|tv\+|arcade|news|fitness|apple tv|bfi|player"
+)
+APPLE_GAME_RE = re.compile(r"game|games")
+APPLE_IN_APP_RE = re.compile(r"in-app|coins|gems|premium")
+APPLE_EDUCATION_RE = re.compile(r"hazard|driving|test|education")
+
+
 def infer_apple_category(name: str) -> str:
     """
     Infer category for Apple items.
@@ -401,16 +419,13 @@ def infer_apple_category(name: str) -> str:
 
     name_lower = name.lower()
 
-    if re.search(
-        r"icloud|storage|apple one|music|tv\+|arcade|news|fitness|apple tv|bfi|player",
-        name_lower,
-    ):
+    if APPLE_SUBSCRIPTION_RE.search(name_lower):
         return "subscription"
-    if re.search(r"game|games", name_lower):
+    if APPLE_GAME_RE.search(name_lower):
         return "entertainment"
-    if re.search(r"in-app|coins|gems|premium", name_lower):
+    if APPLE_IN_APP_RE.search(name_lower):
         return "entertainment"
-    if re.search(r"hazard|driving|test|education", name_lower):
+    if APPLE_EDUCATION_RE.search(name_lower):
         return "education"
 
     return "subscription"
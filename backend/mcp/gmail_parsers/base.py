@@ -3,36 +3,126 @@ Gmail Parser Base - Shared Utilities and Registry
 
 Contains:
 - Parser registry and decorator for vendor-specific parsers
+- Domain-suffix lookup and lazy loading of the vendor modules
 - Common utility functions for amount and date parsing
 - Type definitions for parser functions
 """
 
+import importlib
 import re
 from collections.abc import Callable
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-# Type alias for parser functions
-VendorParser = Callable[[str, str, str], dict | None]
+from bs4 import BeautifulSoup
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+# Type alias for parser functions: (html_body, text_body, subject, parsed=None)
+VendorParser = Callable[..., dict | None]
 
 
 # Registry of vendor domain -> parser function
 VENDOR_PARSERS: dict[str, VendorParser] = {}
 
+# Vendor modules in this package. They are imported on the first lookup
+# rather than with the package, so processes that never parse receipts
+# (Flask, non-Gmail Celery workers) don't pay for them.
+VENDOR_MODULES = (
+    "amazon",
+    "apple",
+    "digital_services",
+    "ecommerce",
+    "financial",
+    "food_delivery",
+    "retail",
+    "rides",
+    "specialty",
+    "travel",
+)
+
+# Resolved sender domains kept by get_vendor_parser
+VENDOR_LOOKUP_CACHE_SIZE = 4096
+
+_vendor_modules_loaded = False
+
+
+class _DomainTrieNode:
+    """Node in the reversed-label domain trie ('uk' -> 'co' -> 'amazon')."""
+
+    __slots__ = ("children", "parser")
+
+    def __init__(self):
+        self.children: dict[str, _DomainTrieNode] = {}
+        self.parser: VendorParser | None = None
+
+
+_DOMAIN_TRIE = _DomainTrieNode()
 
-def register_vendor(domains: list[str]):
-    """Decorator to register a parser for specific domains."""
+
+def register_vendor(domains: list[str], version: int = 1):
+    """
+    Decorator to register a parser for specific domains.
+
+    Args:
+        domains: Sender domains handled by the parser
+        version: Parser version. Bump it whenever the parser's output changes
+            so a reparse run picks up the receipts it produced.
+    """
 
     def decorator(func: VendorParser):
+        func.parser_version = version
         for domain in domains:
             VENDOR_PARSERS[domain] = func
+            node = _DOMAIN_TRIE
+            for label in reversed(domain.lower().split(".")):
+                node = node.children.setdefault(label, _DomainTrieNode())
+            node.parser = func
+        _resolve_vendor_parser.cache_clear()
         return func
 
     return decorator
 
 
+def load_vendor_parsers() -> dict[str, VendorParser]:
+    """
+    Import every vendor module so its @register_vendor decorators run.
+
+    Returns:
+        The populated VENDOR_PARSERS registry
+    """
+    global _vendor_modules_loaded
+
+    if not _vendor_modules_loaded:
+        for module_name in VENDOR_MODULES:
+            importlib.import_module(f"{__package__}.{module_name}")
+        _vendor_modules_loaded = True
+    return VENDOR_PARSERS
+
+
+@lru_cache(maxsize=VENDOR_LOOKUP_CACHE_SIZE)
+def _resolve_vendor_parser(sender_domain: str) -> VendorParser | None:
+    """Walk the trie and return the parser for the longest registered suffix."""
+    node = _DOMAIN_TRIE
+    parser = None
+    for label in reversed(sender_domain.split(".")):
+        node = node.children.get(label)
+        if node is None:
+            break
+        if node.parser is not None:
+            parser = node.parser
+    return parser
+
+
 def get_vendor_parser(sender_domain: str) -> VendorParser | None:
     """
     Get vendor-specific parser for a domain.
 
+    Matches whole labels from the right, so 'email.amazon.co.uk' resolves to
+    the 'amazon.co.uk' parser but 'eba.com' does not match 'ba.com'. The most
+    specific registered domain wins.
+
     Args:
         sender_domain: Email sender domain (e.g., 'amazon.co.uk')
 
@@ -42,18 +132,32 @@ def get_vendor_parser(sender_domain: str) -> VendorParser | None:
     if not sender_domain:
         return None
 
-    sender_domain = sender_domain.lower()
+    load_vendor_parsers()
+    return _resolve_vendor_parser(sender_domain.lower())
 
-    # Check exact match first
-    if sender_domain in VENDOR_PARSERS:
-        return VENDOR_PARSERS[sender_domain]
 
-    # Check partial match (e.g., 'email.amazon.co.uk' matches 'amazon.co.uk')
-    for domain, parser in VENDOR_PARSERS.items():
-        if domain in sender_domain:
-            return parser
+def get_soup(html_body: str, parsed: "ParsedEmail | None" = None) -> BeautifulSoup:
+    """
+    Get the parsed tree for an email body, reusing the shared one if possible.
 
-    return None
+    Args:
+        html_body: HTML to parse
+        parsed: Optional ParsedEmail from the orchestrator
+
+    Returns:
+        BeautifulSoup tree (shared - do not modify)
+    """
+    if parsed is None or not parsed.matches(html_body):
+        # Imported here: mcp.gmail_parsing imports this package at load time
+        from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+        parsed = ParsedEmail(html_body)
+    return parsed.soup
+
+
+CURRENCY_STRIP_RE = re.compile(r"[£$€¥\s]")
+EUROPEAN_DECIMAL_RE = re.compile(r"^\d+,\d{2}$")
+NUMBER_RE = re.compile(r"(\d+\.?\d*)")
 
 
 def parse_amount(text: str) -> float | None:
@@ -62,18 +166,18 @@ def parse_amount(text: str) -> float | None:
         return None
 
     # Remove currency symbols and whitespace
-    cleaned = re.sub(r"[£$€¥\s]", "", text)
+    cleaned = CURRENCY_STRIP_RE.sub("", text)
 
     # Handle European format: comma as decimal separator (e.g., "63,75" -> "63.75")
     # Pattern: comma followed by exactly 2 digits at end of number
-    if re.match(r"^\d+,\d{2}$", cleaned):
+    if EUROPEAN_DECIMAL_RE.match(cleaned):
         cleaned = cleaned.replace(",", ".")
     else:
         # Otherwise remove commas (thousands separators)
         cleaned = cleaned.replace(",", "")
 
     # Extract number
-    match = re.search(r"(\d+\.?\d*)", cleaned)
+    match = NUMBER_RE.search(cleaned)
     if match:
         try:
             return float(match.group(1))
@@ -82,26 +186,33 @@ def parse_amount(text: str) -> float | None:
     return None
 
 
+# Month name patterns (full and abbreviated)
+MONTH_PATTERN = r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+
+# Common date patterns, compiled once
+DATE_TEXT_PATTERNS = [
+    # 15 January 2024 or 15 Jan 2024
+    (
+        re.compile(rf"(\d{{1,2}})\s+({MONTH_PATTERN})\s+(\d{{4}})", re.IGNORECASE),
+        "DMY_FULL",
+    ),
+    # January 15, 2024 or Jan 15, 2024
+    (
+        re.compile(rf"({MONTH_PATTERN})\s+(\d{{1,2}}),?\s+(\d{{4}})", re.IGNORECASE),
+        "MDY_FULL",
+    ),
+    # 15/01/2024 or 15-01-2024
+    (re.compile(r"(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})"), "DMY"),
+    # 2024-01-15
+    (re.compile(r"(\d{4})[/\-](\d{1,2})[/\-](\d{1,2})"), "YMD"),
+]
+
+
 def parse_date_text(text: str) -> str | None:
     """Parse various date formats to YYYY-MM-DD."""
     if not text:
         return None
 
-    # Month name patterns (full and abbreviated)
-    month_pattern = r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
-
-    # Common patterns
-    patterns = [
-        # 15 January 2024 or 15 Jan 2024
-        (rf"(\d{{1,2}})\s+({month_pattern})\s+(\d{{4}})", "DMY_FULL"),
-        # January 15, 2024 or Jan 15, 2024
-        (rf"({month_pattern})\s+(\d{{1,2}}),?\s+(\d{{4}})", "MDY_FULL"),
-        # 15/01/2024 or 15-01-2024
-        (r"(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})", "DMY"),
-        # 2024-01-15
-        (r"(\d{4})[/\-](\d{1,2})[/\-](\d{1,2})", "YMD"),
-    ]
-
     # Map both full and abbreviated month names to numbers
     months = {
         "jan": 1,
@@ -130,8 +241,8 @@ def parse_date_text(text: str) -> str | None:
         "december": 12,
     }
 
-    for pattern, fmt in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern, fmt in DATE_TEXT_PATTERNS:
+        match = pattern.search(text)
         if match:
             try:
                 if fmt == "DMY_FULL":
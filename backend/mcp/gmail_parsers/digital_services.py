@@ -5,15 +5,38 @@ Microsoft, Google, Figma, Atlassian, Anthropic
 """
 
 import re
-
-from bs4 import BeautifulSoup
-
-from .base import parse_amount, parse_date_text, register_vendor
+from typing import TYPE_CHECKING
+
+from .base import get_soup, parse_amount, parse_date_text, register_vendor
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+
+MICROSOFT_SUBJECT_PATTERNS = [
+    re.compile(r"purchase of\s+(.+?)\s+has been", re.IGNORECASE),
+    re.compile(r"subscription to\s+(.+?)\s+has been", re.IGNORECASE),
+    # Handle both curly and straight apostrophe
+    re.compile(r"You['\u2019]ve renewed your\s+(.+?)\s+subscription", re.IGNORECASE),
+    re.compile(r"Your\s+(.+?)\s+order\s*#\d+", re.IGNORECASE),
+]
+MICROSOFT_ORDER_RE = re.compile(r"Order\s*(?:number|#)?[:\s]*(\d{8,12})", re.IGNORECASE)
+MICROSOFT_AMOUNT_PATTERNS = [
+    re.compile(r"Plan Price[:\s]*(?:GBP|USD|EUR)?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"(?:GBP|USD|EUR)\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+MICROSOFT_PERIOD_RE = re.compile(r"(\d+)\s*(year|month)", re.IGNORECASE)
+MICROSOFT_PAYMENT_RE = re.compile(
+    r"(MasterCard|Visa|PayPal|Amex|American Express)[^\d]*(\*{2,4}\d{4})?",
+    re.IGNORECASE,
+)
 
 
 @register_vendor(["microsoft.com"])
 def parse_microsoft_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Microsoft purchase receipts (Microsoft 365, Xbox, Store).
@@ -40,14 +63,8 @@ def parse_microsoft_receipt(
     # "Your Microsoft order #2600070935 has been processed"
     product_name = None
 
-    subject_patterns = [
-        r"purchase of\s+(.+?)\s+has been",
-        r"subscription to\s+(.+?)\s+has been",
-        r"You['\u2019]ve renewed your\s+(.+?)\s+subscription",  # Handle both curly and straight apostrophe
-        r"Your\s+(.+?)\s+order\s*#\d+",
-    ]
-    for pattern in subject_patterns:
-        match = re.search(pattern, subject, re.IGNORECASE)
+    for pattern in MICROSOFT_SUBJECT_PATTERNS:
+        match = pattern.search(subject)
         if match:
             product_name = match.group(1).strip()
             break
@@ -58,25 +75,17 @@ def parse_microsoft_receipt(
         result["line_items"] = [{"name": product_name, "brand": "Microsoft"}]
 
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
         # Extract order number (8-12 digits)
-        order_match = re.search(
-            r"Order\s*(?:number|#)?[:\s]*(\d{8,12})", text, re.IGNORECASE
-        )
+        order_match = MICROSOFT_ORDER_RE.search(text)
         if order_match:
             result["order_id"] = order_match.group(1)
 
         # Extract amount - multiple patterns
-        amount_patterns = [
-            r"Plan Price[:\s]*(?:GBP|USD|EUR)?\s*([0-9,]+\.?\d*)",
-            r"(?:GBP|USD|EUR)\s*([0-9,]+\.?\d*)",
-            r"[£$€]\s*([0-9,]+\.?\d*)",
-            r"Total[:\s]*[£$€]?\s*([0-9,]+\.?\d*)",
-        ]
-        for pattern in amount_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in MICROSOFT_AMOUNT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["total_amount"] = parse_amount(match.group(1))
                 break
@@ -90,18 +99,14 @@ def parse_microsoft_receipt(
             result["currency_code"] = "USD"
 
         # Subscription period
-        period_match = re.search(r"(\d+)\s*(year|month)", text, re.IGNORECASE)
+        period_match = MICROSOFT_PERIOD_RE.search(text)
         if period_match:
             result["billing_period"] = (
                 f"{period_match.group(1)} {period_match.group(2)}"
             )
 
         # Payment method
-        payment_match = re.search(
-            r"(MasterCard|Visa|PayPal|Amex|American Express)[^\d]*(\*{2,4}\d{4})?",
-            text,
-            re.IGNORECASE,
-        )
+        payment_match = MICROSOFT_PAYMENT_RE.search(text)
         if payment_match:
             result["payment_method"] = payment_match.group(0).strip()
 
@@ -130,8 +135,35 @@ def parse_microsoft_receipt(
 # ============================================================================
 
 
+GOOGLE_ORDER_PATTERNS = [
+    re.compile(r"Order number[:\s]*([A-Z0-9\.\-]+)", re.IGNORECASE),
+    re.compile(r"Invoice number[:\s]*(\d+)", re.IGNORECASE),
+]
+GOOGLE_SUBJECT_RE = re.compile(r"for\s+([A-Z0-9\-]+)", re.IGNORECASE)
+GOOGLE_DATE_RE = re.compile(
+    r"Invoice date[:\s]+([A-Za-z]+\s+\d{1,2},\s+\d{4})", re.IGNORECASE
+)
+GOOGLE_PERIOD_END_RE = re.compile(r"to\s+(\d{4}-\d{2}-\d{2})", re.IGNORECASE)
+GOOGLE_SUBJECT_DATE_RE = re.compile(r"\(([A-Za-z]+\s+\d{4})\)")
+GOOGLE_AMOUNT_PATTERNS = [
+    re.compile(r"[£$€]\s*([0-9,]+\.?\d*)/(?:year|month)", re.IGNORECASE),
+    re.compile(r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Price[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"[£$€]\s*([0-9,]+\.[0-9]{2})", re.IGNORECASE),
+]
+GOOGLE_PRODUCT_PATTERNS = [
+    re.compile(r"(?:Product|Item)[:\s]+(.+?)(?:\n|Auto-renewing)"),
+    re.compile(r"(\d+ GB.*?)\s+(?:Google One|storage)"),
+    # App subscriptions
+    re.compile(r"(?:for|of)\s+([A-Za-z0-9\s]+(?:subscription|plan|membership))"),
+]
+GOOGLE_PERIOD_RE = re.compile(r"([£$€][0-9,\.]+)/(\w+)")
+
+
 @register_vendor(["google.com"])
-def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_google_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Google Play and Google Cloud receipts.
 
@@ -167,32 +199,26 @@ def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict |
         result["merchant_name_normalized"] = "google_cloud"
 
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
         # Extract order/invoice number
-        order_patterns = [
-            r"Order number[:\s]*([A-Z0-9\.\-]+)",
-            r"Invoice number[:\s]*(\d+)",
-        ]
-        for pattern in order_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in GOOGLE_ORDER_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["order_id"] = match.group(1)
                 break
 
         # Try to extract invoice ID from subject for Google Cloud
         if not result.get("order_id") and "invoice" in subject_lower:
-            subject_match = re.search(r"for\s+([A-Z0-9\-]+)", subject, re.IGNORECASE)
+            subject_match = GOOGLE_SUBJECT_RE.search(subject)
             if subject_match:
                 result["order_id"] = subject_match.group(1)
 
         # Extract invoice date for Google Cloud
         if "cloud" in result.get("merchant_name_normalized", ""):
             # Pattern 1: "Invoice date: Month DD, YYYY"
-            date_match = re.search(
-                r"Invoice date[:\s]+([A-Za-z]+\s+\d{1,2},\s+\d{4})", text, re.IGNORECASE
-            )
+            date_match = GOOGLE_DATE_RE.search(text)
             if date_match:
                 parsed = parse_date_text(date_match.group(1))
                 if parsed:
@@ -200,9 +226,7 @@ def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict |
 
             # Pattern 2: "Billing period: YYYY-MM-DD to YYYY-MM-DD" (use end date)
             if not result.get("receipt_date"):
-                period_match = re.search(
-                    r"to\s+(\d{4}-\d{2}-\d{2})", text, re.IGNORECASE
-                )
+                period_match = GOOGLE_PERIOD_END_RE.search(text)
                 if period_match:
                     parsed = parse_date_text(period_match.group(1))
                     if parsed:
@@ -210,7 +234,7 @@ def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict |
 
             # Pattern 3: Subject line "Invoice for [ID] (Month YYYY)" - use first day of month
             if not result.get("receipt_date"):
-                subject_date = re.search(r"\(([A-Za-z]+\s+\d{4})\)", subject)
+                subject_date = GOOGLE_SUBJECT_DATE_RE.search(subject)
                 if subject_date:
                     # Use first day of month as approximation
                     parsed = parse_date_text(subject_date.group(1) + " 01")
@@ -218,14 +242,8 @@ def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict |
                         result["receipt_date"] = parsed
 
         # Extract amount (Google Play has in HTML)
-        amount_patterns = [
-            r"[£$€]\s*([0-9,]+\.?\d*)/(?:year|month)",
-            r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"Price[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"[£$€]\s*([0-9,]+\.[0-9]{2})",
-        ]
-        for pattern in amount_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in GOOGLE_AMOUNT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["total_amount"] = parse_amount(match.group(1))
                 break
@@ -239,13 +257,8 @@ def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict |
             result["currency_code"] = "USD"
 
         # Extract product name for Google Play
-        product_patterns = [
-            r"(?:Product|Item)[:\s]+(.+?)(?:\n|Auto-renewing)",
-            r"(\d+ GB.*?)\s+(?:Google One|storage)",
-            r"(?:for|of)\s+([A-Za-z0-9\s]+(?:subscription|plan|membership))",  # App subscriptions
-        ]
-        for pattern in product_patterns:
-            match = re.search(pattern, text)
+        for pattern in GOOGLE_PRODUCT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 product = match.group(1).strip()
                 # Avoid extracting just "Price" or other generic terms
@@ -258,7 +271,7 @@ def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict |
                     break
 
         # Extract subscription period if present
-        period_match = re.search(r"([£$€][0-9,\.]+)/(\w+)", text)
+        period_match = GOOGLE_PERIOD_RE.search(text)
         if period_match:
             result["billing_period"] = period_match.group(2)
 
@@ -297,9 +310,22 @@ def parse_google_receipt(html_body: str, text_body: str, subject: str) -> dict |
 # ============================================================================
 
 
+ANTHROPIC_RECEIPT_RE = re.compile(r"#(\d{4}-\d{4}-\d{4})")
+ANTHROPIC_INVOICE_RE = re.compile(r"Invoice number\s+([A-Z0-9\-]+)", re.IGNORECASE)
+ANTHROPIC_AMOUNT_PATTERNS = [
+    re.compile(r"[\$£]([0-9,]+\.?\d*)\s+Paid", re.IGNORECASE),
+    re.compile(r"Total\s+[\$£]([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount paid\s+[\$£]([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+ANTHROPIC_DATE_RE = re.compile(r"Paid\s+(\w+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE)
+ANTHROPIC_VAT_RE = re.compile(r"(?:VAT|Tax)[^\$£]*[\$£]([0-9,]+\.?\d*)", re.IGNORECASE)
+ANTHROPIC_SUBTOTAL_RE = re.compile(r"Subtotal\s+[\$£]([0-9,]+\.?\d*)", re.IGNORECASE)
+ANTHROPIC_PRODUCT_RE = re.compile(r"Receipt #[\d\-]+\s+(.+?)\s+Qty")
+
+
 @register_vendor(["mail.anthropic.com"])
 def parse_anthropic_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Anthropic receipt emails (Stripe-based).
@@ -321,30 +347,25 @@ def parse_anthropic_receipt(
     }
 
     # Extract receipt number from subject
-    receipt_match = re.search(r"#(\d{4}-\d{4}-\d{4})", subject)
+    receipt_match = ANTHROPIC_RECEIPT_RE.search(subject)
     if receipt_match:
         result["order_id"] = receipt_match.group(1)
 
     # Use text body for parsing (cleaner than HTML)
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract invoice number
-    invoice_match = re.search(r"Invoice number\s+([A-Z0-9\-]+)", text, re.IGNORECASE)
+    invoice_match = ANTHROPIC_INVOICE_RE.search(text)
     if invoice_match:
         result["invoice_number"] = invoice_match.group(1)
 
     # Extract total amount - handle both USD ($) and GBP (£)
     # e.g., "$60.00 Paid", "£180.00 Paid", "Total $60.00", "Amount paid £180.00"
-    amount_patterns = [
-        r"[\$£]([0-9,]+\.?\d*)\s+Paid",
-        r"Total\s+[\$£]([0-9,]+\.?\d*)",
-        r"Amount paid\s+[\$£]([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in ANTHROPIC_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             # Detect currency from match
@@ -354,24 +375,22 @@ def parse_anthropic_receipt(
             break
 
     # Extract date (e.g., "November 30, 2025")
-    date_match = re.search(r"Paid\s+(\w+\s+\d{1,2},?\s+\d{4})", text, re.IGNORECASE)
+    date_match = ANTHROPIC_DATE_RE.search(text)
     if date_match:
         result["receipt_date"] = parse_date_text(date_match.group(1))
 
     # Extract VAT/Tax (e.g., "VAT - United Kingdom (20%) $10.00" or "Tax (20%) £30.00")
-    vat_match = re.search(
-        r"(?:VAT|Tax)[^\$£]*[\$£]([0-9,]+\.?\d*)", text, re.IGNORECASE
-    )
+    vat_match = ANTHROPIC_VAT_RE.search(text)
     if vat_match:
         result["vat_amount"] = parse_amount(vat_match.group(1))
 
     # Extract subtotal
-    subtotal_match = re.search(r"Subtotal\s+[\$£]([0-9,]+\.?\d*)", text, re.IGNORECASE)
+    subtotal_match = ANTHROPIC_SUBTOTAL_RE.search(text)
     if subtotal_match:
         result["subtotal"] = parse_amount(subtotal_match.group(1))
 
     # Extract product description
-    product_match = re.search(r"Receipt #[\d\-]+\s+(.+?)\s+Qty", text)
+    product_match = ANTHROPIC_PRODUCT_RE.search(text)
     if product_match:
         result["product_name"] = product_match.group(1).strip()
 
@@ -393,9 +412,17 @@ def parse_anthropic_receipt(
 # ============================================================================
 
 
+ATLASSIAN_INVOICE_RE = re.compile(r"(IN-\d{3}-\d{3}-\d+)")
+ATLASSIAN_BODY_INVOICE_RE = re.compile(r"invoice\s+(IN-\d{3}-\d{3}-\d+)", re.IGNORECASE)
+ATLASSIAN_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["am.atlassian.com", "atlassian.com"])
 def parse_atlassian_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Atlassian invoice/receipt emails.
@@ -413,21 +440,19 @@ def parse_atlassian_receipt(
     }
 
     # Extract invoice number from subject
-    invoice_match = re.search(r"(IN-\d{3}-\d{3}-\d+)", subject)
+    invoice_match = ATLASSIAN_INVOICE_RE.search(subject)
     if invoice_match:
         result["order_id"] = invoice_match.group(1)
 
     # Use text body
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Try to extract invoice number from body if not in subject
     if not result.get("order_id"):
-        invoice_match = re.search(
-            r"invoice\s+(IN-\d{3}-\d{3}-\d+)", text, re.IGNORECASE
-        )
+        invoice_match = ATLASSIAN_BODY_INVOICE_RE.search(text)
         if invoice_match:
             result["order_id"] = invoice_match.group(1)
 
@@ -440,12 +465,8 @@ def parse_atlassian_receipt(
         result["currency_code"] = "USD"
 
     # Extract amount (if in email body - often in PDF attachment)
-    amount_patterns = [
-        r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in ATLASSIAN_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -462,8 +483,29 @@ def parse_atlassian_receipt(
 # ============================================================================
 
 
+FIGMA_DATE_RE = re.compile(r"(\w{3})\s+(\d{1,2}),?\s+(\d{4})", re.IGNORECASE)
+FIGMA_SUB_RE = re.compile(
+    r"(Professional|Organization|Team|Starter)\s+(team\s+)?\((annual|monthly)\)",
+    re.IGNORECASE,
+)
+
+
+FIGMA_AMOUNT_PATTERNS = [
+    # Total: £201.60
+    re.compile(r"Total:?\s*[\n\s]*£([\d,]+\.?\d*)", re.IGNORECASE),
+    # Total: $15.00
+    re.compile(r"Total:?\s*[\n\s]*\$([\d,]+\.?\d*)", re.IGNORECASE),
+    # £201.60 GBP
+    re.compile(r"£([\d,]+\.?\d*)\s*GBP", re.IGNORECASE),
+    # $15.00 USD
+    re.compile(r"\$([\d,]+\.\d{2})\s*USD", re.IGNORECASE),
+]
+
+
 @register_vendor(["figma.com"])
-def parse_figma_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_figma_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Figma subscription receipt emails.
 
@@ -482,7 +524,7 @@ def parse_figma_receipt(html_body: str, text_body: str, subject: str) -> dict |
     }
 
     # Extract date from subject "Receipt for subscription payment Nov 30, 2025"
-    date_match = re.search(r"(\w{3})\s+(\d{1,2}),?\s+(\d{4})", subject, re.IGNORECASE)
+    date_match = FIGMA_DATE_RE.search(subject)
     if date_match:
         month_abbr = date_match.group(1)
         day = int(date_match.group(2))
@@ -510,35 +552,24 @@ def parse_figma_receipt(html_body: str, text_body: str, subject: str) -> dict |
     # Prefer HTML for parsing as text_body may be empty or minimal
     text = ""
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text(separator="\n")
     elif text_body and text_body.strip():
         text = text_body
 
     # Look for amount - could be $ or £
     # Figma format: "Total: £201.60 GBP" or "Total:\n £201.60 GBP"
-    amount_patterns = [
-        r"Total:?\s*[\n\s]*£([\d,]+\.?\d*)",  # Total: £201.60
-        r"Total:?\s*[\n\s]*\$([\d,]+\.?\d*)",  # Total: $15.00
-        r"£([\d,]+\.?\d*)\s*GBP",  # £201.60 GBP
-        r"\$([\d,]+\.\d{2})\s*USD",  # $15.00 USD
-    ]
-
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in FIGMA_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             # Detect currency from the pattern or symbol
-            if "£" in pattern or "£" in match.group(0):
+            if "£" in pattern.pattern or "£" in match.group(0):
                 result["currency_code"] = "GBP"
             break
 
     # Look for subscription type - "Professional team (annual)"
-    sub_match = re.search(
-        r"(Professional|Organization|Team|Starter)\s+(team\s+)?\((annual|monthly)\)",
-        text,
-        re.IGNORECASE,
-    )
+    sub_match = FIGMA_SUB_RE.search(text)
     if sub_match:
         plan_type = sub_match.group(1).title()
         billing = sub_match.group(3).lower() if sub_match.group(3) else "subscription"
@@ -5,14 +5,18 @@ eBay, Etsy, Vinted
 """
 
 import re
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
+from .base import get_soup, parse_amount, register_vendor
 
-from .base import parse_amount, register_vendor
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
 
 
 @register_vendor(["ebay.co.uk", "ebay.com", "ebay.de", "ebay.fr", "ebay.com.au"])
-def parse_ebay_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_ebay_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse eBay order confirmation emails.
 
@@ -76,7 +80,7 @@ def parse_ebay_receipt(html_body: str, text_body: str, subject: str) -> dict | N
     )
 
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
 
         # Extract order details from structured HTML (placeholder - full implementation needed)
         order_data = {}
@@ -128,8 +132,22 @@ def parse_ebay_receipt(html_body: str, text_body: str, subject: str) -> dict | N
     return None
 
 
+VINTED_ITEM_RE = re.compile(
+    r'receipt for ["\u201c]([^"\u201d]+)["\u201d]', re.IGNORECASE
+)
+VINTED_PAID_RE = re.compile(r"Paid[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE)
+VINTED_SELLER_RE = re.compile(r"Seller[:\s]*(\w+)", re.IGNORECASE)
+VINTED_POSTAGE_RE = re.compile(r"postage[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE)
+VINTED_ITEM_PRICE_RE = re.compile(r"item[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE)
+VINTED_PROTECTION_RE = re.compile(
+    r"(?:Buyer\s+)?Protection(?:\s+fee)?[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE
+)
+
+
 @register_vendor(["vinted.co.uk", "vinted.com", "vinted.fr", "vinted.de"])
-def parse_vinted_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_vinted_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Vinted purchase receipts.
 
@@ -148,9 +166,7 @@ def parse_vinted_receipt(html_body: str, text_body: str, subject: str) -> dict |
     }
 
     # Extract item name from subject: Your receipt for "Item Name"
-    item_match = re.search(
-        r'receipt for ["\u201c]([^"\u201d]+)["\u201d]', subject, re.IGNORECASE
-    )
+    item_match = VINTED_ITEM_RE.search(subject)
     if item_match:
         item_name = item_match.group(1).strip()
         result["line_items"] = [{"name": item_name}]
@@ -158,36 +174,32 @@ def parse_vinted_receipt(html_body: str, text_body: str, subject: str) -> dict |
     # Use text body or extract from HTML
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract total paid amount: "Paid: £19.44" or "Paid: £19.44 (breakdown...)"
-    paid_match = re.search(r"Paid[:\s]*£\s*([0-9,]+\.?\d*)", text, re.IGNORECASE)
+    paid_match = VINTED_PAID_RE.search(text)
     if paid_match:
         result["total_amount"] = parse_amount(paid_match.group(1))
 
     # Extract seller name
-    seller_match = re.search(r"Seller[:\s]*(\w+)", text, re.IGNORECASE)
+    seller_match = VINTED_SELLER_RE.search(text)
     if seller_match:
         result["seller_name"] = seller_match.group(1)
 
     # Extract breakdown if available
-    postage_match = re.search(r"postage[:\s]*£\s*([0-9,]+\.?\d*)", text, re.IGNORECASE)
+    postage_match = VINTED_POSTAGE_RE.search(text)
     if postage_match:
         result["postage_amount"] = parse_amount(postage_match.group(1))
 
-    item_price_match = re.search(r"item[:\s]*£\s*([0-9,]+\.?\d*)", text, re.IGNORECASE)
+    item_price_match = VINTED_ITEM_PRICE_RE.search(text)
     if item_price_match:
         result["item_amount"] = parse_amount(item_price_match.group(1))
         # Update line item with price
         if result.get("line_items"):
             result["line_items"][0]["price"] = result["item_amount"]
 
-    protection_match = re.search(
-        r"(?:Buyer\s+)?Protection(?:\s+fee)?[:\s]*£\s*([0-9,]+\.?\d*)",
-        text,
-        re.IGNORECASE,
-    )
+    protection_match = VINTED_PROTECTION_RE.search(text)
     if protection_match:
         result["protection_fee"] = parse_amount(protection_match.group(1))
 
@@ -203,8 +215,28 @@ def parse_vinted_receipt(html_body: str, text_body: str, subject: str) -> dict |
 # ============================================================================
 
 
+ETSY_SUBJECT_RE = re.compile(
+    r"Your Etsy Purchase from\s+(.+?)\s*\((\d+)\)", re.IGNORECASE
+)
+ETSY_SHIPPING_RE = re.compile(r"Shipping[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE)
+ETSY_ITEM_PATTERNS = [
+    re.compile(r"Item[:\s]*(.+?)(?:\s*Qty|\s*£|\n)", re.IGNORECASE),
+    re.compile(r"([^£€$\n]+?)\s*×\s*\d+\s*£\s*[0-9,]+\.?\d*", re.IGNORECASE),
+]
+
+
+ETSY_TOTAL_PATTERNS = [
+    re.compile(r"(?:Order\s+)?[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"(?:Grand\s+)?[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"(?:Order\s+)?[Tt]otal[:\s]*\$\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"(?:Grand\s+)?[Tt]otal[:\s]*€\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["etsy.com"])
-def parse_etsy_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_etsy_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Etsy purchase receipts.
 
@@ -226,9 +258,7 @@ def parse_etsy_receipt(html_body: str, text_body: str, subject: str) -> dict | N
 
     # Extract seller name and order ID from subject
     # Pattern: "Your Etsy Purchase from SellerName (order_id)"
-    subject_match = re.search(
-        r"Your Etsy Purchase from\s+(.+?)\s*\((\d+)\)", subject, re.IGNORECASE
-    )
+    subject_match = ETSY_SUBJECT_RE.search(subject)
     if subject_match:
         result["seller_name"] = subject_match.group(1).strip()
         result["order_id"] = subject_match.group(2).strip()
@@ -236,44 +266,32 @@ def parse_etsy_receipt(html_body: str, text_body: str, subject: str) -> dict | N
     # Use text body or extract from HTML
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract total amount - Etsy uses various patterns
     # "Order total: £12.34" or "Total: £12.34" or "Grand total £12.34"
-    total_patterns = [
-        r"(?:Order\s+)?[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"(?:Grand\s+)?[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"(?:Order\s+)?[Tt]otal[:\s]*\$\s*([0-9,]+\.?\d*)",
-        r"(?:Grand\s+)?[Tt]otal[:\s]*€\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in ETSY_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             # Detect currency from pattern
-            if "€" in pattern:
+            if "€" in pattern.pattern:
                 result["currency_code"] = "EUR"
-            elif "$" in pattern:
+            elif "$" in pattern.pattern:
                 result["currency_code"] = "USD"
             break
 
     # Extract shipping cost if present
-    shipping_match = re.search(
-        r"Shipping[:\s]*£\s*([0-9,]+\.?\d*)", text, re.IGNORECASE
-    )
+    shipping_match = ETSY_SHIPPING_RE.search(text)
     if shipping_match:
         result["shipping_amount"] = parse_amount(shipping_match.group(1))
 
     # Try to extract item names from the order summary
     # Etsy items often appear in structured lists
-    item_patterns = [
-        r"Item[:\s]*(.+?)(?:\s*Qty|\s*£|\n)",
-        r"([^£€$\n]+?)\s*×\s*\d+\s*£\s*[0-9,]+\.?\d*",
-    ]
     items = []
-    for pattern in item_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in ETSY_ITEM_PATTERNS:
+        matches = pattern.findall(text)
         for match in matches:
             item_name = match.strip() if isinstance(match, str) else match[0].strip()
             if item_name and len(item_name) > 3 and len(item_name) < 200:
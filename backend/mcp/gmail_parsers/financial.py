@@ -5,14 +5,49 @@ PayPal and payment processors
 """
 
 import re
-
-from bs4 import BeautifulSoup
-
-from .base import parse_amount, parse_date_text, register_vendor
+from typing import TYPE_CHECKING
+
+from .base import get_soup, parse_amount, parse_date_text, register_vendor
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+
+PAYPAL_SUBJECT_MERCHANT_RE = re.compile(
+    r"(?:payment to|receipt for your payment to)\s+([A-Za-z0-9\s\-&\'\.]+)",
+    re.IGNORECASE,
+)
+PAYPAL_TX_RE = re.compile(r"Transaction\s*ID[:\s]*([A-Z0-9]{10,17})", re.IGNORECASE)
+PAYPAL_MERCHANT_PATTERNS = [
+    re.compile(
+        r"Payment to[:\s]+([A-Za-z0-9\s\-&\'\.]+?)(?:\s*Transaction|\s*Amount|\s*£|\s*\$|\s*€)"
+    ),
+    re.compile(r"Paid to[:\s]+([A-Za-z0-9\s\-&\'\.]+)"),
+    re.compile(r"Sent to[:\s]+([A-Za-z0-9\s\-&\'\.]+)"),
+]
+PAYPAL_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"You (?:sent|paid)[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Payment[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+PAYPAL_DATE_PATTERNS = [
+    re.compile(
+        r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2},?\s+\d{4})",
+        re.IGNORECASE,
+    ),
+    re.compile(r"(?:Date|Transaction date)[:\s]*([\d]+\s+\w+\s+\d{4})", re.IGNORECASE),
+]
 
 
 @register_vendor(["paypal.co.uk", "paypal.com", "mail.paypal.co.uk"])
-def parse_paypal_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_paypal_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse PayPal payment receipts.
 
@@ -33,11 +68,7 @@ def parse_paypal_receipt(html_body: str, text_body: str, subject: str) -> dict |
     # Try to extract merchant from subject first
     # "Receipt for your payment to JustHost - Bluehost"
     # "Receipt for Your Payment to Microsoft Payments"
-    subject_merchant_match = re.search(
-        r"(?:payment to|receipt for your payment to)\s+([A-Za-z0-9\s\-&\'\.]+)",
-        subject,
-        re.IGNORECASE,
-    )
+    subject_merchant_match = PAYPAL_SUBJECT_MERCHANT_RE.search(subject)
     if subject_merchant_match:
         merchant = subject_merchant_match.group(1).strip()
         if 2 < len(merchant) < 50:
@@ -47,25 +78,18 @@ def parse_paypal_receipt(html_body: str, text_body: str, subject: str) -> dict |
             )
 
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
         # Extract transaction ID (alphanumeric, 10-17 chars)
-        tx_match = re.search(
-            r"Transaction\s*ID[:\s]*([A-Z0-9]{10,17})", text, re.IGNORECASE
-        )
+        tx_match = PAYPAL_TX_RE.search(text)
         if tx_match:
             result["order_id"] = tx_match.group(1)
 
         # Extract merchant from body if not found in subject
         if "payee_name" not in result:
-            merchant_patterns = [
-                r"Payment to[:\s]+([A-Za-z0-9\s\-&\'\.]+?)(?:\s*Transaction|\s*Amount|\s*£|\s*\$|\s*€)",
-                r"Paid to[:\s]+([A-Za-z0-9\s\-&\'\.]+)",
-                r"Sent to[:\s]+([A-Za-z0-9\s\-&\'\.]+)",
-            ]
-            for pattern in merchant_patterns:
-                match = re.search(pattern, text)
+            for pattern in PAYPAL_MERCHANT_PATTERNS:
+                match = pattern.search(text)
                 if match:
                     merchant = match.group(1).strip()
                     if 2 < len(merchant) < 50:
@@ -76,14 +100,8 @@ def parse_paypal_receipt(html_body: str, text_body: str, subject: str) -> dict |
                         break
 
         # Extract total amount
-        amount_patterns = [
-            r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"You (?:sent|paid)[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"Amount[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"Payment[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-        ]
-        for pattern in amount_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in PAYPAL_AMOUNT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["total_amount"] = parse_amount(match.group(1))
                 break
@@ -97,13 +115,8 @@ def parse_paypal_receipt(html_body: str, text_body: str, subject: str) -> dict |
             result["currency_code"] = "USD"
 
         # Date extraction - multiple formats
-        date_patterns = [
-            r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
-            r"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2},?\s+\d{4})",
-            r"(?:Date|Transaction date)[:\s]*([\d]+\s+\w+\s+\d{4})",
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in PAYPAL_DATE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["receipt_date"] = parse_date_text(match.group(1))
                 break
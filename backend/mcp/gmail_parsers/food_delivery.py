@@ -5,15 +5,39 @@ Deliveroo
 """
 
 import re
-
-from bs4 import BeautifulSoup
-
-from .base import parse_amount, register_vendor
+from typing import TYPE_CHECKING
+
+from .base import get_soup, parse_amount, register_vendor
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+
+DELIVEROO_RESTAURANT_RE = re.compile(r"([\w][\w\s&\'\-]+)\s+has your order")
+DELIVEROO_SUBJECT_PATTERNS = [
+    re.compile(r"order from\s+(.+?)(?:\s*-|\s*$)", re.IGNORECASE),
+    re.compile(r"from\s+([A-Za-z0-9\s&\'\-]+?)(?:\s*order|\s*-|\s*$)", re.IGNORECASE),
+]
+DELIVEROO_TOTAL_PATTERNS = [
+    re.compile(r"Total\s+£([\d,.]+)", re.IGNORECASE),
+    re.compile(r"Total[:\s]*£\s*([\d,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Order total[:\s]*£\s*([\d,]+\.?\d*)", re.IGNORECASE),
+]
+DELIVEROO_ITEM_RE = re.compile(r"(\d+)x\s+(.+?)\s+-\s+£([\d.]+)")
+DELIVEROO_ORDER_RE = re.compile(r"Order #(\d+)")
+DELIVEROO_DATE_PATTERNS = [
+    # "Delivered on June 15, 2024"
+    re.compile(r"Delivered on\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})", re.IGNORECASE),
+    # "Order completed: 15/06/2024"
+    re.compile(r"Order completed[:\s]+(\d{1,2}/\d{1,2}/\d{4})", re.IGNORECASE),
+    # "15 June 2024"
+    re.compile(r"(\d{1,2}\s+[A-Za-z]+\s+\d{4})", re.IGNORECASE),
+]
 
 
 @register_vendor(["deliveroo.co.uk", "deliveroo.com"])
 def parse_deliveroo_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Deliveroo order receipts.
@@ -41,7 +65,7 @@ def parse_deliveroo_receipt(
     # Normalize line endings
     text = (text_body or "").replace("\r\n", "\n").replace("\r", "\n")
     if not text and html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     if not text:
@@ -51,18 +75,14 @@ def parse_deliveroo_receipt(
     restaurant = None
 
     # Pattern 1: "{Restaurant} has your order!" (new format)
-    rest_match = re.search(r"([\w][\w\s&\'\-]+)\s+has your order", text)
+    rest_match = DELIVEROO_RESTAURANT_RE.search(text)
     if rest_match:
         restaurant = rest_match.group(1).strip()
 
     # Pattern 2: From subject - "order from {Restaurant}"
     if not restaurant:
-        subject_patterns = [
-            r"order from\s+(.+?)(?:\s*-|\s*$)",
-            r"from\s+([A-Za-z0-9\s&\'\-]+?)(?:\s*order|\s*-|\s*$)",
-        ]
-        for pattern in subject_patterns:
-            match = re.search(pattern, subject, re.IGNORECASE)
+        for pattern in DELIVEROO_SUBJECT_PATTERNS:
+            match = pattern.search(subject)
             if match:
                 restaurant = match.group(1).strip()
                 if len(restaurant) > 2 and len(restaurant) < 100:
@@ -70,13 +90,8 @@ def parse_deliveroo_receipt(
                 restaurant = None
 
     # Extract total amount
-    total_patterns = [
-        r"Total\s+£([\d,.]+)",
-        r"Total[:\s]*£\s*([\d,]+\.?\d*)",
-        r"Order total[:\s]*£\s*([\d,]+\.?\d*)",
-    ]
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in DELIVEROO_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -84,8 +99,7 @@ def parse_deliveroo_receipt(
     # Extract individual line items
     # Format: "3x    Naan Bread  - £2.00"
     line_items = []
-    item_pattern = r"(\d+)x\s+(.+?)\s+-\s+£([\d.]+)"
-    for match in re.finditer(item_pattern, text):
+    for match in DELIVEROO_ITEM_RE.finditer(text):
         qty = int(match.group(1))
         name = match.group(2).strip()
         price = parse_amount(match.group(3))
@@ -114,19 +128,13 @@ def parse_deliveroo_receipt(
         result["restaurant_name"] = restaurant
 
     # Extract order ID from text
-    order_match = re.search(r"Order #(\d+)", text)
+    order_match = DELIVEROO_ORDER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract delivery completion date
-    date_patterns = [
-        r"Delivered on\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})",  # "Delivered on June 15, 2024"
-        r"Order completed[:\s]+(\d{1,2}/\d{1,2}/\d{4})",  # "Order completed: 15/06/2024"
-        r"(\d{1,2}\s+[A-Za-z]+\s+\d{4})",  # "15 June 2024"
-    ]
-
-    for pattern in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in DELIVEROO_DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             date_str = match.group(1)
             # Try multiple formats
@@ -5,15 +5,23 @@ John Lewis, Uniqlo, CEX, etc.
 """
 
 import re
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
+from .base import get_soup, parse_amount, register_vendor
 
-from .base import parse_amount, register_vendor
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+
+CHARLES_TYRWHITT_SUBJECT_REF_RE = re.compile(r"Ref[:\s]*([A-Z0-9]+)", re.IGNORECASE)
+CHARLES_TYRWHITT_REF_RE = re.compile(
+    r"(?:Order|Reference)[:\s#]*([A-Z0-9]+)", re.IGNORECASE
+)
 
 
 @register_vendor(["ctshirts.co.uk", "ctshirts.com"])
 def parse_charles_tyrwhitt_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Charles Tyrwhitt receipt emails.
@@ -38,21 +46,19 @@ def parse_charles_tyrwhitt_receipt(
     elif "order confirmation" in subject.lower():
         result["email_type"] = "order_confirmation"
         # Extract reference from subject
-        ref_match = re.search(r"Ref[:\s]*([A-Z0-9]+)", subject, re.IGNORECASE)
+        ref_match = CHARLES_TYRWHITT_SUBJECT_REF_RE.search(subject)
         if ref_match:
             result["order_id"] = ref_match.group(1)
 
     # Use text body
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Try to extract order reference from body
     if not result.get("order_id"):
-        ref_match = re.search(
-            r"(?:Order|Reference)[:\s#]*([A-Z0-9]+)", text, re.IGNORECASE
-        )
+        ref_match = CHARLES_TYRWHITT_REF_RE.search(text)
         if ref_match:
             result["order_id"] = ref_match.group(1)
 
@@ -66,9 +72,17 @@ def parse_charles_tyrwhitt_receipt(
 # ============================================================================
 
 
+JOHN_LEWIS_ORDER_RE = re.compile(r"purchase\s+(\d+)", re.IGNORECASE)
+GBP_TOTAL_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["johnlewis.co.uk", "johnlewis.com"])
 def parse_john_lewis_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse John Lewis purchase confirmations."""
     result = {
@@ -81,23 +95,18 @@ def parse_john_lewis_receipt(
     }
 
     # Extract order ID from subject: "Thank you for your purchase 509392169"
-    order_match = re.search(r"purchase\s+(\d+)", subject, re.IGNORECASE)
+    order_match = JOHN_LEWIS_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -112,8 +121,13 @@ def parse_john_lewis_receipt(
 # ============================================================================
 
 
+CEX_ORDER_RE = re.compile(r"confirmation[:\s]*(\d+)", re.IGNORECASE)
+
+
 @register_vendor(["webuy.com", "cex.co.uk"])
-def parse_cex_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_cex_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """Parse CeX/WeBuy order confirmations."""
     result = {
         "merchant_name": "CeX",
@@ -125,23 +139,18 @@ def parse_cex_receipt(html_body: str, text_body: str, subject: str) -> dict | No
     }
 
     # Extract order ID from subject: "CeX order confirmation: 19719781"
-    order_match = re.search(r"confirmation[:\s]*(\d+)", subject, re.IGNORECASE)
+    order_match = CEX_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -156,9 +165,27 @@ def parse_cex_receipt(html_body: str, text_body: str, subject: str) -> dict | No
 # ============================================================================
 
 
+WORLD_OF_BOOKS_ORDER_RE = re.compile(r"(WOB\d+)")
+WORLD_OF_BOOKS_ORDER_NUMBER_RE = re.compile(r"order\s*(?:#|:)?\s*(\d+)", re.IGNORECASE)
+WORLD_OF_BOOKS_TITLE_RE = re.compile(
+    r"Title\s*\n\s*Price\s*\n(.+?)(?:Subtotal|Shipping address)", re.DOTALL
+)
+WORLD_OF_BOOKS_PRICE_LINE_RE = re.compile(r"^£")
+WORLD_OF_BOOKS_CONDITION_RE = re.compile(r"^[A-Z]{2}\s*/\s*\w+")
+WORLD_OF_BOOKS_QTY_RE = re.compile(r"Qty:\s*(\d+)")
+WORLD_OF_BOOKS_PRICE_RE = re.compile(r"£([0-9,]+\.?\d*)")
+WORLD_OF_BOOKS_AMOUNT_PATTERNS = [
+    # Total on one line, amount on next
+    re.compile(r"Total\s*\n\s*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    # Total: £X.XX
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["worldofbooks.com", "wob.com"])
 def parse_world_of_books_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse World of Books order confirmations.
@@ -181,19 +208,19 @@ def parse_world_of_books_receipt(
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Normalize line endings
     text = text.replace("\r\n", "\n").replace("\r", "\n")
 
     # Extract order ID - format: WOB1053001728131
-    order_match = re.search(r"(WOB\d+)", text)
+    order_match = WORLD_OF_BOOKS_ORDER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
     else:
         # Fallback: generic order number
-        order_match = re.search(r"order\s*(?:#|:)?\s*(\d+)", text, re.IGNORECASE)
+        order_match = WORLD_OF_BOOKS_ORDER_NUMBER_RE.search(text)
         if order_match:
             result["order_id"] = order_match.group(1)
 
@@ -205,7 +232,7 @@ def parse_world_of_books_receipt(
     # Try HTML table format first (newer wob.com format)
     # Pattern: <td>qty</td><td>Book Title (Condition)</td><td>Status</td>
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         # Find table rows after "Title" header
         tables = soup.find_all("table")
         for table in tables:
@@ -232,11 +259,7 @@ def parse_world_of_books_receipt(
     # Fallback to text format
     # Pattern: Title\nPrice\n\nBook Name\n\nGB / VERY_GOOD\n\nQty: 1\n\n£3.50
     if not line_items:
-        title_match = re.search(
-            r"Title\s*\n\s*Price\s*\n(.+?)(?:Subtotal|Shipping address)",
-            text,
-            re.DOTALL,
-        )
+        title_match = WORLD_OF_BOOKS_TITLE_RE.search(text)
         if title_match:
             items_section = title_match.group(1)
             lines = [l.strip() for l in items_section.split("\n") if l.strip()]
@@ -250,9 +273,9 @@ def parse_world_of_books_receipt(
                     continue
 
                 # Check if this looks like a book title (not a price, not a condition code)
-                if not re.match(r"^£", line) and not re.match(
-                    r"^[A-Z]{2}\s*/\s*\w+", line
-                ):
+                if not WORLD_OF_BOOKS_PRICE_LINE_RE.match(
+                    line
+                ) and not WORLD_OF_BOOKS_CONDITION_RE.match(line):
                     title = line
                     qty = 1
                     price = None
@@ -260,10 +283,10 @@ def parse_world_of_books_receipt(
                     # Look ahead for qty and price
                     for j in range(i + 1, min(i + 5, len(lines))):
                         next_line = lines[j]
-                        qty_match = re.match(r"Qty:\s*(\d+)", next_line)
+                        qty_match = WORLD_OF_BOOKS_QTY_RE.match(next_line)
                         if qty_match:
                             qty = int(qty_match.group(1))
-                        price_match = re.match(r"£([0-9,]+\.?\d*)", next_line)
+                        price_match = WORLD_OF_BOOKS_PRICE_RE.match(next_line)
                         if price_match:
                             price = parse_amount(price_match.group(1))
                             break
@@ -291,13 +314,8 @@ def parse_world_of_books_receipt(
         result["line_items"] = unique_items
 
     # Extract total amount
-    amount_patterns = [
-        r"Total\s*\n\s*£\s*([0-9,]+\.?\d*)",  # Total on one line, amount on next
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",  # Total: £X.XX
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in WORLD_OF_BOOKS_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -312,8 +330,25 @@ def parse_world_of_books_receipt(
 # ============================================================================
 
 
+UNIQLO_ORDER_PATTERNS = [
+    re.compile(r"Order Number[:\s]*([0-9\-]+)", re.IGNORECASE),
+    re.compile(r"Order:?\s*#?\s*([0-9\-]+)", re.IGNORECASE),
+]
+UNIQLO_ORDER_RE = re.compile(r"Order Number[:\s]*([0-9\-]+)", re.IGNORECASE)
+UNIQLO_TOTAL_PATTERNS = [
+    re.compile(r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"TOTAL[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Item Subtotal[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+UNIQLO_PRODUCT_RE = re.compile(r"^(\d{10,}),\s*(.+)$")
+UNIQLO_QTY_RE = re.compile(r"^(\d+)\s*(?:items?|x)$")
+UNIQLO_PRICE_RE = re.compile(r"^£\s*([0-9,]+\.?\d*)$")
+
+
 @register_vendor(["uniqlo.eu", "uniqlo.com", "ml.store.uniqlo.com"])
-def parse_uniqlo_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_uniqlo_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Uniqlo order emails.
 
@@ -338,36 +373,25 @@ def parse_uniqlo_receipt(html_body: str, text_body: str, subject: str) -> dict |
 
     # Parse HTML for invoice emails
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text(separator="\n")
 
         # Extract order number from various patterns
-        order_patterns = [
-            r"Order Number[:\s]*([0-9\-]+)",
-            r"Order:?\s*#?\s*([0-9\-]+)",
-        ]
-        for pattern in order_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in UNIQLO_ORDER_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["order_id"] = match.group(1)
                 break
 
         # Also check subject for order number
         if not result.get("order_id"):
-            order_match = re.search(
-                r"Order Number[:\s]*([0-9\-]+)", subject, re.IGNORECASE
-            )
+            order_match = UNIQLO_ORDER_RE.search(subject)
             if order_match:
                 result["order_id"] = order_match.group(1)
 
         # Extract total amount
-        total_patterns = [
-            r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-            r"TOTAL[:\s]*£\s*([0-9,]+\.?\d*)",
-            r"Item Subtotal[:\s]*£\s*([0-9,]+\.?\d*)",
-        ]
-        for pattern in total_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in UNIQLO_TOTAL_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["total_amount"] = parse_amount(match.group(1))
                 break
@@ -380,7 +404,7 @@ def parse_uniqlo_receipt(html_body: str, text_body: str, subject: str) -> dict |
         while i < len(lines):
             line = lines[i]
             # Product format: "47421309005000, Cotton Boxer Briefs"
-            product_match = re.match(r"^(\d{10,}),\s*(.+)$", line)
+            product_match = UNIQLO_PRODUCT_RE.match(line)
             if product_match:
                 product_code = product_match.group(1)
                 product_name = product_match.group(2).strip()
@@ -395,11 +419,11 @@ def parse_uniqlo_receipt(html_body: str, text_body: str, subject: str) -> dict |
                 qty = 1
                 for j in range(i + 1, min(i + 6, len(lines))):
                     # Quantity pattern: "2 items" or "1 x"
-                    qty_match = re.search(r"^(\d+)\s*(?:items?|x)$", lines[j])
+                    qty_match = UNIQLO_QTY_RE.search(lines[j])
                     if qty_match:
                         qty = int(qty_match.group(1))
                     # Price pattern
-                    price_match = re.match(r"^£\s*([0-9,]+\.?\d*)$", lines[j])
+                    price_match = UNIQLO_PRICE_RE.match(lines[j])
                     if price_match:
                         price = parse_amount(price_match.group(1))
                         break
@@ -421,7 +445,7 @@ def parse_uniqlo_receipt(html_body: str, text_body: str, subject: str) -> dict |
     # Fallback to text body
     elif text_body:
         text = text_body
-        order_match = re.search(r"Order Number[:\s]*([0-9\-]+)", text, re.IGNORECASE)
+        order_match = UNIQLO_ORDER_RE.search(text)
         if order_match:
             result["order_id"] = order_match.group(1)
 
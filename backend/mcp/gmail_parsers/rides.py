@@ -6,14 +6,46 @@ Uber, Lyft, Lime
 
 import re
 from datetime import datetime
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
+from .base import get_soup, parse_amount, parse_date_text, register_vendor
 
-from .base import parse_amount, parse_date_text, register_vendor
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+
+UBER_TOTAL_PATTERNS = [
+    re.compile(r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"You paid[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount charged[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    # Fallback: any currency amount
+    re.compile(r"[£$€]([0-9,]+\.[0-9]{2})", re.IGNORECASE),
+]
+UBER_DATE_PATTERNS = [
+    re.compile(
+        r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2},?\s+\d{4})",
+        re.IGNORECASE,
+    ),
+]
+UBER_TIME_RE = re.compile(r"(\d{1,2}:\d{2})\s*(?:am|pm)?", re.IGNORECASE)
+UBER_RESTAURANT_PATTERNS = [
+    re.compile(
+        r"(?:Your order from|Order from)\s+([A-Za-z0-9\s&\'\-]+?)(?:\s*is|\s*has|\n)",
+        re.IGNORECASE,
+    ),
+    re.compile(r"Restaurant[:\s]+([A-Za-z0-9\s&\'\-]+?)(?:\n|\s{2,})", re.IGNORECASE),
+    re.compile(r"Thanks for ordering from\s+([A-Za-z0-9\s&\'\-]+)", re.IGNORECASE),
+]
 
 
 @register_vendor(["uber.com", "ubereats.com"])
-def parse_uber_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_uber_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Uber ride receipts and Uber Eats order receipts.
 
@@ -50,19 +82,12 @@ def parse_uber_receipt(html_body: str, text_body: str, subject: str) -> dict | N
     result["parse_confidence"] = 85
 
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
         # Extract total - Uber uses specific patterns
-        total_patterns = [
-            r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"You paid[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"Amount charged[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"[£$€]([0-9,]+\.[0-9]{2})",  # Fallback: any currency amount
-        ]
-
-        for pattern in total_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in UBER_TOTAL_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["total_amount"] = parse_amount(match.group(1))
                 break
@@ -76,31 +101,22 @@ def parse_uber_receipt(html_body: str, text_body: str, subject: str) -> dict | N
             result["currency_code"] = "USD"
 
         # Extract date - multiple formats
-        date_patterns = [
-            r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
-            r"((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{1,2},?\s+\d{4})",
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in UBER_DATE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["receipt_date"] = parse_date_text(match.group(1))
                 break
 
         # Extract time if available
-        time_match = re.search(r"(\d{1,2}:\d{2})\s*(?:am|pm)?", text, re.IGNORECASE)
+        time_match = UBER_TIME_RE.search(text)
         if time_match:
             result["trip_time"] = time_match.group(1)
 
         # Extract line items based on type
         if email_type == "eats":
             # Try to extract restaurant name for Uber Eats
-            restaurant_patterns = [
-                r"(?:Your order from|Order from)\s+([A-Za-z0-9\s&\'\-]+?)(?:\s*is|\s*has|\n)",
-                r"Restaurant[:\s]+([A-Za-z0-9\s&\'\-]+?)(?:\n|\s{2,})",
-                r"Thanks for ordering from\s+([A-Za-z0-9\s&\'\-]+)",
-            ]
-            for pattern in restaurant_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
+            for pattern in UBER_RESTAURANT_PATTERNS:
+                match = pattern.search(text)
                 if match:
                     restaurant = match.group(1).strip()
                     if len(restaurant) > 2 and len(restaurant) < 100:
@@ -156,8 +172,25 @@ def parse_uber_receipt(html_body: str, text_body: str, subject: str) -> dict | N
 # ============================================================================
 
 
+LYFT_SUBJECT_DATE_RE = re.compile(
+    r"(?:on|from)\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2})",
+    re.IGNORECASE,
+)
+LYFT_TOTAL_PATTERNS = [
+    re.compile(r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"You paid[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Charged[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"[£$€]\s*([0-9,]+\.[0-9]{2})\s*(?:total|charged)", re.IGNORECASE),
+    # Lyft sometimes just shows the amount
+    re.compile(r"Total\s+\$([0-9,]+\.[0-9]{2})", re.IGNORECASE),
+]
+LYFT_TRIP_RE = re.compile(r"(?:from|pickup)[:\s]*([^,\n]+)", re.IGNORECASE)
+
+
 @register_vendor(["lyftmail.com"])
-def parse_lyft_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_lyft_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Lyft ride receipts.
 
@@ -174,28 +207,15 @@ def parse_lyft_receipt(html_body: str, text_body: str, subject: str) -> dict | N
     }
 
     # Extract date from subject (e.g., "Your receipt for rides on December 12")
-    subject_date_match = re.search(
-        r"(?:on|from)\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2})",
-        subject,
-        re.IGNORECASE,
-    )
+    subject_date_match = LYFT_SUBJECT_DATE_RE.search(subject)
 
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
         # Extract total amount - Lyft uses various patterns
-        total_patterns = [
-            r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"You paid[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"Charged[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-            r"[£$€]\s*([0-9,]+\.[0-9]{2})\s*(?:total|charged)",
-            # Lyft sometimes just shows the amount
-            r"Total\s+\$([0-9,]+\.[0-9]{2})",
-        ]
-
-        for pattern in total_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in LYFT_TOTAL_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result["total_amount"] = parse_amount(match.group(1))
                 break
@@ -228,7 +248,7 @@ def parse_lyft_receipt(html_body: str, text_body: str, subject: str) -> dict | N
                 result["receipt_date"] = f"{year:04d}-{month:02d}-{day:02d}"
 
         # Extract trip details if available
-        trip_match = re.search(r"(?:from|pickup)[:\s]*([^,\n]+)", text, re.IGNORECASE)
+        trip_match = LYFT_TRIP_RE.search(text)
         if trip_match:
             result["line_items"] = [f"Lyft ride: {trip_match.group(1).strip()[:50]}"]
 
@@ -248,8 +268,23 @@ def parse_lyft_receipt(html_body: str, text_body: str, subject: str) -> dict | N
 # ============================================================================
 
 
+LIME_DATE_RE = re.compile(
+    r"Date of issue:\s*(\d{1,2})\s+(\w{3})\s+(\d{4})", re.IGNORECASE
+)
+LIME_REFUND_RE = re.compile(
+    r"Refunded\s+(?:to\s+\w+\s+\w+\s+)?-?£([\d,]+\.?\d*)", re.IGNORECASE
+)
+LIME_TOTAL_RE = re.compile(r"(?:Total|Charged)\s*[\n\s]*£([\d,]+\.?\d*)", re.IGNORECASE)
+LIME_DISTANCE_RE = re.compile(r"([\d.]+)\s*mi\s+distance", re.IGNORECASE)
+LIME_TIME_RE = re.compile(
+    r"(\d+:\d+\s*[AP]\.?M\.?)\s*-\s*(\d+:\d+\s*[AP]\.?M\.?)", re.IGNORECASE
+)
+
+
 @register_vendor(["li.me"])
-def parse_lime_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_lime_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Lime scooter receipt/refund emails.
 
@@ -275,13 +310,11 @@ def parse_lime_receipt(html_body: str, text_body: str, subject: str) -> dict | N
     if not html_body:
         return None
 
-    soup = BeautifulSoup(html_body, "html.parser")
+    soup = get_soup(html_body, parsed)
     text = soup.get_text(separator="\n")
 
     # Extract date - "Date of issue: 07 Sep 2024"
-    date_match = re.search(
-        r"Date of issue:\s*(\d{1,2})\s+(\w{3})\s+(\d{4})", text, re.IGNORECASE
-    )
+    date_match = LIME_DATE_RE.search(text)
     if date_match:
         day = int(date_match.group(1))
         month_abbr = date_match.group(2)
@@ -307,25 +340,19 @@ def parse_lime_receipt(html_body: str, text_body: str, subject: str) -> dict | N
     # Refund pattern: "Refunded to Apple Pay -£6.22"
     # Or total pattern near end
     if is_refund:
-        refund_match = re.search(
-            r"Refunded\s+(?:to\s+\w+\s+\w+\s+)?-?£([\d,]+\.?\d*)", text, re.IGNORECASE
-        )
+        refund_match = LIME_REFUND_RE.search(text)
         if refund_match:
             # Store as negative for refunds
             result["total_amount"] = -parse_amount(refund_match.group(1))
     else:
         # Look for total/charged amount
-        total_match = re.search(
-            r"(?:Total|Charged)\s*[\n\s]*£([\d,]+\.?\d*)", text, re.IGNORECASE
-        )
+        total_match = LIME_TOTAL_RE.search(text)
         if total_match:
             result["total_amount"] = parse_amount(total_match.group(1))
 
     # Extract ride description
-    distance_match = re.search(r"([\d.]+)\s*mi\s+distance", text, re.IGNORECASE)
-    time_match = re.search(
-        r"(\d+:\d+\s*[AP]\.?M\.?)\s*-\s*(\d+:\d+\s*[AP]\.?M\.?)", text, re.IGNORECASE
-    )
+    distance_match = LIME_DISTANCE_RE.search(text)
+    time_match = LIME_TIME_RE.search(text)
 
     if distance_match:
         distance = distance_match.group(1)
@@ -5,14 +5,56 @@ All other vendors
 """
 
 import re
-
-from bs4 import BeautifulSoup
-
-from .base import parse_amount, register_vendor
+from typing import TYPE_CHECKING
+
+from .base import get_soup, parse_amount, register_vendor
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+
+# Patterns shared by several of the smaller merchants below
+HASH_ORDER_RE = re.compile(r"#(\d+)")
+GBP_ORDER_TOTAL_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+GBP_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+ORDER_NUMBER_RE = re.compile(r"order\s*(?:#|:)?\s*(\d+)", re.IGNORECASE)
+
+
+MINDBODY_BUSINESS_RE = re.compile(r"^(.+?)\s+Sales Receipt", re.IGNORECASE)
+MINDBODY_PURCHASE_RE = re.compile(r"Receipt for Your\s+(.+?)\s+Purchase", re.IGNORECASE)
+MINDBODY_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+MINDBODY_SALE_ID_RE = re.compile(r"Sale ID[:\s]*(\d+)", re.IGNORECASE)
+MINDBODY_DATE_PATTERNS = [
+    re.compile(r"Sale Date[:\s]*(\d{1,2})/(\d{1,2})/(\d{4})", re.IGNORECASE),
+    re.compile(r"on\s+(\d{1,2})/(\d{1,2})/(\d{4})", re.IGNORECASE),
+]
+MINDBODY_TOTAL_PATTERNS = [
+    # Purchased 1 item(s) for £25.00
+    re.compile(
+        r"Purchased\s+\d+\s+item\(?s?\)?\s+for\s+£\s*([0-9,]+\.?\d*)", re.IGNORECASE
+    ),
+    # Total (incl. tax...): £25.00
+    re.compile(r"Total\s*\([^)]*\)[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    # Total: £25.00
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+MINDBODY_TAX_RE = re.compile(
+    r"(?:incl\.?\s*)?tax\s*(?:of)?\s*£\s*([0-9,]+\.?\d*)", re.IGNORECASE
+)
+MINDBODY_PRICE_RE = re.compile(r"£\s*([0-9,]+\.?\d*)")
+MINDBODY_ITEM_RE = re.compile(r"^(\d+)\s+(.+?)\s+£([0-9,]+\.?\d*)$")
 
 
 @register_vendor(["mindbodyonline.com"])
-def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_mindbody_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Mindbody Online sales receipts (used by yoga studios, gyms, etc.).
 
@@ -32,20 +74,18 @@ def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict
     # Format 1: "triyoga Sales Receipt"
     # Format 2: "Receipt for Your triyoga Purchase"
     business_name = "Mindbody"
-    business_match = re.match(r"^(.+?)\s+Sales Receipt", subject, re.IGNORECASE)
+    business_match = MINDBODY_BUSINESS_RE.match(subject)
     if business_match:
         business_name = business_match.group(1).strip()
     else:
-        purchase_match = re.search(
-            r"Receipt for Your\s+(.+?)\s+Purchase", subject, re.IGNORECASE
-        )
+        purchase_match = MINDBODY_PURCHASE_RE.search(subject)
         if purchase_match:
             business_name = purchase_match.group(1).strip()
 
     result = {
         "merchant_name": business_name,
-        "merchant_name_normalized": re.sub(
-            r"[^a-z0-9]+", "_", business_name.lower()
+        "merchant_name_normalized": MINDBODY_NON_ALNUM_RE.sub(
+            "_", business_name.lower()
         ).strip("_"),
         "parse_method": "vendor_mindbody",
         "parse_confidence": 90,
@@ -56,23 +96,19 @@ def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict
     # Use text body or extract from HTML
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract Sale ID
-    sale_id_match = re.search(r"Sale ID[:\s]*(\d+)", text, re.IGNORECASE)
+    sale_id_match = MINDBODY_SALE_ID_RE.search(text)
     if sale_id_match:
         result["order_id"] = sale_id_match.group(1)
 
     # Extract date - multiple formats
     # Format 1: "Sale Date: DD/MM/YYYY"
     # Format 2: "Purchased X item(s) for £Y.YY on DD/MM/YYYY - HH:MM"
-    date_patterns = [
-        r"Sale Date[:\s]*(\d{1,2})/(\d{1,2})/(\d{4})",
-        r"on\s+(\d{1,2})/(\d{1,2})/(\d{4})",
-    ]
-    for pattern in date_patterns:
-        date_match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in MINDBODY_DATE_PATTERNS:
+        date_match = pattern.search(text)
         if date_match:
             day = int(date_match.group(1))
             month = int(date_match.group(2))
@@ -83,22 +119,14 @@ def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict
     # Extract Total amount - multiple formats
     # Format 1: "Total (incl. tax of £X.XX): £Y.YY"
     # Format 2: "Purchased X item(s) for £Y.YY on..."
-    total_patterns = [
-        r"Purchased\s+\d+\s+item\(?s?\)?\s+for\s+£\s*([0-9,]+\.?\d*)",  # Purchased 1 item(s) for £25.00
-        r"Total\s*\([^)]*\)[:\s]*£\s*([0-9,]+\.?\d*)",  # Total (incl. tax...): £25.00
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",  # Total: £25.00
-    ]
-
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in MINDBODY_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
 
     # Extract tax amount if present
-    tax_match = re.search(
-        r"(?:incl\.?\s*)?tax\s*(?:of)?\s*£\s*([0-9,]+\.?\d*)", text, re.IGNORECASE
-    )
+    tax_match = MINDBODY_TAX_RE.search(text)
     if tax_match:
         result["vat_amount"] = parse_amount(tax_match.group(1))
 
@@ -107,7 +135,7 @@ def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict
     line_items = []
 
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
 
         # Method 1: Use structured HTML with id="lineItems"
         line_items_div = soup.find(id="lineItems")
@@ -122,7 +150,7 @@ def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict
                     price_text = cells[2].get_text(strip=True)
 
                     # Extract price from "£25.00" format
-                    price_match = re.search(r"£\s*([0-9,]+\.?\d*)", price_text)
+                    price_match = MINDBODY_PRICE_RE.search(price_text)
                     qty = 1
                     try:
                         qty = int(qty_text)
@@ -147,7 +175,7 @@ def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict
             # Skip lines containing "Total" or "tax"
             if "total" in line.lower() or "tax" in line.lower():
                 continue
-            item_match = re.match(r"^(\d+)\s+(.+?)\s+£([0-9,]+\.?\d*)$", line)
+            item_match = MINDBODY_ITEM_RE.match(line)
             if item_match:
                 line_items.append(
                     {
@@ -176,9 +204,19 @@ def parse_mindbody_receipt(html_body: str, text_body: str, subject: str) -> dict
 # ============================================================================
 
 
+FASTSPRING_ORDER_RE = re.compile(r"order\s+([A-Z0-9\-]+)", re.IGNORECASE)
+FASTSPRING_PRODUCT_RE = re.compile(r"Your Order\s+(.+?)\s+Download", re.IGNORECASE)
+FASTSPRING_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Price[:\s]*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"[£$€]\s*([0-9,]+\.[0-9]{2})", re.IGNORECASE),
+]
+
+
 @register_vendor(["fastspring.com"])
 def parse_fastspring_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse FastSpring software purchase receipts.
@@ -196,19 +234,19 @@ def parse_fastspring_receipt(
     }
 
     # Extract order ID from subject
-    order_match = re.search(r"order\s+([A-Z0-9\-]+)", subject, re.IGNORECASE)
+    order_match = FASTSPRING_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Use text body or extract from HTML
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Try to extract product name
     # Pattern: "Your Order [Product Name] Download"
-    product_match = re.search(r"Your Order\s+(.+?)\s+Download", text, re.IGNORECASE)
+    product_match = FASTSPRING_PRODUCT_RE.search(text)
     if product_match:
         product_name = product_match.group(1).strip()
         result["line_items"] = [{"name": product_name}]
@@ -217,14 +255,8 @@ def parse_fastspring_receipt(
             result["merchant_name"] = product_name
 
     # Extract amount - various patterns
-    amount_patterns = [
-        r"Total[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-        r"Price[:\s]*[£$€]\s*([0-9,]+\.?\d*)",
-        r"[£$€]\s*([0-9,]+\.[0-9]{2})",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in FASTSPRING_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -249,9 +281,19 @@ def parse_fastspring_receipt(
 # ============================================================================
 
 
+CITIZENS_OF_SOIL_ORDER_RE = re.compile(r"order\s*#(\d+)", re.IGNORECASE)
+CITIZENS_OF_SOIL_TOTAL_PATTERNS = [
+    re.compile(r"Total\s*[£$€]\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Total\s+([0-9,]+\.?\d*)\s*GBP", re.IGNORECASE),
+]
+CITIZENS_OF_SOIL_PRODUCT_RE = re.compile(
+    r"What\'s coming.*?\n+(.+?)\s*×\s*\d+", re.IGNORECASE | re.DOTALL
+)
+
+
 @register_vendor(["citizensofsoil.com"])
 def parse_citizens_of_soil_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Citizens of Soil olive oil order confirmations.
@@ -270,31 +312,25 @@ def parse_citizens_of_soil_receipt(
     }
 
     # Extract order ID from subject: "Olive oil order #121862 confirmed"
-    order_match = re.search(r"order\s*#(\d+)", subject, re.IGNORECASE)
+    order_match = CITIZENS_OF_SOIL_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Use text body for parsing
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract total amount: "Total\n£15.00 GBP" or "Total £15.00"
-    total_patterns = [
-        r"Total\s*[£$€]\s*([0-9,]+\.?\d*)",
-        r"Total\s+([0-9,]+\.?\d*)\s*GBP",
-    ]
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CITIZENS_OF_SOIL_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
 
     # Extract product name
-    product_match = re.search(
-        r"What\'s coming.*?\n+(.+?)\s*×\s*\d+", text, re.IGNORECASE | re.DOTALL
-    )
+    product_match = CITIZENS_OF_SOIL_PRODUCT_RE.search(text)
     if product_match:
         product_name = product_match.group(1).strip()
         if product_name:
@@ -312,9 +348,23 @@ def parse_citizens_of_soil_receipt(
 # ============================================================================
 
 
+BLACK_SHEEP_COFFEE_SUBJECT_RE = re.compile(
+    r"Order Confirmation\s*-\s*(\d+)\s*-\s*([^-]+?)\s*-\s*(.+)", re.IGNORECASE
+)
+BLACK_SHEEP_COFFEE_TOTAL_PATTERNS = [
+    re.compile(r"[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"[Oo]rder\s+[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"[Aa]mount[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"£\s*([0-9,]+\.\d{2})\s*(?:total|paid)", re.IGNORECASE),
+]
+BLACK_SHEEP_COFFEE_ITEM_PATTERNS = [
+    re.compile(r"([A-Za-z][A-Za-z\s]+?)\s*(?:x\d+)?\s*£\s*([0-9,]+\.?\d*)"),
+]
+
+
 @register_vendor(["leavetheherdbehind.com"])
 def parse_black_sheep_coffee_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Black Sheep Coffee order confirmations.
@@ -336,11 +386,7 @@ def parse_black_sheep_coffee_receipt(
 
     # Extract order number, city, and location from subject
     # Pattern: "Order Confirmation - {number} - {city} - {location}"
-    subject_match = re.search(
-        r"Order Confirmation\s*-\s*(\d+)\s*-\s*([^-]+?)\s*-\s*(.+)",
-        subject,
-        re.IGNORECASE,
-    )
+    subject_match = BLACK_SHEEP_COFFEE_SUBJECT_RE.search(subject)
     if subject_match:
         result["order_id"] = subject_match.group(1).strip()
         result["city"] = subject_match.group(2).strip()
@@ -349,30 +395,21 @@ def parse_black_sheep_coffee_receipt(
     # Use text body or extract from HTML
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract total amount
-    total_patterns = [
-        r"[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"[Oo]rder\s+[Tt]otal[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"[Aa]mount[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"£\s*([0-9,]+\.\d{2})\s*(?:total|paid)",
-    ]
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in BLACK_SHEEP_COFFEE_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
 
     # Try to extract items from the order
     # Coffee shop items often appear as: "Item Name x1 £3.50" or "Item Name £3.50"
-    item_patterns = [
-        r"([A-Za-z][A-Za-z\s]+?)\s*(?:x\d+)?\s*£\s*([0-9,]+\.?\d*)",
-    ]
     items = []
-    for pattern in item_patterns:
-        matches = re.findall(pattern, text)
+    for pattern in BLACK_SHEEP_COFFEE_ITEM_PATTERNS:
+        matches = pattern.findall(text)
         for match in matches:
             item_name = match[0].strip() if isinstance(match, tuple) else match.strip()
             if item_name and len(item_name) > 2 and len(item_name) < 100:
@@ -421,9 +458,17 @@ def parse_black_sheep_coffee_receipt(
 # ============================================================================
 
 
+AUDIO_EMOTION_ORDER_RE = re.compile(r"order\s*(?:#|number|:)?\s*(\d+)", re.IGNORECASE)
+AUDIO_EMOTION_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Grand Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["audioemotion.co.uk"])
 def parse_audio_emotion_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse Audio Emotion audio equipment order confirmations."""
     result = {
@@ -437,24 +482,17 @@ def parse_audio_emotion_receipt(
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract order ID
-    order_match = re.search(
-        r"order\s*(?:#|number|:)?\s*(\d+)", subject + " " + text, re.IGNORECASE
-    )
+    order_match = AUDIO_EMOTION_ORDER_RE.search(subject + " " + text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Grand Total[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AUDIO_EMOTION_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -470,7 +508,9 @@ def parse_audio_emotion_receipt(
 
 
 @register_vendor(["novationmusic.com"])
-def parse_novation_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_novation_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """Parse Novation Music order confirmations."""
     result = {
         "merchant_name": "Novation Music",
@@ -482,22 +522,18 @@ def parse_novation_receipt(html_body: str, text_body: str, subject: str) -> dict
     }
 
     # Extract order ID from subject: "Your Novation order confirmation (#700024906)"
-    order_match = re.search(r"#(\d+)", subject)
+    order_match = HASH_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_ORDER_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -512,8 +548,18 @@ def parse_novation_receipt(html_body: str, text_body: str, subject: str) -> dict
 # ============================================================================
 
 
+BLUEHOST_ORDER_RE = re.compile(r"order\s*(?:#|ID|:)?\s*(\d+)", re.IGNORECASE)
+BLUEHOST_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*\$\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*\$\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"\$\s*([0-9,]+\.[0-9]{2})", re.IGNORECASE),
+]
+
+
 @register_vendor(["account.bluehost.com", "bluehost.com"])
-def parse_bluehost_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_bluehost_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """Parse Bluehost hosting order confirmations."""
     result = {
         "merchant_name": "Bluehost",
@@ -526,22 +572,17 @@ def parse_bluehost_receipt(html_body: str, text_body: str, subject: str) -> dict
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract order ID
-    order_match = re.search(r"order\s*(?:#|ID|:)?\s*(\d+)", text, re.IGNORECASE)
+    order_match = BLUEHOST_ORDER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*\$\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*\$\s*([0-9,]+\.?\d*)",
-        r"\$\s*([0-9,]+\.[0-9]{2})",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in BLUEHOST_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -560,15 +601,16 @@ def parse_bluehost_receipt(html_body: str, text_body: str, subject: str) -> dict
 # ============================================================================
 
 
+YRECEIPTS_MERCHANT_RE = re.compile(r"receipt from\s+(.+?)(?:\s*$|\s*-)", re.IGNORECASE)
+
+
 @register_vendor(["yreceipts.com"])
 def parse_yreceipts_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse yReceipts digital receipts (used by various retailers like Moss)."""
     # Extract merchant name from subject: "Your receipt from Moss"
-    merchant_match = re.search(
-        r"receipt from\s+(.+?)(?:\s*$|\s*-)", subject, re.IGNORECASE
-    )
+    merchant_match = YRECEIPTS_MERCHANT_RE.search(subject)
     merchant_name = merchant_match.group(1).strip() if merchant_match else "Unknown"
 
     result = {
@@ -584,16 +626,12 @@ def parse_yreceipts_receipt(
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -608,8 +646,18 @@ def parse_yreceipts_receipt(
 # ============================================================================
 
 
+WORLDPAY_REF_RE = re.compile(r"reference[:\s]*([A-Z0-9\-]+)", re.IGNORECASE)
+WORLDPAY_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"£\s*([0-9,]+\.[0-9]{2})", re.IGNORECASE),
+]
+
+
 @register_vendor(["worldpay.com"])
-def parse_worldpay_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_worldpay_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """Parse Worldpay transaction confirmations."""
     result = {
         "merchant_name": "Worldpay",
@@ -622,22 +670,17 @@ def parse_worldpay_receipt(html_body: str, text_body: str, subject: str) -> dict
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract transaction reference
-    ref_match = re.search(r"reference[:\s]*([A-Z0-9\-]+)", text, re.IGNORECASE)
+    ref_match = WORLDPAY_REF_RE.search(text)
     if ref_match:
         result["order_id"] = ref_match.group(1)
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"£\s*([0-9,]+\.[0-9]{2})",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in WORLDPAY_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -654,7 +697,7 @@ def parse_worldpay_receipt(html_body: str, text_body: str, subject: str) -> dict
 
 @register_vendor(["designacable.com"])
 def parse_designacable_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse Designacable custom cable order confirmations."""
     result = {
@@ -668,23 +711,17 @@ def parse_designacable_receipt(
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract order ID
-    order_match = re.search(
-        r"order\s*(?:#|:)?\s*(\d+)", subject + " " + text, re.IGNORECASE
-    )
+    order_match = ORDER_NUMBER_RE.search(subject + " " + text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_ORDER_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -701,7 +738,7 @@ def parse_designacable_receipt(
 
 @register_vendor(["cooksmill.co.uk"])
 def parse_cooksmill_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse Cooksmill kitchenware order confirmations."""
     result = {
@@ -714,22 +751,18 @@ def parse_cooksmill_receipt(
     }
 
     # Extract order ID from subject: "Your Cooksmill order confirmation (#4000007561)"
-    order_match = re.search(r"#(\d+)", subject)
+    order_match = HASH_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_ORDER_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -744,9 +777,16 @@ def parse_cooksmill_receipt(
 # ============================================================================
 
 
+BAHAI_EVENTS_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Payment[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["bahaievents.org.uk"])
 def parse_bahai_events_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse Baha'i Events payment confirmations."""
     result = {
@@ -760,17 +800,12 @@ def parse_bahai_events_receipt(
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Payment[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in BAHAI_EVENTS_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -785,9 +820,12 @@ def parse_bahai_events_receipt(
 # ============================================================================
 
 
+BAHAI_BOOKS_INVOICE_RE = re.compile(r"#([A-Z]?\d+)")
+
+
 @register_vendor(["bahai.org.uk"])
 def parse_bahai_books_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse Baha'i Books UK invoices."""
     result = {
@@ -800,22 +838,18 @@ def parse_bahai_books_receipt(
     }
 
     # Extract invoice number from subject: "Invoice #D4551"
-    invoice_match = re.search(r"#([A-Z]?\d+)", subject)
+    invoice_match = BAHAI_BOOKS_INVOICE_RE.search(subject)
     if invoice_match:
         result["order_id"] = invoice_match.group(1)
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -831,7 +865,9 @@ def parse_bahai_books_receipt(
 
 
 @register_vendor(["smolproducts.com"])
-def parse_smol_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_smol_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """Parse Smol eco-products order confirmations."""
     result = {
         "merchant_name": "Smol",
@@ -844,21 +880,17 @@ def parse_smol_receipt(html_body: str, text_body: str, subject: str) -> dict | N
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract order ID
-    order_match = re.search(r"order\s*(?:#|:)?\s*(\d+)", text, re.IGNORECASE)
+    order_match = ORDER_NUMBER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_ORDER_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -875,7 +907,7 @@ def parse_smol_receipt(html_body: str, text_body: str, subject: str) -> dict | N
 
 @register_vendor(["cables4all.co.uk"])
 def parse_cables4all_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """Parse Cables4All order confirmations."""
     result = {
@@ -889,21 +921,17 @@ def parse_cables4all_receipt(
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract order ID
-    order_match = re.search(r"order\s*(?:#|:)?\s*(\d+)", text, re.IGNORECASE)
+    order_match = ORDER_NUMBER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Order Total[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in GBP_ORDER_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -918,9 +946,18 @@ def parse_cables4all_receipt(
 # ============================================================================
 
 
+GEAR4MUSIC_ORDER_RE = re.compile(r"order\s+(W\d+)", re.IGNORECASE)
+GEAR4MUSIC_AMOUNT_RE = re.compile(r"&#163;([0-9,]+\.?\d*)")
+GEAR4MUSIC_GRAND_TOTAL_RE = re.compile(
+    r"Grand Total.*?£\s*([0-9,]+\.?\d*)", re.IGNORECASE | re.DOTALL
+)
+GEAR4MUSIC_ITEM_RE = re.compile(r"^(\d+)\s*x\s+(.+)$")
+GEAR4MUSIC_PRICE_RE = re.compile(r"^£\s*([0-9,]+\.?\d*)$")
+
+
 @register_vendor(["gear4music.com"])
 def parse_gear4music_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Gear4music order confirmation emails.
@@ -940,25 +977,23 @@ def parse_gear4music_receipt(
     }
 
     # Extract order ID from subject
-    order_match = re.search(r"order\s+(W\d+)", subject, re.IGNORECASE)
+    order_match = GEAR4MUSIC_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Parse HTML for details
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text(separator="\n")
 
         # Extract Grand Total - look for &#163; (£ encoded) pattern
         # Pattern in HTML: <strong>&#163;42.89</strong>
-        amount_match = re.search(r"&#163;([0-9,]+\.?\d*)", html_body)
+        amount_match = GEAR4MUSIC_AMOUNT_RE.search(html_body)
         if amount_match:
             result["total_amount"] = parse_amount(amount_match.group(1))
         else:
             # Fallback to text pattern
-            amount_match = re.search(
-                r"Grand Total.*?£\s*([0-9,]+\.?\d*)", text, re.IGNORECASE | re.DOTALL
-            )
+            amount_match = GEAR4MUSIC_GRAND_TOTAL_RE.search(text)
             if amount_match:
                 result["total_amount"] = parse_amount(amount_match.group(1))
 
@@ -968,7 +1003,7 @@ def parse_gear4music_receipt(
 
         for i, line in enumerate(lines):
             # Match pattern like "1 x AKG P5 S Dynamic..."
-            item_match = re.match(r"^(\d+)\s*x\s+(.+)$", line)
+            item_match = GEAR4MUSIC_ITEM_RE.match(line)
             if item_match:
                 qty = int(item_match.group(1))
                 name = item_match.group(2).strip()
@@ -976,7 +1011,7 @@ def parse_gear4music_receipt(
                 # Look for price in next lines
                 price = None
                 for j in range(i + 1, min(i + 3, len(lines))):
-                    price_match = re.search(r"^£\s*([0-9,]+\.?\d*)$", lines[j])
+                    price_match = GEAR4MUSIC_PRICE_RE.search(lines[j])
                     if price_match:
                         price = parse_amount(price_match.group(1))
                         break
@@ -996,9 +1031,16 @@ def parse_gear4music_receipt(
 # ============================================================================
 
 
+BLOOMLING_ORDER_RE = re.compile(r"order\s*#?\s*(\d{10,})", re.IGNORECASE)
+BLOOMLING_ITEM_RE = re.compile(
+    r"(\d+)x\s*\[([^\]]+)\]\([^)]+\)(?:,\s*([^,]+))?(?:,\s*Item no\.?:\s*(\S+))?"
+)
+BLOOMLING_PRICE_RE = re.compile(r"^£(\d+\.?\d*)$")
+
+
 @register_vendor(["bloomling.com", "bloomling.co.uk"])
 def parse_bloomling_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse Bloomling (online garden store) order emails.
@@ -1020,7 +1062,7 @@ def parse_bloomling_receipt(
     }
 
     # Extract order number from subject
-    order_match = re.search(r"order\s*#?\s*(\d{10,})", subject, re.IGNORECASE)
+    order_match = BLOOMLING_ORDER_RE.search(subject)
     if order_match:
         result["order_id"] = order_match.group(1)
 
@@ -1028,8 +1070,7 @@ def parse_bloomling_receipt(
     items = []
     if text_body:
         # Pattern: "1x [Product Name](url), quantity info, Item no.: XXX"
-        item_pattern = r"(\d+)x\s*\[([^\]]+)\]\([^)]+\)(?:,\s*([^,]+))?(?:,\s*Item no\.?:\s*(\S+))?"
-        for match in re.finditer(item_pattern, text_body):
+        for match in BLOOMLING_ITEM_RE.finditer(text_body):
             qty = int(match.group(1))
             name = match.group(2).strip()
             variant = match.group(3).strip() if match.group(3) else None
@@ -1048,13 +1089,13 @@ def parse_bloomling_receipt(
 
     # Extract prices from HTML
     if html_body:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
 
         # Find all price spans - format: <span>£X.XX</span>
         prices = []
         for span in soup.find_all("span"):
             text = span.get_text(strip=True)
-            price_match = re.match(r"^£(\d+\.?\d*)$", text)
+            price_match = BLOOMLING_PRICE_RE.match(text)
             if price_match:
                 prices.append(parse_amount(price_match.group(1)))
 
@@ -1090,8 +1131,20 @@ def parse_bloomling_receipt(
 # ============================================================================
 
 
+O2_ORDER_RE = re.compile(r"Order\s*(?:number)?[:\s]*([A-Z]{2}\d{8})", re.IGNORECASE)
+O2_PHONE_RE = re.compile(r"(?:order|line)[:\s]*(\d{11})", re.IGNORECASE)
+O2_PLAN_RE = re.compile(r"plan\s+([^,\n]+(?:,\s*[^,\n]+)*)", re.IGNORECASE)
+O2_GRAND_TOTAL_RE = re.compile(
+    r"Order grand total(.*?)(?=\n\n|\Z)", re.IGNORECASE | re.DOTALL
+)
+O2_AMOUNTS_RE = re.compile(r"(-)?£(\d+\.?\d*)")
+O2_MONTHLY_RE = re.compile(r"Monthly\s+Charge[:\s]*£?(\d+\.?\d*)", re.IGNORECASE)
+
+
 @register_vendor(["s-email-o2.co.uk", "email.o2.co.uk", "o2.co.uk"])
-def parse_o2_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_o2_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse O2 Mobile order confirmation emails.
 
@@ -1115,36 +1168,32 @@ def parse_o2_receipt(html_body: str, text_body: str, subject: str) -> dict | Non
     if not html_body:
         return None
 
-    soup = BeautifulSoup(html_body, "html.parser")
+    soup = get_soup(html_body, parsed)
     text = soup.get_text(separator="\n")
 
     # Extract order number (format: NCxxxxxxxx)
-    order_match = re.search(
-        r"Order\s*(?:number)?[:\s]*([A-Z]{2}\d{8})", text, re.IGNORECASE
-    )
+    order_match = O2_ORDER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract phone number being ordered/upgraded
-    phone_match = re.search(r"(?:order|line)[:\s]*(\d{11})", text, re.IGNORECASE)
+    phone_match = O2_PHONE_RE.search(text)
     if phone_match:
         result["phone_number"] = phone_match.group(1)
 
     # Extract plan details
-    plan_match = re.search(r"plan\s+([^,\n]+(?:,\s*[^,\n]+)*)", text, re.IGNORECASE)
+    plan_match = O2_PLAN_RE.search(text)
     if plan_match:
         result["plan_name"] = plan_match.group(1).strip()
 
     # Extract grand total
     # O2 emails show: "Order grand total\n-£13.99\n£0.00" (discount then final total)
     # We want the LAST non-negative amount after "Order grand total"
-    grand_total_match = re.search(
-        r"Order grand total(.*?)(?=\n\n|\Z)", text, re.IGNORECASE | re.DOTALL
-    )
+    grand_total_match = O2_GRAND_TOTAL_RE.search(text)
     if grand_total_match:
         section = grand_total_match.group(1)
         # Find all amounts in this section
-        amounts = re.findall(r"(-)?£(\d+\.?\d*)", section)
+        amounts = O2_AMOUNTS_RE.findall(section)
         # Take the last non-negative amount (the final total)
         for neg, val in reversed(amounts):
             amount = parse_amount(val)
@@ -1157,9 +1206,7 @@ def parse_o2_receipt(html_body: str, text_body: str, subject: str) -> dict | Non
                 break
 
     # Extract monthly charge
-    monthly_match = re.search(
-        r"Monthly\s+Charge[:\s]*£?(\d+\.?\d*)", text, re.IGNORECASE
-    )
+    monthly_match = O2_MONTHLY_RE.search(text)
     if monthly_match:
         result["monthly_charge"] = parse_amount(monthly_match.group(1))
 
@@ -1184,8 +1231,18 @@ def parse_o2_receipt(html_body: str, text_body: str, subject: str) -> dict | Non
 # ============================================================================
 
 
+REVERB_SUBJECT_RE = re.compile(r"Your order of (.+?) on Reverb", re.IGNORECASE)
+REVERB_ORDER_RE = re.compile(r"Order\s*#?\s*(\d{7,9})", re.IGNORECASE)
+REVERB_PRICES_RE = re.compile(r"£([\d,]+\.?\d*)")
+REVERB_TOTAL_RE = re.compile(r"Total\s*[\n\r\s]*£([\d,]+\.?\d*)", re.IGNORECASE)
+REVERB_SHIPPING_RE = re.compile(r"Shipping\s*\n?\s*£([\d,]+\.?\d*)", re.IGNORECASE)
+REVERB_SUBTOTAL_RE = re.compile(r"Subtotal\s*\n?\s*£([\d,]+\.?\d*)", re.IGNORECASE)
+
+
 @register_vendor(["reverb.com", "email.reverb.com"])
-def parse_reverb_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_reverb_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Reverb.com order confirmation emails.
 
@@ -1209,7 +1266,7 @@ def parse_reverb_receipt(html_body: str, text_body: str, subject: str) -> dict |
     # Extract product name from subject
     # Format: "Your order of [Product Name] on Reverb"
     product_name = None
-    subject_match = re.search(r"Your order of (.+?) on Reverb", subject, re.IGNORECASE)
+    subject_match = REVERB_SUBJECT_RE.search(subject)
     if subject_match:
         product_name = subject_match.group(1).strip()
 
@@ -1219,41 +1276,35 @@ def parse_reverb_receipt(html_body: str, text_body: str, subject: str) -> dict |
             return result
         return None
 
-    soup = BeautifulSoup(html_body, "html.parser")
+    soup = get_soup(html_body, parsed)
     text = soup.get_text(separator="\n")
 
     # Extract order number (8 digits)
-    order_match = re.search(r"Order\s*#?\s*(\d{7,9})", text, re.IGNORECASE)
+    order_match = REVERB_ORDER_RE.search(text)
     if order_match:
         result["order_id"] = order_match.group(1)
 
     # Extract prices - look for £ amounts
-    prices = re.findall(r"£([\d,]+\.?\d*)", text)
+    prices = REVERB_PRICES_RE.findall(text)
     prices = [parse_amount(p) for p in prices if parse_amount(p) > 0]
 
     # Typical structure: item price, subtotal, shipping, total
     # Total is usually the largest or last significant amount
     if prices:
         # Find total - use findall and take LAST match (grand total appears after subtotal/shipping)
-        total_matches = re.findall(
-            r"Total\s*[\n\r\s]*£([\d,]+\.?\d*)", text, re.IGNORECASE
-        )
+        total_matches = REVERB_TOTAL_RE.findall(text)
         if total_matches:
             result["total_amount"] = parse_amount(
                 total_matches[-1]
             )  # Last match is grand total
 
         # Find shipping
-        shipping_match = re.search(
-            r"Shipping\s*\n?\s*£([\d,]+\.?\d*)", text, re.IGNORECASE
-        )
+        shipping_match = REVERB_SHIPPING_RE.search(text)
         if shipping_match:
             result["shipping"] = parse_amount(shipping_match.group(1))
 
         # Find subtotal/item price
-        subtotal_match = re.search(
-            r"Subtotal\s*\n?\s*£([\d,]+\.?\d*)", text, re.IGNORECASE
-        )
+        subtotal_match = REVERB_SUBTOTAL_RE.search(text)
         if subtotal_match:
             result["subtotal"] = parse_amount(subtotal_match.group(1))
 
@@ -1281,9 +1332,21 @@ def parse_reverb_receipt(html_body: str, text_body: str, subject: str) -> dict |
 # ============================================================================
 
 
+GUITARGUITAR_SALE_REF_RE = re.compile(r"Sale Ref:\s*(\d+)", re.IGNORECASE)
+GUITARGUITAR_ORDER_RE = re.compile(r"Order Number\s*-?\s*(\d+)", re.IGNORECASE)
+GUITARGUITAR_DATE_RE = re.compile(
+    r"Receipt Date\s*-?\s*(\d{1,2})\s+(\w+)\s+(\d{4})", re.IGNORECASE
+)
+GUITARGUITAR_TOTAL_RE = re.compile(r"Sale Total\s*£?([\d,]+\.?\d*)", re.IGNORECASE)
+GUITARGUITAR_VAT_RE = re.compile(r"VAT\s*£?([\d,]+\.?\d*)", re.IGNORECASE)
+GUITARGUITAR_PRODUCT_RE = re.compile(
+    r"Sale\s+([A-Z][^\n]+?)\s+SKU:\s*(\d+)[^\n]*\n?\s*£([\d,]+\.?\d*)", re.IGNORECASE
+)
+
+
 @register_vendor(["guitarguitar.co.uk"])
 def parse_guitarguitar_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse GuitarGuitar sales receipt emails.
@@ -1306,26 +1369,24 @@ def parse_guitarguitar_receipt(
     }
 
     # Extract Sale Ref from subject
-    sale_ref_match = re.search(r"Sale Ref:\s*(\d+)", subject, re.IGNORECASE)
+    sale_ref_match = GUITARGUITAR_SALE_REF_RE.search(subject)
     if sale_ref_match:
         result["order_id"] = sale_ref_match.group(1)
 
     if not html_body:
         return result if result.get("order_id") else None
 
-    soup = BeautifulSoup(html_body, "html.parser")
+    soup = get_soup(html_body, parsed)
     text = soup.get_text(separator="\n")
 
     # Extract Order Number if not in subject
     if not result.get("order_id"):
-        order_match = re.search(r"Order Number\s*-?\s*(\d+)", text, re.IGNORECASE)
+        order_match = GUITARGUITAR_ORDER_RE.search(text)
         if order_match:
             result["order_id"] = order_match.group(1)
 
     # Extract Receipt Date - "30 October 2024"
-    date_match = re.search(
-        r"Receipt Date\s*-?\s*(\d{1,2})\s+(\w+)\s+(\d{4})", text, re.IGNORECASE
-    )
+    date_match = GUITARGUITAR_DATE_RE.search(text)
     if date_match:
         day = int(date_match.group(1))
         month_name = date_match.group(2)
@@ -1348,12 +1409,12 @@ def parse_guitarguitar_receipt(
         result["receipt_date"] = f"{year:04d}-{month:02d}-{day:02d}"
 
     # Extract Sale Total
-    total_match = re.search(r"Sale Total\s*£?([\d,]+\.?\d*)", text, re.IGNORECASE)
+    total_match = GUITARGUITAR_TOTAL_RE.search(text)
     if total_match:
         result["total_amount"] = parse_amount(total_match.group(1))
 
     # Extract VAT
-    vat_match = re.search(r"VAT\s*£?([\d,]+\.?\d*)", text, re.IGNORECASE)
+    vat_match = GUITARGUITAR_VAT_RE.search(text)
     if vat_match:
         result["vat_amount"] = parse_amount(vat_match.group(1))
 
@@ -1362,8 +1423,7 @@ def parse_guitarguitar_receipt(
     items = []
 
     # Find product blocks - they contain description followed by SKU
-    product_pattern = r"Sale\s+([A-Z][^\n]+?)\s+SKU:\s*(\d+)[^\n]*\n?\s*£([\d,]+\.?\d*)"
-    for match in re.finditer(product_pattern, text, re.IGNORECASE):
+    for match in GUITARGUITAR_PRODUCT_RE.finditer(text):
         product_name = match.group(1).strip()
         sku = match.group(2)
         price = parse_amount(match.group(3))
@@ -5,14 +5,39 @@ Airbnb, British Airways, DHL
 """
 
 import re
-
-from bs4 import BeautifulSoup
-
-from .base import parse_amount, parse_date_text, register_vendor
+from typing import TYPE_CHECKING
+
+from .base import get_soup, parse_amount, parse_date_text, register_vendor
+
+if TYPE_CHECKING:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+
+AIRBNB_RECEIPT_RE = re.compile(r"Receipt ID[:\s]*([A-Z0-9]+)", re.IGNORECASE)
+AIRBNB_CONFIRM_RE = re.compile(r"Confirmation code[:\s]*([A-Z0-9]+)", re.IGNORECASE)
+AIRBNB_DATE_RE = re.compile(
+    r"Receipt ID[:\s]*[A-Z0-9]+\s*[·•]\s*(\d{1,2}\s+\w+\s+\d{4})", re.IGNORECASE
+)
+AIRBNB_LOCATION_RE = re.compile(r"nights? in\s+(.+?)(?:\n|$)", re.IGNORECASE)
+AIRBNB_STAY_RE = re.compile(
+    r"(\w{3},\s+\d{1,2}\s+\w+\s+\d{4})\s*->\s*(\w{3},\s+\d{1,2}\s+\w+\s+\d{4})"
+)
+AIRBNB_TOTAL_PATTERNS = [
+    re.compile(r"Total\s*\(GBP\)\s*£([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount paid\s*\(GBP\)\s*£([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Total\s*£([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+AIRBNB_FEE_RE = re.compile(
+    r"(?:Airbnb\s+)?service fee\s+£([0-9,]+\.?\d*)", re.IGNORECASE
+)
+AIRBNB_TAX_RE = re.compile(r"Taxes\s+£([0-9,]+\.?\d*)", re.IGNORECASE)
+AIRBNB_PAYMENT_RE = re.compile(r"(MASTERCARD|VISA|AMEX)[^\d]*(\d{4})", re.IGNORECASE)
 
 
 @register_vendor(["airbnb.com", "airbnb.co.uk"])
-def parse_airbnb_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_airbnb_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """
     Parse Airbnb receipt emails.
 
@@ -37,72 +62,54 @@ def parse_airbnb_receipt(html_body: str, text_body: str, subject: str) -> dict |
     # Use text body (cleaner structure)
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract Receipt ID
-    receipt_match = re.search(r"Receipt ID[:\s]*([A-Z0-9]+)", text, re.IGNORECASE)
+    receipt_match = AIRBNB_RECEIPT_RE.search(text)
     if receipt_match:
         result["order_id"] = receipt_match.group(1)
 
     # Extract Confirmation code
-    confirm_match = re.search(
-        r"Confirmation code[:\s]*([A-Z0-9]+)", text, re.IGNORECASE
-    )
+    confirm_match = AIRBNB_CONFIRM_RE.search(text)
     if confirm_match:
         result["confirmation_code"] = confirm_match.group(1)
 
     # Extract receipt date (from Receipt ID line: "Receipt ID: RCJTZQP29T · 29 September 2025")
-    date_match = re.search(
-        r"Receipt ID[:\s]*[A-Z0-9]+\s*[·•]\s*(\d{1,2}\s+\w+\s+\d{4})",
-        text,
-        re.IGNORECASE,
-    )
+    date_match = AIRBNB_DATE_RE.search(text)
     if date_match:
         result["receipt_date"] = parse_date_text(date_match.group(1))
 
     # Extract property/location
-    location_match = re.search(r"nights? in\s+(.+?)(?:\n|$)", text, re.IGNORECASE)
+    location_match = AIRBNB_LOCATION_RE.search(text)
     if location_match:
         result["product_name"] = location_match.group(1).strip()
 
     # Extract stay dates
-    stay_match = re.search(
-        r"(\w{3},\s+\d{1,2}\s+\w+\s+\d{4})\s*->\s*(\w{3},\s+\d{1,2}\s+\w+\s+\d{4})",
-        text,
-    )
+    stay_match = AIRBNB_STAY_RE.search(text)
     if stay_match:
         result["stay_start"] = stay_match.group(1)
         result["stay_end"] = stay_match.group(2)
 
     # Extract total amount (e.g., "Total (GBP)   £1,576.80" or "Amount paid (GBP)   £1,576.80")
-    total_patterns = [
-        r"Total\s*\(GBP\)\s*£([0-9,]+\.?\d*)",
-        r"Amount paid\s*\(GBP\)\s*£([0-9,]+\.?\d*)",
-        r"Total\s*£([0-9,]+\.?\d*)",
-    ]
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AIRBNB_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
 
     # Extract service fee
-    fee_match = re.search(
-        r"(?:Airbnb\s+)?service fee\s+£([0-9,]+\.?\d*)", text, re.IGNORECASE
-    )
+    fee_match = AIRBNB_FEE_RE.search(text)
     if fee_match:
         result["service_fee"] = parse_amount(fee_match.group(1))
 
     # Extract taxes
-    tax_match = re.search(r"Taxes\s+£([0-9,]+\.?\d*)", text, re.IGNORECASE)
+    tax_match = AIRBNB_TAX_RE.search(text)
     if tax_match:
         result["tax_amount"] = parse_amount(tax_match.group(1))
 
     # Extract payment method
-    payment_match = re.search(
-        r"(MASTERCARD|VISA|AMEX)[^\d]*(\d{4})", text, re.IGNORECASE
-    )
+    payment_match = AIRBNB_PAYMENT_RE.search(text)
     if payment_match:
         result["payment_method"] = (
             f"{payment_match.group(1)} •••• {payment_match.group(2)}"
@@ -132,9 +139,21 @@ def parse_airbnb_receipt(html_body: str, text_body: str, subject: str) -> dict |
 # ============================================================================
 
 
+BRITISH_AIRWAYS_REF_RE = re.compile(r"confirmation\s+([A-Z0-9]{6})", re.IGNORECASE)
+BRITISH_AIRWAYS_FLIGHT_RE = re.compile(
+    r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*(?:-|to)\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)"
+)
+BRITISH_AIRWAYS_FLIGHT_NUMS_RE = re.compile(r"\bBA\s*(\d{3,4})\b")
+BRITISH_AIRWAYS_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Grand Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount paid[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["crm.ba.com", "ba.com"])
 def parse_british_airways_receipt(
-    html_body: str, text_body: str, subject: str
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
 ) -> dict | None:
     """
     Parse British Airways booking confirmation emails.
@@ -153,21 +172,20 @@ def parse_british_airways_receipt(
     }
 
     # Extract booking reference from subject
-    ref_match = re.search(r"confirmation\s+([A-Z0-9]{6})", subject, re.IGNORECASE)
+    ref_match = BRITISH_AIRWAYS_REF_RE.search(subject)
     if ref_match:
         result["order_id"] = ref_match.group(1)
 
     # Use text body or extract from HTML
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract flights as line items
     line_items = []
     # Pattern: "London - Belfast" or "City to City"
-    flight_pattern = r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*(?:-|to)\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)"
-    flight_matches = re.findall(flight_pattern, text)
+    flight_matches = BRITISH_AIRWAYS_FLIGHT_RE.findall(text)
     seen_routes = set()
     for origin, dest in flight_matches:
         route = f"{origin} to {dest}"
@@ -180,7 +198,7 @@ def parse_british_airways_receipt(
             line_items.append({"name": f"Flight: {route}"})
 
     # Extract flight numbers
-    flight_nums = re.findall(r"\bBA\s*(\d{3,4})\b", text)
+    flight_nums = BRITISH_AIRWAYS_FLIGHT_NUMS_RE.findall(text)
     for i, num in enumerate(flight_nums[: len(line_items)]):
         if i < len(line_items):
             line_items[i]["name"] += f" (BA{num})"
@@ -189,13 +207,8 @@ def parse_british_airways_receipt(
         result["line_items"] = line_items[:4]  # Max 4 flights
 
     # Extract total amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Grand Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount paid[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in BRITISH_AIRWAYS_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -210,8 +223,18 @@ def parse_british_airways_receipt(
 # ============================================================================
 
 
+DHL_WAYBILL_RE = re.compile(r"waybill[:\s]*(\d+)", re.IGNORECASE)
+DHL_AMOUNT_PATTERNS = [
+    re.compile(r"Total[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Amount[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+    re.compile(r"Payment[:\s]*£\s*([0-9,]+\.?\d*)", re.IGNORECASE),
+]
+
+
 @register_vendor(["dhl.com", "dhl.co.uk"])
-def parse_dhl_receipt(html_body: str, text_body: str, subject: str) -> dict | None:
+def parse_dhl_receipt(
+    html_body: str, text_body: str, subject: str, parsed: "ParsedEmail | None" = None
+) -> dict | None:
     """Parse DHL duty/tax payment receipts."""
     result = {
         "merchant_name": "DHL",
@@ -224,22 +247,17 @@ def parse_dhl_receipt(html_body: str, text_body: str, subject: str) -> dict | No
 
     text = text_body or ""
     if html_body and not text:
-        soup = BeautifulSoup(html_body, "html.parser")
+        soup = get_soup(html_body, parsed)
         text = soup.get_text()
 
     # Extract waybill/tracking number
-    waybill_match = re.search(r"waybill[:\s]*(\d+)", text, re.IGNORECASE)
+    waybill_match = DHL_WAYBILL_RE.search(text)
     if waybill_match:
         result["order_id"] = waybill_match.group(1)
 
     # Extract amount
-    amount_patterns = [
-        r"Total[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Amount[:\s]*£\s*([0-9,]+\.?\d*)",
-        r"Payment[:\s]*£\s*([0-9,]+\.?\d*)",
-    ]
-    for pattern in amount_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in DHL_AMOUNT_PATTERNS:
+        match = pattern.search(text)
         if match:
             result["total_amount"] = parse_amount(match.group(1))
             break
@@ -5,16 +5,22 @@ Modular receipt parsing system for Gmail emails.
 
 Architecture:
 - utilities: Common utility functions (merchant normalization, currency detection, etc.)
+- parsed_email: ParsedEmail, the parse-once view of an email body shared by all stages
 - filtering: Pre-filtering to reject marketing/promotional emails
 - schema_extraction: Schema.org markup extraction
 - pattern_extraction: Regex-based pattern matching
 - llm_extraction: LLM-powered fallback extraction
+- template_cache: Per-sender HTML templates learned from LLM/confirmed parses
 - orchestrator: Main parsing coordination and database updates
+- parse_cache: Parser versions and the (content hash, parser version) result cache
+- reparse: Streaming bulk reparse of stored receipts after a parser change
 
 Public API:
 - parse_receipt(receipt_id) - Parse a single receipt from database
 - parse_receipt_content(...) - Parse email content directly (used during sync)
 - parse_pending_receipts(connection_id, limit) - Batch parse pending receipts
+- reparse_changed_receipts(connection_id) - Reparse receipts whose parser changed
+- learn_template_from_receipt(receipt_id) - Learn a template from a confirmed receipt
 """
 
 # Import main parsing functions from orchestrator
@@ -42,9 +48,15 @@ from .orchestrator import (
     parse_receipt_content,
     update_receipt_with_parsed_data,
 )
+from .parse_cache import (
+    compute_content_hash,
+    get_parser_version,
+)
+from .parsed_email import ParsedEmail
 from .pattern_extraction import (
     extract_with_patterns,
 )
+from .reparse import reparse_changed_receipts
 
 # Import extraction functions
 from .schema_extraction import (
@@ -53,6 +65,11 @@ from .schema_extraction import (
     infer_description_from_name,
     parse_schema_org_order,
 )
+from .template_cache import (
+    extract_with_template,
+    learn_template,
+    learn_template_from_receipt,
+)
 
 # Import utility functions that may be used externally
 from .utilities import (
@@ -75,6 +92,10 @@ __all__ = [
     "update_receipt_with_parsed_data",
     "mark_receipt_unparseable",
     "parse_pending_receipts",
+    "reparse_changed_receipts",
+    "get_parser_version",
+    "compute_content_hash",
+    "ParsedEmail",
     # Utility functions
     "normalize_merchant_name",
     "compute_receipt_hash",
@@ -104,4 +125,7 @@ __all__ = [
     "infer_category_from_name",
     "extract_with_patterns",
     "extract_with_llm",
+    "extract_with_template",
+    "learn_template",
+    "learn_template_from_receipt",
 ]
@@ -6,6 +6,13 @@ Pre-filters emails before extraction to reject marketing/promotional content.
 """
 
 import re
+from collections.abc import Callable
+from functools import lru_cache
+
+from .parsed_email import ParsedEmail
+
+# Amazon rejection that depends on the full body (the snippet alone is not enough)
+AMAZON_NO_RECEIPT_INDICATOR = "Amazon email without receipt indicator"
 
 # Strong receipt indicators (weighted +2)
 STRONG_RECEIPT_INDICATORS = [
@@ -42,6 +49,12 @@ WEAK_RECEIPT_INDICATORS = [
     "subscription",
 ]
 
+# Order/invoice number pattern (weighted +3)
+ORDER_NUMBER_RE = re.compile(
+    r"(?:order|invoice|confirmation|booking|transaction)\s*(?:#|number|no\.?|id)?\s*[:.]?\s*[A-Z0-9-]{5,}",
+    re.IGNORECASE,
+)
+
 # Strong marketing/promotional indicators (weighted -3, any one = reject)
 STRONG_MARKETING_INDICATORS = [
     "shop now",
@@ -281,7 +294,7 @@ def is_amazon_receipt_email(
         return (True, "Amazon refund sender", 90)
 
     # Reject all other Amazon emails (delivery notifications, cancellations, etc.)
-    return (False, "Amazon email without receipt indicator", 90)
+    return (False, AMAZON_NO_RECEIPT_INDICATOR, 90)
 
 
 def is_uber_receipt_email(subject: str, sender_email: str) -> tuple:
@@ -1116,6 +1129,157 @@ def is_etsy_receipt_email(subject: str, sender_email: str) -> tuple:
     return (False, "Etsy - not a purchase receipt", 90)
 
 
+# ============================================================================
+# PRE-FILTER DISPATCH
+# ============================================================================
+
+# Distinct senders whose applicable filters / sender signals are remembered
+SENDER_CACHE_SIZE = 4096
+
+
+class VendorFilterDispatch:
+    """
+    Ordered vendor pre-filters, dispatched on the sender address.
+
+    Every vendor filter returns (None, None, None) unless the sender contains
+    one of its trigger substrings (e.g. "ebay"). Instead of calling each
+    filter in turn for every email, the filters that can apply to a sender
+    are worked out once and cached, so a typical email runs zero or one
+    vendor filter. The first filter to return a decision still wins.
+    """
+
+    def __init__(
+        self,
+        filters: list[tuple[tuple[str, ...], Callable[..., tuple], bool]],
+    ):
+        """
+        Build a dispatcher.
+
+        Args:
+            filters: (sender_triggers, filter_func, takes_body) in precedence
+                order. An empty trigger tuple means the filter always runs.
+        """
+        self.filters = tuple(filters)
+        self.filters_for_sender = lru_cache(maxsize=SENDER_CACHE_SIZE)(
+            self._filters_for_sender
+        )
+
+    def _filters_for_sender(self, sender_lower: str) -> tuple:
+        """Filters (and whether they take the body) that apply to a sender."""
+        return tuple(
+            (filter_func, takes_body)
+            for triggers, filter_func, takes_body in self.filters
+            if not triggers or any(trigger in sender_lower for trigger in triggers)
+        )
+
+    def run(self, subject: str, sender_email: str, body_text: str = None) -> tuple:
+        """
+        Run the filters that apply to the sender, in precedence order.
+
+        Args:
+            subject: Email subject line
+            sender_email: Full sender email address
+            body_text: Email body text (passed to filters that take it)
+
+        Returns:
+            First (is_receipt, reason, confidence) decision, or
+            (None, None, None) if no filter made one
+        """
+        for filter_func, takes_body in self.filters_for_sender(sender_email.lower()):
+            if takes_body:
+                result = filter_func(subject, sender_email, body_text)
+            else:
+                result = filter_func(subject, sender_email)
+            if result[0] is not None:
+                return result
+        return (None, None, None)
+
+
+# Filters run by is_likely_receipt before generic scoring
+LIKELY_RECEIPT_FILTERS = VendorFilterDispatch(
+    [
+        # User-forwarded emails and known non-receipt senders
+        (("gmail.com",), is_gmail_forwarded_email, False),
+        (("bmail.sony-europe.com",), is_sony_email, False),
+        (("booking.com",), is_booking_email, False),
+        # Booking confirmations and shipping notifications from any sender
+        ((), is_non_receipt_notification, False),
+        # Vendors with a high volume of marketing email
+        (("designacable",), is_designacable_receipt_email, False),
+        (("ryanair",), is_ryanair_receipt_email, False),
+        (("ctshirts",), is_charles_tyrwhitt_receipt_email, False),
+        (("ebay",), is_ebay_receipt_email, False),
+        (("amazon",), is_amazon_receipt_email, True),
+        (("uber",), is_uber_receipt_email, False),
+        (("paypal",), is_paypal_receipt_email, False),
+        (("microsoft",), is_microsoft_receipt_email, False),
+        (("apple",), is_apple_receipt_email, False),
+        (("lyft",), is_lyft_receipt_email, False),
+        (("deliveroo",), is_deliveroo_receipt_email, False),
+        (("spotify",), is_spotify_receipt_email, False),
+        (("netflix",), is_netflix_receipt_email, False),
+        (("google",), is_google_receipt_email, False),
+        (("ocado",), is_ocado_receipt_email, False),
+        (
+            ("citizensofsoil", "citizens of soil"),
+            is_citizens_of_soil_receipt_email,
+            False,
+        ),
+        (("figma",), is_figma_receipt_email, False),
+        (("sebago",), is_sebago_receipt_email, False),
+        (("etsy",), is_etsy_receipt_email, False),
+    ]
+)
+
+# Filters run by the sync's should_import_email before storing an email
+IMPORT_FILTERS = VendorFilterDispatch(
+    [
+        # Amazon filter uses body content for accurate filtering
+        (("amazon",), is_amazon_receipt_email, True),
+        (("ebay",), is_ebay_receipt_email, False),
+        (("etsy",), is_etsy_receipt_email, False),
+        (("uber",), is_uber_receipt_email, False),
+        (("paypal",), is_paypal_receipt_email, False),
+        (("microsoft",), is_microsoft_receipt_email, False),
+        (("apple",), is_apple_receipt_email, False),
+        (("lyft",), is_lyft_receipt_email, False),
+        (("deliveroo",), is_deliveroo_receipt_email, False),
+        (("spotify",), is_spotify_receipt_email, False),
+        (("netflix",), is_netflix_receipt_email, False),
+        (("google",), is_google_receipt_email, False),
+        (("ocado",), is_ocado_receipt_email, False),
+        (
+            ("citizensofsoil", "citizens of soil"),
+            is_citizens_of_soil_receipt_email,
+            False,
+        ),
+        (("figma",), is_figma_receipt_email, False),
+    ]
+)
+
+
+@lru_cache(maxsize=SENDER_CACHE_SIZE)
+def classify_sender(sender_lower: str) -> tuple:
+    """
+    Match a sender against the known marketing/receipt sender patterns.
+
+    Args:
+        sender_lower: Lowercased sender email address
+
+    Returns:
+        Tuple of (first matching KNOWN_MARKETING_SENDERS pattern or None,
+        whether any KNOWN_RECEIPT_SENDERS pattern matches)
+    """
+    marketing_pattern = next(
+        (pattern for pattern in KNOWN_MARKETING_SENDERS if pattern in sender_lower),
+        None,
+    )
+    is_known_receipt_sender = any(
+        pattern in sender_lower for pattern in KNOWN_RECEIPT_SENDERS
+    )
+    return marketing_pattern, is_known_receipt_sender
+
+
 def is_likely_receipt(
     subject: str,
     body_text: str,
@@ -1148,124 +1312,29 @@ def is_likely_receipt(
     if has_schema_order:
         return (True, "Has Schema.org Order markup", 100)
 
-    # Signal 1.5: Reject user-forwarded emails and known non-receipt senders first
-    gmail_result = is_gmail_forwarded_email(subject, sender_email)
-    if gmail_result[0] is not None:
-        return gmail_result
-
-    sony_result = is_sony_email(subject, sender_email)
-    if sony_result[0] is not None:
-        return sony_result
-
-    booking_result = is_booking_email(subject, sender_email)
-    if booking_result[0] is not None:
-        return booking_result
-
-    # Filter out booking confirmations and shipping notifications
-    non_receipt_result = is_non_receipt_notification(subject, sender_email)
-    if non_receipt_result[0] is not None:
-        return non_receipt_result
-
-    # Signal 1.6: Vendor-specific pre-filters (before generic processing)
-    # These vendors need special handling due to high volume of marketing emails
-    designacable_result = is_designacable_receipt_email(subject, sender_email)
-    if designacable_result[0] is not None:
-        return designacable_result
-
-    ryanair_result = is_ryanair_receipt_email(subject, sender_email)
-    if ryanair_result[0] is not None:
-        return ryanair_result
-
-    charles_tyrwhitt_result = is_charles_tyrwhitt_receipt_email(subject, sender_email)
-    if charles_tyrwhitt_result[0] is not None:
-        return charles_tyrwhitt_result
-
-    ebay_result = is_ebay_receipt_email(subject, sender_email)
-    if ebay_result[0] is not None:
-        return ebay_result
-
-    amazon_result = is_amazon_receipt_email(subject, sender_email, body_text)
-    if amazon_result[0] is not None:
-        return amazon_result
-
-    uber_result = is_uber_receipt_email(subject, sender_email)
-    if uber_result[0] is not None:
-        return uber_result
-
-    paypal_result = is_paypal_receipt_email(subject, sender_email)
-    if paypal_result[0] is not None:
-        return paypal_result
-
-    microsoft_result = is_microsoft_receipt_email(subject, sender_email)
-    if microsoft_result[0] is not None:
-        return microsoft_result
-
-    apple_result = is_apple_receipt_email(subject, sender_email)
-    if apple_result[0] is not None:
-        return apple_result
-
-    lyft_result = is_lyft_receipt_email(subject, sender_email)
-    if lyft_result[0] is not None:
-        return lyft_result
-
-    deliveroo_result = is_deliveroo_receipt_email(subject, sender_email)
-    if deliveroo_result[0] is not None:
-        return deliveroo_result
+    # Signal 1.5: Reject user-forwarded emails, known non-receipt senders,
+    # booking/shipping notifications, then vendor-specific pre-filters
+    # (vendors with a high volume of marketing emails need special handling)
+    vendor_result = LIKELY_RECEIPT_FILTERS.run(subject, sender_email, body_text)
+    if vendor_result[0] is not None:
+        return vendor_result
 
-    spotify_result = is_spotify_receipt_email(subject, sender_email)
-    if spotify_result[0] is not None:
-        return spotify_result
-
-    netflix_result = is_netflix_receipt_email(subject, sender_email)
-    if netflix_result[0] is not None:
-        return netflix_result
-
-    google_result = is_google_receipt_email(subject, sender_email)
-    if google_result[0] is not None:
-        return google_result
-
-    ocado_result = is_ocado_receipt_email(subject, sender_email)
-    if ocado_result[0] is not None:
-        return ocado_result
-
-    citizens_result = is_citizens_of_soil_receipt_email(subject, sender_email)
-    if citizens_result[0] is not None:
-        return citizens_result
-
-    figma_result = is_figma_receipt_email(subject, sender_email)
-    if figma_result[0] is not None:
-        return figma_result
-
-    sebago_result = is_sebago_receipt_email(subject, sender_email)
-    if sebago_result[0] is not None:
-        return sebago_result
-
-    etsy_result = is_etsy_receipt_email(subject, sender_email)
-    if etsy_result[0] is not None:
-        return etsy_result
-
-    sender_lower = (sender_email or "").lower()
+    marketing_pattern, is_known_receipt_sender = classify_sender(
+        (sender_email or "").lower()
+    )
     text = f"{subject} {body_text[:1000]}".lower()
 
     # Signal 2: List-Unsubscribe header strongly indicates marketing
-    if list_unsubscribe:
-        # But check if it's from a known receipt sender first
-        is_known_receipt_sender = any(
-            pattern in sender_lower for pattern in KNOWN_RECEIPT_SENDERS
-        )
-        if not is_known_receipt_sender:
-            return (False, "Has List-Unsubscribe header (marketing)", 85)
+    # (unless it's from a known receipt sender)
+    if list_unsubscribe and not is_known_receipt_sender:
+        return (False, "Has List-Unsubscribe header (marketing)", 85)
 
     # Signal 3: Check sender patterns
     # Known marketing senders = reject
-    for pattern in KNOWN_MARKETING_SENDERS:
-        if pattern in sender_lower:
-            return (False, f"Marketing sender pattern: {pattern}", 90)
+    if marketing_pattern:
+        return (False, f"Marketing sender pattern: {marketing_pattern}", 90)
 
     # Known receipt senders = accept (but verify with content)
-    is_known_receipt_sender = any(
-        pattern in sender_lower for pattern in KNOWN_RECEIPT_SENDERS
-    )
 
     # Signal 4: Content scoring
     score = 0
@@ -1294,13 +1363,7 @@ def is_likely_receipt(
             score += 1
 
     # Check for order/invoice number patterns (strong receipt signal)
-    has_order_number = bool(
-        re.search(
-            r"(?:order|invoice|confirmation|booking|transaction)\s*(?:#|number|no\.?|id)?\s*[:.]?\s*[A-Z0-9-]{5,}",
-            text,
-            re.IGNORECASE,
-        )
-    )
+    has_order_number = bool(ORDER_NUMBER_RE.search(text))
     if has_order_number:
         score += 3
 
@@ -1317,14 +1380,8 @@ def is_likely_receipt(
     return (False, f"Ambiguous score: {score} (defaulting to not receipt)", 50)
 
 
-def has_schema_order_markup(html_body: str) -> bool:
+def has_schema_order_markup(html_body: str, parsed: ParsedEmail = None) -> bool:
     """Check if HTML contains Schema.org Order markup (definitive receipt signal)."""
-    if not html_body:
-        return False
-    # Check for JSON-LD Order type
-    if '"@type"' in html_body and '"Order"' in html_body:
-        return True
-    # Check for microdata Order type
-    if "itemtype" in html_body and "schema.org/Order" in html_body:
-        return True
-    return False
+    if parsed is None or not parsed.matches(html_body):
+        parsed = ParsedEmail(html_body)
+    return parsed.has_order_markup
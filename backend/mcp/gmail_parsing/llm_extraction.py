@@ -6,6 +6,7 @@ Supports multiple LLM providers (Anthropic, OpenAI, Google, DeepSeek, Ollama).
 """
 
 import json
+import re
 
 from mcp.logging_config import get_logger
 
@@ -14,21 +15,65 @@ from .utilities import normalize_merchant_name
 # Initialize logger
 logger = get_logger(__name__)
 
+# Body characters sent per email (keeps prompts within token limits)
+LLM_BODY_CHARS = 2000
 
-def extract_with_llm(subject: str, sender: str, body_text: str) -> dict | None:
+# Tracking links carry no receipt data but cost many tokens
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+RECEIPT_JSON_STRUCTURE = """{
+  "merchant_name": "Store name",
+  "order_id": "Order/confirmation number",
+  "total_amount": 12.34,
+  "currency_code": "GBP",
+  "receipt_date": "YYYY-MM-DD",
+  "line_items": [
+    {
+      "name": "Full product name as shown",
+      "description": "Brief description of what this item IS (e.g., 'wireless earbuds', 'monthly subscription')",
+      "category_hint": "groceries|electronics|clothing|entertainment|food_delivery|transport|subscription|services|health|home|other",
+      "quantity": 1,
+      "price": 12.34
+    }
+  ]
+}"""
+
+RECEIPT_JSON_RULES = """Important:
+- total_amount must be a number (no currency symbols)
+- receipt_date must be YYYY-MM-DD format
+- For line_items: extract ALL items if visible, include price per item when shown
+- category_hint should be one of: groceries, electronics, clothing, entertainment, food_delivery, transport, subscription, services, health, home, other
+- Return only valid JSON, no markdown or explanation"""
+
+
+def trim_body_for_llm(body_text: str) -> str:
     """
-    Extract receipt data using LLM.
+    Reduce an email body to the minimal text worth sending to the LLM.
 
-    Uses the configured LLM provider to parse unstructured receipt emails.
-    Returns parsed data with cost tracking.
+    Drops URLs, collapses whitespace and truncates to LLM_BODY_CHARS.
 
     Args:
-        subject: Email subject
-        sender: Sender email/name
-        body_text: Plain text body
+        body_text: Plain text body (or visible text of the HTML body)
 
     Returns:
-        Parsed receipt dictionary or None
+        Trimmed text ("" for an empty body)
+    """
+    if not body_text:
+        return ""
+    text = WHITESPACE_RE.sub(" ", URL_RE.sub(" ", body_text)).strip()
+    return text[:LLM_BODY_CHARS]
+
+
+def build_llm_provider(config=None):
+    """
+    Build the configured LLM provider.
+
+    Args:
+        config: LLMConfig to build from (loaded from the environment if omitted)
+
+    Returns:
+        Provider instance, or None if LLM is unavailable or not configured
     """
     try:
         from config.llm_config import LLMProvider, load_llm_config
@@ -43,7 +88,7 @@ def extract_with_llm(subject: str, sender: str, body_text: str) -> dict | None:
         logger.warning(f"LLM providers not available: {e}")
         return None
 
-    config = load_llm_config()
+    config = config or load_llm_config()
     if not config:
         logger.debug("LLM not configured for Gmail parsing")
         return None
@@ -76,13 +121,85 @@ def extract_with_llm(subject: str, sender: str, body_text: str) -> dict | None:
         if config.provider == LLMProvider.ANTHROPIC:
             provider_kwargs["admin_api_key"] = config.anthropic_admin_api_key
 
-        provider = ProviderClass(**provider_kwargs)
+        return ProviderClass(**provider_kwargs)
     except Exception as e:
         logger.error(f"Failed to initialize LLM provider: {e}", exc_info=True)
         return None
 
-    # Truncate body to avoid token limits (max ~2000 chars)
-    truncated_body = body_text[:2000] if body_text else ""
+
+def _response_json(response):
+    """Decode the JSON content of an LLM response (markdown fences allowed)."""
+    content = response.content.strip()
+
+    # Handle markdown code blocks
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+
+    return json.loads(content)
+
+
+def _response_cost_cents(response) -> float:
+    """Cost of an LLM response in (fractional) cents."""
+    if hasattr(response, "total_tokens") and hasattr(response, "cost_per_1k_tokens"):
+        return (response.total_tokens / 1000) * response.cost_per_1k_tokens * 100
+    if hasattr(response, "cost"):
+        return response.cost * 100
+    return 0
+
+
+def _split_cost_cents(total_cents: float, weights: list) -> list:
+    """Split a request's cost in whole cents, keeping the shares' sum exact."""
+    total = round(total_cents)
+    shares = [total * weight / sum(weights) for weight in weights]
+    cents = [int(share) for share in shares]
+    # Leftover cents go to the largest remainders
+    by_remainder = sorted(range(len(shares)), key=lambda i: cents[i] - shares[i])
+    for i in by_remainder[: total - sum(cents)]:
+        cents[i] += 1
+    return cents
+
+
+def _receipt_from_llm(parsed: dict, cost_cents: int) -> dict:
+    """Map one extracted JSON object to receipt fields."""
+    return {
+        "merchant_name": parsed.get("merchant_name"),
+        "merchant_name_normalized": normalize_merchant_name(
+            parsed.get("merchant_name")
+        ),
+        "order_id": parsed.get("order_id"),
+        "total_amount": float(parsed["total_amount"])
+        if parsed.get("total_amount")
+        else None,
+        "currency_code": parsed.get("currency_code", "GBP"),
+        "receipt_date": parsed.get("receipt_date"),
+        "line_items": parsed.get("line_items"),
+        "parse_method": "llm",
+        "parse_confidence": 70,
+        "parsing_status": "parsed",
+        "llm_cost_cents": cost_cents,
+    }
+
+
+def extract_with_llm(subject: str, sender: str, body_text: str) -> dict | None:
+    """
+    Extract receipt data using LLM.
+
+    Uses the configured LLM provider to parse unstructured receipt emails.
+    Returns parsed data with cost tracking.
+
+    Args:
+        subject: Email subject
+        sender: Sender email/name
+        body_text: Plain text body
+
+    Returns:
+        Parsed receipt dictionary or None
+    """
+    provider = build_llm_provider()
+    if not provider:
+        return None
 
     # Build prompt for receipt extraction with enhanced line item details
     prompt = f"""Extract receipt/purchase information from this email. Return JSON only, no explanation.
@@ -90,32 +207,12 @@ def extract_with_llm(subject: str, sender: str, body_text: str) -> dict | None:
 Subject: {subject}
 From: {sender}
 Body:
-{truncated_body}
+{trim_body_for_llm(body_text)}
 
 Extract and return this JSON structure (use null for missing fields):
-{{
-  "merchant_name": "Store name",
-  "order_id": "Order/confirmation number",
-  "total_amount": 12.34,
-  "currency_code": "GBP",
-  "receipt_date": "YYYY-MM-DD",
-  "line_items": [
-    {{
-      "name": "Full product name as shown",
-      "description": "Brief description of what this item IS (e.g., 'wireless earbuds', 'monthly subscription')",
-      "category_hint": "groceries|electronics|clothing|entertainment|food_delivery|transport|subscription|services|health|home|other",
-      "quantity": 1,
-      "price": 12.34
-    }}
-  ]
-}}
+{RECEIPT_JSON_STRUCTURE}
 
-Important:
-- total_amount must be a number (no currency symbols)
-- receipt_date must be YYYY-MM-DD format
-- For line_items: extract ALL items if visible, include price per item when shown
-- category_hint should be one of: groceries, electronics, clothing, entertainment, food_delivery, transport, subscription, services, health, home, other
-- Return only valid JSON, no markdown or explanation"""
+{RECEIPT_JSON_RULES}"""
 
     try:
         response = provider.complete(prompt)
@@ -123,45 +220,8 @@ Important:
         if not response or not response.content:
             return None
 
-        # Parse JSON from response
-        content = response.content.strip()
-
-        # Handle markdown code blocks
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-
-        parsed = json.loads(content)
-
-        # Calculate cost in cents
-        cost_cents = 0
-        if hasattr(response, "total_tokens") and hasattr(
-            response, "cost_per_1k_tokens"
-        ):
-            cost_cents = int(
-                (response.total_tokens / 1000) * response.cost_per_1k_tokens * 100
-            )
-        elif hasattr(response, "cost"):
-            cost_cents = int(response.cost * 100)
-
-        return {
-            "merchant_name": parsed.get("merchant_name"),
-            "merchant_name_normalized": normalize_merchant_name(
-                parsed.get("merchant_name")
-            ),
-            "order_id": parsed.get("order_id"),
-            "total_amount": float(parsed["total_amount"])
-            if parsed.get("total_amount")
-            else None,
-            "currency_code": parsed.get("currency_code", "GBP"),
-            "receipt_date": parsed.get("receipt_date"),
-            "line_items": parsed.get("line_items"),
-            "parse_method": "llm",
-            "parse_confidence": 70,
-            "parsing_status": "parsed",
-            "llm_cost_cents": cost_cents,
-        }
+        parsed = _response_json(response)
+        return _receipt_from_llm(parsed, int(_response_cost_cents(response)))
 
     except json.JSONDecodeError as e:
         logger.warning(f"LLM returned invalid JSON: {e}")
@@ -169,3 +229,86 @@ Important:
     except Exception as e:
         logger.error(f"LLM extraction failed: {e}", exc_info=True)
         return None
+
+
+def extract_batch_with_llm(emails: list, provider=None) -> list:
+    """
+    Extract receipt data for several emails with one LLM request.
+
+    The emails are numbered in a single prompt and the LLM answers with a
+    JSON array, so the instructions and output schema are paid for once per
+    request instead of once per email. The request's cost is split across
+    the emails in proportion to the body text each contributed.
+
+    Args:
+        emails: Dicts with subject, sender and body_text
+        provider: Provider to use (the configured one if omitted)
+
+    Returns:
+        List aligned with emails of (parsed receipt dict or None, cost in cents)
+    """
+    if not emails:
+        return []
+
+    provider = provider or build_llm_provider()
+    if not provider:
+        return [(None, 0) for _ in emails]
+
+    blocks = [
+        f"=== Email {number} ===\n"
+        f"Subject: {email.get('subject', '')}\n"
+        f"From: {email.get('sender', '')}\n"
+        f"Body:\n{trim_body_for_llm(email.get('body_text'))}"
+        for number, email in enumerate(emails, start=1)
+    ]
+    emails_text = "\n\n".join(blocks)
+
+    prompt = f"""Extract receipt/purchase information from each of these {len(emails)} emails. Return a JSON array only, no explanation, with one object per email in the same order.
+
+{emails_text}
+
+Extract this JSON structure for every email (use null for missing fields), adding an "email" field with the email's number:
+{RECEIPT_JSON_STRUCTURE}
+
+{RECEIPT_JSON_RULES}
+- Return a JSON array of exactly {len(emails)} objects"""
+
+    try:
+        response = provider.complete(prompt)
+    except Exception as e:
+        logger.error(f"LLM batch extraction failed: {e}", exc_info=True)
+        return [(None, 0) for _ in emails]
+
+    if not response or not response.content:
+        return [(None, 0) for _ in emails]
+
+    costs = _split_cost_cents(
+        _response_cost_cents(response), [len(block) for block in blocks]
+    )
+
+    try:
+        answers = _response_json(response)
+    except json.JSONDecodeError as e:
+        logger.warning(f"LLM returned invalid JSON for batch: {e}")
+        return [(None, cost) for cost in costs]
+
+    if isinstance(answers, dict):
+        answers = answers.get("receipts") or [answers]
+
+    # Match answers to emails by number, falling back to their position
+    by_number = {}
+    for position, answer in enumerate(answers, start=1):
+        if not isinstance(answer, dict):
+            continue
+        number = answer.get("email")
+        by_number[number if isinstance(number, int) else position] = answer
+
+    results = []
+    for number, cost in enumerate(costs, start=1):
+        answer = by_number.get(number)
+        try:
+            results.append((_receipt_from_llm(answer, cost) if answer else None, cost))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"LLM returned an invalid receipt for email {number}: {e}")
+            results.append((None, cost))
+    return results
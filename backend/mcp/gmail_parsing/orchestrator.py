@@ -2,7 +2,7 @@
 Gmail Parser Orchestrator
 
 Main parsing coordination and database update logic.
-Orchestrates the parsing flow: pre-filter → vendor → schema → pattern → LLM
+Orchestrates the parsing flow: pre-filter → vendor → schema → template → pattern → LLM
 """
 
 import json
@@ -17,11 +17,12 @@ from .filtering import (
     is_likely_receipt,
 )
 from .llm_extraction import extract_with_llm
+from .parsed_email import ParsedEmail
 from .pattern_extraction import extract_with_patterns
 from .schema_extraction import extract_schema_org
+from .template_cache import extract_with_template, learn_template
 from .utilities import (
     compute_receipt_hash,
-    html_to_text,
     is_valid_merchant_name,
 )
 
@@ -38,8 +39,9 @@ def parse_receipt(receipt_id: int) -> dict:
     2. Pre-filter to reject marketing emails
     3. Schema.org extraction
     4. Vendor-specific parsing
-    5. Pattern-based extraction
-    6. LLM fallback
+    5. Learned template of the sender (from earlier LLM/confirmed parses)
+    6. Pattern-based extraction
+    7. LLM fallback (a success teaches the sender's template)
 
     Args:
         receipt_id: Database ID of the receipt to parse
@@ -60,18 +62,27 @@ def parse_receipt(receipt_id: int) -> dict:
 
     html_body = raw_data.get("body_html", "")
     text_body = raw_data.get("body_text", "")
+    list_unsubscribe = raw_data.get("list_unsubscribe", "")
+    if not html_body and not text_body:
+        # Bodies live in the compressed body store, loaded only here
+        content = database.get_gmail_email_content(receipt.get("message_id")) or {}
+        html_body = content.get("body_html") or ""
+        text_body = content.get("body_text") or ""
+        list_unsubscribe = list_unsubscribe or content.get("list_unsubscribe") or ""
     subject = receipt.get("subject", "")
     sender_email = receipt.get("sender_email", "")
     sender_name = receipt.get("sender_name", "")
     sender_domain = receipt.get("merchant_domain", "")
-    list_unsubscribe = raw_data.get("list_unsubscribe", "")
     received_at = receipt.get("received_at")  # Get timestamp for date fallback
 
+    # Parse the HTML at most once; every stage below shares it
+    parsed = ParsedEmail(html_body, text_body)
+
     # Prepare text for filtering
-    text_body_cleaned = text_body or html_to_text(html_body)
+    text_body_cleaned = parsed.body_text
 
     # STEP 1: Check for Schema.org Order markup (definitive receipt signal)
-    has_order_markup = has_schema_order_markup(html_body)
+    has_order_markup = has_schema_order_markup(html_body, parsed)
 
     # STEP 2: PRE-FILTER - Run BEFORE any extraction to reject marketing emails
     is_receipt, filter_reason, filter_confidence = is_likely_receipt(
@@ -95,7 +106,7 @@ def parse_receipt(receipt_id: int) -> dict:
 
     # STEP 3: Try Schema.org extraction (highest confidence)
     if html_body:
-        schema_result = extract_schema_org(html_body)
+        schema_result = extract_schema_org(html_body, parsed)
         if schema_result and schema_result.get("merchant_name"):
             # Fallback: use email received_at timestamp if no date was parsed
             if not schema_result.get("receipt_date") and received_at:
@@ -114,7 +125,7 @@ def parse_receipt(receipt_id: int) -> dict:
     # STEP 4: Try vendor-specific parser (high confidence for known formats)
     vendor_parser = get_vendor_parser(sender_domain)
     if vendor_parser:
-        vendor_result = vendor_parser(html_body, text_body, subject)
+        vendor_result = vendor_parser(html_body, text_body, subject, parsed=parsed)
         # Accept vendor result if it has amount OR at least identified the merchant
         # (e.g., Amazon "Ordered:" emails may not have parseable amounts)
         if vendor_result and (
@@ -138,7 +149,23 @@ def parse_receipt(receipt_id: int) -> dict:
             )
             return update_receipt_with_parsed_data(receipt_id, vendor_result)
 
-    # STEP 5: Try pattern-based extraction
+    # STEP 5: Try a template learned from earlier LLM/confirmed parses
+    template_result = extract_with_template(sender_domain, parsed)
+    if template_result:
+        if not template_result.get("receipt_date") and received_at:
+            template_result["receipt_date"] = (
+                received_at.strftime("%Y-%m-%d")
+                if hasattr(received_at, "strftime")
+                else str(received_at)
+            )
+            template_result["date_source"] = "email_received"
+        logger.info(
+            "Template parsing succeeded",
+            extra={"receipt_id": receipt_id, "parse_method": "template"},
+        )
+        return update_receipt_with_parsed_data(receipt_id, template_result)
+
+    # STEP 6: Try pattern-based extraction
     pattern_result = extract_with_patterns(
         subject=subject,
         body_text=text_body_cleaned,
@@ -170,11 +197,13 @@ def parse_receipt(receipt_id: int) -> dict:
         )
         pattern_result["merchant_name"] = None  # Clear invalid merchant
 
-    # STEP 6: Try LLM extraction as fallback
+    # STEP 7: Try LLM extraction as fallback
     llm_result = extract_with_llm(
         subject=subject, sender=sender_email, body_text=text_body_cleaned
     )
     if llm_result and llm_result.get("total_amount"):
+        # Next email with this layout is parsed from the template instead
+        learn_template(sender_domain, parsed, llm_result, source="llm")
         # Fallback: use email received_at timestamp if no date was parsed
         if not llm_result.get("receipt_date") and received_at:
             llm_result["receipt_date"] = (
@@ -225,6 +254,7 @@ def parse_receipt_content(
     list_unsubscribe: str = None,
     skip_llm: bool = True,
     received_at: datetime = None,
+    parsed: ParsedEmail = None,
 ) -> dict:
     """
     Parse email content directly (without database).
@@ -236,8 +266,10 @@ def parse_receipt_content(
     1. Pre-filter to reject marketing emails
     2. Vendor-specific parsing (highest priority - tailored to known formats)
     3. Schema.org extraction (fallback for vendors without custom parsers)
-    4. Pattern-based extraction
-    5. LLM fallback (optional, disabled by default during sync)
+    4. Learned template of the sender (from earlier LLM/confirmed parses)
+    5. Pattern-based extraction
+    6. LLM fallback (optional, disabled by default during sync); a success
+       teaches the sender's template
 
     Args:
         html_body: HTML body of email
@@ -249,6 +281,7 @@ def parse_receipt_content(
         list_unsubscribe: List-Unsubscribe header value
         skip_llm: Skip LLM extraction (faster, no cost)
         received_at: Email received timestamp (fallback for receipt_date if not parsed)
+        parsed: Optional ParsedEmail wrapping html_body (built here if omitted)
 
     Returns:
         Dictionary with parsed data:
@@ -266,11 +299,15 @@ def parse_receipt_content(
         if "@" in sender_email:
             sender_domain = sender_email.split("@")[-1].lower()
 
+    # Parse the HTML at most once; every stage below shares it
+    if parsed is None or not parsed.matches(html_body):
+        parsed = ParsedEmail(html_body, text_body)
+
     # Prepare text for filtering
-    text_body_cleaned = text_body or html_to_text(html_body)
+    text_body_cleaned = text_body or parsed.text
 
     # STEP 1: Check for Schema.org Order markup (definitive receipt signal)
-    has_order_markup = has_schema_order_markup(html_body) if html_body else False
+    has_order_markup = has_schema_order_markup(html_body, parsed)
 
     # STEP 2: PRE-FILTER - Run BEFORE any extraction to reject marketing emails
     is_receipt, filter_reason, filter_confidence = is_likely_receipt(
@@ -295,7 +332,9 @@ def parse_receipt_content(
     vendor_parser = get_vendor_parser(sender_domain)
     if vendor_parser:
         try:
-            vendor_result = vendor_parser(html_body or "", text_body or "", subject)
+            vendor_result = vendor_parser(
+                html_body or "", text_body or "", subject, parsed=parsed
+            )
             # Accept vendor result if it has amount, order_id, OR identified the merchant
             if vendor_result and (
                 vendor_result.get("total_amount")
@@ -338,7 +377,7 @@ def parse_receipt_content(
 
     # STEP 4: Try Schema.org extraction (fallback for vendors without custom parsers)
     if html_body:
-        schema_result = extract_schema_org(html_body)
+        schema_result = extract_schema_org(html_body, parsed)
         if schema_result and schema_result.get("merchant_name"):
             # Fallback: use email received_at timestamp if no date was parsed
             if not schema_result.get("receipt_date") and received_at:
@@ -347,7 +386,15 @@ def parse_receipt_content(
             schema_result["parsing_status"] = "parsed"
             return schema_result
 
-    # STEP 5: Try pattern-based extraction
+    # STEP 5: Try a template learned from earlier LLM/confirmed parses
+    template_result = extract_with_template(sender_domain, parsed)
+    if template_result:
+        if not template_result.get("receipt_date") and received_at:
+            template_result["receipt_date"] = received_at.strftime("%Y-%m-%d")
+            template_result["date_source"] = "email_received"
+        return template_result
+
+    # STEP 6: Try pattern-based extraction
     pattern_result = extract_with_patterns(
         subject=subject,
         body_text=text_body_cleaned,
@@ -367,12 +414,14 @@ def parse_receipt_content(
             pattern_result["parsing_status"] = "parsed"
             return pattern_result
 
-    # STEP 6: Try LLM extraction as fallback (if enabled)
+    # STEP 7: Try LLM extraction as fallback (if enabled)
     if not skip_llm:
         llm_result = extract_with_llm(
             subject=subject, sender=sender_email, body_text=text_body_cleaned
         )
         if llm_result and llm_result.get("total_amount"):
+            # Next email with this layout is parsed from the template instead
+            learn_template(sender_domain, parsed, llm_result, source="llm")
             # Fallback: use email received_at timestamp if no date was parsed
             if not llm_result.get("receipt_date") and received_at:
                 llm_result["receipt_date"] = received_at.strftime("%Y-%m-%d")
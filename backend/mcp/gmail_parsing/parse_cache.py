@@ -0,0 +1,119 @@
+"""
+Gmail Parse Cache
+
+Parser versioning and the (content_hash, parser_version) -> parse result cache.
+
+Every receipt is stamped with a hash of the inputs it was parsed from and the
+version string of the parsers that could have produced it: the orchestrator
+stages below, the vendor parser registered for the sender domain and the
+templates learned for it. When a parser changes, bump its version (PARSER_STAGE_VERSIONS here, or the
+register_vendor(..., version=N) argument for vendor parsers) and run
+reparse.reparse_changed_receipts(): only receipts whose applicable version
+changed are revisited, and content already parsed under the new version
+(identical templates, repeated runs) comes straight from the
+gmail_parse_results cache. Learning or refreshing a sender template changes
+the template digest in the version, so results parsed before it are not
+served from the cache.
+
+Usage:
+    from mcp.gmail_parsing.parse_cache import compute_content_hash, get_parser_version
+
+    version = get_parser_version("amazon.co.uk")
+"""
+
+import hashlib
+import json
+
+from mcp.gmail_parsers.base import get_vendor_parser
+
+from .template_cache import get_templates
+
+# Versions of the orchestrator stages in parse_receipt_content(). Bump one
+# whenever a change to that stage can change its output.
+PARSER_STAGE_VERSIONS = {
+    "pre_filter": 1,  # filtering.py
+    "schema_org": 1,  # schema_extraction.py
+    "template": 1,  # template_cache.py
+    "pattern": 1,  # pattern_extraction.py, utilities.py
+    "llm": 1,  # llm_extraction.py
+}
+
+
+def _template_digest(sender_domain: str) -> str | None:
+    """Short hash of the templates learned for a sender domain (None if none)."""
+    templates = get_templates(sender_domain) if sender_domain else []
+    if not templates:
+        return None
+    keys = sorted(
+        f"{template['id']}@{template.get('updated_at')}" for template in templates
+    )
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()[:12]
+
+
+def get_parser_version(sender_domain: str, skip_llm: bool = True) -> str:
+    """
+    Build the version string of the parsers that apply to a sender domain.
+
+    Args:
+        sender_domain: Email sender domain
+        skip_llm: Whether the LLM stage is skipped (its version is then left out)
+
+    Returns:
+        Version string, e.g. 'pre_filter:1,schema_org:1,template:1@3f2a9c1b7d04,
+        pattern:1,parse_amazon_receipt:2' (the digest only once templates exist)
+    """
+    parts = []
+    for stage, version in PARSER_STAGE_VERSIONS.items():
+        if skip_llm and stage == "llm":
+            continue
+        if stage == "template":
+            digest = _template_digest(sender_domain)
+            if digest:
+                version = f"{version}@{digest}"
+        parts.append(f"{stage}:{version}")
+    vendor_parser = get_vendor_parser(sender_domain)
+    if vendor_parser:
+        parts.append(
+            f"{vendor_parser.__name__}:{getattr(vendor_parser, 'parser_version', 1)}"
+        )
+    return ",".join(parts)
+
+
+def compute_content_hash(
+    html_body: str,
+    text_body: str,
+    subject: str,
+    sender_email: str,
+    sender_domain: str = None,
+    sender_name: str = None,
+    list_unsubscribe: str = None,
+    received_at=None,
+) -> str:
+    """
+    Hash the inputs of parse_receipt_content().
+
+    received_at only feeds the receipt_date fallback, so just its date is
+    hashed.
+
+    Returns:
+        SHA256 hex digest
+    """
+    received_date = (
+        received_at.strftime("%Y-%m-%d")
+        if hasattr(received_at, "strftime")
+        else received_at
+    )
+    payload = json.dumps(
+        [
+            html_body or "",
+            text_body or "",
+            subject or "",
+            sender_email or "",
+            sender_domain or "",
+            sender_name or "",
+            list_unsubscribe or "",
+            received_date,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
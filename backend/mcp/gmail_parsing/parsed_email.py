@@ -0,0 +1,156 @@
+"""
+Gmail Parsed Email
+
+Parse-once view of an email body shared by every parsing stage.
+
+Text rendering, the Schema.org pre-check, JSON-LD extraction and the vendor
+parsers all used to build their own BeautifulSoup tree from the same HTML.
+ParsedEmail builds a single lxml-backed tree on first use and caches it along
+with everything derived from it, so each email is parsed at most once.
+
+Usage:
+    from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+    parsed = ParsedEmail(html_body, text_body)
+    parsed.text  # html_to_text() rendering
+    parsed.json_ld  # Decoded JSON-LD blocks
+    vendor_parser(html_body, text_body, subject, parsed=parsed)
+"""
+
+import json
+import re
+from functools import cached_property
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+# Elements whose contents are not visible text
+NON_TEXT_TAGS = frozenset(["script", "style", "head", "meta", "noscript"])
+
+# Markers for Microdata/RDFa, which need extruct rather than the JSON-LD scan
+STRUCTURED_MARKUP_MARKERS = ("itemtype", "typeof=", "vocab=")
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ParsedEmail:
+    """Lazily parsed email body.
+
+    Nothing is parsed until an attribute is first read; every derived value
+    is computed once and cached. The tree is shared, so consumers must treat
+    it as read-only.
+
+    Attributes:
+        html_body: Raw HTML body ("" if the email has none)
+        text_body: Raw plain-text body ("" if the email has none)
+    """
+
+    def __init__(self, html_body: str | None, text_body: str | None = None):
+        """
+        Wrap an email body without parsing it.
+
+        Args:
+            html_body: HTML body of the email
+            text_body: Plain text body of the email
+        """
+        self.html_body = html_body or ""
+        self.text_body = text_body or ""
+        self._get_text_cache: dict[str, str] = {}
+
+    def matches(self, html_body: str | None) -> bool:
+        """Check whether this object wraps the given HTML."""
+        html_body = html_body or ""
+        return html_body is self.html_body or html_body == self.html_body
+
+    @cached_property
+    def soup(self) -> BeautifulSoup | None:
+        """Single lxml-backed tree for the HTML body (None without HTML)."""
+        if not self.html_body:
+            return None
+
+        try:
+            return BeautifulSoup(self.html_body, "lxml")
+        except Exception:
+            return BeautifulSoup(self.html_body, "html.parser")
+
+    @cached_property
+    def text(self) -> str:
+        """Visible text with whitespace collapsed (html_to_text rendering)."""
+        if self.soup is None:
+            return ""
+
+        return WHITESPACE_RE.sub(" ", " ".join(self._visible_strings())).strip()
+
+    def _visible_strings(self):
+        """Yield visible text nodes in document order.
+
+        Non-visible elements are skipped rather than decomposed, so the
+        shared tree is left untouched.
+        """
+        stack = [iter([self.soup])]
+        while stack:
+            for node in stack[-1]:
+                if isinstance(node, Tag):
+                    if node.name not in NON_TEXT_TAGS:
+                        stack.append(iter(node.contents))
+                        break
+                elif type(node) in (NavigableString, CData):
+                    yield node
+            else:
+                stack.pop()
+
+    @cached_property
+    def body_text(self) -> str:
+        """Plain text body, falling back to the HTML rendering."""
+        return self.text_body or self.text
+
+    def get_text(self, separator: str = "") -> str:
+        """
+        Cached equivalent of soup.get_text(separator=...).
+
+        Args:
+            separator: String inserted between text nodes
+
+        Returns:
+            Text of the whole document ("" without HTML)
+        """
+        if separator not in self._get_text_cache:
+            self._get_text_cache[separator] = (
+                self.soup.get_text(separator=separator) if self.soup else ""
+            )
+        return self._get_text_cache[separator]
+
+    @cached_property
+    def has_order_markup(self) -> bool:
+        """Check for Schema.org Order markup (JSON-LD or Microdata)."""
+        html = self.html_body
+        if not html:
+            return False
+        # Check for JSON-LD Order type
+        if '"@type"' in html and '"Order"' in html:
+            return True
+        # Check for microdata Order type
+        return "itemtype" in html and "schema.org/Order" in html
+
+    @cached_property
+    def has_structured_markup(self) -> bool:
+        """Check for Microdata/RDFa attributes (cheap substring test)."""
+        return any(marker in self.html_body for marker in STRUCTURED_MARKUP_MARKERS)
+
+    @cached_property
+    def json_ld(self) -> list:
+        """Decoded JSON-LD blocks; lists are flattened, invalid blocks skipped."""
+        if "application/ld+json" not in self.html_body or self.soup is None:
+            return []
+
+        items = []
+        for script in self.soup.find_all("script", type="application/ld+json"):
+            if not script.string:
+                continue
+            try:
+                # strict=False tolerates raw newlines inside strings
+                data = json.loads(script.string, strict=False)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            items.extend(data if isinstance(data, list) else [data])
+
+        return [item for item in items if isinstance(item, dict)]
@@ -0,0 +1,394 @@
+"""
+Gmail Bulk Reparse
+
+Streaming reparse of stored receipts after a parser change.
+
+Pipeline per batch:
+1. Stream receipts not on their current parser version, with their stored
+   email content, through a server-side cursor
+2. Look the (content_hash, parser_version) keys up in gmail_parse_results
+3. Parse the misses in a process pool (identical content is parsed once)
+4. Write the batch back with a single UPDATE ... FROM (VALUES ...)
+
+The process pool is only available outside Celery: prefork workers are
+daemonic and can't start child processes, so reparse_gmail_receipts_task
+parses serially. Run the CLI for a parallel reparse.
+
+Usage:
+    source venv/bin/activate
+    cd backend
+
+    # Reparse every connection using all CPU cores:
+    python -m mcp.gmail_parsing.reparse
+
+    # One connection, four worker processes:
+    python -m mcp.gmail_parsing.reparse --connection-id 1 --workers 4
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+
+import database
+from mcp.gmail_parsers.base import get_vendor_parser
+from mcp.logging_config import get_logger
+
+from .orchestrator import parse_receipt_content
+from .parse_cache import compute_content_hash, get_parser_version
+from .utilities import compute_receipt_hash
+
+logger = get_logger(__name__)
+
+# Worker processes used to parse (0 = one per CPU core)
+REPARSE_WORKERS = int(os.getenv("GMAIL_REPARSE_WORKERS", "0"))
+
+# Receipts streamed, looked up, parsed and written back per batch
+REPARSE_BATCH_SIZE = 500
+
+
+def _init_reparse_worker():
+    """Drop database connections inherited from the parent process."""
+    from database.base import engine
+
+    engine.dispose(close=False)
+
+
+def _parse_stored_receipt(job: dict) -> tuple:
+    """
+    Parse one stored email (runs in a worker process).
+
+    Args:
+        job: Keyword arguments for parse_receipt_content()
+
+    Returns:
+        Tuple of (parse result as JSON-compatible dict or None, seconds, error)
+    """
+    start = time.perf_counter()
+    try:
+        result = parse_receipt_content(**job, skip_llm=True)
+        # Round-trip through JSON so fresh and cached results match
+        result = json.loads(json.dumps(result, default=str))
+        return result, time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, str(e)
+
+
+def _sender_domain(receipt: dict) -> str:
+    """
+    Sender domain as the sync derived it for a stored receipt.
+
+    Mirrors the SQL the stale-receipt count and stream select by, so a
+    receipt is either streamed or counted unchanged, never both.
+    """
+    domain = receipt.get("merchant_domain")
+    sender_email = receipt.get("sender_email") or ""
+    if not domain and "@" in sender_email:
+        domain = sender_email.split("@")[-1].lower()
+    return domain or ""
+
+
+def _receipt_update(
+    receipt_id: int, parsed_data: dict, content_hash: str, parser_version: str
+) -> dict:
+    """Build the bulk-update row for a receipt from its parse result."""
+    # Same dedup hash the sync computes when it stores a receipt
+    receipt_hash = None
+    if parsed_data.get("merchant_name") and parsed_data.get("total_amount"):
+        receipt_hash = compute_receipt_hash(
+            merchant_name=parsed_data["merchant_name"],
+            amount=parsed_data["total_amount"],
+            receipt_date=parsed_data.get("receipt_date"),
+            order_id=parsed_data.get("order_id"),
+        )
+
+    return {
+        "id": receipt_id,
+        "merchant_name": parsed_data.get("merchant_name"),
+        "merchant_name_normalized": parsed_data.get("merchant_name_normalized"),
+        "order_id": parsed_data.get("order_id"),
+        "total_amount": parsed_data.get("total_amount"),
+        "currency_code": parsed_data.get("currency_code", "GBP"),
+        "receipt_date": parsed_data.get("receipt_date"),
+        "line_items": parsed_data.get("line_items"),
+        "receipt_hash": receipt_hash,
+        "parse_method": parsed_data.get("parse_method", "unknown"),
+        "parse_confidence": parsed_data.get("parse_confidence", 0),
+        "parsing_status": parsed_data.get("parsing_status", "unparseable"),
+        "llm_cost_cents": parsed_data.get("llm_cost_cents"),
+        "content_hash": content_hash,
+        "parser_version": parser_version,
+    }
+
+
+class BulkReparser:
+    """
+    Reparses batches of stored receipts and accumulates run statistics.
+
+    Parser versions and vendor labels are resolved once per sender domain.
+    """
+
+    def __init__(
+        self, versions: dict, executor: ProcessPoolExecutor = None, workers: int = 1
+    ):
+        """
+        Args:
+            versions: Dict of sender domain -> current parser version
+            executor: Process pool to parse in (parses in-process if None)
+            workers: Number of processes in the pool
+        """
+        self.versions = versions
+        self.executor = executor
+        self.workers = workers
+        self.vendor_labels = {}
+        self.stats = {
+            "total": 0,
+            "unchanged": 0,
+            "reparsed": 0,
+            "cache_hits": 0,
+            "parsed": 0,
+            "missing_content": 0,
+            "failed": 0,
+        }
+        # Vendor parser name ('generic' if none) -> parse count and seconds
+        self.vendor_timings = {}
+
+    def version_for(self, domain: str) -> str:
+        """Current parser version for a sender domain."""
+        if domain not in self.versions:
+            self.versions[domain] = get_parser_version(domain)
+        return self.versions[domain]
+
+    def vendor_label(self, domain: str) -> str:
+        """Name of the vendor parser for a domain, for timing breakdowns."""
+        if domain not in self.vendor_labels:
+            vendor_parser = get_vendor_parser(domain)
+            self.vendor_labels[domain] = (
+                vendor_parser.__name__ if vendor_parser else "generic"
+            )
+        return self.vendor_labels[domain]
+
+    def _parse_all(self, jobs: list) -> list:
+        """Parse jobs in the pool (or in-process), preserving order."""
+        if self.executor is None or len(jobs) < 2:
+            return [_parse_stored_receipt(job) for job in jobs]
+        chunksize = max(1, len(jobs) // (self.workers * 4))
+        return list(self.executor.map(_parse_stored_receipt, jobs, chunksize=chunksize))
+
+    def reparse_batch(self, receipts: list) -> int:
+        """
+        Reparse one batch of stored receipts and write the results back.
+
+        Args:
+            receipts: Receipt dicts from iter_gmail_receipts_for_reparse()
+
+        Returns:
+            Number of receipts updated
+        """
+        pending = []
+        for receipt in receipts:
+            domain = _sender_domain(receipt)
+            version = self.version_for(domain)
+            if receipt.get("parser_version") == version:
+                # Stamped since the run was counted - already current
+                continue
+            if not receipt.get("body_html") and not receipt.get("body_text"):
+                self.stats["missing_content"] += 1
+                continue
+            content_hash = compute_content_hash(
+                html_body=receipt.get("body_html"),
+                text_body=receipt.get("body_text"),
+                subject=receipt.get("subject"),
+                sender_email=receipt.get("sender_email"),
+                sender_domain=domain,
+                sender_name=receipt.get("sender_name"),
+                list_unsubscribe=receipt.get("list_unsubscribe"),
+                received_at=receipt.get("received_at"),
+            )
+            pending.append((receipt, domain, (content_hash, version)))
+
+        results = database.get_gmail_parse_results(list({key for _, _, key in pending}))
+
+        # Parse each distinct uncached key once
+        to_parse = {}
+        for receipt, domain, key in pending:
+            if key not in results and key not in to_parse:
+                to_parse[key] = (
+                    self.vendor_label(domain),
+                    {
+                        "html_body": receipt.get("body_html") or "",
+                        "text_body": receipt.get("body_text") or "",
+                        "subject": receipt.get("subject") or "",
+                        "sender_email": receipt.get("sender_email") or "",
+                        "sender_domain": domain,
+                        "sender_name": receipt.get("sender_name"),
+                        "list_unsubscribe": receipt.get("list_unsubscribe"),
+                        "received_at": receipt.get("received_at"),
+                    },
+                )
+
+        new_results = []
+        outcomes = self._parse_all([job for _, job in to_parse.values()])
+        for (key, (label, _)), (result, seconds, error) in zip(
+            to_parse.items(), outcomes, strict=True
+        ):
+            timing = self.vendor_timings.setdefault(label, {"count": 0, "seconds": 0.0})
+            timing["count"] += 1
+            timing["seconds"] += seconds
+            if result is None:
+                logger.error(
+                    f"Reparse failed ({label}): {error}",
+                    extra={"merchant": label},
+                )
+                continue
+            results[key] = result
+            new_results.append((*key, result))
+
+        database.save_gmail_parse_results(new_results)
+
+        updates = []
+        for receipt, _, key in pending:
+            if key not in results:
+                self.stats["failed"] += 1
+                continue
+            updates.append(_receipt_update(receipt["id"], results[key], *key))
+
+        database.update_gmail_receipts_parsed_bulk(updates)
+        self.stats["reparsed"] += len(updates)
+        self.stats["parsed"] += len(new_results)
+        self.stats["cache_hits"] += len(updates) - len(new_results)
+        return len(updates)
+
+
+def _resolve_workers(workers: int = None) -> int:
+    """Number of parse processes to use for this run."""
+    workers = workers or REPARSE_WORKERS or os.cpu_count() or 1
+    # Celery prefork children are daemonic and can't start their own pool
+    if workers > 1 and multiprocessing.current_process().daemon:
+        logger.warning(
+            f"Daemonic process can't start {workers} parse processes - "
+            "reparsing serially; run the CLI to reparse in parallel"
+        )
+        return 1
+    return workers
+
+
+def reparse_changed_receipts(
+    connection_id: int = None,
+    workers: int = None,
+    batch_size: int = REPARSE_BATCH_SIZE,
+    progress_callback: Callable[[dict], None] = None,
+) -> dict:
+    """
+    Reparse the stored receipts whose applicable parser version changed.
+
+    Receipts already stamped with the current version are never read. The
+    rest are streamed in batches, looked up in the parse result cache,
+    parsed in a process pool on a miss (LLM stage skipped, as during sync)
+    and written back with one UPDATE per batch.
+
+    Args:
+        connection_id: Restrict to one Gmail connection (all if None)
+        workers: Parse processes (default GMAIL_REPARSE_WORKERS or CPU count)
+        batch_size: Receipts per streamed batch
+        progress_callback: Called with the running stats after each batch
+
+    Returns:
+        Statistics dictionary, including per-vendor parse timings
+    """
+    start = time.perf_counter()
+
+    versions = {
+        domain: get_parser_version(domain)
+        for domain in database.get_gmail_reparse_domains(connection_id)
+    }
+    counts = database.count_gmail_receipts_for_reparse(connection_id, versions)
+
+    workers = _resolve_workers(workers)
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, initializer=_init_reparse_worker)
+        if workers > 1
+        else None
+    )
+    reparser = BulkReparser(versions, executor, workers)
+    stats = reparser.stats
+    stats["total"] = counts["total"]
+    stats["unchanged"] = counts["total"] - counts["stale"]
+    stats["stale"] = counts["stale"]
+
+    logger.info(
+        f"Reparse starting: {counts['stale']} of {counts['total']} receipts "
+        f"on an old parser version, {workers} worker(s)",
+        extra={"connection_id": connection_id},
+    )
+
+    try:
+        done = 0
+        for batch in database.iter_gmail_receipts_for_reparse(
+            connection_id, versions, batch_size
+        ):
+            reparser.reparse_batch(batch)
+            done += len(batch)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"Reparse progress: {done}/{counts['stale']} receipts "
+                f"({done / elapsed:.0f}/s, {stats['cache_hits']} from cache)",
+                extra={"connection_id": connection_id},
+            )
+            if progress_callback:
+                progress_callback({**stats, "processed": done})
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    stats["elapsed_seconds"] = round(time.perf_counter() - start, 2)
+    stats["vendor_timings"] = {
+        label: {
+            "count": timing["count"],
+            "seconds": round(timing["seconds"], 3),
+            "avg_ms": round(timing["seconds"] * 1000 / timing["count"], 1),
+        }
+        for label, timing in sorted(
+            reparser.vendor_timings.items(),
+            key=lambda item: item[1]["seconds"],
+            reverse=True,
+        )
+    }
+
+    logger.info(
+        f"Reparse complete: {stats['reparsed']} receipts in "
+        f"{stats['elapsed_seconds']}s ({stats['parsed']} parsed, "
+        f"{stats['cache_hits']} from cache, {stats['failed']} failed)",
+        extra={"connection_id": connection_id},
+    )
+    for label, timing in list(stats["vendor_timings"].items())[:10]:
+        logger.info(
+            f"  {label}: {timing['count']} parses, {timing['seconds']}s "
+            f"({timing['avg_ms']}ms avg)"
+        )
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Reparse stored Gmail receipts after a parser change"
+    )
+    arg_parser.add_argument("--connection-id", type=int, default=None)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE)
+    args = arg_parser.parse_args()
+
+    print(
+        json.dumps(
+            reparse_changed_receipts(
+                connection_id=args.connection_id,
+                workers=args.workers,
+                batch_size=args.batch_size,
+            ),
+            indent=2,
+        )
+    )
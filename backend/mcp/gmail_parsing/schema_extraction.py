@@ -5,13 +5,11 @@ Extracts structured receipt data from Schema.org markup in emails.
 Supports JSON-LD, Microdata, and RDFa formats.
 """
 
-import json
 import re
 
-from bs4 import BeautifulSoup
-
 from mcp.logging_config import get_logger
 
+from .parsed_email import ParsedEmail
 from .utilities import normalize_merchant_name, parse_date_string
 
 # Initialize logger
@@ -26,14 +24,17 @@ except ImportError:
     EXTRUCT_AVAILABLE = False
 
 
-def extract_schema_org(html_body: str) -> dict | None:
+def extract_schema_org(html_body: str, parsed: ParsedEmail = None) -> dict | None:
     """
-    Extract Schema.org data from email HTML using extruct.
+    Extract Schema.org data from email HTML.
 
-    Handles JSON-LD, Microdata, and RDFa formats uniformly.
+    JSON-LD blocks are read from the shared parsed tree. extruct builds its
+    own document, so it only runs for Microdata/RDFa, and only when the HTML
+    carries those attributes at all.
 
     Args:
         html_body: Raw HTML content of email
+        parsed: Optional ParsedEmail already wrapping html_body
 
     Returns:
         Parsed receipt dictionary or None
@@ -41,66 +42,58 @@ def extract_schema_org(html_body: str) -> dict | None:
     if not html_body:
         return None
 
-    # Try extruct first (handles JSON-LD, Microdata, RDFa)
-    if EXTRUCT_AVAILABLE:
-        result = _extract_with_extruct(html_body)
-        if result:
-            return result
+    if parsed is None or not parsed.matches(html_body):
+        parsed = ParsedEmail(html_body)
 
-    # Fallback to manual BeautifulSoup parsing for JSON-LD only
-    return _extract_json_ld_manual(html_body)
+    result = _find_schema_order(parsed.json_ld)
+    if result:
+        return result
 
+    # Microdata / RDFa via extruct
+    if EXTRUCT_AVAILABLE and parsed.has_structured_markup:
+        return _extract_with_extruct(html_body)
 
-def _extract_with_extruct(html_body: str) -> dict | None:
+    return None
+
+
+def _find_schema_order(items: list) -> dict | None:
     """
-    Extract structured data using extruct library.
+    Find the first Order/Invoice/Receipt node in Schema.org items.
 
     Args:
-        html_body: Raw HTML content
+        items: Schema.org objects (JSON-LD blocks or extruct output)
 
     Returns:
         Parsed receipt dictionary or None
     """
-    try:
-        # Extract all supported formats
-        data = extruct.extract(
-            html_body,
-            syntaxes=["json-ld", "microdata", "rdfa"],
-            uniform=True,  # Normalize all formats to same structure
-        )
-
-        # Check each syntax type for Order/Invoice/Receipt
-        for syntax in ["json-ld", "microdata", "rdfa"]:
-            items = data.get(syntax, [])
-            for item in items:
-                item_type = item.get("@type", "")
-
-                # Handle array types (extruct sometimes returns list)
-                if isinstance(item_type, list):
-                    item_type = item_type[0] if item_type else ""
-
-                # Check for receipt-related types
-                if item_type in ["Order", "Invoice", "Receipt", "ConfirmAction"]:
-                    return parse_schema_org_order(item)
-
-                # Check nested @graph structure
-                if "@graph" in item:
-                    for node in item["@graph"]:
-                        node_type = node.get("@type", "")
-                        if isinstance(node_type, list):
-                            node_type = node_type[0] if node_type else ""
-                        if node_type in ["Order", "Invoice", "Receipt"]:
-                            return parse_schema_org_order(node)
-
-    except Exception as e:
-        logger.warning(f"Extruct extraction failed: {e}", exc_info=True)
+    for item in items:
+        item_type = item.get("@type", "")
+
+        # Handle array types (extruct sometimes returns list)
+        if isinstance(item_type, list):
+            item_type = item_type[0] if item_type else ""
+
+        # Check for receipt-related types
+        if item_type in ["Order", "Invoice", "Receipt", "ConfirmAction"]:
+            return parse_schema_org_order(item)
+
+        # Check nested @graph structure
+        if "@graph" in item:
+            for node in item["@graph"]:
+                if not isinstance(node, dict):
+                    continue
+                node_type = node.get("@type", "")
+                if isinstance(node_type, list):
+                    node_type = node_type[0] if node_type else ""
+                if node_type in ["Order", "Invoice", "Receipt"]:
+                    return parse_schema_org_order(node)
 
     return None
 
 
-def _extract_json_ld_manual(html_body: str) -> dict | None:
+def _extract_with_extruct(html_body: str) -> dict | None:
     """
-    Fallback manual JSON-LD extraction using BeautifulSoup.
+    Extract Microdata/RDFa structured data using extruct library.
 
     Args:
         html_body: Raw HTML content
@@ -109,37 +102,19 @@ def _extract_json_ld_manual(html_body: str) -> dict | None:
         Parsed receipt dictionary or None
     """
     try:
-        soup = BeautifulSoup(html_body, "lxml")
-    except Exception:
-        soup = BeautifulSoup(html_body, "html.parser")
-
-    scripts = soup.find_all("script", type="application/ld+json")
-
-    for script in scripts:
-        try:
-            if not script.string:
-                continue
-
-            data = json.loads(script.string)
-
-            # Handle both single object and array of objects
-            items = data if isinstance(data, list) else [data]
-
-            for item in items:
-                item_type = item.get("@type", "")
-
-                # Check for receipt-related types
-                if item_type in ["Order", "Invoice", "Receipt", "ConfirmAction"]:
-                    return parse_schema_org_order(item)
+        data = extruct.extract(
+            html_body,
+            syntaxes=["microdata", "rdfa"],
+            uniform=True,  # Normalize all formats to same structure
+        )
 
-                # Check nested @graph structure
-                if "@graph" in item:
-                    for node in item["@graph"]:
-                        if node.get("@type") in ["Order", "Invoice", "Receipt"]:
-                            return parse_schema_org_order(node)
+        for syntax in ["microdata", "rdfa"]:
+            result = _find_schema_order(data.get(syntax, []))
+            if result:
+                return result
 
-        except (json.JSONDecodeError, AttributeError, TypeError):
-            continue
+    except Exception as e:
+        logger.warning(f"Extruct extraction failed: {e}", exc_info=True)
 
     return None
 
@@ -252,6 +227,54 @@ def parse_schema_org_order(data: dict) -> dict:
     }
 
 
+# Product name keywords -> brief description
+DESCRIPTION_PATTERNS = [
+    (re.compile(r"headphone|earphone|earbud|airpod"), "audio headphones/earbuds"),
+    (re.compile(r"cable|charger|adapter|usb"), "charging/connectivity accessory"),
+    (re.compile(r"case|cover|screen protector"), "protective case/cover"),
+    (re.compile(r"battery|power bank"), "portable power/battery"),
+    (re.compile(r"book|kindle|paperback|hardcover"), "book"),
+    (re.compile(r"shirt|dress|pants|jeans|jacket|coat"), "clothing item"),
+    (re.compile(r"toy|lego|game|puzzle"), "toy/game"),
+    (re.compile(r"vitamin|supplement|medicine"), "health supplement"),
+    (re.compile(r"food|snack|chocolate|coffee|tea"), "food/beverage"),
+    (re.compile(r"cleaning|soap|detergent"), "cleaning product"),
+    (re.compile(r"phone|tablet|laptop|computer"), "electronic device"),
+    (re.compile(r"subscription|monthly|annual"), "subscription service"),
+    (re.compile(r"delivery|shipping"), "delivery service"),
+]
+
+
+# Product name keywords -> category hint
+CATEGORY_PATTERNS = [
+    (
+        re.compile(
+            r"headphone|speaker|audio|earphone|earbud|airpod|cable|charger|phone|tablet|laptop|computer|usb|hdmi|adapter|battery|power bank"
+        ),
+        "electronics",
+    ),
+    (re.compile(r"book|kindle|paperback|hardcover|novel|magazine"), "entertainment"),
+    (
+        re.compile(r"shirt|dress|pants|jeans|jacket|coat|shoe|sock|underwear|clothing"),
+        "clothing",
+    ),
+    (
+        re.compile(
+            r"food|snack|chocolate|coffee|tea|grocery|organic|vitamin|supplement"
+        ),
+        "groceries",
+    ),
+    (re.compile(r"toy|lego|game|puzzle|doll|action figure"), "entertainment"),
+    (re.compile(r"cleaning|soap|detergent|shampoo|toothpaste|tissue"), "home"),
+    (re.compile(r"medicine|pharmacy|health|first aid|bandage"), "health"),
+    (re.compile(r"kitchen|cooking|pan|pot|utensil|plate|bowl|cup"), "home"),
+    (re.compile(r"uber|lyft|taxi|ride|trip"), "transport"),
+    (re.compile(r"deliveroo|uber eats|just eat|delivery"), "food_delivery"),
+    (re.compile(r"subscription|monthly|annual|premium|membership"), "subscription"),
+    (re.compile(r"netflix|spotify|disney|streaming"), "subscription"),
+]
+
+
 def infer_description_from_name(name: str) -> str | None:
     """
     Infer a brief description from product name.
@@ -267,24 +290,8 @@ def infer_description_from_name(name: str) -> str | None:
 
     name_lower = name.lower()
 
-    type_patterns = [
-        (r"headphone|earphone|earbud|airpod", "audio headphones/earbuds"),
-        (r"cable|charger|adapter|usb", "charging/connectivity accessory"),
-        (r"case|cover|screen protector", "protective case/cover"),
-        (r"battery|power bank", "portable power/battery"),
-        (r"book|kindle|paperback|hardcover", "book"),
-        (r"shirt|dress|pants|jeans|jacket|coat", "clothing item"),
-        (r"toy|lego|game|puzzle", "toy/game"),
-        (r"vitamin|supplement|medicine", "health supplement"),
-        (r"food|snack|chocolate|coffee|tea", "food/beverage"),
-        (r"cleaning|soap|detergent", "cleaning product"),
-        (r"phone|tablet|laptop|computer", "electronic device"),
-        (r"subscription|monthly|annual", "subscription service"),
-        (r"delivery|shipping", "delivery service"),
-    ]
-
-    for pattern, description in type_patterns:
-        if re.search(pattern, name_lower):
+    for pattern, description in DESCRIPTION_PATTERNS:
+        if pattern.search(name_lower):
             return description
 
     return None
@@ -305,32 +312,8 @@ def infer_category_from_name(name: str) -> str:
 
     name_lower = name.lower()
 
-    category_patterns = [
-        (
-            r"headphone|speaker|audio|earphone|earbud|airpod|cable|charger|phone|tablet|laptop|computer|usb|hdmi|adapter|battery|power bank",
-            "electronics",
-        ),
-        (r"book|kindle|paperback|hardcover|novel|magazine", "entertainment"),
-        (
-            r"shirt|dress|pants|jeans|jacket|coat|shoe|sock|underwear|clothing",
-            "clothing",
-        ),
-        (
-            r"food|snack|chocolate|coffee|tea|grocery|organic|vitamin|supplement",
-            "groceries",
-        ),
-        (r"toy|lego|game|puzzle|doll|action figure", "entertainment"),
-        (r"cleaning|soap|detergent|shampoo|toothpaste|tissue", "home"),
-        (r"medicine|pharmacy|health|first aid|bandage", "health"),
-        (r"kitchen|cooking|pan|pot|utensil|plate|bowl|cup", "home"),
-        (r"uber|lyft|taxi|ride|trip", "transport"),
-        (r"deliveroo|uber eats|just eat|delivery", "food_delivery"),
-        (r"subscription|monthly|annual|premium|membership", "subscription"),
-        (r"netflix|spotify|disney|streaming", "subscription"),
-    ]
-
-    for pattern, category in category_patterns:
-        if re.search(pattern, name_lower):
+    for pattern, category in CATEGORY_PATTERNS:
+        if pattern.search(name_lower):
             return category
 
     return "other"
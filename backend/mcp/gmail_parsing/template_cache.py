@@ -0,0 +1,554 @@
+"""
+Gmail Receipt Template Cache
+
+Learns per-sender HTML templates from trusted parses (LLM results and
+user-confirmed matches) so later emails built from the same template are
+parsed deterministically, without an LLM call.
+
+- Fingerprint: every element contributes a shingle made of the last
+  SHINGLE_DEPTH "tag.class" tokens of its path (digits stripped from
+  classes). The shingle set is hashed into the fingerprint, so text, amounts
+  and repeated line-item rows don't change it.
+- Learning: for total_amount, receipt_date and order_id, the deepest element
+  showing the value is found and its DOM path, tag shape and label (text in
+  front of the value, or the preceding cell) are recorded.
+- Matching: templates of the sender domain match by exact fingerprint, or by
+  shingle Jaccard similarity >= GMAIL_TEMPLATE_SIMILARITY (same layout with a
+  block added or removed).
+- Extraction: the recorded path is followed; if the layout shifted (e.g. a
+  longer item table), the first element of the same shape carrying the label
+  is used instead.
+
+Templates live in gmail_receipt_templates and are cached in-process per
+sender domain for GMAIL_TEMPLATE_CACHE_SECONDS.
+
+Usage:
+    from mcp.gmail_parsing.template_cache import extract_with_template, learn_template
+
+    result = extract_with_template(sender_domain, parsed)
+    learn_template(sender_domain, parsed, llm_result, source="llm")
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from bs4 import Tag
+
+import database
+from mcp.logging_config import get_logger
+
+from .parsed_email import NON_TEXT_TAGS, WHITESPACE_RE, ParsedEmail
+from .utilities import extract_date, normalize_merchant_name
+
+logger = get_logger(__name__)
+
+# Minimum shingle Jaccard similarity for a near (non-exact) template match
+TEMPLATE_SIMILARITY = float(os.getenv("GMAIL_TEMPLATE_SIMILARITY", "0.9"))
+
+# How long a sender domain's templates are cached in-process
+TEMPLATE_CACHE_SECONDS = float(os.getenv("GMAIL_TEMPLATE_CACHE_SECONDS", "300"))
+
+# Path tokens per shingle
+SHINGLE_DEPTH = 3
+
+# Characters of label text kept in front of a value
+MAX_LABEL_CHARS = 40
+
+TEMPLATE_FIELDS = ("total_amount", "receipt_date", "order_id")
+
+# Amounts as written in receipts: 1,234.56 / 12.50 / 12
+AMOUNT_PATTERN = r"\d{1,3}(?:,\d{3})+(?:\.\d{2})?|\d+(?:\.\d{2})?"
+
+# Date layouts searched for when learning where receipt_date came from
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%d.%m.%Y",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%d %B, %Y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+)
+
+DATE_TOKEN_PATTERNS = {
+    "%Y": r"\d{4}",
+    "%m": r"\d{1,2}",
+    "%d": r"\d{1,2}",
+    "%B": r"[A-Za-z]+",
+    "%b": r"[A-Za-z]{3}",
+}
+
+DIGITS_RE = re.compile(r"\d+")
+
+# Digit runs, letter runs and single other characters of a value
+VALUE_RUN_RE = re.compile(r"\d+|[A-Za-z]+|.")
+
+# Zero padding of a day or month number ("05 March" -> "5 March")
+ZERO_PADDING_RE = re.compile(r"(?<!\d)0(\d)(?=\D)")
+
+# Separators between a label and its value ("Total: £" -> "Total:")
+LABEL_TAIL_RE = re.compile(r"[^\w:#)]+$")
+
+_cache: dict[str, tuple[float, list]] = {}
+_cache_lock = threading.Lock()
+
+
+# ============================================================================
+# FINGERPRINTING
+# ============================================================================
+
+
+def _token(element: Tag) -> str:
+    """tag.class token of an element (digits stripped from class names)."""
+    classes = sorted(DIGITS_RE.sub("", c) for c in element.get("class") or [])
+    return ".".join([element.name, *classes])
+
+
+def _child_tags(node):
+    return [
+        child
+        for child in node.children
+        if isinstance(child, Tag) and child.name not in NON_TEXT_TAGS
+    ]
+
+
+def _elements(parsed: ParsedEmail):
+    """Yield (element, shape) for every visible element in document order."""
+    if parsed.soup is None:
+        return
+
+    stack = [(child, (_token(child),)) for child in reversed(_child_tags(parsed.soup))]
+    while stack:
+        element, shape = stack.pop()
+        yield element, shape
+        stack.extend(
+            (child, (*shape, _token(child))) for child in reversed(_child_tags(element))
+        )
+
+
+def _shingle(shape: tuple) -> str:
+    """Short hash of the last SHINGLE_DEPTH tokens of an element path."""
+    path = "/".join(shape[-SHINGLE_DEPTH:])
+    return hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+
+
+def _fingerprint(elements) -> tuple[str, list]:
+    shingles = sorted({_shingle(shape) for _, shape in elements})
+    fingerprint = hashlib.sha256("\n".join(shingles).encode("utf-8")).hexdigest()
+    return fingerprint[:32], shingles
+
+
+def fingerprint_email(parsed: ParsedEmail) -> tuple[str, list]:
+    """
+    Fingerprint the DOM skeleton of an email.
+
+    Args:
+        parsed: ParsedEmail of the email
+
+    Returns:
+        Tuple of (fingerprint, sorted list of shingle hashes)
+    """
+    return _fingerprint(_elements(parsed))
+
+
+def _similarity(a: list, b: list) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def match_template(templates: list, fingerprint: str, shingles: list) -> dict | None:
+    """Best template for a fingerprint: exact match, else the most similar one."""
+    for template in templates:
+        if template["fingerprint"] == fingerprint:
+            return template
+
+    best, best_score = None, TEMPLATE_SIMILARITY
+    for template in templates:
+        score = _similarity(template["shingles"], shingles)
+        if score >= best_score:
+            best, best_score = template, score
+    return best
+
+
+# ============================================================================
+# DOM PATHS
+# ============================================================================
+
+
+def _text(element) -> str:
+    return WHITESPACE_RE.sub(" ", element.get_text(" ")).strip()
+
+
+def _path_of(element: Tag) -> tuple[str, str]:
+    """(path, shape) of an element, e.g. ('html[0]/body[0]/td[1]', 'html/body/td')."""
+    steps, tokens = [], []
+    while element is not None and element.parent is not None:
+        index = len(element.find_previous_siblings(element.name))
+        steps.append(f"{element.name}[{index}]")
+        tokens.append(_token(element))
+        element = element.parent
+    return "/".join(reversed(steps)), "/".join(reversed(tokens))
+
+
+def _find_by_path(parsed: ParsedEmail, path: str) -> Tag | None:
+    node = parsed.soup
+    for step in path.split("/"):
+        name, _, index = step.rstrip("]").partition("[")
+        children = [c for c in _child_tags(node) if c.name == name]
+        if int(index) >= len(children):
+            return None
+        node = children[int(index)]
+    return node
+
+
+def _deepest_matches(node, regex, found: list) -> None:
+    """Collect the deepest elements under node whose text matches regex."""
+    matched = False
+    for child in _child_tags(node):
+        if regex.search(_text(child)):
+            matched = True
+            _deepest_matches(child, regex, found)
+    if not matched:
+        found.append(node)
+
+
+def _previous_cell_text(element: Tag) -> str:
+    sibling = element.find_previous_sibling()
+    return _text(sibling)[-MAX_LABEL_CHARS:] if sibling else ""
+
+
+# ============================================================================
+# LEARNING
+# ============================================================================
+
+
+def _value_shape(value: str) -> str:
+    """Regex for values shaped like this one (digit/letter runs, fixed lengths)."""
+    parts = []
+    for run in VALUE_RUN_RE.findall(value):
+        if run.isdigit():
+            parts.append(rf"\d{{{len(run)}}}")
+        elif run.isalpha():
+            parts.append(rf"[A-Za-z]{{{len(run)}}}")
+        else:
+            parts.append(re.escape(run))
+    return "".join(parts)
+
+
+def _date_pattern(date_format: str) -> str:
+    pattern = re.escape(date_format)
+    for token, token_pattern in DATE_TOKEN_PATTERNS.items():
+        pattern = pattern.replace(re.escape(token), token_pattern)
+    return pattern
+
+
+def _field_candidates(field: str, value) -> list:
+    """(value regex, date format) pairs for the ways a value may be written."""
+    if field == "total_amount":
+        amount = float(value)
+        written = {f"{amount:.2f}", f"{amount:,.2f}"}
+        if amount == int(amount):
+            written.add(str(int(amount)))
+        return [(rf"(?<![\d.,])(?:{'|'.join(map(re.escape, written))})(?![\d])", None)]
+    if field == "receipt_date":
+        try:
+            date = datetime.strptime(str(value)[:10], "%Y-%m-%d")
+        except ValueError:
+            return []
+        candidates = []
+        for date_format in DATE_FORMATS:
+            written = {date.strftime(date_format)}
+            # Day without zero padding ("5 March 2024")
+            written.add(ZERO_PADDING_RE.sub(r"\1", date.strftime(date_format)))
+            pattern = "|".join(re.escape(w) for w in written)
+            candidates.append((rf"(?<!\d)(?:{pattern})(?!\d)", date_format))
+        return candidates
+    return [(rf"(?<![\w-]){re.escape(str(value))}(?![\w-])", None)]
+
+
+def _learn_field(parsed: ParsedEmail, field: str, value) -> dict | None:
+    for value_regex, date_format in _field_candidates(field, value):
+        regex = re.compile(value_regex)
+        if not regex.search(_text(parsed.soup)):
+            continue
+
+        found = []
+        _deepest_matches(parsed.soup, regex, found)
+        located = []
+        for element in found:
+            text = _text(element)
+            match = regex.search(text)
+            if element is parsed.soup or not match:
+                continue
+            label = LABEL_TAIL_RE.sub("", text[: match.start()])
+            label = label[-MAX_LABEL_CHARS:].strip()
+            label_source = "element" if label else "sibling"
+            if not label:
+                label = _previous_cell_text(element)
+            located.append((element, label, label_source))
+        if not located:
+            continue
+
+        # A total shares its value with a single line item; prefer the
+        # labelled total, else the last occurrence (totals come last)
+        if field == "total_amount":
+            element, label, label_source = next(
+                (item for item in located if "total" in item[1].lower()),
+                located[-1],
+            )
+        else:
+            element, label, label_source = located[0]
+
+        if date_format:
+            pattern = _date_pattern(date_format)
+        elif field == "total_amount":
+            pattern = AMOUNT_PATTERN
+        else:
+            pattern = _value_shape(str(value))
+
+        path, shape = _path_of(element)
+        spec = {
+            "path": path,
+            "shape": shape,
+            "label": label,
+            "label_source": label_source if label else None,
+            "pattern": pattern,
+        }
+        if date_format:
+            spec["date_format"] = date_format
+        return spec
+    return None
+
+
+def learn_template(
+    sender_domain: str, parsed: ParsedEmail, result: dict, source: str = "llm"
+) -> int | None:
+    """
+    Learn a template from a trusted parse of an email.
+
+    Args:
+        sender_domain: Email sender domain
+        parsed: ParsedEmail of the email that was parsed
+        result: Parse result with total_amount (and optionally receipt_date,
+            order_id, merchant_name, currency_code)
+        source: 'llm' or 'user' (user templates are never overwritten by LLM ones)
+
+    Returns:
+        Template ID, or None if nothing could be learned
+    """
+    if not sender_domain or parsed.soup is None or not result.get("total_amount"):
+        return None
+
+    try:
+        fields = {}
+        for field in TEMPLATE_FIELDS:
+            if result.get(field):
+                spec = _learn_field(parsed, field, result[field])
+                if spec:
+                    fields[field] = spec
+        if "total_amount" not in fields:
+            return None
+
+        fingerprint, shingles = fingerprint_email(parsed)
+        merchant_name = result.get("merchant_name")
+        template_id = database.save_gmail_receipt_template(
+            {
+                "sender_domain": sender_domain,
+                "fingerprint": fingerprint,
+                "shingles": shingles,
+                "field_paths": fields,
+                "merchant_name": merchant_name,
+                "merchant_name_normalized": result.get("merchant_name_normalized")
+                or normalize_merchant_name(merchant_name),
+                "currency_code": result.get("currency_code") or "GBP",
+                "source": source,
+            }
+        )
+        invalidate_templates(sender_domain)
+        logger.info(
+            f"Learned receipt template for {sender_domain} from {source} parse",
+            extra={"merchant": sender_domain},
+        )
+        return template_id
+    except Exception as e:
+        # Learning is an optimisation; never fail the parse because of it
+        logger.warning(f"Failed to learn template for {sender_domain}: {e}")
+        return None
+
+
+def learn_template_from_receipt(receipt_id: int, source: str = "user") -> int | None:
+    """
+    Learn a template from a stored receipt whose values are confirmed.
+
+    Args:
+        receipt_id: Database receipt ID
+        source: Template source ('user' for confirmed matches)
+
+    Returns:
+        Template ID, or None if the receipt or its body is unavailable
+    """
+    try:
+        receipt = database.get_gmail_receipt_by_id(receipt_id)
+        if not receipt or not receipt.get("total_amount"):
+            return None
+        content = database.get_gmail_email_content(receipt.get("message_id")) or {}
+    except Exception as e:
+        logger.warning(f"Could not load receipt {receipt_id} for template: {e}")
+        return None
+    if not content.get("body_html"):
+        return None
+
+    receipt_date = receipt.get("receipt_date")
+    return learn_template(
+        receipt.get("merchant_domain"),
+        ParsedEmail(content["body_html"], content.get("body_text")),
+        {
+            "total_amount": receipt["total_amount"],
+            "receipt_date": receipt_date.strftime("%Y-%m-%d")
+            if hasattr(receipt_date, "strftime")
+            else receipt_date,
+            "order_id": receipt.get("order_id"),
+            "merchant_name": receipt.get("merchant_name"),
+            "merchant_name_normalized": receipt.get("merchant_name_normalized"),
+            "currency_code": receipt.get("currency_code"),
+        },
+        source=source,
+    )
+
+
+# ============================================================================
+# EXTRACTION
+# ============================================================================
+
+
+def get_templates(sender_domain: str) -> list:
+    """Templates for a sender domain (cached in-process)."""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(sender_domain)
+        if cached and now - cached[0] < TEMPLATE_CACHE_SECONDS:
+            return cached[1]
+
+    try:
+        templates = database.get_gmail_receipt_templates(sender_domain)
+    except Exception as e:
+        logger.warning(f"Could not load templates for {sender_domain}: {e}")
+        templates = []
+
+    with _cache_lock:
+        _cache[sender_domain] = (now, templates)
+    return templates
+
+
+def invalidate_templates(sender_domain: str = None) -> None:
+    """Drop cached templates for one sender domain (or all)."""
+    with _cache_lock:
+        if sender_domain is None:
+            _cache.clear()
+        else:
+            _cache.pop(sender_domain, None)
+
+
+@lru_cache(maxsize=1024)
+def _labelled_value_regex(label: str, pattern: str) -> re.Pattern:
+    """Compiled regex for a value following its label (per template field)."""
+    return re.compile(rf"{re.escape(label)}\W{{0,6}}?({pattern})")
+
+
+@lru_cache(maxsize=1024)
+def _value_regex(pattern: str) -> re.Pattern:
+    """Compiled regex for a standalone value (per template field)."""
+    return re.compile(rf"(?<![\w.,])({pattern})(?![\w])")
+
+
+def _read_value(element: Tag, spec: dict) -> str | None:
+    text = _text(element)
+    if spec.get("label_source") == "element":
+        match = _labelled_value_regex(spec["label"], spec["pattern"]).search(text)
+    else:
+        if spec.get("label_source") == "sibling" and not _previous_cell_text(
+            element
+        ).endswith(spec["label"]):
+            return None
+        match = _value_regex(spec["pattern"]).search(text)
+    return match.group(1) if match else None
+
+
+def _extract_field(parsed: ParsedEmail, spec: dict, elements: list) -> str | None:
+    element = _find_by_path(parsed, spec["path"])
+    value = _read_value(element, spec) if element is not None else None
+    if value or not spec.get("label"):
+        return value
+
+    # Layout shifted: first element of the same shape carrying the label
+    for element, shape in elements:
+        if "/".join(shape) == spec["shape"]:
+            value = _read_value(element, spec)
+            if value:
+                return value
+    return None
+
+
+def _to_date(value: str, date_format: str | None) -> str | None:
+    if date_format:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return extract_date(value)
+
+
+def extract_with_template(sender_domain: str, parsed: ParsedEmail) -> dict | None:
+    """
+    Parse an email with a learned template of its sender.
+
+    Args:
+        sender_domain: Email sender domain
+        parsed: ParsedEmail of the email
+
+    Returns:
+        Parsed receipt dictionary, or None without a matching template or
+        when the template no longer yields a total
+    """
+    if not sender_domain or parsed.soup is None:
+        return None
+    templates = get_templates(sender_domain)
+    if not templates:
+        return None
+
+    elements = list(_elements(parsed))
+    template = match_template(templates, *_fingerprint(elements))
+    if not template:
+        return None
+
+    fields = template["field_paths"]
+    values = {
+        field: _extract_field(parsed, spec, elements) for field, spec in fields.items()
+    }
+    if not values.get("total_amount"):
+        return None
+
+    receipt_date = None
+    if values.get("receipt_date"):
+        receipt_date = _to_date(
+            values["receipt_date"], fields["receipt_date"].get("date_format")
+        )
+
+    return {
+        "merchant_name": template["merchant_name"],
+        "merchant_name_normalized": template["merchant_name_normalized"],
+        "order_id": values.get("order_id"),
+        "total_amount": float(values["total_amount"].replace(",", "")),
+        "currency_code": template["currency_code"] or "GBP",
+        "receipt_date": receipt_date,
+        "line_items": None,
+        "parse_method": "template",
+        "parse_confidence": 85 if template["source"] == "user" else 75,
+        "parsing_status": "parsed",
+    }
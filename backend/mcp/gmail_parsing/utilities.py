@@ -15,10 +15,10 @@ import hashlib
 import re
 from datetime import datetime
 
-from bs4 import BeautifulSoup
-
 import database
 
+from .parsed_email import ParsedEmail
+
 # Domain to merchant name mappings for known senders
 # Maps email domains to canonical merchant names
 DOMAIN_TO_MERCHANT = {
@@ -92,39 +92,93 @@ CURRENCY_SYMBOLS = {
 # Common amount patterns for different currencies
 AMOUNT_PATTERNS = [
     # £12.34 or GBP 12.34
-    r"(?:£|GBP)\s*([0-9,]+\.?[0-9]*)",
+    re.compile(r"(?:£|GBP)\s*([0-9,]+\.?[0-9]*)", re.IGNORECASE),
     # $12.34 or USD 12.34
-    r"(?:\$|USD)\s*([0-9,]+\.?[0-9]*)",
+    re.compile(r"(?:\$|USD)\s*([0-9,]+\.?[0-9]*)", re.IGNORECASE),
     # €12.34 or EUR 12.34
-    r"(?:€|EUR)\s*([0-9,]+\.?[0-9]*)",
+    re.compile(r"(?:€|EUR)\s*([0-9,]+\.?[0-9]*)", re.IGNORECASE),
     # 12.34 GBP (amount before currency)
-    r"([0-9,]+\.[0-9]{2})\s*(?:GBP|USD|EUR)",
+    re.compile(r"([0-9,]+\.[0-9]{2})\s*(?:GBP|USD|EUR)", re.IGNORECASE),
 ]
 
 # Common total amount label patterns
 TOTAL_PATTERNS = [
-    r"(?:total|order total|amount|grand total|payment|charged|paid)[:\s]*[£$€]?\s*([0-9,]+\.?[0-9]*)",
-    r"[£$€]\s*([0-9,]+\.[0-9]{2})\s*(?:total|paid|charged)",
+    re.compile(
+        r"(?:total|order total|amount|grand total|payment|charged|paid)[:\s]*[£$€]?\s*([0-9,]+\.?[0-9]*)",
+        re.IGNORECASE,
+    ),
+    re.compile(r"[£$€]\s*([0-9,]+\.[0-9]{2})\s*(?:total|paid|charged)", re.IGNORECASE),
 ]
 
 # Date patterns
 DATE_PATTERNS = [
     # DD/MM/YYYY or DD-MM-YYYY
-    (r"(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})", "DMY"),
+    (re.compile(r"(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})"), "DMY"),
     # YYYY-MM-DD (ISO)
-    (r"(\d{4})[/\-](\d{1,2})[/\-](\d{1,2})", "YMD"),
+    (re.compile(r"(\d{4})[/\-](\d{1,2})[/\-](\d{1,2})"), "YMD"),
     # Month DD, YYYY
     (
-        r"(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})",
+        re.compile(
+            r"(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})",
+            re.IGNORECASE,
+        ),
         "MDY",
     ),
     # DD Month YYYY
     (
-        r"(\d{1,2})(?:st|nd|rd|th)?\s+(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{4})",
+        re.compile(
+            r"(\d{1,2})(?:st|nd|rd|th)?\s+(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{4})",
+            re.IGNORECASE,
+        ),
         "DMY",
     ),
 ]
 
+# Order/confirmation number patterns
+ORDER_ID_PATTERNS = [
+    re.compile(
+        r"order\s*(?:#|number|no\.?|id)?[:\s]*([A-Z0-9\-]{5,30})", re.IGNORECASE
+    ),
+    re.compile(
+        r"confirmation\s*(?:#|number|no\.?)?[:\s]*([A-Z0-9\-]{5,30})", re.IGNORECASE
+    ),
+    re.compile(
+        r"reference\s*(?:#|number|no\.?)?[:\s]*([A-Z0-9\-]{5,30})", re.IGNORECASE
+    ),
+    re.compile(
+        r"booking\s*(?:#|number|no\.?|ref)?[:\s]*([A-Z0-9\-]{5,30})", re.IGNORECASE
+    ),
+    re.compile(r"invoice\s*(?:#|number|no\.?)?[:\s]*([A-Z0-9\-]{5,30})", re.IGNORECASE),
+]
+
+# Subject line patterns for merchant extraction
+SUBJECT_MERCHANT_PATTERNS = [
+    re.compile(
+        r"(?:your\s+)?(?:order|receipt|confirmation)\s+(?:from\s+)?([A-Za-z0-9\s&\']+)",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"([A-Za-z0-9\s&\']+?)(?:\s+order|\s+receipt|\s+confirmation)", re.IGNORECASE
+    ),
+    re.compile(
+        r"thank(?:s|you)?\s+for\s+(?:your\s+)?(?:order|purchase)\s+(?:from\s+)?([A-Za-z0-9\s&\']+)",
+        re.IGNORECASE,
+    ),
+]
+
+# Date fragments that disqualify a merchant name
+MERCHANT_DATE_PATTERNS = [
+    re.compile(
+        r"\b(?:january|february|march|april|may|june|july|august|september|october|november|december)\b"
+    ),
+    re.compile(r"\b\d{1,2}(?:st|nd|rd|th)?\b"),  # 1st, 2nd, 12th, etc.
+    re.compile(r"\b20\d{2}\b"),  # Years like 2024, 2025
+]
+
+NON_WORD_RE = re.compile(r"[^\w\s]")
+WHITESPACE_RUN_RE = re.compile(r"\s+")
+ISO_DATE_PREFIX_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
 MONTH_MAP = {
     "jan": 1,
     "january": 1,
@@ -174,10 +228,10 @@ def normalize_merchant_name(name: str) -> str | None:
             normalized = normalized[: -len(suffix)].strip()
 
     # Remove special characters but keep spaces
-    normalized = re.sub(r"[^\w\s]", "", normalized)
+    normalized = NON_WORD_RE.sub("", normalized)
 
     # Collapse multiple spaces
-    normalized = re.sub(r"\s+", " ", normalized)
+    normalized = WHITESPACE_RUN_RE.sub(" ", normalized)
 
     return normalized.strip() if normalized else None
 
@@ -211,6 +265,9 @@ def html_to_text(html: str) -> str:
     """
     Convert HTML to plain text.
 
+    Script, style and head content is dropped and whitespace collapsed.
+    Callers that already hold a ParsedEmail should use its cached .text.
+
     Args:
         html: HTML content
 
@@ -220,20 +277,7 @@ def html_to_text(html: str) -> str:
     if not html:
         return ""
 
-    try:
-        soup = BeautifulSoup(html, "lxml")
-    except Exception:
-        soup = BeautifulSoup(html, "html.parser")
-
-    # Remove script and style elements
-    for element in soup(["script", "style", "head", "meta", "noscript"]):
-        element.decompose()
-
-    # Get text and clean up whitespace
-    text = soup.get_text(separator=" ")
-    text = re.sub(r"\s+", " ", text)
-
-    return text.strip()
+    return ParsedEmail(html).text
 
 
 def parse_date_string(date_str: str) -> str | None:
@@ -250,7 +294,7 @@ def parse_date_string(date_str: str) -> str | None:
         return None
 
     # Already in ISO format
-    if re.match(r"^\d{4}-\d{2}-\d{2}", date_str):
+    if ISO_DATE_PREFIX_RE.match(date_str):
         return date_str[:10]
 
     # Try common formats
@@ -311,7 +355,7 @@ def extract_amount(text: str) -> tuple[float | None, str | None]:
 
     # First try total-specific patterns
     for pattern in TOTAL_PATTERNS:
-        match = re.search(pattern, text_lower, re.IGNORECASE)
+        match = pattern.search(text_lower)
         if match:
             amount_str = match.group(1).replace(",", "")
             try:
@@ -327,7 +371,7 @@ def extract_amount(text: str) -> tuple[float | None, str | None]:
     best_currency = None
 
     for pattern in AMOUNT_PATTERNS:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+        matches = pattern.findall(text)
         for match_str in matches:
             try:
                 amount = float(match_str.replace(",", ""))
@@ -335,11 +379,12 @@ def extract_amount(text: str) -> tuple[float | None, str | None]:
                 if best_amount is None or amount > best_amount:
                     best_amount = amount
                     # Detect currency from pattern
-                    if "£" in pattern or "GBP" in pattern:
+                    source = pattern.pattern
+                    if "£" in source or "GBP" in source:
                         best_currency = "GBP"
-                    elif "$" in pattern or "USD" in pattern:
+                    elif "$" in source or "USD" in source:
                         best_currency = "USD"
-                    elif "€" in pattern or "EUR" in pattern:
+                    elif "€" in source or "EUR" in source:
                         best_currency = "EUR"
             except ValueError:
                 continue
@@ -358,7 +403,7 @@ def extract_date(text: str) -> str | None:
         Date string in YYYY-MM-DD format or None
     """
     for pattern, format_type in DATE_PATTERNS:
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = pattern.search(text)
         if match:
             try:
                 groups = match.groups()
@@ -407,16 +452,8 @@ def extract_order_id(text: str) -> str | None:
     Returns:
         Order ID string or None
     """
-    patterns = [
-        r"order\s*(?:#|number|no\.?|id)?[:\s]*([A-Z0-9\-]{5,30})",
-        r"confirmation\s*(?:#|number|no\.?)?[:\s]*([A-Z0-9\-]{5,30})",
-        r"reference\s*(?:#|number|no\.?)?[:\s]*([A-Z0-9\-]{5,30})",
-        r"booking\s*(?:#|number|no\.?|ref)?[:\s]*([A-Z0-9\-]{5,30})",
-        r"invoice\s*(?:#|number|no\.?)?[:\s]*([A-Z0-9\-]{5,30})",
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in ORDER_ID_PATTERNS:
+        match = pattern.search(text)
         if match:
             order_id = match.group(1).strip()
             # Filter out common false positives
@@ -480,14 +517,8 @@ def extract_merchant_from_text(
             return sender_name_clean
 
     # Priority 3: Try to extract from subject (with validation)
-    subject_patterns = [
-        r"(?:your\s+)?(?:order|receipt|confirmation)\s+(?:from\s+)?([A-Za-z0-9\s&\']+)",
-        r"([A-Za-z0-9\s&\']+?)(?:\s+order|\s+receipt|\s+confirmation)",
-        r"thank(?:s|you)?\s+for\s+(?:your\s+)?(?:order|purchase)\s+(?:from\s+)?([A-Za-z0-9\s&\']+)",
-    ]
-
-    for pattern in subject_patterns:
-        match = re.search(pattern, subject, re.IGNORECASE)
+    for pattern in SUBJECT_MERCHANT_PATTERNS:
+        match = pattern.search(subject)
         if match:
             merchant = match.group(1).strip()
             # Validate extracted merchant name
@@ -557,13 +588,8 @@ def is_valid_merchant_name(merchant: str) -> bool:
         return False
 
     # Reject if contains date patterns
-    date_patterns = [
-        r"\b(?:january|february|march|april|may|june|july|august|september|october|november|december)\b",
-        r"\b\d{1,2}(?:st|nd|rd|th)?\b",  # 1st, 2nd, 12th, etc.
-        r"\b20\d{2}\b",  # Years like 2024, 2025
-    ]
-    for pattern in date_patterns:
-        if re.search(pattern, merchant_lower):
+    for pattern in MERCHANT_DATE_PATTERNS:
+        if pattern.search(merchant_lower):
             return False
 
     # Reject if it's mostly common words (prepositions, articles, pronouns)
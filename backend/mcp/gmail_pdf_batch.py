@@ -0,0 +1,363 @@
+"""
+Gmail PDF Batch Worker
+
+Processes the PDF attachments of many receipts from one Gmail connection in
+a single task, instead of one Celery task (and one token refresh, Gmail
+session, MinIO client and handful of database round trips) per PDF.
+
+Pipeline per batch:
+1. Mark every receipt 'processing' with one UPDATE
+2. Refresh credentials and build the Gmail session once
+3. Download attachments over that session with bounded concurrency
+4. Look the (content_hash, parser_version) keys up in gmail_parse_results
+   and parse the misses in a process pool (identical PDFs are parsed once)
+5. Store each distinct PDF in MinIO once
+6. Write attachment rows, parsed receipt data and final statuses in bulk
+
+Usage:
+    from mcp.gmail_pdf_batch import chunk_pdf_jobs
+    from tasks.gmail_tasks import process_pdf_receipts_batch_task
+
+    for jobs in chunk_pdf_jobs(pdf_jobs):
+        process_pdf_receipts_batch_task.delay(connection_id=1, jobs=jobs)
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+
+import database
+from mcp.gmail_auth import get_gmail_credentials
+from mcp.gmail_client import build_gmail_service, get_attachment_content
+from mcp.gmail_pdf_parser import (
+    PDF_SUPPORT,
+    get_pdf_parser_version,
+    parse_receipt_pdf,
+)
+from mcp.logging_config import get_logger
+from mcp.minio_client import compute_pdf_hash, is_available, store_pdf
+
+logger = get_logger(__name__)
+
+# PDF receipts handed to one batch task
+PDF_BATCH_SIZE = int(os.getenv("GMAIL_PDF_BATCH_SIZE", "25"))
+
+# Concurrent attachment downloads (and MinIO uploads) per batch
+PDF_DOWNLOAD_WORKERS = int(os.getenv("GMAIL_PDF_DOWNLOAD_WORKERS", "4"))
+
+# Worker processes used to parse (0 = one per CPU core)
+PDF_PARSE_WORKERS = int(os.getenv("GMAIL_PDF_PARSE_WORKERS", "0"))
+
+# Timeout for PDFs linked from the email body rather than attached
+EXTERNAL_PDF_TIMEOUT = 30
+
+
+def chunk_pdf_jobs(jobs: list, batch_size: int = None) -> list:
+    """
+    Split PDF jobs into batches for process_pdf_receipts_batch_task.
+
+    Args:
+        jobs: List of job dicts (receipt_id, message_id, attachment_info,
+            sender_domain, received_date)
+        batch_size: Jobs per batch (defaults to GMAIL_PDF_BATCH_SIZE)
+
+    Returns:
+        List of job lists
+    """
+    batch_size = max(1, batch_size or PDF_BATCH_SIZE)
+    return [jobs[i : i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+
+def _init_pdf_worker():
+    """Drop database connections inherited from the parent process."""
+    from database.base import engine
+
+    engine.dispose(close=False)
+
+
+def _parse_pdf(job: tuple) -> tuple:
+    """
+    Parse one PDF (runs in a worker process).
+
+    Args:
+        job: Tuple of (pdf_bytes, sender_domain, filename)
+
+    Returns:
+        Tuple of (parse result as JSON-compatible dict or None, error)
+    """
+    try:
+        result = parse_receipt_pdf(*job)
+        # Round-trip through JSON so fresh and cached results match
+        return json.loads(json.dumps(result or {}, default=str)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _resolve_workers(workers: int = None) -> int:
+    """Number of parse processes to use for this batch."""
+    workers = workers or PDF_PARSE_WORKERS or os.cpu_count() or 1
+    # Celery prefork children are daemonic and can't start their own pool
+    if workers > 1 and multiprocessing.current_process().daemon:
+        return 1
+    return workers
+
+
+def _parse_all(jobs: list, workers: int) -> list:
+    """Parse PDF jobs in a process pool, or in-process for a single worker."""
+    workers = min(_resolve_workers(workers), len(jobs))
+    if workers <= 1:
+        return [_parse_pdf(job) for job in jobs]
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_pdf_worker
+    ) as executor:
+        return list(executor.map(_parse_pdf, jobs))
+
+
+def _received_datetime(received_date) -> datetime | None:
+    """Received date as a datetime (Celery delivers it as an ISO string)."""
+    if isinstance(received_date, str):
+        try:
+            return datetime.fromisoformat(received_date.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return received_date
+
+
+def _download_pdf(service, http: requests.Session, job: dict) -> bytes:
+    """Fetch one PDF from Gmail or from the external URL it links to."""
+    attachment_info = job["attachment_info"]
+    if "external_url" in attachment_info:
+        response = http.get(
+            attachment_info["external_url"], timeout=EXTERNAL_PDF_TIMEOUT
+        )
+        if response.status_code != 200:
+            raise Exception(f"Failed to download PDF: HTTP {response.status_code}")
+        return response.content
+    if "attachment_id" in attachment_info:
+        return get_attachment_content(
+            service, job["message_id"], attachment_info["attachment_id"]
+        )
+    raise Exception("No valid PDF source (attachment_id or external_url)")
+
+
+def _download_all(connection_id: int, jobs: list, failures: dict) -> dict:
+    """
+    Download the PDFs of a batch over one Gmail session.
+
+    Returns:
+        Dict of receipt_id -> PDF bytes for the downloads that succeeded
+    """
+    service = None
+    if any("attachment_id" in job["attachment_info"] for job in jobs):
+        # Get valid credentials (handles token refresh if needed) once per batch
+        access_token, refresh_token = get_gmail_credentials(connection_id)
+        service = build_gmail_service(access_token, refresh_token)
+
+    downloaded = {}
+    with (
+        requests.Session() as http,
+        ThreadPoolExecutor(
+            max_workers=max(1, min(PDF_DOWNLOAD_WORKERS, len(jobs)))
+        ) as executor,
+    ):
+        futures = {
+            executor.submit(_download_pdf, service, http, job): job for job in jobs
+        }
+        for future in as_completed(futures):
+            receipt_id = futures[future]["receipt_id"]
+            try:
+                pdf_bytes = future.result()
+            except Exception as e:
+                failures[receipt_id] = str(e)
+                continue
+            if pdf_bytes:
+                downloaded[receipt_id] = pdf_bytes
+            else:
+                failures[receipt_id] = "PDF bytes are empty"
+    return downloaded
+
+
+def _store_all(jobs: list, pdf_results: dict, pdfs: dict, hashes: dict) -> list:
+    """
+    Store each distinct parsed PDF in MinIO once.
+
+    Returns:
+        pdf_attachments rows for every receipt whose PDF was stored
+    """
+    first_job = {}
+    for job in jobs:
+        if job["receipt_id"] in pdf_results:
+            first_job.setdefault(hashes[job["receipt_id"]], job)
+
+    def store(job):
+        receipt_id = job["receipt_id"]
+        return store_pdf(
+            pdf_bytes=pdfs[receipt_id],
+            message_id=job["message_id"],
+            filename=job["attachment_info"].get("filename", "receipt.pdf"),
+            received_date=_received_datetime(job.get("received_date")),
+            metadata={"merchant": pdf_results[receipt_id].get("merchant_name")},
+        )
+
+    stored = {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(PDF_DOWNLOAD_WORKERS, len(first_job)))
+    ) as executor:
+        futures = {executor.submit(store, job): h for h, job in first_job.items()}
+        for future in as_completed(futures):
+            try:
+                minio_result = future.result()
+            except Exception as e:
+                # MinIO failure is non-fatal, continue with receipt update
+                logger.warning(f"[PDF] MinIO storage failed (non-fatal): {e}")
+                continue
+            if minio_result:
+                stored[futures[future]] = minio_result
+
+    attachments = []
+    for job in jobs:
+        minio_result = stored.get(hashes.get(job["receipt_id"]))
+        if job["receipt_id"] not in pdf_results or not minio_result:
+            continue
+        attachments.append(
+            {
+                "gmail_receipt_id": job["receipt_id"],
+                "message_id": job["message_id"],
+                "bucket_name": minio_result["bucket_name"],
+                "object_key": minio_result["object_key"],
+                "filename": job["attachment_info"].get("filename", "receipt.pdf"),
+                "content_hash": minio_result["content_hash"],
+                "size_bytes": minio_result["size_bytes"],
+                "etag": minio_result["etag"],
+            }
+        )
+    return attachments
+
+
+def process_pdf_batch(connection_id: int, jobs: list, workers: int = None) -> dict:
+    """
+    Download, parse and store the PDF receipts of one connection.
+
+    Per-receipt failures (a download error, a PDF that parses to nothing)
+    mark that receipt 'failed' without affecting the rest of the batch.
+    Failures that stop the whole batch, such as a credential refresh error,
+    are raised to the caller.
+
+    Args:
+        connection_id: Gmail connection ID (for API access)
+        jobs: List of dicts with receipt_id, message_id, attachment_info,
+            sender_domain and optional received_date
+        workers: Parse processes (defaults to GMAIL_PDF_PARSE_WORKERS)
+
+    Returns:
+        dict with total, downloaded, parsed, cache_hits, stored, completed,
+        failed and per-stage timings in seconds
+    """
+    stats = {
+        "total": len(jobs),
+        "downloaded": 0,
+        "parsed": 0,
+        "cache_hits": 0,
+        "stored": 0,
+        "completed": 0,
+        "failed": 0,
+        "timings": {},
+    }
+    if not jobs:
+        return stats
+
+    database.update_gmail_receipts_pdf_status_bulk(
+        [{"id": job["receipt_id"], "status": "processing"} for job in jobs]
+    )
+
+    # 1. Fetch PDF content
+    stage_start = time.time()
+    failures = {}
+    pdfs = _download_all(connection_id, jobs, failures)
+    stats["downloaded"] = len(pdfs)
+    stats["timings"]["fetch"] = time.time() - stage_start
+
+    # 2. Parse each distinct PDF once (cached by content hash)
+    stage_start = time.time()
+    hashes = {receipt_id: compute_pdf_hash(data) for receipt_id, data in pdfs.items()}
+    keys = {
+        job["receipt_id"]: (
+            hashes[job["receipt_id"]],
+            get_pdf_parser_version(job["sender_domain"]),
+        )
+        for job in jobs
+        if job["receipt_id"] in pdfs
+    }
+    results = database.get_gmail_parse_results(list(set(keys.values())))
+    stats["cache_hits"] = sum(key in results for key in keys.values())
+
+    misses = {}
+    for job in jobs:
+        key = keys.get(job["receipt_id"])
+        if key and key not in results and key not in misses:
+            misses[key] = (
+                pdfs[job["receipt_id"]],
+                job["sender_domain"],
+                job["attachment_info"].get("filename", "receipt.pdf"),
+            )
+
+    if misses:
+        parsed = _parse_all(list(misses.values()), workers)
+        new_results = []
+        for key, (result, error) in zip(misses, parsed, strict=True):
+            if error:
+                logger.warning(f"[PDF] Parse failed for {key[0][:12]}: {error}")
+                continue
+            results[key] = result
+            new_results.append((*key, result))
+        stats["parsed"] = len(misses)
+        # Without pdfplumber every PDF parses to nothing; don't remember that
+        if new_results and PDF_SUPPORT:
+            database.save_gmail_parse_results(new_results)
+    stats["timings"]["parse"] = time.time() - stage_start
+
+    pdf_results = {}
+    for receipt_id, key in keys.items():
+        # {} records a PDF that parsed to nothing
+        result = results.get(key)
+        if result and result.get("total_amount") is not None:
+            pdf_results[receipt_id] = result
+        else:
+            failures[receipt_id] = "PDF parsing returned no data"
+
+    # 3. Upload to MinIO
+    stage_start = time.time()
+    attachments = []
+    if pdf_results:
+        try:
+            if is_available():
+                attachments = _store_all(jobs, pdf_results, pdfs, hashes)
+        except Exception as e:
+            # MinIO failure is non-fatal, continue with receipt update
+            logger.warning(f"[PDF] MinIO storage failed (non-fatal): {e}")
+    stats["stored"] = len(attachments)
+    stats["timings"]["upload"] = time.time() - stage_start
+
+    # 4. Update receipts with parsed data and final statuses
+    stage_start = time.time()
+    database.save_pdf_attachments_bulk(attachments)
+    database.update_gmail_receipts_from_pdf_bulk(pdf_results)
+    database.update_gmail_receipts_pdf_status_bulk(
+        [{"id": receipt_id, "status": "completed"} for receipt_id in pdf_results]
+        + [
+            {"id": receipt_id, "status": "failed", "error": error}
+            for receipt_id, error in failures.items()
+        ]
+    )
+    stats["timings"]["db"] = time.time() - stage_start
+
+    stats["completed"] = len(pdf_results)
+    stats["failed"] = len(failures)
+    for failed_id, error in failures.items():
+        logger.warning(f"[PDF] Processing failed for receipt {failed_id}: {error}")
+    return stats
@@ -9,7 +9,13 @@ Supports:
 """
 
 import io
+import json
 import re
+import threading
+from collections import OrderedDict
+
+import database
+from mcp.minio_client import compute_pdf_hash
 
 try:
     import pdfplumber
@@ -19,13 +25,29 @@ except ImportError:
     PDF_SUPPORT = False
     print("⚠️ pdfplumber not installed - PDF parsing disabled")
 
+# Receipt totals sit on the first pages; long statements are not read past this
+PDF_MAX_PAGES = 20
+
+# Extracted text of the most recent PDFs, keyed by content hash. Shared by
+# the sync's worker threads, so every access holds the lock.
+PDF_TEXT_CACHE_SIZE = 64
+_text_cache = OrderedDict()
+_text_cache_lock = threading.Lock()
+
+# Bump whenever a change to a PDF parser can change its output
+PDF_PARSER_VERSION = 1
+
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str | None:
+def extract_text_from_pdf(pdf_bytes: bytes, content_hash: str = None) -> str | None:
     """
     Extract text content from a PDF file.
 
+    The document is opened once per distinct content: the text is cached by
+    content hash, so every parser that looks at the same PDF shares it.
+
     Args:
         pdf_bytes: Raw PDF file content
+        content_hash: SHA256 of pdf_bytes, if already computed
 
     Returns:
         Extracted text or None if extraction fails
@@ -33,17 +55,32 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str | None:
     if not PDF_SUPPORT:
         return None
 
+    content_hash = content_hash or compute_pdf_hash(pdf_bytes)
+    with _text_cache_lock:
+        if content_hash in _text_cache:
+            _text_cache.move_to_end(content_hash)
+            return _text_cache[content_hash]
+
     try:
         with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
             text_parts = []
-            for page in pdf.pages:
+            for page in pdf.pages[:PDF_MAX_PAGES]:
                 page_text = page.extract_text()
                 if page_text:
                     text_parts.append(page_text)
-            return "\n".join(text_parts)
+            text = "\n".join(text_parts)
     except Exception as e:
         print(f"❌ PDF extraction error: {e}")
-        return None
+        text = None
+
+    # Extracted outside the lock; a concurrent extraction of the same PDF
+    # just stores the same text again
+    with _text_cache_lock:
+        _text_cache[content_hash] = text
+        _text_cache.move_to_end(content_hash)
+        if len(_text_cache) > PDF_TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    return text
 
 
 def parse_amount(text: str) -> float | None:
@@ -1017,6 +1054,29 @@ def parse_suffolk_latch_pdf(pdf_bytes: bytes) -> dict | None:
 # MAIN ENTRY POINT
 # ============================================================================
 
+# Sender domain substring -> vendor PDF parser (first match wins)
+PDF_VENDOR_PARSERS = (
+    ("ctshirts", parse_charles_tyrwhitt_pdf),
+    ("google", parse_google_cloud_pdf),
+    ("xero", parse_xero_invoice_pdf),
+    ("atlassian", parse_atlassian_invoice_pdf),
+    ("suffolklatch", parse_suffolk_latch_pdf),
+)
+
+
+def get_pdf_parser(sender_domain: str = None):
+    """Parser a PDF from this sender domain is routed to."""
+    sender_domain = (sender_domain or "").lower()
+    for pattern, parser in PDF_VENDOR_PARSERS:
+        if pattern in sender_domain:
+            return parser
+    return parse_generic_receipt_pdf
+
+
+def get_pdf_parser_version(sender_domain: str = None) -> str:
+    """Version string of the PDF parser used for a sender domain."""
+    return f"pdf:{PDF_PARSER_VERSION},{get_pdf_parser(sender_domain).__name__}"
+
 
 def parse_receipt_pdf(
     pdf_bytes: bytes, sender_domain: str = None, filename: str = None
@@ -1042,23 +1102,44 @@ def parse_receipt_pdf(
     if not pdf_bytes:
         return None
 
-    sender_domain = (sender_domain or "").lower()
+    return get_pdf_parser(sender_domain)(pdf_bytes)
 
-    # Route to vendor-specific parser
-    if "ctshirts" in sender_domain:
-        return parse_charles_tyrwhitt_pdf(pdf_bytes)
 
-    if "google" in sender_domain:
-        return parse_google_cloud_pdf(pdf_bytes)
+def parse_receipt_pdf_cached(
+    pdf_bytes: bytes,
+    sender_domain: str = None,
+    filename: str = None,
+    content_hash: str = None,
+) -> dict | None:
+    """
+    Parse a receipt PDF, reusing the stored result for identical content.
 
-    if "xero" in sender_domain:
-        return parse_xero_invoice_pdf(pdf_bytes)
+    Results are kept in gmail_parse_results keyed by the PDF's content hash
+    and get_pdf_parser_version(), so the same invoice attached to several
+    emails (or downloaded again on a retry) is only parsed once.
 
-    if "atlassian" in sender_domain:
-        return parse_atlassian_invoice_pdf(pdf_bytes)
+    Args:
+        pdf_bytes: Raw PDF content
+        sender_domain: Email sender domain for routing
+        filename: PDF filename for hints
+        content_hash: SHA256 of pdf_bytes, if already computed
 
-    if "suffolklatch" in sender_domain:
-        return parse_suffolk_latch_pdf(pdf_bytes)
+    Returns:
+        Parsed receipt dict or None
+    """
+    if not PDF_SUPPORT or not pdf_bytes:
+        return parse_receipt_pdf(pdf_bytes, sender_domain, filename)
 
-    # Fallback to generic parser
-    return parse_generic_receipt_pdf(pdf_bytes)
+    content_hash = content_hash or compute_pdf_hash(pdf_bytes)
+    key = (content_hash, get_pdf_parser_version(sender_domain))
+
+    cached = database.get_gmail_parse_results([key]).get(key)
+    if cached is not None:
+        # {} records a PDF that parsed to nothing
+        return cached or None
+
+    result = parse_receipt_pdf(pdf_bytes, sender_domain, filename)
+    database.save_gmail_parse_results(
+        [(*key, json.loads(json.dumps(result or {}, default=str)))]
+    )
+    return result
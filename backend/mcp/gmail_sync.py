@@ -6,6 +6,7 @@ Supports full sync (initial) and incremental sync (subsequent).
 """
 
 import hashlib
+import itertools
 import os
 import re
 import time
@@ -27,31 +28,19 @@ from mcp.gmail_client import (
     build_receipt_query,
     extract_sender_domain,
     get_attachment_content,
-    get_history_changes,
     get_message_content,
+    get_message_metadata,
     get_user_profile,
+    iter_history_pages,
     list_receipt_messages,
     parse_sender_email,
 )
-from mcp.gmail_parsing.filtering import (
-    is_amazon_receipt_email,
-    is_apple_receipt_email,
-    is_citizens_of_soil_receipt_email,
-    is_deliveroo_receipt_email,
-    is_ebay_receipt_email,
-    is_etsy_receipt_email,
-    is_figma_receipt_email,
-    is_google_receipt_email,
-    is_lyft_receipt_email,
-    is_microsoft_receipt_email,
-    is_netflix_receipt_email,
-    is_ocado_receipt_email,
-    is_paypal_receipt_email,
-    is_spotify_receipt_email,
-    is_uber_receipt_email,
-)
+from mcp.gmail_known_messages import remember_message_ids, split_known_message_ids
+from mcp.gmail_parsing.filtering import AMAZON_NO_RECEIPT_INDICATOR, IMPORT_FILTERS
 from mcp.gmail_parsing.orchestrator import parse_receipt_content
-from mcp.gmail_pdf_parser import parse_receipt_pdf
+from mcp.gmail_parsing.parse_cache import compute_content_hash, get_parser_version
+from mcp.gmail_pdf_batch import chunk_pdf_jobs
+from mcp.gmail_pdf_parser import parse_receipt_pdf_cached
 from mcp.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -65,6 +54,9 @@ BATCH_SIZE = 50  # Messages to process before updating progress
 # Performance tracking configuration
 GMAIL_SYNC_WORKERS = int(os.getenv("GMAIL_SYNC_WORKERS", "5"))
 GMAIL_PARALLEL_FETCH = os.getenv("GMAIL_PARALLEL_FETCH", "true").lower() == "true"
+GMAIL_METADATA_PREFILTER = (
+    os.getenv("GMAIL_METADATA_PREFILTER", "true").lower() == "true"
+)
 
 
 class SyncPerformanceTracker:
@@ -135,6 +127,48 @@ class SyncPerformanceTracker:
         logger.info("=" * 80)
 
 
+# Personal email domains - these can never issue receipts, and forwarded
+# receipts from them should not be stored
+PERSONAL_EMAIL_DOMAINS = frozenset(
+    {
+        "gmail.com",
+        "googlemail.com",
+        "outlook.com",
+        "hotmail.com",
+        "live.com",
+        "msn.com",
+        "yahoo.com",
+        "yahoo.co.uk",
+        "icloud.com",
+        "me.com",
+        "mac.com",
+        "aol.com",
+        "protonmail.com",
+        "proton.me",
+    }
+)
+
+# Shipping/delivery notification subjects (not receipts)
+SHIPPING_PATTERNS = (
+    "your order is on the way",
+    "your order has shipped",
+    "your order has been shipped",
+    "your order has been delivered",
+    "your package is on its way",
+    "out for delivery",
+)
+
+# Booking confirmation subjects (not receipts)
+BOOKING_PATTERNS = (
+    "booking confirmation for",
+    "your reservation at",
+    "reservation confirmed",
+)
+
+# Domains that only send shipping updates (but purchase receipts are accepted)
+SHIPPING_DOMAINS = frozenset({"woolrich.com"})
+
+
 def should_import_email(
     subject: str, sender_email: str, body_text: str = None
 ) -> tuple:
@@ -152,54 +186,23 @@ def should_import_email(
     Returns:
         Tuple of (should_import: bool, reason: str)
     """
-    # Reject personal email domains - these can never issue receipts
-    # Forwarded receipts from these domains should not be stored
-    PERSONAL_EMAIL_DOMAINS = {
-        "gmail.com",
-        "googlemail.com",
-        "outlook.com",
-        "hotmail.com",
-        "live.com",
-        "msn.com",
-        "yahoo.com",
-        "yahoo.co.uk",
-        "icloud.com",
-        "me.com",
-        "mac.com",
-        "aol.com",
-        "protonmail.com",
-        "proton.me",
-    }
+    # Reject personal email domains
     sender_domain = sender_email.split("@")[-1].lower() if "@" in sender_email else ""
     if sender_domain in PERSONAL_EMAIL_DOMAINS:
         return (False, f"Personal email domain: {sender_domain}")
 
     # Reject shipping/delivery notifications (not receipts)
     subject_lower = subject.lower()
-    SHIPPING_PATTERNS = [
-        "your order is on the way",
-        "your order has shipped",
-        "your order has been shipped",
-        "your order has been delivered",
-        "your package is on its way",
-        "out for delivery",
-    ]
     for pattern in SHIPPING_PATTERNS:
         if pattern in subject_lower:
             return (False, f"Shipping notification: {pattern}")
 
     # Reject booking confirmations (not receipts)
-    BOOKING_PATTERNS = [
-        "booking confirmation for",
-        "your reservation at",
-        "reservation confirmed",
-    ]
     for pattern in BOOKING_PATTERNS:
         if pattern in subject_lower:
             return (False, f"Booking confirmation: {pattern}")
 
     # Reject specific domains that only send shipping updates (but accept purchase receipts)
-    SHIPPING_DOMAINS = {"woolrich.com"}
     if sender_domain in SHIPPING_DOMAINS:
         # Accept actual purchase confirmations
         if (
@@ -211,43 +214,117 @@ def should_import_email(
         else:
             return (False, f"Shipping domain: {sender_domain}")
 
-    # Amazon filter uses body content for accurate filtering
-    amazon_result = is_amazon_receipt_email(subject, sender_email, body_text)
-    if amazon_result[0] is not None:
-        if amazon_result[0] is False:
-            return (False, amazon_result[1])
-        return (True, amazon_result[1])
-
-    # Other vendor filters (subject/sender only)
-    filters = [
-        is_ebay_receipt_email,
-        is_etsy_receipt_email,
-        is_uber_receipt_email,
-        is_paypal_receipt_email,
-        is_microsoft_receipt_email,
-        is_apple_receipt_email,
-        is_lyft_receipt_email,
-        is_deliveroo_receipt_email,
-        is_spotify_receipt_email,
-        is_netflix_receipt_email,
-        is_google_receipt_email,
-        is_ocado_receipt_email,
-        is_citizens_of_soil_receipt_email,
-        is_figma_receipt_email,
-    ]
-
-    for filter_func in filters:
-        result = filter_func(subject, sender_email)
-        if result[0] is not None:  # This vendor's filter applies
-            if result[0] is False:  # Explicitly rejected
-                return (False, result[1])
-            # Explicitly accepted
-            return (True, result[1])
+    # Vendor filters - only the ones whose sender pattern matches are run
+    result = IMPORT_FILTERS.run(subject, sender_email, body_text)
+    if result[0] is not None:  # This vendor's filter applies
+        if result[0] is False:  # Explicitly rejected
+            return (False, result[1])
+        # Explicitly accepted
+        return (True, result[1])
 
     # No vendor filter matched - allow import (generic receipt)
     return (True, "No vendor filter matched")
 
 
+def should_fetch_full_message(subject: str, sender_email: str, snippet: str) -> tuple:
+    """
+    Header-level version of should_import_email() for metadata-first fetching.
+
+    Runs the same sender/subject filters with the Gmail snippet standing in
+    for the body. A snippet containing an Amazon body indicator (e.g.
+    "Thanks for your order") is enough to accept, but the snippet is only the
+    first ~200 characters, so Amazon's "no receipt indicator" rejection is
+    deferred to the full-body check instead of being trusted here.
+
+    Args:
+        subject: Email subject line
+        sender_email: Full sender email address
+        snippet: Gmail message snippet
+
+    Returns:
+        Tuple of (should_fetch: bool, reason: str)
+    """
+    should_import, reason = should_import_email(subject, sender_email, snippet)
+    if should_import:
+        return (True, reason)
+
+    if reason == AMAZON_NO_RECEIPT_INDICATOR:
+        return (True, "Amazon email deferred to full-body check")
+
+    return (False, reason)
+
+
+def prefilter_message_ids(
+    service, message_ids: list, perf: SyncPerformanceTracker = None
+) -> tuple:
+    """
+    Fetch metadata for a page of messages and drop known non-receipts.
+
+    Phase one of the two-phase fetch: only headers and snippet are downloaded
+    (format=metadata), and the full payload is fetched later for survivors
+    only. Messages whose metadata cannot be fetched are kept so the full
+    fetch still gets a chance at them.
+
+    Args:
+        service: Gmail API session
+        message_ids: List of Gmail message IDs
+        perf: Optional performance tracker for API timings
+
+    Returns:
+        Tuple of (survivor_ids: list, rejected: list of (message_id, reason))
+    """
+    if not message_ids:
+        return [], []
+
+    def fetch(msg_id):
+        api_start = time.time()
+        metadata = get_message_metadata(service, msg_id)
+        if perf:
+            perf.record_api_call(time.time() - api_start)
+        return metadata
+
+    metadata_by_id = {}
+    if GMAIL_PARALLEL_FETCH and len(message_ids) > 1:
+        with ThreadPoolExecutor(
+            max_workers=min(GMAIL_SYNC_WORKERS, len(message_ids))
+        ) as executor:
+            future_to_msg_id = {
+                executor.submit(fetch, msg_id): msg_id for msg_id in message_ids
+            }
+            for future in as_completed(future_to_msg_id):
+                msg_id = future_to_msg_id[future]
+                try:
+                    metadata_by_id[msg_id] = future.result(timeout=30)
+                except Exception as e:
+                    logger.debug(f"Metadata fetch failed for {msg_id}: {e}")
+    else:
+        for msg_id in message_ids:
+            try:
+                metadata_by_id[msg_id] = fetch(msg_id)
+            except Exception as e:
+                logger.debug(f"Metadata fetch failed for {msg_id}: {e}")
+
+    survivors = []
+    rejected = []
+    # Preserve listing order for survivors
+    for msg_id in message_ids:
+        metadata = metadata_by_id.get(msg_id)
+        if metadata is None:
+            survivors.append(msg_id)
+            continue
+
+        sender_email, _ = parse_sender_email(metadata.get("from", ""))
+        should_fetch, reason = should_fetch_full_message(
+            metadata.get("subject", ""), sender_email, metadata.get("snippet", "")
+        )
+        if should_fetch:
+            survivors.append(msg_id)
+        else:
+            rejected.append((msg_id, reason))
+
+    return survivors, rejected
+
+
 def compute_receipt_hash(
     merchant_name: str, amount: float, receipt_date: str, order_id: str = None
 ) -> str:
@@ -273,17 +350,469 @@ def compute_receipt_hash(
     return hashlib.sha256(hash_input.encode()).hexdigest()
 
 
+def parser_stamp(
+    message: dict, sender_email: str, sender_name: str, sender_domain: str
+) -> dict:
+    """
+    Content hash and parser version for a receipt parsed during sync.
+
+    Stored on the receipt so a later reparse can skip it until one of the
+    parsers that applies to it changes.
+
+    Returns:
+        dict with 'content_hash' and 'parser_version'
+    """
+    return {
+        "content_hash": compute_content_hash(
+            html_body=message.get("body_html"),
+            text_body=message.get("body_text"),
+            subject=message.get("subject", ""),
+            sender_email=sender_email,
+            sender_domain=sender_domain,
+            sender_name=sender_name,
+            list_unsubscribe=message.get("list_unsubscribe", ""),
+            received_at=message.get("received_at"),
+        ),
+        "parser_version": get_parser_version(sender_domain),
+    }
+
+
+def _process_sync_batch(
+    connection_id: int,
+    batch_ids: list,
+    job_id: int,
+    perf: SyncPerformanceTracker,
+    stats,
+    force_reparse: bool = False,
+    use_bulk_writes: bool = True,
+) -> dict:
+    """
+    Fetch, parse and store one batch of new messages for a full sync.
+
+    The batch is fully committed when this returns, so callers can checkpoint
+    after it.
+
+    Args:
+        connection_id: Database connection ID
+        batch_ids: Gmail message IDs not yet stored
+        job_id: Sync job ID (for logging and error tracking)
+        perf: Performance tracker for this sync
+        stats: GmailSyncStatistics for this sync
+        force_reparse: If True, re-parse existing emails
+        use_bulk_writes: Use bulk inserts (GMAIL_BULK_WRITES)
+
+    Returns:
+        Dict of counter increments (processed, parsed, failed, duplicates,
+        filtered) plus 'oldest_received_at' of the fetched messages
+    """
+    counts = {"processed": 0, "parsed": 0, "failed": 0, "duplicates": 0, "filtered": 0}
+    received_dates = []
+
+    # Create fresh Gmail service for this batch to avoid TLS connection reuse
+    # This prevents SSL errors from corrupted connection state
+    access_token_batch, refresh_token_batch = get_gmail_credentials(connection_id)
+    service = build_gmail_service(access_token_batch, refresh_token_batch)
+
+    # Two-phase fetch: headers + snippet first, full payload for survivors only
+    if GMAIL_METADATA_PREFILTER:
+        batch_ids, rejected = prefilter_message_ids(service, batch_ids, perf)
+        counts["filtered"] += len(rejected)
+        counts["processed"] += len(rejected)
+
+    # Phase 3: Prepare batch accumulators for bulk operations
+    if use_bulk_writes:
+        email_content_batch = []
+        receipt_batch = []
+        pdf_tasks_batch = []
+
+    if GMAIL_PARALLEL_FETCH and len(batch_ids) > 1:
+        # Parallel processing with ThreadPoolExecutor
+        with ThreadPoolExecutor(
+            max_workers=min(GMAIL_SYNC_WORKERS, len(batch_ids))
+        ) as executor:
+            # Submit all API calls in parallel
+            future_to_msg_id = {
+                executor.submit(get_message_content, service, msg_id): msg_id
+                for msg_id in batch_ids
+            }
+
+            # Process results as they complete
+            for future in as_completed(future_to_msg_id):
+                msg_id = future_to_msg_id[future]
+                try:
+                    # Get message from future with timeout
+                    api_start = time.time()
+                    msg = future.result(timeout=30)
+                    perf.record_api_call(time.time() - api_start)
+                    if msg.get("received_at"):
+                        received_dates.append(msg["received_at"])
+
+                    if use_bulk_writes:
+                        # Phase 3: Prepare data for bulk insert
+                        parse_start = time.time()
+                        prepared = prepare_receipt_data(
+                            connection_id,
+                            msg,
+                            service,
+                            force_reparse=force_reparse,
+                            duplicate_checked=True,
+                        )
+                        parse_duration_ms = int((time.time() - parse_start) * 1000)
+                        perf.record_parse(parse_duration_ms / 1000.0)
+
+                        # Record statistics for this parse attempt (only for stored receipts)
+                        if prepared.get("receipt_data"):
+                            stats.record_parse_attempt(
+                                message_id=prepared["message_id"],
+                                sender_domain=prepared["sender_domain"],
+                                parse_result=prepared["receipt_data"],
+                                duration_ms=parse_duration_ms,
+                                llm_cost_cents=prepared["receipt_data"].get(
+                                    "llm_cost_cents"
+                                ),
+                            )
+
+                        # Accumulate for bulk insert
+                        email_content_batch.append(prepared["message"])
+                        if prepared["action"] == "store":
+                            receipt_batch.append(
+                                (
+                                    prepared["connection_id"],
+                                    prepared["message_id"],
+                                    prepared["receipt_data"],
+                                )
+                            )
+                            if prepared.get("pdf_task_info"):
+                                pdf_tasks_batch.append(prepared)
+                        elif prepared["action"] == "duplicate":
+                            counts["duplicates"] += 1
+                        elif prepared["action"] == "filtered":
+                            counts["filtered"] += 1
+                    else:
+                        # Original: Individual inserts
+                        db_start = time.time()
+                        result = store_pending_receipt(
+                            connection_id,
+                            msg,
+                            service,
+                            force_reparse=force_reparse,
+                            duplicate_checked=True,
+                        )
+                        perf.record_db_write(time.time() - db_start)
+
+                        # Record statistics for this parse attempt (non-bulk path)
+                        if result.get("receipt_data"):
+                            stats.record_parse_attempt(
+                                message_id=result["message_id"],
+                                sender_domain=result["sender_domain"],
+                                parse_result=result["receipt_data"],
+                                llm_cost_cents=result["receipt_data"].get(
+                                    "llm_cost_cents"
+                                ),
+                            )
+
+                        if result.get("stored"):
+                            counts["parsed"] += 1
+                        elif result.get("duplicate"):
+                            counts["duplicates"] += 1
+                        elif result.get("filtered"):
+                            counts["filtered"] += 1
+
+                    counts["processed"] += 1
+
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to process message {msg_id}: {e}",
+                        extra={"sync_job_id": job_id, "message_id": msg_id},
+                    )
+                    counts["failed"] += 1
+                    counts["processed"] += 1
+    else:
+        # Sequential processing (fallback or single message)
+        for msg_id in batch_ids:
+            retry_count = 0
+            max_retries = 3
+
+            while retry_count < max_retries:
+                try:
+                    # Fetch message content
+                    api_start = time.time()
+                    msg = get_message_content(service, msg_id)
+                    perf.record_api_call(time.time() - api_start)
+                    if msg.get("received_at"):
+                        received_dates.append(msg["received_at"])
+
+                    if use_bulk_writes:
+                        # Phase 3: Prepare data for bulk insert
+                        parse_start = time.time()
+                        prepared = prepare_receipt_data(
+                            connection_id,
+                            msg,
+                            service,
+                            force_reparse=force_reparse,
+                            duplicate_checked=True,
+                        )
+                        perf.record_parse(time.time() - parse_start)
+
+                        # Accumulate for bulk insert
+                        email_content_batch.append(prepared["message"])
+                        if prepared["action"] == "store":
+                            receipt_batch.append(
+                                (
+                                    prepared["connection_id"],
+                                    prepared["message_id"],
+                                    prepared["receipt_data"],
+                                )
+                            )
+                            if prepared.get("pdf_task_info"):
+                                pdf_tasks_batch.append(prepared)
+                        elif prepared["action"] == "duplicate":
+                            counts["duplicates"] += 1
+                        elif prepared["action"] == "filtered":
+                            counts["filtered"] += 1
+                    else:
+                        # Original: Individual inserts
+                        db_start = time.time()
+                        result = store_pending_receipt(
+                            connection_id,
+                            msg,
+                            service,
+                            force_reparse=force_reparse,
+                            duplicate_checked=True,
+                        )
+                        perf.record_db_write(time.time() - db_start)
+
+                        # Record statistics for this parse attempt (non-bulk path)
+                        if result.get("receipt_data"):
+                            stats.record_parse_attempt(
+                                message_id=result["message_id"],
+                                sender_domain=result["sender_domain"],
+                                parse_result=result["receipt_data"],
+                                llm_cost_cents=result["receipt_data"].get(
+                                    "llm_cost_cents"
+                                ),
+                            )
+
+                        if result.get("stored"):
+                            counts["parsed"] += 1
+                        elif result.get("duplicate"):
+                            counts["duplicates"] += 1
+                        elif result.get("filtered"):
+                            counts["filtered"] += 1
+
+                    counts["processed"] += 1
+                    break  # Success, exit retry loop
+
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to process message {msg_id}: {e}",
+                        extra={"sync_job_id": job_id, "message_id": msg_id},
+                        exc_info=(os.getenv("DEBUG_GMAIL_SYNC") == "true"),
+                    )
+                    retry_count += 1
+                    if retry_count >= max_retries:
+                        counts["failed"] += 1
+                        counts["processed"] += 1
+
+    # Phase 3: Bulk database writes after batch processing
+    if use_bulk_writes and (email_content_batch or receipt_batch):
+        db_start = time.time()
+        try:
+            logger.info(
+                f"Bulk inserting: {len(email_content_batch)} emails, {len(receipt_batch)} receipts",
+                extra={"sync_job_id": job_id},
+            )
+
+            # Bulk insert email content
+            if email_content_batch:
+                database.save_gmail_email_content_bulk(email_content_batch)
+
+            # Bulk insert receipts and get receipt IDs
+            receipt_id_mapping = {}
+            if receipt_batch:
+                result = database.save_gmail_receipt_bulk(receipt_batch)
+                receipt_id_mapping = result["message_to_id"]
+                counts["parsed"] += result["inserted"]
+                remember_message_ids(connection_id, receipt_id_mapping)
+
+            perf.record_db_write(time.time() - db_start)
+
+            # Dispatch PDF tasks using receipt IDs from bulk insert
+            if pdf_tasks_batch and receipt_id_mapping:
+                from tasks.gmail_tasks import process_pdf_receipts_batch_task
+
+                pdf_jobs = [
+                    {
+                        "receipt_id": receipt_id_mapping[prepared["message_id"]],
+                        "message_id": prepared["message_id"],
+                        "attachment_info": prepared["pdf_task_info"],
+                        "sender_domain": prepared["sender_domain"],
+                        "received_date": prepared["receipt_data"].get("received_at"),
+                    }
+                    for prepared in pdf_tasks_batch
+                    if receipt_id_mapping.get(prepared["message_id"])
+                ]
+                for jobs in chunk_pdf_jobs(pdf_jobs):
+                    receipt_ids = [job["receipt_id"] for job in jobs]
+                    try:
+                        process_pdf_receipts_batch_task.delay(
+                            connection_id=connection_id, jobs=jobs
+                        )
+                    except Exception as e:
+                        logger.warning(
+                            f"PDF batch dispatch failed for receipts {receipt_ids}: {e}",
+                            extra={
+                                "sync_job_id": job_id,
+                                "receipt_ids": receipt_ids,
+                            },
+                        )
+
+                        # CRITICAL FIX: Track PDF task dispatch failures
+                        try:
+                            from mcp.error_tracking import (
+                                ErrorStage,
+                                ErrorType,
+                                GmailError,
+                            )
+
+                            error = GmailError(
+                                stage=ErrorStage.PDF_PARSE,
+                                error_type=ErrorType.UNKNOWN,
+                                message=f"PDF task dispatch failed: {e}",
+                                exception=e,
+                                context={"receipt_ids": receipt_ids},
+                                is_retryable=True,
+                            )
+                            error.log(
+                                connection_id=connection_id,
+                                sync_job_id=job_id,
+                            )
+                        except Exception:  # Fixed: was bare except
+                            pass  # Don't let error tracking crash sync
+
+        except Exception as e:
+            logger.warning(
+                f"Bulk insert failed, falling back to individual inserts: {e}",
+                extra={"sync_job_id": job_id},
+                exc_info=(os.getenv("DEBUG_GMAIL_SYNC") == "true"),
+            )
+
+            # Fallback: insert individually
+            # CRITICAL FIX: Track failures in fallback mode
+            from mcp.error_tracking import ErrorStage, GmailError
+
+            for msg in email_content_batch:
+                try:
+                    database.save_gmail_email_content(msg)
+                except Exception as e2:
+                    counts["failed"] += 1  # CRITICAL: Increment failed counter
+                    logger.warning(
+                        f"Failed to save email content for {msg.get('message_id')}: {e2}",
+                        extra={
+                            "sync_job_id": job_id,
+                            "message_id": msg.get("message_id"),
+                        },
+                    )
+
+                    # Track error for statistics
+                    try:
+                        error = GmailError.from_exception(
+                            e2,
+                            ErrorStage.STORAGE,
+                            context={
+                                "message_id": msg.get("message_id"),
+                                "operation": "save_email_content",
+                            },
+                        )
+                        error.log(connection_id=connection_id, sync_job_id=job_id)
+                    except Exception:  # Fixed: was bare except
+                        pass  # Don't let error tracking crash sync
+
+            for conn_id, msg_id, receipt_data in receipt_batch:
+                try:
+                    database.save_gmail_receipt(conn_id, msg_id, receipt_data)
+                    counts["parsed"] += 1
+                except Exception as e2:
+                    counts["failed"] += 1  # CRITICAL: Increment failed counter
+                    logger.warning(
+                        f"Failed to save receipt for {msg_id}: {e2}",
+                        extra={"sync_job_id": job_id, "message_id": msg_id},
+                    )
+
+                    # Track error for statistics
+                    try:
+                        error = GmailError.from_exception(
+                            e2,
+                            ErrorStage.STORAGE,
+                            context={
+                                "message_id": msg_id,
+                                "operation": "save_receipt",
+                            },
+                        )
+                        error.log(connection_id=connection_id, sync_job_id=job_id)
+                    except Exception:  # Fixed: was bare except
+                        pass  # Don't let error tracking crash sync
+
+    # Per-message statistics and errors of this batch in one write each
+    stats.flush_buffers()
+
+    counts["oldest_received_at"] = min(received_dates) if received_dates else None
+    return counts
+
+
+def plan_sync_chunks(from_date: datetime, to_date: datetime = None) -> list:
+    """
+    Split a sync date range into calendar-month windows.
+
+    Windows are half-open ([from, to)) to match Gmail's after:/before:
+    search operators, so adjacent chunks never list the same message.
+
+    Args:
+        from_date: Range start
+        to_date: Range end (defaults to tomorrow, i.e. including today)
+
+    Returns:
+        List of (from_date, to_date) YYYY-MM-DD string tuples, oldest first
+    """
+    start = datetime(from_date.year, from_date.month, from_date.day)
+    end = to_date or (datetime.utcnow() + timedelta(days=1))
+    end = datetime(end.year, end.month, end.day)
+
+    chunks = []
+    while start < end:
+        if start.month == 12:
+            next_month = datetime(start.year + 1, 1, 1)
+        else:
+            next_month = datetime(start.year, start.month + 1, 1)
+        chunk_end = min(next_month, end)
+        chunks.append((start.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d")))
+        start = chunk_end
+
+    return chunks
+
+
 def sync_receipts_full(
     connection_id: int,
     from_date: datetime = None,
     to_date: datetime = None,
     job_id: int = None,
     force_reparse: bool = False,
+    resume: bool = True,
+    update_history: bool = True,
 ) -> Generator[dict, None, dict]:
     """
     Full sync of all receipt emails.
 
-    Yields progress updates and returns final results.
+    Yields progress updates and returns final results. Listing pages are
+    processed as they arrive and a checkpoint (page token, committed offset
+    within the page, date cursor) is saved on the job after every batch, so
+    a replacement run for the same connection and date range resumes instead
+    of starting over.
+
+    The mailbox history ID is read once when the sync first starts and kept
+    in the checkpoint. A resumed run reuses it, and it is what the
+    connection is set to on completion, so mail that arrives while the sync
+    runs is left for the next incremental sync.
 
     Args:
         connection_id: Database connection ID
@@ -291,6 +820,10 @@ def sync_receipts_full(
         to_date: Optional end date (defaults to today)
         job_id: Optional pre-created job ID for progress tracking
         force_reparse: If True, re-parse existing emails (bypass duplicate check)
+        resume: If True, continue from a checkpoint left by an interrupted
+            sync of the same date range
+        update_history: If False, leave the connection's history ID alone
+            (chunks of a chunked sync - the parent sets it when finalized)
 
     Yields:
         Progress dictionaries with count, status, etc.
@@ -333,21 +866,38 @@ def sync_receipts_full(
         )
 
         # Set date range
-        if from_date is None:
-            # Use stored sync_from_date or default to 12 months
-            if connection.get("sync_from_date"):
-                from_date = datetime.fromisoformat(str(connection["sync_from_date"]))
+        if from_date is None and connection.get("sync_from_date"):
+            # Use stored sync_from_date; the default range is resolved below
+            from_date = datetime.fromisoformat(str(connection["sync_from_date"]))
+        # The default range starts relative to today, so it can't be matched
+        # by date - a resumed run takes its start from the checkpoint
+        default_range = from_date is None
+        to_date_str = to_date.strftime("%Y-%m-%d") if to_date else None
+
+        # Resume from a checkpoint left by an interrupted run of the same range
+        checkpoint = None
+        if resume:
+            checkpoint = database.get_resumable_gmail_sync_checkpoint(
+                connection_id,
+                None if default_range else from_date.strftime("%Y-%m-%d"),
+                to_date_str,
+                job_id=job_id,
+            )
+            if checkpoint and checkpoint.get("force_reparse", False) != force_reparse:
+                checkpoint = None
+
+        if default_range:
+            if checkpoint:
+                from_date = datetime.fromisoformat(checkpoint["from_date"])
             else:
                 from_date = datetime.utcnow() - timedelta(days=DEFAULT_SYNC_MONTHS * 30)
+        from_date_str = from_date.strftime("%Y-%m-%d")
+        database.update_gmail_sync_job_dates(job_id, from_date_str, to_date_str)
 
         # Build search query with date range
         query = build_receipt_query(from_date=from_date, to_date=to_date)
         logger.info(f"Search query: {query[:100]}...", extra={"sync_job_id": job_id})
 
-        # Format dates for progress reporting
-        from_date_str = from_date.strftime("%Y-%m-%d") if from_date else None
-        to_date_str = to_date.strftime("%Y-%m-%d") if to_date else None
-
         # Initial yield - starting
         yield {
             "status": "started",
@@ -357,58 +907,61 @@ def sync_receipts_full(
             "to_date": to_date_str,
         }
 
-        # Paginate through results
-        all_message_ids = []
-        page_token = None
-        page_count = 0
-
-        while True:
-            result = list_receipt_messages(
-                service, query=query, page_token=page_token, max_results=100
-            )
-
-            messages = result.get("messages", [])
-            all_message_ids.extend([m["id"] for m in messages])
-
-            page_count += 1
+        if checkpoint:
             logger.info(
-                f"Page {page_count}: {len(messages)} messages (total: {len(all_message_ids)})",
+                f"Resuming from checkpoint of job {checkpoint['resumed_from_job_id']}: "
+                f"page offset {checkpoint.get('page_offset', 0)}, "
+                f"date cursor {checkpoint.get('cursor_date')}",
                 extra={"sync_job_id": job_id},
             )
-
-            # Safety limit
-            if len(all_message_ids) >= MAX_MESSAGES_PER_SYNC:
-                logger.warning(
-                    f"Hit message limit ({MAX_MESSAGES_PER_SYNC})",
-                    extra={"sync_job_id": job_id},
+            if checkpoint.get("list_to_date"):
+                query = build_receipt_query(
+                    from_date=from_date,
+                    to_date=datetime.fromisoformat(checkpoint["list_to_date"]),
                 )
-                break
-
-            page_token = result.get("nextPageToken")
-            if not page_token:
-                break
-
-        total_messages = len(all_message_ids)
-        logger.info(
-            f"Found {total_messages} potential receipt messages",
-            extra={"sync_job_id": job_id},
-        )
+        checkpoint = checkpoint or {}
+
+        # History ID from when this sync first started - everything after it
+        # is left to incremental sync, so a resumed run must not move it on
+        start_history_id = checkpoint.get("history_id") or latest_history_id
+
+        page_token = checkpoint.get("page_token")
+        page_offset = checkpoint.get("page_offset", 0)
+        cursor_date = checkpoint.get("cursor_date")
+        list_to_date = checkpoint.get("list_to_date")
+        processed = checkpoint.get("processed", 0)
+        parsed = checkpoint.get("parsed", 0)
+        failed = checkpoint.get("failed", 0)
+        duplicates = checkpoint.get("duplicates", 0)
+        filtered = checkpoint.get("filtered", 0)
+        fetched = checkpoint.get("fetched", 0)  # New messages handled (safety limit)
+        total_messages = processed
+        page_count = 0
 
-        # Update job with total
-        database.update_gmail_sync_job_progress(job_id, total_messages, 0, 0, 0)
+        def save_checkpoint(committed_offset: int) -> None:
+            database.update_gmail_sync_job_checkpoint(
+                job_id,
+                {
+                    "from_date": from_date_str,
+                    "to_date": to_date_str,
+                    "default_range": default_range,
+                    "force_reparse": force_reparse,
+                    "history_id": start_history_id,
+                    "list_to_date": list_to_date,
+                    "page_token": page_token,
+                    "page_offset": committed_offset,
+                    "cursor_date": cursor_date,
+                    "processed": processed,
+                    "parsed": parsed,
+                    "failed": failed,
+                    "duplicates": duplicates,
+                    "filtered": filtered,
+                    "fetched": fetched,
+                },
+            )
 
-        yield {
-            "status": "scanning",
-            "total_messages": total_messages,
-            "processed": 0,
-        }
-
-        # Process messages in batches
-        processed = 0
-        parsed = 0
-        failed = 0
-        duplicates = 0
-        filtered = 0
+        # Record the starting history ID before anything is listed
+        save_checkpoint(page_offset)
 
         # Initialize performance tracker
         perf = SyncPerformanceTracker()
@@ -416,366 +969,131 @@ def sync_receipts_full(
         # Phase 3: Bulk database writes (feature flag)
         USE_BULK_WRITES = os.getenv("GMAIL_BULK_WRITES", "true").lower() == "true"
 
-        for i in range(0, total_messages, BATCH_SIZE):
-            batch_ids = all_message_ids[i : i + BATCH_SIZE]
+        # Stream listing pages: each page is processed and checkpointed before
+        # the next one is listed, so an interrupted sync loses at most a batch
+        while True:
+            try:
+                result = list_receipt_messages(
+                    service, query=query, page_token=page_token, max_results=100
+                )
+            except Exception as e:
+                if not (checkpoint and page_token and page_count == 0):
+                    raise
+                # Page tokens expire - restart listing just above the date cursor.
+                # Listing is newest-first, so everything newer is already done
+                # (overlap on the cursor day is absorbed by the known-ID check).
+                logger.warning(
+                    f"Checkpoint page token rejected ({e}), relisting before {cursor_date}",
+                    extra={"sync_job_id": job_id},
+                )
+                resume_to = to_date
+                if cursor_date:
+                    resume_to = datetime.fromisoformat(cursor_date) + timedelta(days=1)
+                    if to_date and to_date < resume_to:
+                        resume_to = to_date
+                list_to_date = resume_to.strftime("%Y-%m-%d") if resume_to else None
+                query = build_receipt_query(from_date=from_date, to_date=resume_to)
+                page_token = None
+                page_offset = 0
+                continue
 
-            # Create fresh Gmail service for this batch to avoid TLS connection reuse
-            # This prevents SSL errors from corrupted connection state
-            access_token_batch, refresh_token_batch = get_gmail_credentials(
-                connection_id
-            )
-            service = build_gmail_service(access_token_batch, refresh_token_batch)
-
-            # Phase 3: Prepare batch accumulators for bulk operations
-            if USE_BULK_WRITES:
-                email_content_batch = []
-                receipt_batch = []
-                pdf_tasks_batch = []
-
-            if GMAIL_PARALLEL_FETCH and len(batch_ids) > 1:
-                # Parallel processing with ThreadPoolExecutor
-                with ThreadPoolExecutor(
-                    max_workers=min(GMAIL_SYNC_WORKERS, len(batch_ids))
-                ) as executor:
-                    # Submit all API calls in parallel
-                    future_to_msg_id = {
-                        executor.submit(get_message_content, service, msg_id): msg_id
-                        for msg_id in batch_ids
-                    }
+            page_count += 1
+            raw_ids = [m["id"] for m in result.get("messages", [])]
+            next_page_token = result.get("nextPageToken")
 
-                    # Process results as they complete
-                    for future in as_completed(future_to_msg_id):
-                        msg_id = future_to_msg_id[future]
-                        try:
-                            # Get message from future with timeout
-                            api_start = time.time()
-                            msg = future.result(timeout=30)
-                            perf.record_api_call(time.time() - api_start)
-
-                            if USE_BULK_WRITES:
-                                # Phase 3: Prepare data for bulk insert
-                                parse_start = time.time()
-                                prepared = prepare_receipt_data(
-                                    connection_id,
-                                    msg,
-                                    service,
-                                    force_reparse=force_reparse,
-                                )
-                                parse_duration_ms = int(
-                                    (time.time() - parse_start) * 1000
-                                )
-                                perf.record_parse(parse_duration_ms / 1000.0)
-
-                                # Record statistics for this parse attempt (only for stored receipts)
-                                if prepared.get("receipt_data"):
-                                    stats.record_parse_attempt(
-                                        message_id=prepared["message_id"],
-                                        sender_domain=prepared["sender_domain"],
-                                        parse_result=prepared["receipt_data"],
-                                        duration_ms=parse_duration_ms,
-                                        llm_cost_cents=prepared["receipt_data"].get(
-                                            "llm_cost_cents"
-                                        ),
-                                    )
-
-                                # Accumulate for bulk insert
-                                email_content_batch.append(prepared["message"])
-                                if prepared["action"] == "store":
-                                    receipt_batch.append(
-                                        (
-                                            prepared["connection_id"],
-                                            prepared["message_id"],
-                                            prepared["receipt_data"],
-                                        )
-                                    )
-                                    if prepared.get("pdf_task_info"):
-                                        pdf_tasks_batch.append(prepared)
-                                elif prepared["action"] == "duplicate":
-                                    duplicates += 1
-                                elif prepared["action"] == "filtered":
-                                    filtered += 1
-                            else:
-                                # Original: Individual inserts
-                                db_start = time.time()
-                                result = store_pending_receipt(
-                                    connection_id,
-                                    msg,
-                                    service,
-                                    force_reparse=force_reparse,
-                                )
-                                perf.record_db_write(time.time() - db_start)
-
-                                # Record statistics for this parse attempt (non-bulk path)
-                                if result.get("receipt_data"):
-                                    stats.record_parse_attempt(
-                                        message_id=result["message_id"],
-                                        sender_domain=result["sender_domain"],
-                                        parse_result=result["receipt_data"],
-                                        llm_cost_cents=result["receipt_data"].get(
-                                            "llm_cost_cents"
-                                        ),
-                                    )
-
-                                if result.get("stored"):
-                                    parsed += 1
-                                elif result.get("duplicate"):
-                                    duplicates += 1
-                                elif result.get("filtered"):
-                                    filtered += 1
-
-                            processed += 1
-
-                        except Exception as e:
-                            logger.warning(
-                                f"Failed to process message {msg_id}: {e}",
-                                extra={"sync_job_id": job_id, "message_id": msg_id},
-                            )
-                            failed += 1
-                            processed += 1
-            else:
-                # Sequential processing (fallback or single message)
-                for msg_id in batch_ids:
-                    retry_count = 0
-                    max_retries = 3
+            if page_count == 1:
+                total_messages = processed + max(
+                    result.get("resultSizeEstimate", 0), len(raw_ids)
+                )
+                database.update_gmail_sync_job_progress(
+                    job_id, total_messages, processed, parsed, failed
+                )
+                yield {
+                    "status": "scanning",
+                    "total_messages": total_messages,
+                    "processed": processed,
+                }
 
-                    while retry_count < max_retries:
-                        try:
-                            # Fetch message content
-                            api_start = time.time()
-                            msg = get_message_content(service, msg_id)
-                            perf.record_api_call(time.time() - api_start)
-
-                            if USE_BULK_WRITES:
-                                # Phase 3: Prepare data for bulk insert
-                                parse_start = time.time()
-                                prepared = prepare_receipt_data(
-                                    connection_id,
-                                    msg,
-                                    service,
-                                    force_reparse=force_reparse,
-                                )
-                                perf.record_parse(time.time() - parse_start)
-
-                                # Accumulate for bulk insert
-                                email_content_batch.append(prepared["message"])
-                                if prepared["action"] == "store":
-                                    receipt_batch.append(
-                                        (
-                                            prepared["connection_id"],
-                                            prepared["message_id"],
-                                            prepared["receipt_data"],
-                                        )
-                                    )
-                                    if prepared.get("pdf_task_info"):
-                                        pdf_tasks_batch.append(prepared)
-                                elif prepared["action"] == "duplicate":
-                                    duplicates += 1
-                                elif prepared["action"] == "filtered":
-                                    filtered += 1
-                            else:
-                                # Original: Individual inserts
-                                db_start = time.time()
-                                result = store_pending_receipt(
-                                    connection_id,
-                                    msg,
-                                    service,
-                                    force_reparse=force_reparse,
-                                )
-                                perf.record_db_write(time.time() - db_start)
-
-                                # Record statistics for this parse attempt (non-bulk path)
-                                if result.get("receipt_data"):
-                                    stats.record_parse_attempt(
-                                        message_id=result["message_id"],
-                                        sender_domain=result["sender_domain"],
-                                        parse_result=result["receipt_data"],
-                                        llm_cost_cents=result["receipt_data"].get(
-                                            "llm_cost_cents"
-                                        ),
-                                    )
-
-                                if result.get("stored"):
-                                    parsed += 1
-                                elif result.get("duplicate"):
-                                    duplicates += 1
-                                elif result.get("filtered"):
-                                    filtered += 1
-
-                            processed += 1
-                            break  # Success, exit retry loop
-
-                        except Exception as e:
-                            logger.warning(
-                                f"Failed to process message {msg_id}: {e}",
-                                extra={"sync_job_id": job_id, "message_id": msg_id},
-                                exc_info=(os.getenv("DEBUG_GMAIL_SYNC") == "true"),
-                            )
-                            retry_count += 1
-                            if retry_count >= max_retries:
-                                failed += 1
-                                processed += 1
-
-            # Phase 3: Bulk database writes after batch processing
-            if USE_BULK_WRITES and (email_content_batch or receipt_batch):
-                db_start = time.time()
-                try:
-                    logger.info(
-                        f"Bulk inserting: {len(email_content_batch)} emails, {len(receipt_batch)} receipts",
-                        extra={"sync_job_id": job_id},
-                    )
+            known_ids = set()
+            if not force_reparse:
+                _, known_ids = split_known_message_ids(connection_id, raw_ids)
 
-                    # Bulk insert email content
-                    if email_content_batch:
-                        database.save_gmail_email_content_bulk(email_content_batch)
-
-                    # Bulk insert receipts and get receipt IDs
-                    receipt_id_mapping = {}
-                    if receipt_batch:
-                        result = database.save_gmail_receipt_bulk(receipt_batch)
-                        receipt_id_mapping = result["message_to_id"]
-                        parsed += result["inserted"]
-
-                    perf.record_db_write(time.time() - db_start)
-
-                    # Dispatch PDF tasks using receipt IDs from bulk insert
-                    if pdf_tasks_batch and receipt_id_mapping:
-                        from tasks.gmail_tasks import process_pdf_receipt_task
-
-                        for prepared in pdf_tasks_batch:
-                            message_id = prepared["message_id"]
-                            receipt_id = receipt_id_mapping.get(message_id)
-                            if receipt_id:
-                                try:
-                                    process_pdf_receipt_task.delay(
-                                        receipt_id=receipt_id,
-                                        message_id=message_id,
-                                        attachment_info=prepared["pdf_task_info"],
-                                        sender_domain=prepared["sender_domain"],
-                                        connection_id=connection_id,
-                                        received_date=prepared["receipt_data"].get(
-                                            "received_at"
-                                        ),
-                                    )
-                                except Exception as e:
-                                    logger.warning(
-                                        f"PDF task dispatch failed for receipt {receipt_id}: {e}",
-                                        extra={
-                                            "sync_job_id": job_id,
-                                            "receipt_id": receipt_id,
-                                        },
-                                    )
-
-                                    # CRITICAL FIX: Track PDF task dispatch failures
-                                    try:
-                                        from mcp.error_tracking import (
-                                            ErrorStage,
-                                            ErrorType,
-                                            GmailError,
-                                        )
-
-                                        error = GmailError(
-                                            stage=ErrorStage.PDF_PARSE,
-                                            error_type=ErrorType.UNKNOWN,
-                                            message=f"PDF task dispatch failed: {e}",
-                                            exception=e,
-                                            context={
-                                                "receipt_id": receipt_id,
-                                                "message_id": message_id,
-                                            },
-                                            is_retryable=True,
-                                        )
-                                        error.log(
-                                            connection_id=connection_id,
-                                            sync_job_id=job_id,
-                                        )
-                                    except Exception:  # Fixed: was bare except
-                                        pass  # Don't let error tracking crash sync
+            logger.info(
+                f"Page {page_count}: {len(raw_ids)} messages ({len(known_ids)} already stored)",
+                extra={"sync_job_id": job_id},
+            )
 
-                except Exception as e:
-                    logger.warning(
-                        f"Bulk insert failed, falling back to individual inserts: {e}",
-                        extra={"sync_job_id": job_id},
-                        exc_info=(os.getenv("DEBUG_GMAIL_SYNC") == "true"),
+            for offset in range(page_offset, len(raw_ids), BATCH_SIZE):
+                window = raw_ids[offset : offset + BATCH_SIZE]
+                batch_ids = [msg_id for msg_id in window if msg_id not in known_ids]
+                duplicates += len(window) - len(batch_ids)
+                processed += len(window) - len(batch_ids)
+
+                if batch_ids:
+                    batch_counts = _process_sync_batch(
+                        connection_id,
+                        batch_ids,
+                        job_id,
+                        perf,
+                        stats,
+                        force_reparse=force_reparse,
+                        use_bulk_writes=USE_BULK_WRITES,
                     )
+                    processed += batch_counts["processed"]
+                    parsed += batch_counts["parsed"]
+                    failed += batch_counts["failed"]
+                    duplicates += batch_counts["duplicates"]
+                    filtered += batch_counts["filtered"]
+                    fetched += len(batch_ids)
+
+                    oldest = batch_counts["oldest_received_at"]
+                    if oldest:
+                        oldest_date = oldest.date().isoformat()
+                        if cursor_date is None or oldest_date < cursor_date:
+                            cursor_date = oldest_date
+
+                total_messages = max(total_messages, processed)
+
+                # Batch is committed - checkpoint before moving on
+                save_checkpoint(offset + len(window))
+
+                # Update progress after each batch
+                database.update_gmail_sync_job_progress(
+                    job_id, total_messages, processed, parsed, failed
+                )
 
-                    # Fallback: insert individually
-                    # CRITICAL FIX: Track failures in fallback mode
-                    from mcp.error_tracking import ErrorStage, GmailError
-
-                    for msg in email_content_batch:
-                        try:
-                            database.save_gmail_email_content(msg)
-                        except Exception as e2:
-                            failed += 1  # CRITICAL: Increment failed counter
-                            logger.warning(
-                                f"Failed to save email content for {msg.get('message_id')}: {e2}",
-                                extra={
-                                    "sync_job_id": job_id,
-                                    "message_id": msg.get("message_id"),
-                                },
-                            )
-
-                            # Track error for statistics
-                            try:
-                                error = GmailError.from_exception(
-                                    e2,
-                                    ErrorStage.STORAGE,
-                                    context={
-                                        "message_id": msg.get("message_id"),
-                                        "operation": "save_email_content",
-                                    },
-                                )
-                                error.log(
-                                    connection_id=connection_id, sync_job_id=job_id
-                                )
-                            except Exception:  # Fixed: was bare except
-                                pass  # Don't let error tracking crash sync
+                yield {
+                    "status": "processing",
+                    "total_messages": total_messages,
+                    "processed": processed,
+                    "parsed": parsed,
+                    "failed": failed,
+                    "filtered": filtered,
+                    "duplicates": duplicates,
+                }
 
-                    for conn_id, msg_id, receipt_data in receipt_batch:
-                        try:
-                            database.save_gmail_receipt(conn_id, msg_id, receipt_data)
-                            parsed += 1
-                        except Exception as e2:
-                            failed += 1  # CRITICAL: Increment failed counter
-                            logger.warning(
-                                f"Failed to save receipt for {msg_id}: {e2}",
-                                extra={"sync_job_id": job_id, "message_id": msg_id},
-                            )
+            page_offset = 0
 
-                            # Track error for statistics
-                            try:
-                                error = GmailError.from_exception(
-                                    e2,
-                                    ErrorStage.STORAGE,
-                                    context={
-                                        "message_id": msg_id,
-                                        "operation": "save_receipt",
-                                    },
-                                )
-                                error.log(
-                                    connection_id=connection_id, sync_job_id=job_id
-                                )
-                            except Exception:  # Fixed: was bare except
-                                pass  # Don't let error tracking crash sync
+            # Safety limit
+            if fetched >= MAX_MESSAGES_PER_SYNC:
+                logger.warning(
+                    f"Hit message limit ({MAX_MESSAGES_PER_SYNC})",
+                    extra={"sync_job_id": job_id},
+                )
+                break
 
-            # Update progress after each batch
-            database.update_gmail_sync_job_progress(
-                job_id, total_messages, processed, parsed, failed
-            )
+            page_token = next_page_token
+            if not page_token:
+                break
 
-            yield {
-                "status": "processing",
-                "total_messages": total_messages,
-                "processed": processed,
-                "parsed": parsed,
-                "failed": failed,
-                "filtered": filtered,
-                "duplicates": duplicates,
-            }
+        total_messages = processed
+        database.update_gmail_sync_job_progress(
+            job_id, total_messages, processed, parsed, failed
+        )
 
         # Update history ID for incremental syncs
-        if latest_history_id:
-            database.update_gmail_history_id(connection_id, latest_history_id)
+        if update_history and start_history_id:
+            database.update_gmail_history_id(connection_id, start_history_id)
 
         # Update connection status
         database.update_gmail_connection_status(connection_id, "active")
@@ -791,7 +1109,7 @@ def sync_receipts_full(
             "parsed": parsed,
             "failed": failed,
             "duplicates": duplicates,
-            "history_id": latest_history_id,
+            "history_id": start_history_id,
         }
 
         logger.info(
@@ -813,6 +1131,7 @@ def sync_receipts_full(
 
     except Exception as e:
         logger.error(f"Sync failed: {e}", extra={"sync_job_id": job_id}, exc_info=True)
+        stats.flush()
         database.complete_gmail_sync_job(job_id, "failed", str(e))
         raise
 
@@ -823,7 +1142,9 @@ def sync_receipts_incremental(
     """
     Incremental sync using Gmail history API.
 
-    Only fetches messages added since last sync.
+    Only fetches messages added since last sync. History pages are
+    processed as they arrive and the connection's history ID is saved after
+    each one, so an interrupted sync picks up from the last finished page.
 
     Args:
         connection_id: Database connection ID
@@ -865,10 +1186,13 @@ def sync_receipts_incremental(
         # Build Gmail service with both tokens for auto-refresh support
         service = build_gmail_service(access_token, refresh_token)
 
-        # Get changes since last sync
-        changes = get_history_changes(service, history_id)
+        # Stream changes since last sync page by page; the connection's
+        # history ID advances after each committed page, so a failed run
+        # resumes from the last page it finished
+        pages = iter_history_pages(service, history_id)
+        first_page = next(pages)
 
-        if changes.get("full_sync_required"):
+        if first_page.get("full_sync_required"):
             logger.warning(
                 "History expired, falling back to full sync",
                 extra={"sync_job_id": job_id},
@@ -881,56 +1205,62 @@ def sync_receipts_incremental(
                 result = progress
             return result
 
-        new_message_ids = changes.get("new_message_ids", [])
-        latest_history_id = changes.get("latest_history_id")
-
-        logger.info(
-            f"Found {len(new_message_ids)} new messages since last sync",
-            extra={"sync_job_id": job_id},
-        )
-
-        if not new_message_ids:
-            database.complete_gmail_sync_job(job_id, "completed")
-            database.update_gmail_history_id(connection_id, latest_history_id)
-            return {
-                "status": "completed",
-                "job_id": job_id,
-                "new_messages": 0,
-                "parsed": 0,
-            }
-
-        # Process new messages
-        database.update_gmail_sync_job_progress(job_id, len(new_message_ids), 0, 0, 0)
-
+        new_messages = 0
+        processed = 0
         parsed = 0
         failed = 0
         duplicates = 0
         filtered = 0
 
-        for msg_id in new_message_ids:
-            try:
-                msg = get_message_content(service, msg_id)
-                result = store_pending_receipt(
-                    connection_id, msg, service, force_reparse=force_reparse
+        for page in itertools.chain([first_page], pages):
+            new_message_ids = page["message_ids"]
+            new_messages += len(new_message_ids)
+            if new_message_ids:
+                logger.info(
+                    f"Processing {len(new_message_ids)} new messages from history",
+                    extra={"sync_job_id": job_id},
                 )
 
-                if result.get("stored"):
-                    parsed += 1
-                elif result.get("duplicate"):
-                    duplicates += 1
-                elif result.get("filtered"):
-                    filtered += 1
+            fetch_ids = new_message_ids
+            if fetch_ids and not force_reparse:
+                fetch_ids, known_ids = split_known_message_ids(connection_id, fetch_ids)
+                duplicates += len(known_ids)
+            if fetch_ids and GMAIL_METADATA_PREFILTER:
+                fetch_ids, rejected = prefilter_message_ids(service, fetch_ids)
+                filtered += len(rejected)
 
-            except Exception as e:
-                logger.warning(
-                    f"Failed to process message {msg_id}: {e}",
-                    extra={"sync_job_id": job_id, "message_id": msg_id},
-                )
-                failed += 1
+            for msg_id in fetch_ids:
+                try:
+                    msg = get_message_content(service, msg_id)
+                    result = store_pending_receipt(
+                        connection_id,
+                        msg,
+                        service,
+                        force_reparse=force_reparse,
+                        duplicate_checked=True,
+                    )
+
+                    if result.get("stored"):
+                        parsed += 1
+                    elif result.get("duplicate"):
+                        duplicates += 1
+                    elif result.get("filtered"):
+                        filtered += 1
+
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to process message {msg_id}: {e}",
+                        extra={"sync_job_id": job_id, "message_id": msg_id},
+                    )
+                    failed += 1
 
-        # Update history ID
-        if latest_history_id:
-            database.update_gmail_history_id(connection_id, latest_history_id)
+            # Page committed: checkpoint history ID and progress
+            processed += len(new_message_ids)
+            if page["history_id"]:
+                database.update_gmail_history_id(connection_id, page["history_id"])
+            database.update_gmail_sync_job_progress(
+                job_id, new_messages, processed, parsed, failed
+            )
 
         # Update connection status
         database.update_gmail_connection_status(connection_id, "active")
@@ -946,7 +1276,7 @@ def sync_receipts_incremental(
         return {
             "status": "completed",
             "job_id": job_id,
-            "new_messages": len(new_message_ids),
+            "new_messages": new_messages,
             "parsed": parsed,
             "failed": failed,
             "duplicates": duplicates,
@@ -964,7 +1294,11 @@ def sync_receipts_incremental(
 
 
 def store_parsed_receipt(
-    connection_id: int, message: dict, service=None, force_reparse: bool = False
+    connection_id: int,
+    message: dict,
+    service=None,
+    force_reparse: bool = False,
+    duplicate_checked: bool = False,
 ) -> dict:
     """
     Parse email inline and store only extracted data (no raw body).
@@ -980,6 +1314,8 @@ def store_parsed_receipt(
         message: Parsed message dictionary from gmail_client
         service: Gmail API service (optional, for fetching PDF attachments)
         force_reparse: If True, re-parse existing emails (bypass duplicate check)
+        duplicate_checked: True if the caller already ran the page-level
+            known-ID check (skips the per-message lookup)
 
     Returns:
         Dictionary with 'stored', 'duplicate', or 'filtered' flag
@@ -1007,8 +1343,9 @@ def store_parsed_receipt(
             f"Failed to store email content: {e}", extra={"message_id": message_id}
         )
 
-    # Check for duplicate by message_id (skip if force_reparse is enabled)
-    if not force_reparse:
+    # Check for duplicate by message_id (skip if force_reparse is enabled or
+    # the caller already filtered known IDs for the whole page)
+    if not force_reparse and not duplicate_checked:
         existing = database.get_gmail_receipt_by_message_id(message_id)
         if existing:
             return {"duplicate": True, "message_id": message_id}
@@ -1085,7 +1422,7 @@ def store_parsed_receipt(
 
                     if pdf_bytes:
                         # Parse PDF to extract amount and other data
-                        pdf_data = parse_receipt_pdf(
+                        pdf_data = parse_receipt_pdf_cached(
                             pdf_bytes,
                             sender_domain=sender_domain,
                             filename=attachment.get("filename"),
@@ -1216,6 +1553,7 @@ def store_parsed_receipt(
             "x_mailer": message.get("x_mailer", ""),
             # NO body_html or body_text - that's the point!
         },
+        **parser_stamp(message, sender_email, sender_name, sender_domain),
     }
 
     # Compute receipt hash if we have key data
@@ -1233,6 +1571,7 @@ def store_parsed_receipt(
 
     # Store parsed receipt
     receipt_id = database.save_gmail_receipt(connection_id, message_id, receipt_data)
+    remember_message_ids(connection_id, [message_id])
 
     # Dispatch PDF processing task asynchronously (Phase 2 Optimization)
     # This eliminates 2-5s blocking per PDF receipt
@@ -1294,13 +1633,18 @@ def store_parsed_receipt(
 
 
 def prepare_receipt_data(
-    connection_id: int, message: dict, service=None, force_reparse: bool = False
+    connection_id: int,
+    message: dict,
+    service=None,
+    force_reparse: bool = False,
+    duplicate_checked: bool = False,
 ) -> dict:
     """
     Parse email and prepare data for bulk insert (Phase 3 Optimization).
 
     This is a non-writing version of store_parsed_receipt() that returns data
-    to be bulk inserted later.
+    to be bulk inserted later. Pass duplicate_checked=True when the page-level
+    known-ID check has already run.
 
     Returns:
         dict with 'action', 'message', 'email_content', 'receipt_data', 'pdf_task_info'
@@ -1325,8 +1669,9 @@ def prepare_receipt_data(
             "sender_domain": sender_domain,  # Required for statistics tracking
         }
 
-    # Check for duplicate by message_id (skip if force_reparse is enabled)
-    if not force_reparse:
+    # Check for duplicate by message_id (skip if force_reparse is enabled or
+    # the caller already filtered known IDs for the whole page)
+    if not force_reparse and not duplicate_checked:
         existing = database.get_gmail_receipt_by_message_id(message_id)
         if existing:
             return {
@@ -1410,7 +1755,7 @@ def prepare_receipt_data(
 
                     if pdf_bytes:
                         # Parse PDF to extract amount and other data
-                        pdf_data = parse_receipt_pdf(
+                        pdf_data = parse_receipt_pdf_cached(
                             pdf_bytes,
                             sender_domain=sender_domain,
                             filename=attachment.get("filename"),
@@ -1527,6 +1872,7 @@ def prepare_receipt_data(
             "list_unsubscribe": message.get("list_unsubscribe", ""),
             "x_mailer": message.get("x_mailer", ""),
         },
+        **parser_stamp(message, sender_email, sender_name, sender_domain),
     }
 
     # Compute receipt hash if we have key data
@@ -50,9 +50,10 @@ def get_vendor_parser(sender_domain: str) -> VendorParser | None:
     if sender_domain in VENDOR_PARSERS:
         return VENDOR_PARSERS[sender_domain]
 
-    # Check partial match (e.g., 'email.amazon.co.uk' matches 'amazon.co.uk')
+    # Check subdomain match on whole labels (e.g., 'email.amazon.co.uk'
+    # matches 'amazon.co.uk', but 'eba.com' must not match 'ba.com')
     for domain, parser in VENDOR_PARSERS.items():
-        if domain in sender_domain:
+        if sender_domain.endswith("." + domain):
             return parser
 
     return None
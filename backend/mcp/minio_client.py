@@ -107,6 +107,9 @@ def store_pdf(
         received_date: Date for organizing in bucket
         metadata: Optional metadata dict (merchant name, etc.)
 
+    Identical content is only uploaded once: if a PDF with the same hash is
+    already stored, its object is returned (with deduplicated=True) instead.
+
     Returns:
         Dict with object_key, content_hash, size_bytes, etag if successful.
         None if storage failed.
@@ -116,6 +119,24 @@ def store_pdf(
         if client is None:
             return None
 
+        # Compute hash for deduplication
+        content_hash = compute_pdf_hash(pdf_bytes)
+
+        stored = _find_stored_pdf(content_hash)
+        if stored:
+            logger.info(
+                f"PDF already stored as {stored['object_key']}, skipping upload"
+            )
+            return {
+                "bucket_name": MINIO_BUCKET,
+                "object_key": stored["object_key"],
+                "content_hash": content_hash,
+                "size_bytes": len(pdf_bytes),
+                "etag": stored["etag"],
+                "filename": filename,
+                "deduplicated": True,
+            }
+
         # Ensure bucket exists
         if not client.bucket_exists(MINIO_BUCKET):
             client.make_bucket(MINIO_BUCKET)
@@ -123,9 +144,6 @@ def store_pdf(
         # Generate object key
         object_key = generate_object_key(message_id, filename, received_date)
 
-        # Compute hash for deduplication
-        content_hash = compute_pdf_hash(pdf_bytes)
-
         # Prepare metadata
         minio_metadata = {
             "message-id": message_id,
@@ -150,6 +168,7 @@ def store_pdf(
         )
 
         logger.info(f"Stored PDF in MinIO: {object_key} ({len(pdf_bytes)} bytes)")
+        _record_storage_change(1, len(pdf_bytes), object_key, minio_metadata)
 
         return {
             "bucket_name": MINIO_BUCKET,
@@ -158,6 +177,7 @@ def store_pdf(
             "size_bytes": len(pdf_bytes),
             "etag": result.etag,
             "filename": filename,
+            "deduplicated": False,
         }
 
     except Exception as e:
@@ -221,6 +241,35 @@ def get_presigned_url(object_key: str, expires_hours: int = 1) -> str | None:
         return None
 
 
+def _find_stored_pdf(content_hash: str) -> dict | None:
+    """
+    Find a stored object with the given content hash.
+
+    The hash is looked up in pdf_attachments, then the object is confirmed
+    to still exist in MinIO.
+
+    Returns:
+        Dict with object_key and etag, or None if not stored.
+    """
+    from database.pdf import get_pdf_attachment_by_hash
+
+    attachment = get_pdf_attachment_by_hash(content_hash)
+    if not attachment:
+        return None
+
+    try:
+        client = _get_client()
+        if client is None:
+            return None
+
+        stat = client.stat_object(MINIO_BUCKET, attachment["object_key"])
+        return {"object_key": attachment["object_key"], "etag": stat.etag}
+
+    except Exception as e:
+        logger.warning(f"PDF {content_hash[:12]} recorded but not in MinIO: {e}")
+        return None
+
+
 def check_exists_by_hash(content_hash: str) -> str | None:
     """
     Check if a PDF with the given content hash already exists.
@@ -228,30 +277,52 @@ def check_exists_by_hash(content_hash: str) -> str | None:
     This is used for deduplication - if we already have this exact PDF,
     we can skip uploading and just reference the existing one.
 
-    Note: This requires a database lookup, not MinIO. Returns None here
-    as the database check is done in database_postgres.py.
+    Returns:
+        Object key of the stored PDF, or None if not stored.
     """
-    # Deduplication is handled at the database level
-    return None
+    stored = _find_stored_pdf(content_hash)
+    return stored["object_key"] if stored else None
 
 
 def delete_pdf(object_key: str) -> bool:
     """
-    Delete a PDF from MinIO.
+    Delete a PDF from MinIO once no attachment record references it.
+
+    Identical PDFs share one object (see store_pdf), so the object and its
+    storage counters are only removed after the last pdf_attachments row
+    pointing at it is gone. Delete the attachment record first.
 
     Args:
         object_key: S3 object key
 
     Returns:
-        True if deleted successfully, False otherwise.
+        True if the object was deleted, False if it is still referenced
+        or deletion failed.
     """
+    from database.pdf import count_pdf_attachments_for_object
+
     try:
+        references = count_pdf_attachments_for_object(object_key)
+        if references:
+            logger.info(
+                f"Keeping PDF in MinIO, {references} attachment(s) still "
+                f"reference it: {object_key}"
+            )
+            return False
+
         client = _get_client()
         if client is None:
             return False
 
+        try:
+            stat = client.stat_object(MINIO_BUCKET, object_key)
+        except Exception:
+            stat = None  # Already gone, so it isn't counted any more
+
         client.remove_object(MINIO_BUCKET, object_key)
         logger.info(f"Deleted PDF from MinIO: {object_key}")
+        if stat is not None:
+            _record_storage_change(-1, -stat.size, object_key, stat.metadata)
         return True
 
     except Exception as e:
@@ -259,33 +330,106 @@ def delete_pdf(object_key: str) -> bool:
         return False
 
 
+def _storage_scope_keys(object_key: str, metadata) -> tuple[str, str]:
+    """
+    Vendor and month counters an object is counted under.
+
+    The vendor is the merchant recorded in the object metadata and the month
+    comes from the YYYY/MM prefix of the object key.
+    """
+    merchant = None
+    for key, value in (metadata or {}).items():
+        if key.lower() in ("merchant", "x-amz-meta-merchant"):
+            merchant = value
+    vendor = (merchant or "unknown").strip().lower()[:255]
+
+    parts = object_key.split("/")
+    if len(parts) > 2 and parts[0].isdigit() and parts[1].isdigit():
+        month = f"{parts[0]}-{parts[1]}"
+    else:
+        month = "unknown"
+    return vendor, month
+
+
+def _record_storage_change(
+    count_delta: int, size_delta: int, object_key: str, metadata
+) -> None:
+    """Apply a stored or deleted object to the storage counters."""
+    from database.pdf import update_pdf_storage_stats
+
+    vendor, month = _storage_scope_keys(object_key, metadata)
+    try:
+        update_pdf_storage_stats(count_delta, size_delta, vendor, month)
+    except Exception as e:
+        # The next reconciliation corrects the counters
+        logger.warning(f"Failed to update storage counters for {object_key}: {e}")
+
+
 def get_storage_stats() -> dict | None:
     """
     Get storage statistics for the receipts bucket.
 
+    Reads the counters kept by store_pdf() and delete_pdf(), so the cost does
+    not grow with the bucket. Counters that were never filled are seeded by
+    reconcile_storage_stats() on first use.
+
+    Returns:
+        Dict with object_count, total_size_bytes, by_vendor and by_month if
+        successful.
+    """
+    try:
+        from database.pdf import get_pdf_storage_counters
+
+        counters = get_pdf_storage_counters()
+        if counters is None:
+            return reconcile_storage_stats()
+
+        return {**counters, "bucket_name": MINIO_BUCKET}
+
+    except Exception as e:
+        logger.error(f"Failed to get storage stats: {e}")
+        return None
+
+
+def reconcile_storage_stats() -> dict | None:
+    """
+    Recount the receipts bucket and overwrite the storage counters.
+
+    Lists every object, so it runs occasionally (reconcile_pdf_storage_stats_task)
+    to correct drift from failed counter updates or objects changed outside
+    the app.
+
     Returns:
-        Dict with object_count and total_size_bytes if successful.
+        The reconciled storage statistics, or None if MinIO is unavailable.
     """
     try:
         client = _get_client()
         if client is None:
             return None
 
-        objects = client.list_objects(MINIO_BUCKET, recursive=True)
-
-        count = 0
-        total_size = 0
+        from database.pdf import get_pdf_storage_counters, replace_pdf_storage_stats
 
+        scopes = {"total": {"": (0, 0)}, "vendor": {}, "month": {}}
+        objects = client.list_objects(
+            MINIO_BUCKET, recursive=True, include_user_meta=True
+        )
         for obj in objects:
-            count += 1
-            total_size += obj.size
-
-        return {
-            "object_count": count,
-            "total_size_bytes": total_size,
-            "bucket_name": MINIO_BUCKET,
-        }
+            vendor, month = _storage_scope_keys(obj.object_name, obj.metadata)
+            for scope, scope_key in (
+                ("total", ""),
+                ("vendor", vendor),
+                ("month", month),
+            ):
+                count, size = scopes[scope].get(scope_key, (0, 0))
+                scopes[scope][scope_key] = (count + 1, size + obj.size)
+
+        replace_pdf_storage_stats(scopes)
+        logger.info(
+            f"Reconciled storage counters: {scopes['total'][''][0]} objects, "
+            f"{scopes['total'][''][1]} bytes"
+        )
+        return {**get_pdf_storage_counters(), "bucket_name": MINIO_BUCKET}
 
     except Exception as e:
-        logger.error(f"Failed to get storage stats: {e}")
+        logger.error(f"Failed to reconcile storage stats: {e}")
         return None
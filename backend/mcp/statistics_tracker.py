@@ -21,6 +21,9 @@ Usage:
         duration_ms=150
     )
 
+    # Write buffered per-message statistics (e.g. after each batch)
+    stats.flush_buffers()
+
     # Flush aggregated stats to database at end of sync
     stats.flush()
 """
@@ -29,7 +32,9 @@ from collections import defaultdict
 from typing import Any
 
 import database as db
+from mcp.error_tracking import flush_errors
 from mcp.logging_config import get_logger
+from mcp.telemetry_buffer import BufferedSink
 
 logger = get_logger(__name__)
 
@@ -84,6 +89,11 @@ class GmailSyncStatistics:
         self.parse_durations = []
         self.total_llm_cost_cents = 0
 
+        # Per-message statistics, written in bulk (see flush_buffers)
+        self._parse_statistics = BufferedSink(
+            "gmail_parse_statistics", self._write_parse_statistics
+        )
+
     def record_parse_attempt(
         self,
         message_id: str,
@@ -134,6 +144,7 @@ class GmailSyncStatistics:
             self.by_merchant[merchant]["failed"] += 1
 
         # Track datapoint extraction (user requirement)
+        datapoints = {}
         if parse_result:
             datapoints = self._extract_datapoint_flags(parse_result)
 
@@ -149,43 +160,45 @@ class GmailSyncStatistics:
         if llm_cost_cents is not None:
             self.total_llm_cost_cents += llm_cost_cents
 
-        # Save detailed statistics to database for message-level analytics
-        try:
-            db.save_gmail_parse_statistic(
-                connection_id=self.connection_id,
-                sync_job_id=self.sync_job_id,
-                message_id=message_id,
-                sender_domain=sender_domain,
-                merchant_normalized=merchant,
-                parse_method=parse_method,
-                merchant_extracted=datapoints.get("merchant", False)
-                if parse_result
-                else False,
-                brand_extracted=datapoints.get("brand", False)
-                if parse_result
-                else False,
-                amount_extracted=datapoints.get("amount", False)
-                if parse_result
-                else False,
-                date_extracted=datapoints.get("date", False) if parse_result else False,
-                order_id_extracted=datapoints.get("order_id", False)
-                if parse_result
-                else False,
-                line_items_extracted=datapoints.get("line_items", False)
-                if parse_result
-                else False,
-                parse_duration_ms=duration_ms,
-                llm_cost_cents=llm_cost_cents,
-                parsing_status=status,
-                parsing_error=parse_result.get("parsing_error")
+        # Buffer detailed statistics for message-level analytics
+        self._parse_statistics.add(
+            {
+                "connection_id": self.connection_id,
+                "sync_job_id": self.sync_job_id,
+                "message_id": message_id,
+                "sender_domain": sender_domain,
+                "merchant_normalized": merchant,
+                "parse_method": parse_method,
+                "merchant_extracted": datapoints.get("merchant", False),
+                "brand_extracted": datapoints.get("brand", False),
+                "amount_extracted": datapoints.get("amount", False),
+                "date_extracted": datapoints.get("date", False),
+                "order_id_extracted": datapoints.get("order_id", False),
+                "line_items_extracted": datapoints.get("line_items", False),
+                "parse_duration_ms": duration_ms,
+                "llm_cost_cents": llm_cost_cents,
+                "parsing_status": status,
+                "parsing_error": parse_result.get("parsing_error")
                 if parse_result
                 else "Parse failed",
-            )
-        except Exception as e:
-            # Don't let statistics tracking crash sync
-            logger.warning(
-                f"Failed to save parse statistic: {e}",
-                extra={"sync_job_id": self.sync_job_id, "message_id": message_id},
+            }
+        )
+
+    def _write_parse_statistics(self, rows: list) -> None:
+        """Write buffered per-message statistics with one bulk insert."""
+        db.save_gmail_parse_statistics_bulk(rows)
+
+    def flush_buffers(self) -> None:
+        """Write buffered per-message statistics and processing errors.
+
+        Called after each committed sync batch; flush() calls it as well.
+        """
+        written = self._parse_statistics.flush()
+        errors = flush_errors()
+        if written or errors:
+            logger.debug(
+                f"Flushed {written} parse statistics and {errors} errors",
+                extra={"sync_job_id": self.sync_job_id},
             )
 
     def record_error(self, error_type: str) -> None:
@@ -234,10 +247,12 @@ class GmailSyncStatistics:
         }
 
     def flush(self) -> None:
-        """Save aggregated statistics to sync job.
+        """Save buffered rows and aggregated statistics to sync job.
 
-        Should be called at the end of sync to persist all collected stats.
+        Should be called at the end of sync (including a failed one) to
+        persist all collected stats.
         """
+        self.flush_buffers()
         try:
             stats_dict = self.to_dict()
             db.update_gmail_sync_job_stats(self.sync_job_id, stats_dict)
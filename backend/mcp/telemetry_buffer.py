@@ -0,0 +1,132 @@
+"""Buffered, batched sinks for Gmail sync telemetry.
+
+Parse statistics and processing errors used to be written to Postgres one
+row at a time from inside the sync and parse loops. A BufferedSink collects
+the rows in memory and writes them with a single bulk insert when:
+- the buffer reaches GMAIL_TELEMETRY_BUFFER_SIZE rows
+- the oldest buffered row is older than GMAIL_TELEMETRY_FLUSH_SECONDS
+  (checked whenever a row is added)
+- the owner flushes it (end of a sync batch or job)
+- a Celery task finishes (celery_app flushes every sink on task_postrun)
+- the process exits
+
+Telemetry is best effort: a failed write is logged and its rows dropped, so
+the buffer stays bounded and never breaks the sync.
+
+Usage:
+    from mcp.telemetry_buffer import BufferedSink
+
+    sink = BufferedSink("gmail_parse_statistics", database.save_gmail_parse_statistics_bulk)
+    sink.add({...})
+    sink.flush()
+"""
+
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections.abc import Callable
+
+from mcp.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Rows held before a sink writes them out
+TELEMETRY_BUFFER_SIZE = int(os.getenv("GMAIL_TELEMETRY_BUFFER_SIZE", "500"))
+
+# Maximum age of a buffered row before the next add() flushes the sink
+TELEMETRY_FLUSH_SECONDS = float(os.getenv("GMAIL_TELEMETRY_FLUSH_SECONDS", "10"))
+
+_sinks = weakref.WeakSet()
+
+
+class BufferedSink:
+    """Collects rows in memory and writes them with one bulk call.
+
+    Attributes:
+        name: Sink name (for logging)
+        writer: Callable taking a list of row dicts
+        max_rows: Buffer size that triggers a flush
+        max_age_seconds: Row age that triggers a flush
+    """
+
+    def __init__(
+        self,
+        name: str,
+        writer: Callable[[list], object],
+        max_rows: int = None,
+        max_age_seconds: float = None,
+    ):
+        """Initialize the sink.
+
+        Args:
+            name: Sink name (for logging)
+            writer: Callable taking a list of row dicts (one bulk insert)
+            max_rows: Buffer size that triggers a flush
+                (defaults to GMAIL_TELEMETRY_BUFFER_SIZE)
+            max_age_seconds: Row age that triggers a flush
+                (defaults to GMAIL_TELEMETRY_FLUSH_SECONDS)
+        """
+        self.name = name
+        self.writer = writer
+        self.max_rows = max(1, max_rows or TELEMETRY_BUFFER_SIZE)
+        self.max_age_seconds = (
+            TELEMETRY_FLUSH_SECONDS if max_age_seconds is None else max_age_seconds
+        )
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        _sinks.add(self)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, row: dict) -> None:
+        """Buffer a row, flushing when the buffer is full or stale.
+
+        Args:
+            row: Row dict in the form the writer expects
+        """
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.append(row)
+            due = (
+                len(self._rows) >= self.max_rows
+                or time.monotonic() - self._oldest >= self.max_age_seconds
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered rows with one writer call.
+
+        Returns:
+            Number of rows written (0 if the buffer was empty or the write failed)
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._oldest = None
+        if not rows:
+            return 0
+
+        try:
+            self.writer(rows)
+            return len(rows)
+        except Exception as e:
+            # Don't let telemetry crash the sync; drop the rows to stay bounded
+            logger.warning(f"Failed to flush {len(rows)} {self.name} rows: {e}")
+            return 0
+
+
+def flush_all_sinks() -> int:
+    """Flush every live sink in this process.
+
+    Returns:
+        Total number of rows written
+    """
+    return sum(sink.flush() for sink in list(_sinks))
+
+
+atexit.register(flush_all_sinks)
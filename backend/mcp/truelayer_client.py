@@ -3,18 +3,39 @@ TrueLayer API Client
 
 Wrapper for TrueLayer Data API endpoints.
 Handles account information, transaction fetching, and balance queries.
+
+TrueLayerClient sends its requests through one process-wide requests
+session, so calls reuse pooled keep-alive connections instead of opening a
+new TCP+TLS connection each time. AsyncTrueLayerClient is the httpx-based
+async variant: fetch_connections_data() uses it to fetch the balances, cards,
+pending and settled transactions of many accounts concurrently, with at most
+TRUELAYER_PROVIDER_CONCURRENCY requests in flight per bank.
+
+Requests are logged at DEBUG level (method, path, status, time, size).
+
+A TrueLayerClient given an on_unauthorized callback survives its access
+token expiring mid-run: a 401 response asks the callback for a fresh token
+and the request is retried once with it.
 """
 
+import asyncio
+import logging
 import os
+import threading
 import time
+from collections.abc import Callable, Iterator
 from datetime import datetime, timedelta
 
+import httpx
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # Load environment variables (Docker env vars take precedence)
 load_dotenv(override=False)
 
+logger = logging.getLogger(__name__)
+
 TRUELAYER_ENV = os.getenv("TRUELAYER_ENVIRONMENT", "sandbox")
 
 # API URLs
@@ -23,24 +44,146 @@ if TRUELAYER_ENV == "production":
 else:
     TRUELAYER_API_URL = "https://api.sandbox.truelayer.com"
 
+# Seconds to wait for a TrueLayer response (providers can be slow)
+TRUELAYER_HTTP_TIMEOUT = float(os.getenv("TRUELAYER_HTTP_TIMEOUT", "30"))
+# Keep-alive connections pooled per process
+TRUELAYER_HTTP_POOL_SIZE = int(os.getenv("TRUELAYER_HTTP_POOL_SIZE", "10"))
+# Concurrent requests per bank; EU banks throttle unattended calls
+TRUELAYER_PROVIDER_CONCURRENCY = int(os.getenv("TRUELAYER_PROVIDER_CONCURRENCY", "2"))
+
+# Rate-limited (429) requests are retried after 2s, then 4s
+MAX_RETRIES = 3
+RETRY_DELAY_SECONDS = 2
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide session for TrueLayer requests.
+
+    Created on first use (after a worker forks) and shared by all clients
+    and threads; the access token is sent per request, not on the session.
+
+    Returns:
+        requests.Session with a pooled HTTPS adapter
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.mount(
+                "https://",
+                HTTPAdapter(
+                    pool_connections=TRUELAYER_HTTP_POOL_SIZE,
+                    pool_maxsize=TRUELAYER_HTTP_POOL_SIZE,
+                ),
+            )
+            _session = session
+        return _session
+
+
+def _retry_wait(attempt: int) -> int:
+    """Seconds to wait before retrying a rate-limited request."""
+    return RETRY_DELAY_SECONDS * (2**attempt)
+
+
+def _error_type(response) -> str:
+    """TrueLayer error code of a failed response."""
+    try:
+        return response.json().get("error", "provider_too_many_requests")
+    except Exception:
+        return "provider_too_many_requests"
+
+
+def _log_response(method: str, endpoint: str, params, status: int, started, size):
+    """Log a completed request at DEBUG level."""
+    logger.debug(
+        "TrueLayer %s %s params=%s -> %s in %.2fs (%d bytes)",
+        method,
+        endpoint,
+        params,
+        status,
+        time.monotonic() - started,
+        size,
+    )
+
+
+def _page_params(from_date, to_date, limit: int, cursor) -> dict:
+    """Query parameters of a paginated request."""
+    params = {"limit": limit}
+    if from_date:
+        params["from"] = from_date
+    if to_date:
+        params["to"] = to_date
+    if cursor:
+        params["cursor"] = cursor
+    return params
+
+
+def _page_results(response) -> tuple[list | None, str | None]:
+    """Results (None if unrecognised) and next cursor of a paginated response."""
+    if isinstance(response, list):
+        # If response is a direct array
+        return response, None
+    if not isinstance(response, dict):
+        return None, None
+
+    # Try common key names for transaction list
+    results = None
+    for key in ["results", "data", "transactions", "items"]:
+        if key in response:
+            results = response.get(key, [])
+            break
+
+    # Check for pagination cursor/token
+    next_cursor = (
+        response.get("next_cursor") or response.get("cursor") or response.get("next")
+    )
+    return results, next_cursor
+
 
 class TrueLayerClient:
     """Client for TrueLayer Data API."""
 
-    def __init__(self, access_token: str):
+    def __init__(
+        self,
+        access_token: str,
+        timeout: float | None = None,
+        on_unauthorized: Callable[[str], str | None] | None = None,
+    ):
         """
         Initialize TrueLayer API client.
 
         Args:
             access_token: Valid OAuth access token
+            timeout: Request timeout in seconds (default: TRUELAYER_HTTP_TIMEOUT)
+            on_unauthorized: Called with the rejected token when a request
+                gets a 401; returns a fresh access token (or None to give up)
         """
-        self.access_token = access_token
         self.base_url = TRUELAYER_API_URL
+        self.timeout = timeout or TRUELAYER_HTTP_TIMEOUT
+        self.on_unauthorized = on_unauthorized
+        self._set_token(access_token)
+
+    def _set_token(self, access_token: str) -> None:
+        self.access_token = access_token
         self.headers = {
             "Authorization": f"Bearer {access_token}",
             "Accept": "application/json",
         }
 
+    def _reauthorize(self) -> bool:
+        """Swap in a fresh access token after a 401, if one can be had."""
+        if not self.on_unauthorized:
+            return False
+        access_token = self.on_unauthorized(self.access_token)
+        if not access_token or access_token == self.access_token:
+            return False
+        self._set_token(access_token)
+        return True
+
     def _make_request(self, method: str, endpoint: str, **kwargs) -> dict:
         """
         Make HTTP request to TrueLayer API with automatic retry on rate limits.
@@ -49,6 +192,9 @@ class TrueLayerClient:
         - Provider-level rate limits (EU banks)
         - TrueLayer unattended call limits
 
+        A 401 (expired or revoked token) is retried once with a token from
+        on_unauthorized.
+
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint path
@@ -61,113 +207,61 @@ class TrueLayerClient:
             requests.RequestException: After max retries or for non-retryable errors
         """
         url = f"{self.base_url}{endpoint}"
-        max_retries = 3
-        retry_delay = 2  # Start with 2 seconds
+        reauthorized = False
 
-        for attempt in range(max_retries):
+        # One pass more than the 429 retries, for the retry after a 401
+        for attempt in range(MAX_RETRIES + 1):
+            started = time.monotonic()
             try:
-                if attempt > 0:
-                    print(f"   🔄 Retry attempt {attempt + 1}/{max_retries}")
-
-                print(f"   🌐 Request: {method} {url}")
-                print(
-                    f"   🌐 Headers: Authorization=Bearer {self.access_token[:20]}..."
-                )
-                if "params" in kwargs:
-                    print(f"   🌐 Query params: {kwargs['params']}")
-
-                response = requests.request(
-                    method, url, headers=self.headers, timeout=10, **kwargs
+                response = get_http_session().request(
+                    method, url, headers=self.headers, timeout=self.timeout, **kwargs
                 )
                 response.raise_for_status()
-                json_response = response.json()
-                print(f"   🌐 Status: {response.status_code}")
-                print(f"   🌐 Response size: {len(str(json_response))} bytes")
-
-                # Log response structure for debugging
-                if isinstance(json_response, dict):
-                    print(f"   🌐 Response keys: {list(json_response.keys())}")
-                    # Log the structure of top-level response
-                    for key in list(json_response.keys())[:5]:  # First 5 keys
-                        val = json_response[key]
-                        if isinstance(val, list):
-                            print(f"   🌐   - '{key}': list with {len(val)} items")
-                            if val and isinstance(val[0], dict):
-                                print(
-                                    f"   🌐     First item keys: {list(val[0].keys())}"
-                                )
-                        elif isinstance(val, dict):
-                            print(
-                                f"   🌐   - '{key}': dict with keys {list(val.keys())}"
-                            )
-                        else:
-                            print(f"   🌐   - '{key}': {type(val).__name__}")
-                elif isinstance(json_response, list):
-                    print(
-                        f"   🌐 Response is direct array with {len(json_response)} items"
-                    )
-                    if json_response and isinstance(json_response[0], dict):
-                        print(f"   🌐 First item keys: {list(json_response[0].keys())}")
-
-                return json_response
 
             except requests.HTTPError as e:
+                status = e.response.status_code
                 # Handle rate limiting (429) with exponential backoff
-                if e.response.status_code == 429:
-                    if attempt < max_retries - 1:
-                        # Exponential backoff: 2s, 4s, 8s
-                        wait_time = retry_delay * (2**attempt)
-                        error_type = "provider_too_many_requests"  # Default
-
-                        # Try to parse error type from response
-                        try:
-                            error_data = e.response.json()
-                            error_type = error_data.get(
-                                "error", "provider_too_many_requests"
-                            )
-                        except Exception:  # Fixed: was bare except
-                            pass
-
-                        print(
-                            f"⚠️  Rate limited (429: {error_type}), retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})"
-                        )
-                        time.sleep(wait_time)
-                        continue  # Retry
-                    # Max retries exceeded
-                    print(
-                        f"❌ Rate limit persists after {max_retries} attempts, giving up"
+                if status == 429 and attempt < MAX_RETRIES - 1:
+                    wait_time = _retry_wait(attempt)
+                    logger.warning(
+                        f"Rate limited (429: {_error_type(e.response)}) on "
+                        f"{method} {endpoint}, retrying in {wait_time}s "
+                        f"(attempt {attempt + 1}/{MAX_RETRIES})"
                     )
-                    print(f"   Status code: {e.response.status_code}")
-                    try:
-                        print(f"   Response: {e.response.text}")
-                    except Exception:  # Fixed: was bare except
-                        pass
-                    raise  # Re-raise to caller
-
-                # Non-retryable error (not 429)
-                print(f"❌ API request failed: {method} {endpoint}")
-                print(f"   Error: {e}")
-                print(f"   Status code: {e.response.status_code}")
-                try:
-                    print(f"   Response: {e.response.text}")
-                except Exception:  # Fixed: was bare except
-                    pass
+                    time.sleep(wait_time)
+                    continue
+
+                if status == 401 and not reauthorized and self._reauthorize():
+                    reauthorized = True
+                    logger.warning(
+                        f"Access token rejected (401) on {method} {endpoint}, "
+                        "retrying with a refreshed token"
+                    )
+                    continue
+
+                logger.error(
+                    f"TrueLayer request failed: {method} {endpoint} -> {status}: "
+                    f"{e.response.text[:500]}"
+                )
                 raise
 
             except requests.RequestException as e:
                 # Network errors, timeouts, etc.
-                print(f"❌ API request failed: {method} {endpoint}")
-                print(f"   Error: {e}")
-                if hasattr(e, "response") and e.response is not None:
-                    print(f"   Status code: {e.response.status_code}")
-                    try:
-                        print(f"   Response: {e.response.text}")
-                    except Exception:  # Fixed: was bare except
-                        pass
+                logger.error(f"TrueLayer request failed: {method} {endpoint}: {e}")
                 raise
 
+            _log_response(
+                method,
+                endpoint,
+                kwargs.get("params"),
+                response.status_code,
+                started,
+                len(response.content),
+            )
+            return response.json()
+
         # This should never be reached, but just in case
-        raise requests.RequestException(f"Failed after {max_retries} attempts")
+        raise requests.RequestException(f"Failed after {MAX_RETRIES} attempts")
 
     def get_me(self) -> dict:
         """Get authenticated user information."""
@@ -227,101 +321,122 @@ class TrueLayerClient:
         results = response.get("results", [])
         return results[0] if results else {}
 
-    def get_transactions(
+    def _iter_pages(
         self,
-        account_id: str,
+        endpoint: str,
         from_date: str | None = None,
         to_date: str | None = None,
         limit: int = 100,
-    ) -> list[dict]:
+        cursor: str | None = None,
+    ) -> Iterator[tuple[list[dict], str | None]]:
         """
-        Get transactions for an account with automatic pagination.
+        Yield the results of a paginated endpoint a page at a time.
+
+        Each page comes with the cursor of the page after it (None after the
+        last page). The cursor only lives in the iterator, so one client can
+        page through several accounts at once. Request errors propagate
+        instead of silently ending the iteration.
 
         Args:
-            account_id: TrueLayer account ID
+            endpoint: API endpoint path
             from_date: Start date (YYYY-MM-DD)
             to_date: End date (YYYY-MM-DD)
-            limit: Page size (default: 100, max per request)
+            limit: Page size
+            cursor: Cursor of the page to start from (None: first page)
 
-        Returns:
-            List of ALL transaction dictionaries (paginated automatically)
+        Yields:
+            Tuples of (raw results of the page, cursor of the next page)
+
+        Raises:
+            ValueError: If a response has no results or its cursor doesn't advance
         """
-        all_transactions = []
         page = 1
-        max_pages = 50  # Safety limit to prevent infinite loops
 
-        while page <= max_pages:
-            params = {"limit": limit}
+        while True:
+            response = self._make_request(
+                "GET",
+                endpoint,
+                params=_page_params(from_date, to_date, limit, cursor),
+            )
+            results, next_cursor = _page_results(response)
 
-            if from_date:
-                params["from"] = from_date
-            if to_date:
-                params["to"] = to_date
+            if results is None:
+                raise ValueError(f"Could not find results in {endpoint} page {page}")
 
-            # Add cursor for pagination (if we have one from previous page)
-            if page > 1 and hasattr(self, "_last_cursor") and self._last_cursor:
-                params["cursor"] = self._last_cursor
+            if len(results) == 0:
+                print(f"   ✅ Page {page}: No more transactions")
+                return
 
-            try:
-                response = self._make_request(
-                    "GET", f"/data/v1/accounts/{account_id}/transactions", params=params
-                )
+            if next_cursor and next_cursor == cursor:
+                raise ValueError(f"Pagination cursor of {endpoint} did not advance")
 
-                # Handle multiple possible response structures
-                transactions = None
-                next_cursor = None
-
-                if isinstance(response, list):
-                    # If response is a direct array
-                    transactions = response
-                elif isinstance(response, dict):
-                    # Try common key names for transaction list
-                    for key in ["results", "data", "transactions", "items"]:
-                        if key in response:
-                            transactions = response.get(key, [])
-                            break
-
-                    # Check for pagination cursor/token
-                    next_cursor = (
-                        response.get("next_cursor")
-                        or response.get("cursor")
-                        or response.get("next")
-                    )
+            print(f"   ✅ Page {page}: Fetched {len(results)} transactions")
+            yield results, next_cursor
 
-                if transactions is None:
-                    print(f"⚠️  Could not find transactions in response page {page}")
-                    break
-
-                if len(transactions) == 0:
-                    print(f"   ✅ Page {page}: No more transactions")
-                    break
-
-                print(f"   ✅ Page {page}: Fetched {len(transactions)} transactions")
-                all_transactions.extend(transactions)
-
-                # Check if there are more pages
-                if len(transactions) < limit and not next_cursor:
-                    # Less than full page and no cursor = end of results
-                    break
-
-                if next_cursor:
-                    self._last_cursor = next_cursor
-                    page += 1
-                elif len(transactions) == limit:
-                    # Full page but no cursor - try one more page with offset
-                    # (some APIs use offset instead of cursor)
-                    page += 1
-                else:
-                    # Partial page and no cursor - we're done
-                    break
+            if not next_cursor:
+                return
 
-            except Exception as e:
-                print(f"❌ Error fetching transactions page {page}: {e}")
-                break
+            cursor = next_cursor
+            page += 1
+
+    def iter_transaction_pages(
+        self,
+        account_id: str,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> Iterator[tuple[list[dict], str | None]]:
+        """
+        Yield an account's transactions a page at a time.
+
+        Callers store each page before asking for the next one and can record
+        the cursor that comes with it to resume from later.
+
+        Args:
+            account_id: TrueLayer account ID
+            from_date: Start date (YYYY-MM-DD)
+            to_date: End date (YYYY-MM-DD)
+            limit: Page size (default: 100, max per request)
+            cursor: Cursor of the page to start from (None: first page)
 
-        print(
-            f"   📦 Total transactions fetched: {len(all_transactions)} (across {page} page(s))"
+        Yields:
+            Tuples of (raw transactions, cursor of the next page or None)
+        """
+        return self._iter_pages(
+            f"/data/v1/accounts/{account_id}/transactions",
+            from_date,
+            to_date,
+            limit,
+            cursor,
         )
+
+    def get_transactions(
+        self,
+        account_id: str,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        limit: int = 100,
+    ) -> list[dict]:
+        """
+        Get transactions for an account with automatic pagination.
+
+        Args:
+            account_id: TrueLayer account ID
+            from_date: Start date (YYYY-MM-DD)
+            to_date: End date (YYYY-MM-DD)
+            limit: Page size (default: 100, max per request)
+
+        Returns:
+            List of ALL transaction dictionaries (paginated automatically)
+        """
+        all_transactions = []
+        for transactions, _ in self.iter_transaction_pages(
+            account_id, from_date, to_date, limit
+        ):
+            all_transactions.extend(transactions)
+
+        print(f"   📦 Total transactions fetched: {len(all_transactions)}")
         return all_transactions
 
     def get_pending_transactions(self, account_id: str) -> list[dict]:
@@ -365,6 +480,35 @@ class TrueLayerClient:
         results = response.get("results", [])
         return results[0] if results else {}
 
+    def iter_card_transaction_pages(
+        self,
+        card_id: str,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> Iterator[tuple[list[dict], str | None]]:
+        """
+        Yield a card's transactions a page at a time.
+
+        Args:
+            card_id: TrueLayer card ID
+            from_date: Start date (YYYY-MM-DD)
+            to_date: End date (YYYY-MM-DD)
+            limit: Page size (default: 100, max per request)
+            cursor: Cursor of the page to start from (None: first page)
+
+        Yields:
+            Tuples of (raw transactions, cursor of the next page or None)
+        """
+        return self._iter_pages(
+            f"/data/v1/cards/{card_id}/transactions",
+            from_date,
+            to_date,
+            limit,
+            cursor,
+        )
+
     def get_card_transactions(
         self,
         card_id: str,
@@ -373,28 +517,23 @@ class TrueLayerClient:
         limit: int = 100,
     ) -> list[dict]:
         """
-        Get transactions for a card.
+        Get transactions for a card with automatic pagination.
 
         Args:
             card_id: TrueLayer card ID
             from_date: Start date (YYYY-MM-DD)
             to_date: End date (YYYY-MM-DD)
-            limit: Maximum transactions to retrieve
+            limit: Page size (default: 100, max per request)
 
         Returns:
             List of transaction dictionaries
         """
-        params = {"limit": limit}
-
-        if from_date:
-            params["from"] = from_date
-        if to_date:
-            params["to"] = to_date
-
-        response = self._make_request(
-            "GET", f"/data/v1/cards/{card_id}/transactions", params=params
-        )
-        return response.get("results", [])
+        all_transactions = []
+        for transactions, _ in self.iter_card_transaction_pages(
+            card_id, from_date, to_date, limit
+        ):
+            all_transactions.extend(transactions)
+        return all_transactions
 
     def normalize_transaction(self, truelayer_txn: dict) -> dict:
         """
@@ -559,3 +698,319 @@ class TrueLayerClient:
         except Exception as e:
             print(f"❌ Error fetching card transactions: {e}")
             return []
+
+
+class ProviderLimits:
+    """
+    Per-bank caps on concurrent TrueLayer requests.
+
+    Clients of connections to the same provider share one semaphore, so a
+    bank sees at most `concurrency` requests at a time however many accounts
+    are being fetched.
+    """
+
+    def __init__(self, concurrency: int | None = None):
+        """
+        Initialize provider limits.
+
+        Args:
+            concurrency: Requests per provider (default: TRUELAYER_PROVIDER_CONCURRENCY)
+        """
+        self.concurrency = concurrency or TRUELAYER_PROVIDER_CONCURRENCY
+        self._semaphores = {}
+
+    def for_provider(self, provider_id: str | None) -> asyncio.Semaphore:
+        """Get the semaphore of a provider (connections without one share one)."""
+        if provider_id not in self._semaphores:
+            self._semaphores[provider_id] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[provider_id]
+
+
+class AsyncTrueLayerClient:
+    """
+    Async client for TrueLayer Data API, built on httpx.
+
+    Clients share an httpx.AsyncClient (and its connection pool); requests
+    hold the provider's semaphore while in flight, but not while backing
+    off from a rate limit.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        http: httpx.AsyncClient,
+        limit: asyncio.Semaphore | None = None,
+    ):
+        """
+        Initialize async TrueLayer API client.
+
+        Args:
+            access_token: Valid OAuth access token
+            http: Shared httpx client (base URL and timeout are set on it)
+            limit: Semaphore capping concurrent requests to this provider
+        """
+        self.http = http
+        self.limit = limit or asyncio.Semaphore(TRUELAYER_PROVIDER_CONCURRENCY)
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json",
+        }
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> dict:
+        """
+        Make HTTP request to TrueLayer API with automatic retry on rate limits.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint path
+            **kwargs: Additional arguments to pass to httpx
+
+        Returns:
+            JSON response from API
+
+        Raises:
+            httpx.HTTPError: After max retries or for non-retryable errors
+        """
+        for attempt in range(MAX_RETRIES):
+            started = time.monotonic()
+            async with self.limit:
+                response = await self.http.request(
+                    method, endpoint, headers=self.headers, **kwargs
+                )
+
+            if response.status_code == 429 and attempt < MAX_RETRIES - 1:
+                wait_time = _retry_wait(attempt)
+                logger.warning(
+                    f"Rate limited (429: {_error_type(response)}) on "
+                    f"{method} {endpoint}, retrying in {wait_time}s "
+                    f"(attempt {attempt + 1}/{MAX_RETRIES})"
+                )
+                await asyncio.sleep(wait_time)
+                continue
+
+            if response.is_error:
+                logger.error(
+                    f"TrueLayer request failed: {method} {endpoint} -> "
+                    f"{response.status_code}: {response.text[:500]}"
+                )
+            response.raise_for_status()
+
+            _log_response(
+                method,
+                endpoint,
+                kwargs.get("params"),
+                response.status_code,
+                started,
+                len(response.content),
+            )
+            return response.json()
+
+        # This should never be reached, but just in case
+        raise httpx.HTTPError(f"Failed after {MAX_RETRIES} attempts")
+
+    async def _get_results(self, endpoint: str) -> list[dict]:
+        """Get the results list of an endpoint."""
+        response = await self._make_request("GET", endpoint)
+        return response.get("results", [])
+
+    async def _get_all_pages(
+        self, endpoint: str, from_date: str | None, to_date: str | None
+    ) -> list[dict]:
+        """Get the results of every page of a paginated endpoint."""
+        all_results = []
+        cursor = None
+
+        while True:
+            response = await self._make_request(
+                "GET", endpoint, params=_page_params(from_date, to_date, 100, cursor)
+            )
+            results, next_cursor = _page_results(response)
+            if results is None:
+                raise ValueError(f"Could not find results in {endpoint}")
+            if not results:
+                return all_results
+            if next_cursor and next_cursor == cursor:
+                raise ValueError(f"Pagination cursor of {endpoint} did not advance")
+
+            all_results.extend(results)
+            if not next_cursor:
+                return all_results
+            cursor = next_cursor
+
+    async def get_accounts(self) -> list[dict]:
+        """Get list of connected bank accounts."""
+        return await self._get_results("/data/v1/accounts")
+
+    async def get_cards(self) -> list[dict]:
+        """Get list of connected credit/debit cards."""
+        return await self._get_results("/data/v1/cards")
+
+    async def get_account_balance(self, account_id: str) -> dict:
+        """Get current balance for an account."""
+        results = await self._get_results(f"/data/v1/accounts/{account_id}/balance")
+        return results[0] if results else {}
+
+    async def get_card_balance(self, card_id: str) -> dict:
+        """Get current balance for a card."""
+        results = await self._get_results(f"/data/v1/cards/{card_id}/balance")
+        return results[0] if results else {}
+
+    async def get_pending_transactions(self, account_id: str) -> list[dict]:
+        """Get pending transactions for an account."""
+        return await self._get_results(
+            f"/data/v1/accounts/{account_id}/transactions/pending"
+        )
+
+    async def get_card_pending_transactions(self, card_id: str) -> list[dict]:
+        """Get pending transactions for a card."""
+        return await self._get_results(f"/data/v1/cards/{card_id}/transactions/pending")
+
+    async def get_transactions(
+        self, account_id: str, from_date: str | None = None, to_date: str | None = None
+    ) -> list[dict]:
+        """Get settled transactions for an account (all pages)."""
+        return await self._get_all_pages(
+            f"/data/v1/accounts/{account_id}/transactions", from_date, to_date
+        )
+
+    async def get_card_transactions(
+        self, card_id: str, from_date: str | None = None, to_date: str | None = None
+    ) -> list[dict]:
+        """Get settled transactions for a card (all pages)."""
+        return await self._get_all_pages(
+            f"/data/v1/cards/{card_id}/transactions", from_date, to_date
+        )
+
+
+async def _gather_dict(requests_by_key: dict) -> dict:
+    """Await a dict of coroutines concurrently; failures become {'error': ...}."""
+    results = await asyncio.gather(*requests_by_key.values(), return_exceptions=True)
+    return {
+        key: {"error": str(result)} if isinstance(result, Exception) else result
+        for key, result in zip(requests_by_key, results, strict=True)
+    }
+
+
+async def _fetch_source(client, kind: str, source_id: str, from_date, to_date):
+    """Balance, pending and settled transactions of one account or card."""
+    if kind == "accounts":
+        requests_by_key = {
+            "balance": client.get_account_balance(source_id),
+            "pending": client.get_pending_transactions(source_id),
+            "transactions": client.get_transactions(source_id, from_date, to_date),
+        }
+    else:
+        requests_by_key = {
+            "balance": client.get_card_balance(source_id),
+            "pending": client.get_card_pending_transactions(source_id),
+            "transactions": client.get_card_transactions(source_id, from_date, to_date),
+        }
+    return await _gather_dict(requests_by_key)
+
+
+async def _fetch_connection(client, connection: dict, from_date, to_date) -> dict:
+    """Fetch every account and card of one connection concurrently."""
+    result = {"connection_id": connection.get("id")}
+
+    for kind, ids_key, discover in (
+        ("accounts", "account_ids", client.get_accounts),
+        ("cards", "card_ids", client.get_cards),
+    ):
+        ids = connection.get(ids_key)
+        if ids is None:
+            try:
+                sources = await discover()
+            except Exception as e:
+                result[kind] = {"error": str(e)}
+                continue
+            ids = [s.get("account_id") or s.get("id") for s in sources]
+
+        result[kind] = await _gather_dict(
+            {
+                source_id: _fetch_source(client, kind, source_id, from_date, to_date)
+                for source_id in ids
+            }
+        )
+
+    return result
+
+
+async def fetch_connections_data_async(
+    connections: list[dict],
+    from_date: str | None = None,
+    to_date: str | None = None,
+    limits: ProviderLimits | None = None,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> list[dict]:
+    """
+    Fetch balances, pending and settled transactions of many connections.
+
+    All accounts and cards are fetched concurrently over one pooled httpx
+    client, with at most limits.concurrency requests in flight per provider.
+
+    Args:
+        connections: Dicts with 'access_token' (decrypted), 'provider_id',
+            'id' and optionally 'account_ids'/'card_ids' (None: discovered)
+        from_date: Start date of settled transactions (YYYY-MM-DD)
+        to_date: End date of settled transactions (YYYY-MM-DD)
+        limits: Per-provider request limits
+        transport: httpx transport (for tests)
+
+    Returns:
+        One dict per connection with 'accounts' and 'cards', each mapping
+        TrueLayer IDs to their 'balance', 'pending' and 'transactions'
+        (or to {'error': ...} where a request failed)
+    """
+    limits = limits or ProviderLimits()
+
+    async with httpx.AsyncClient(
+        base_url=TRUELAYER_API_URL,
+        timeout=TRUELAYER_HTTP_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=TRUELAYER_HTTP_POOL_SIZE),
+        transport=transport,
+    ) as http:
+        return await asyncio.gather(
+            *(
+                _fetch_connection(
+                    AsyncTrueLayerClient(
+                        connection["access_token"],
+                        http,
+                        limits.for_provider(connection.get("provider_id")),
+                    ),
+                    connection,
+                    from_date,
+                    to_date,
+                )
+                for connection in connections
+            )
+        )
+
+
+def fetch_connections_data(
+    connections: list[dict],
+    from_date: str | None = None,
+    to_date: str | None = None,
+    concurrency: int | None = None,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> list[dict]:
+    """
+    Fetch balances, pending and settled transactions of many connections.
+
+    Synchronous entry point of fetch_connections_data_async(), for Celery
+    tasks and other callers outside an event loop.
+
+    Args:
+        connections: See fetch_connections_data_async()
+        from_date: Start date of settled transactions (YYYY-MM-DD)
+        to_date: End date of settled transactions (YYYY-MM-DD)
+        concurrency: Requests per provider (default: TRUELAYER_PROVIDER_CONCURRENCY)
+        transport: httpx transport (for tests)
+
+    Returns:
+        One dict per connection (see fetch_connections_data_async())
+    """
+    return asyncio.run(
+        fetch_connections_data_async(
+            connections, from_date, to_date, ProviderLimits(concurrency), transport
+        )
+    )
@@ -5,13 +5,14 @@ Manages batch imports with date ranges, account selection, and progress tracking
 Supports both sequential and parallel import strategies.
 """
 
+import functools
 import logging
 from datetime import UTC, datetime
 
 import database
 
-from .truelayer_auth import decrypt_token
-from .truelayer_sync import sync_account_transactions
+from .truelayer_scheduler import SyncJob, run_sync_jobs
+from .truelayer_sync import current_access_token, sync_account_transactions
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +40,8 @@ class ImportJob:
         self.to_date = self.job_data.get("to_date")
         self.auto_enrich = self.job_data.get("auto_enrich", True)
         self.batch_size = self.job_data.get("batch_size", 50)
+        self.access_token = None
+        self.provider_id = None
 
     def plan(self) -> dict:
         """
@@ -107,6 +110,10 @@ class ImportJob:
         """
         Execute import job.
 
+        Executing a job again (e.g. after it failed) resumes it: accounts that
+        completed keep their results, and the others continue from the
+        checkpoint of their last stored page.
+
         Args:
             use_parallel: Whether to parallelize account syncing
             max_workers: Max concurrent workers if parallel
@@ -126,10 +133,20 @@ class ImportJob:
             accounts = self._get_accounts_to_sync()
             logger.info(f"   Found {len(accounts)} accounts to sync")
 
+            # Accounts completed by an earlier run of this job
+            results = self._completed_results()
+            accounts = [a for a in accounts if a["id"] not in results]
+            results = list(results.values())
+            if results:
+                logger.info(f"   Resuming: {len(results)} accounts already completed")
+
+            if accounts:
+                self._connect()
+
             if use_parallel:
-                results = self._execute_parallel(accounts, max_workers)
+                results += self._execute_parallel(accounts, max_workers)
             else:
-                results = self._execute_sequential(accounts)
+                results += self._execute_sequential(accounts)
 
             # Aggregate results
             total_synced = sum(r.get("synced", 0) for r in results)
@@ -144,13 +161,26 @@ class ImportJob:
                 total_errors=total_errors,
             )
 
+            # Failed accounts are resumed by executing the job again
+            failed_accounts = sum(
+                1
+                for r in results
+                if r.get("status") == "failed" or r.get("error_message")
+            )
+            if failed_accounts:
+                database.update_import_job_status(
+                    self.job_id,
+                    "failed",
+                    error_message=f"{failed_accounts} account(s) failed to sync",
+                )
+
             logger.info(
                 f"✅ Job complete: {total_synced} synced, {total_duplicates} dupes, {total_errors} errors"
             )
 
             return {
                 "job_id": self.job_id,
-                "status": "completed",
+                "status": "failed" if failed_accounts else "completed",
                 "summary": {
                     "total_synced": total_synced,
                     "total_duplicates": total_duplicates,
@@ -166,6 +196,20 @@ class ImportJob:
             )
             raise
 
+    def _completed_results(self) -> dict:
+        """Results of accounts an earlier run of this job completed, by account."""
+        return {
+            p["account_id"]: {
+                "account_id": p["account_id_truelayer"],
+                "status": "completed",
+                "synced": p["synced_count"] or 0,
+                "duplicates": p["duplicates_count"] or 0,
+                "errors": p["errors_count"] or 0,
+            }
+            for p in database.get_import_progress(self.job_id)
+            if p["progress_status"] == "completed"
+        }
+
     def _execute_sequential(self, accounts: list[dict]) -> list[dict]:
         """Execute accounts sequentially."""
         logger.info("   Executing sequentially")
@@ -191,39 +235,28 @@ class ImportJob:
         return results
 
     def _execute_parallel(self, accounts: list[dict], max_workers: int) -> list[dict]:
-        """Execute accounts in parallel using ThreadPoolExecutor."""
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-
-        logger.info(f"   Executing in parallel ({max_workers} workers)")
-        results = []
-
-        with ThreadPoolExecutor(
-            max_workers=min(max_workers, len(accounts))
-        ) as executor:
-            futures = {
-                executor.submit(self._sync_single_account, account): account
-                for account in accounts
-            }
+        """Execute accounts concurrently, within the provider's request limit."""
+        logger.info(f"   Executing in parallel (up to {max_workers} workers)")
+        jobs = [
+            SyncJob(
+                kind="account",
+                source_id=account["id"],
+                connection_id=self.connection_id,
+                provider_id=self.provider_id,
+                run=functools.partial(self._sync_single_account, account),
+            )
+            for account in accounts
+        ]
+        return run_sync_jobs(jobs, max_workers=max_workers)
 
-            for future in as_completed(futures):
-                account = futures[future]
-                try:
-                    result = future.result(timeout=60)
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"   ❌ Error syncing {account['display_name']}: {e}")
-                    results.append(
-                        {
-                            "account_id": account["id"],
-                            "status": "failed",
-                            "error": str(e),
-                            "synced": 0,
-                            "duplicates": 0,
-                            "errors": 1,
-                        }
-                    )
+    def _connect(self) -> None:
+        """Check the connection and refresh its token before the first account."""
+        connection = database.get_connection(self.connection_id)
+        if not connection:
+            raise ValueError(f"Connection {self.connection_id} not found")
 
-        return results
+        self.access_token = current_access_token(self.connection_id)
+        self.provider_id = connection.get("provider_id")
 
     def _sync_single_account(self, account: dict) -> dict:
         """Sync a single account."""
@@ -234,23 +267,17 @@ class ImportJob:
         logger.info(f"   Syncing: {display_name}")
 
         try:
-            # Get connection and refresh token if needed
-            from .truelayer_sync import refresh_token_if_needed
-
-            connection = database.get_connection(self.connection_id)
-            if not connection:
-                raise ValueError(f"Connection {self.connection_id} not found")
-
-            # Refresh token if expired before making API calls
-            connection = refresh_token_if_needed(self.connection_id, connection)
-            access_token = decrypt_token(connection.get("access_token"))
+            # Windowed imports can outlast a token: refresh it per account
+            self.access_token = (
+                current_access_token(self.connection_id) or self.access_token
+            )
 
             # Sync with custom date range
             result = sync_account_transactions(
                 connection_id=self.connection_id,
                 truelayer_account_id=truelayer_account_id,
                 db_account_id=account_id,
-                access_token=access_token,
+                access_token=self.access_token,
                 from_date=self.from_date,
                 to_date=self.to_date,
                 import_job_id=self.job_id,
@@ -5,13 +5,30 @@ Handles periodic syncing of transactions from TrueLayer API,
 deduplication, and integration with the app's transaction database.
 """
 
+import functools
+import os
+import threading
 import time
-from datetime import UTC, datetime
+from datetime import UTC, date, datetime, timedelta
+
+import requests
 
 import database
 
 from .truelayer_auth import decrypt_token, encrypt_token, refresh_access_token
 from .truelayer_client import TrueLayerClient
+from .truelayer_scheduler import SyncJob, run_sync_jobs
+
+# Transactions identified and inserted per statement
+TRUELAYER_SYNC_PAGE_SIZE = int(os.getenv("TRUELAYER_SYNC_PAGE_SIZE", "500"))
+
+# Days requested per date window; long imports are fetched and checkpointed
+# one window at a time
+TRUELAYER_SYNC_WINDOW_DAYS = int(os.getenv("TRUELAYER_SYNC_WINDOW_DAYS", "90"))
+
+# Refresh tokens rotate: syncs of one connection refresh its token one at a time
+_token_locks: dict[int, threading.Lock] = {}
+_token_locks_guard = threading.Lock()
 
 
 class SyncPerformanceTracker:
@@ -151,6 +168,212 @@ def identify_transaction_merchant(txn: dict) -> dict:
     return txn
 
 
+def _pages(transactions: list, page_size: int = None):
+    """Split fetched transactions into insert pages."""
+    page_size = page_size or TRUELAYER_SYNC_PAGE_SIZE
+    for start in range(0, len(transactions), page_size):
+        yield transactions[start : start + page_size]
+
+
+def _date_windows(from_day: date, to_day: date, window_days: int = None):
+    """Split a date range into windows that share their boundary days."""
+    window_days = window_days or TRUELAYER_SYNC_WINDOW_DAYS
+    start = from_day
+    while True:
+        end = min(start + timedelta(days=window_days), to_day)
+        yield start, end
+        if end >= to_day:
+            return
+        start = end
+
+
+def _as_date(value) -> date:
+    """Date of a YYYY-MM-DD string or date object."""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _normalize_page(normalize, raw_transactions: list) -> tuple[list, int]:
+    """Normalize a page of API transactions, counting the ones that fail."""
+    normalized = []
+    for txn in raw_transactions:
+        try:
+            normalized.append(normalize(txn))
+        except Exception as e:
+            print(f"     ⚠️  Failed to normalize transaction: {e}")
+    return normalized, len(raw_transactions) - len(normalized)
+
+
+def _window_pages(client, truelayer_account_id: str, start, end, cursor=None):
+    """Pages of one date window, restarting it if a stored cursor is rejected."""
+    pages = client.iter_transaction_pages(
+        truelayer_account_id, start.isoformat(), end.isoformat(), cursor=cursor
+    )
+    if cursor:
+        try:
+            first = next(pages, None)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in (400, 404):
+                raise
+            print(f"   ⚠️  Cursor rejected, restarting window {start} to {end}")
+            pages = client.iter_transaction_pages(
+                truelayer_account_id, start.isoformat(), end.isoformat()
+            )
+        else:
+            if first:
+                yield first
+    yield from pages
+
+
+def store_transaction_page(db_account_id: int, transactions: list) -> dict:
+    """
+    Identify merchants for a page of account transactions and insert it.
+
+    The whole page goes to the database in one INSERT ... ON CONFLICT DO
+    NOTHING; transactions already stored come back without an ID and are
+    counted as duplicates. A transaction that can't be prepared counts as
+    an error, and if the page insert fails its rows are inserted one by one
+    so the good ones are still stored.
+
+    Args:
+        db_account_id: Database account ID
+        transactions: Normalized transactions from TrueLayerClient
+
+    Returns:
+        Dictionary with synced, duplicates and errors counts
+    """
+    from mcp.pre_enrichment_detector import detect_pre_enrichment_status
+
+    rows = []
+    errors = 0
+    for txn in transactions:
+        if not txn.get("normalised_provider_id"):
+            errors += 1
+            continue
+
+        try:
+            # Categorization is done by the LLM enricher later
+            try:
+                txn = identify_transaction_merchant(txn)
+            except Exception as e:
+                print(f"     ⚠️  Could not identify merchant for transaction: {e}")
+                # Keep the original merchant if identification fails
+                txn = {
+                    **txn,
+                    "merchant_name": txn.get("merchant_name") or "Unknown Merchant",
+                    "category": "Other",
+                }
+
+            rows.append(
+                {
+                    "account_id": db_account_id,
+                    "transaction_id": txn.get("transaction_id"),
+                    "normalised_provider_id": txn["normalised_provider_id"],
+                    "timestamp": txn.get("date"),
+                    "description": txn.get("description"),
+                    "amount": txn.get("amount"),
+                    "currency": txn.get("currency", "GBP"),
+                    "transaction_type": txn.get("transaction_type"),
+                    "transaction_category": txn.get("category"),
+                    "merchant_name": txn.get("merchant_name"),
+                    "running_balance": txn.get("running_balance"),
+                    "metadata": txn.get("metadata", {}),
+                    # Pre-enrichment status for Apple/Amazon matching
+                    "pre_enrichment_status": detect_pre_enrichment_status(
+                        txn.get("description", ""),
+                        txn.get("merchant_name"),
+                        txn.get("transaction_type", "DEBIT"),
+                    ),
+                }
+            )
+        except Exception as e:
+            print(
+                f"     ❌ Transaction {txn.get('normalised_provider_id')}: "
+                f"Error preparing: {e}"
+            )
+            errors += 1
+
+    try:
+        inserted = database.insert_truelayer_transactions_bulk(rows) if rows else []
+    except Exception as e:
+        print(
+            f"     ⚠️  Error inserting {len(rows)} transactions: {e} "
+            "- inserting them one by one"
+        )
+        return _store_transactions_one_by_one(rows, errors)
+
+    return {
+        "synced": len(inserted),
+        "duplicates": len(rows) - len(inserted),
+        "errors": errors,
+    }
+
+
+def _store_transactions_one_by_one(rows: list, errors: int = 0) -> dict:
+    """Insert prepared transaction rows singly, after a page insert failed."""
+    synced = duplicates = 0
+    for row in rows:
+        normalised_id = row["normalised_provider_id"]
+        try:
+            if database.get_truelayer_transaction_by_id(normalised_id):
+                duplicates += 1
+                continue
+            if database.insert_truelayer_transaction(**row):
+                synced += 1
+                continue
+            print(f"     ❌ Transaction {normalised_id}: Failed to insert")
+        except Exception as e:
+            print(f"     ❌ Transaction {normalised_id}: Error inserting: {e}")
+        errors += 1
+
+    return {"synced": synced, "duplicates": duplicates, "errors": errors}
+
+
+def store_card_transaction_page(db_card_id: int, transactions: list) -> dict:
+    """
+    Insert the new transactions of a page of card transactions.
+
+    Args:
+        db_card_id: Database card ID
+        transactions: Normalized card transactions from TrueLayerClient
+
+    Returns:
+        Dictionary with synced, duplicates and errors counts
+    """
+    rows = [
+        {
+            "card_id": db_card_id,
+            "transaction_id": txn.get("transaction_id"),
+            "normalised_provider_id": txn["normalised_provider_id"],
+            "timestamp": txn.get("date"),
+            "description": txn.get("description"),
+            "amount": txn.get("amount"),
+            "currency": txn.get("currency", "GBP"),
+            "transaction_type": txn.get("transaction_type"),
+            "category": txn.get("category"),
+            "merchant_name": txn.get("merchant_name"),
+            "running_balance": txn.get("running_balance"),
+            "metadata": txn.get("metadata", {}),
+        }
+        for txn in transactions
+        if txn.get("normalised_provider_id")
+    ]
+    errors = len(transactions) - len(rows)
+
+    try:
+        inserted = (
+            database.insert_truelayer_card_transactions_bulk(rows) if rows else []
+        )
+    except Exception as e:
+        print(f"❌ Error inserting {len(rows)} card transactions: {e}")
+        return {"synced": 0, "duplicates": 0, "errors": errors + len(rows)}
+
+    return {
+        "synced": len(inserted),
+        "duplicates": len(rows) - len(inserted),
+        "errors": errors,
+    }
+
+
 def sync_account_transactions(
     connection_id: int,
     truelayer_account_id: str,
@@ -165,6 +388,12 @@ def sync_account_transactions(
     """
     Sync transactions from TrueLayer for a specific account.
 
+    The date range is fetched in windows of TRUELAYER_SYNC_WINDOW_DAYS, and
+    each API page is stored before the next one is requested. With an
+    import_job_id, the window and cursor after every stored page are
+    recorded on the job's progress row; rerunning the job for the same range
+    resumes from there instead of starting over.
+
     Args:
         connection_id: Database connection ID
         truelayer_account_id: TrueLayer account ID (string)
@@ -174,37 +403,30 @@ def sync_account_transactions(
         use_incremental: Use incremental sync based on last_synced_at
         from_date: Start date for explicit date range (YYYY-MM-DD or date object)
         to_date: End date for explicit date range (YYYY-MM-DD or date object)
-        import_job_id: Import job ID to track progress
+        import_job_id: Import job ID to track progress and resume from
 
     Returns:
-        Dictionary with sync results
+        Dictionary with sync results (with 'error_message' if the sync stopped)
     """
+    synced_count = 0
+    duplicate_count = 0
+    error_count = 0
+
     try:
         print(f"🔄 Syncing account {truelayer_account_id}...")
 
-        client = TrueLayerClient(access_token)
+        client = client_for_connection(connection_id, access_token)
 
         # Determine the sync window
         sync_days = days_back
 
         # If explicit date range provided (from Advanced Import), use that instead
         if from_date and to_date:
-            from datetime import date
-            from datetime import datetime as dt
-
-            # Convert date objects to ISO strings if needed
-            from_date_str = (
-                from_date.isoformat() if isinstance(from_date, date) else from_date
-            )
-            to_date_str = to_date.isoformat() if isinstance(to_date, date) else to_date
-
-            # Parse dates and calculate days
-            from_dt = dt.strptime(from_date_str, "%Y-%m-%d")
-            to_dt = dt.strptime(to_date_str, "%Y-%m-%d")
-            days_span = (to_dt - from_dt).days
-            sync_days = max(1, days_span)
+            from_day = _as_date(from_date)
+            to_day = _as_date(to_date)
+            sync_days = max(1, (to_day - from_day).days)
             print(
-                f"   📅 Explicit date range: {from_date_str} to {to_date_str} ({sync_days} days)"
+                f"   📅 Explicit date range: {from_day} to {to_day} ({sync_days} days)"
             )
         elif use_incremental:
             # Get the connection's last sync timestamp
@@ -246,90 +468,72 @@ def sync_account_transactions(
                 print(f"   📅 Falling back to full {days_back} days sync")
                 # Fall back to fetching all days
 
-        # Fetch transactions from TrueLayer
-        print(f"   📡 Fetching transactions from TrueLayer (last {sync_days} days)...")
-        transactions = client.fetch_all_transactions(truelayer_account_id, sync_days)
-        print(f"   📦 Received {len(transactions)} transactions from API")
+        if not (from_date and to_date):
+            to_day = datetime.now(UTC).date()
+            from_day = to_day - timedelta(days=sync_days)
 
-        synced_count = 0
-        duplicate_count = 0
-        error_count = 0
+        sync_range = {"from_date": from_day.isoformat(), "to_date": to_day.isoformat()}
 
-        if transactions:
-            print(f"   🔄 Processing {len(transactions)} transactions...")
-
-            # Insert/update transactions in database
-            for idx, txn in enumerate(transactions, 1):
-                try:
-                    # Check if transaction already exists (using normalised_provider_id)
-                    normalised_id = txn.get("normalised_provider_id")
-                    existing = database.get_truelayer_transaction_by_id(normalised_id)
-
-                    if existing:
-                        duplicate_count += 1
-                        if idx <= 3:  # Log first few duplicates
-                            print(
-                                f"     ⏭️  Transaction {idx}: Duplicate (id: {normalised_id})"
-                            )
-                        continue
-
-                    # Identify merchant (categorization will be done by LLM enricher later)
-                    try:
-                        txn = identify_transaction_merchant(txn)
-                        merchant_name = txn.get("merchant_name")
-                        category = txn.get("category")
-                        print(
-                            f"     📊 Transaction {idx}: {merchant_name} (awaiting LLM enrichment)"
-                        )
-                    except Exception as e:
-                        print(
-                            f"     ⚠️  Could not identify merchant for transaction {idx}: {e}"
-                        )
-                        # Continue with original merchant/category if identification fails
-                        merchant_name = txn.get("merchant_name", "Unknown Merchant")
-                        category = "Other"
-
-                    # Detect pre-enrichment status for Apple/Amazon matching
-                    from mcp.pre_enrichment_detector import detect_pre_enrichment_status
-
-                    pre_enrichment_status = detect_pre_enrichment_status(
-                        txn.get("description", ""),
-                        merchant_name,
-                        txn.get("transaction_type", "DEBIT"),
-                    )
+        # Resume from the last committed page of an earlier run of the job
+        checkpoint = {}
+        if import_job_id:
+            checkpoint = (
+                database.get_import_checkpoint(import_job_id, db_account_id) or {}
+            )
+            if any(checkpoint.get(key) != value for key, value in sync_range.items()):
+                checkpoint = {}
+            if checkpoint:
+                print(
+                    f"   ⏩ Resuming after page {checkpoint['pages']} "
+                    f"(window from {checkpoint['window_from']})"
+                )
 
-                    # Insert new transaction
-                    txn_id = database.insert_truelayer_transaction(
-                        account_id=db_account_id,
-                        transaction_id=txn.get("transaction_id"),
-                        normalised_provider_id=normalised_id,
-                        timestamp=txn.get("date"),
-                        description=txn.get("description"),
-                        amount=txn.get("amount"),
-                        currency=txn.get("currency", "GBP"),
-                        transaction_type=txn.get("transaction_type"),
-                        transaction_category=category,
-                        merchant_name=merchant_name,
-                        running_balance=txn.get("running_balance"),
-                        metadata=txn.get("metadata", {}),
-                        pre_enrichment_status=pre_enrichment_status,
+        synced_count = checkpoint.get("synced", 0)
+        duplicate_count = checkpoint.get("duplicates", 0)
+        error_count = checkpoint.get("errors", 0)
+        pages = checkpoint.get("pages", 0)
+        window_from = _as_date(checkpoint.get("window_from", from_day))
+        cursor = checkpoint.get("cursor")
+
+        # Fetch and store transactions a page at a time
+        print(f"   📡 Fetching transactions from TrueLayer ({from_day} to {to_day})...")
+        start_time = time.time()
+        for window_start, window_end in _date_windows(window_from, to_day):
+            for raw_page, next_cursor in _window_pages(
+                client, truelayer_account_id, window_start, window_end, cursor
+            ):
+                transactions, failed = _normalize_page(
+                    client.normalize_transaction, raw_page
+                )
+                error_count += failed
+                for page in _pages(transactions):
+                    page_result = store_transaction_page(db_account_id, page)
+                    synced_count += page_result["synced"]
+                    duplicate_count += page_result["duplicates"]
+                    error_count += page_result["errors"]
+                pages += 1
+                cursor = next_cursor
+
+                if import_job_id:
+                    database.update_import_checkpoint(
+                        import_job_id,
+                        db_account_id,
+                        {
+                            **sync_range,
+                            "window_from": (
+                                window_start if cursor else window_end
+                            ).isoformat(),
+                            "cursor": cursor,
+                            "pages": pages,
+                            "synced": synced_count,
+                            "duplicates": duplicate_count,
+                            "errors": error_count,
+                        },
                     )
+            cursor = None
 
-                    if txn_id:
-                        synced_count += 1
-                        if idx <= 3:  # Log first few insertions
-                            print(
-                                f"     ✅ Transaction {idx}: Inserted (id: {normalised_id})"
-                            )
-                    else:
-                        error_count += 1
-                        print(
-                            f"     ❌ Transaction {idx}: Failed to insert (id: {normalised_id})"
-                        )
-
-                except Exception as e:
-                    print(f"     ❌ Transaction {idx}: Error inserting: {e}")
-                    error_count += 1
+        if pages:
+            print(f"   💾 Stored {pages} page(s) in {time.time() - start_time:.2f}s")
         else:
             print(f"⚠️  No transactions found for account {truelayer_account_id}")
 
@@ -361,15 +565,91 @@ def sync_account_transactions(
         import traceback
 
         traceback.print_exc()
+        # Pages stored before the failure stay stored (and checkpointed)
         return {
             "account_id": truelayer_account_id,
-            "synced": 0,
-            "duplicates": 0,
-            "errors": 1,
+            "synced": synced_count,
+            "duplicates": duplicate_count,
+            "errors": error_count + 1,
             "error_message": str(e),
         }
 
 
+def _refresh_connection_tokens(connection_id: int, connection: dict) -> dict:
+    """Refresh a connection's tokens with TrueLayer and store them."""
+    # Decrypt refresh token and refresh
+    refresh_token = decrypt_token(connection.get("refresh_token"))
+
+    # Call TrueLayer to refresh
+    new_tokens = refresh_access_token(refresh_token)
+    print("   ✅ Token refreshed successfully")
+
+    # Encrypt new tokens
+    new_access_token = encrypt_token(new_tokens["access_token"])
+    new_refresh_token = encrypt_token(new_tokens["refresh_token"])
+
+    # Update database
+    database.update_connection_tokens(
+        connection_id,
+        new_access_token,
+        new_refresh_token,
+        new_tokens["expires_at"],
+    )
+
+    # Update connection dict
+    connection["access_token"] = new_access_token
+    connection["refresh_token"] = new_refresh_token
+    connection["token_expires_at"] = new_tokens["expires_at"]
+    return connection
+
+
+def _token_lock(connection_id: int) -> threading.Lock:
+    with _token_locks_guard:
+        return _token_locks.setdefault(connection_id, threading.Lock())
+
+
+def current_access_token(connection_id: int, rejected_token: str = None) -> str | None:
+    """
+    Decrypted access token of a connection, refreshed when needed.
+
+    The stored token is refreshed if it is about to expire or is the one
+    TrueLayer just rejected; a token another sync refreshed in the meantime
+    is returned as is. Long imports call this per account, and clients call
+    it (through client_for_connection) when a request gets a 401.
+
+    Args:
+        connection_id: Database connection ID
+        rejected_token: Access token a request was refused with (401)
+
+    Returns:
+        Access token, or None if the connection or its token is gone
+    """
+    with _token_lock(connection_id):
+        connection = database.get_connection(connection_id)
+        if not connection or not connection.get("access_token"):
+            return None
+
+        stored_token = decrypt_token(connection["access_token"])
+        if rejected_token and stored_token == rejected_token:
+            print(f"   🔑 Token of connection {connection_id} rejected - refreshing...")
+            try:
+                connection = _refresh_connection_tokens(connection_id, connection)
+            except Exception as e:
+                print(f"   ⚠️  Token refresh failed: {e}")
+                return None
+        else:
+            connection = refresh_token_if_needed(connection_id, connection)
+        return decrypt_token(connection["access_token"])
+
+
+def client_for_connection(connection_id: int, access_token: str) -> TrueLayerClient:
+    """TrueLayer client that refreshes the connection's token on a 401."""
+    return TrueLayerClient(
+        access_token,
+        on_unauthorized=functools.partial(current_access_token, connection_id),
+    )
+
+
 def refresh_token_if_needed(connection_id: int, connection: dict) -> dict:
     """
     Check if token is expired and refresh if needed.
@@ -408,33 +688,7 @@ def refresh_token_if_needed(connection_id: int, connection: dict) -> dict:
                     print(
                         f"   ⏰ Token expires in {time_until_expiry:.0f} seconds - refreshing..."
                     )
-
-                    # Decrypt refresh token and refresh
-                    encrypted_refresh_token = connection.get("refresh_token")
-                    refresh_token = decrypt_token(encrypted_refresh_token)
-
-                    # Call TrueLayer to refresh
-                    new_tokens = refresh_access_token(refresh_token)
-                    print("   ✅ Token refreshed successfully")
-
-                    # Encrypt new tokens
-                    new_access_token = encrypt_token(new_tokens["access_token"])
-                    new_refresh_token = encrypt_token(new_tokens["refresh_token"])
-
-                    # Update database
-                    database.update_connection_tokens(
-                        connection_id,
-                        new_access_token,
-                        new_refresh_token,
-                        new_tokens["expires_at"],
-                    )
-
-                    # Update connection dict
-                    connection["access_token"] = new_access_token
-                    connection["refresh_token"] = new_refresh_token
-                    connection["token_expires_at"] = new_tokens["expires_at"]
-
-                    return connection
+                    return _refresh_connection_tokens(connection_id, connection)
             except Exception as e:
                 print(f"   ⚠️  Could not parse token expiry time: {e}")
                 # Continue anyway, let the API call fail if token is actually invalid
@@ -446,17 +700,164 @@ def refresh_token_if_needed(connection_id: int, connection: dict) -> dict:
         return connection
 
 
-def sync_all_accounts(user_id: int, date_from: str = None, date_to: str = None) -> dict:
+def _save_card(connection_id: int, card: dict) -> int:
+    """Save or update a discovered card, returning its database ID."""
+    return database.save_connection_card(
+        connection_id=connection_id,
+        card_id=card.get("account_id") or card.get("id"),
+        card_name=card.get("display_name", card.get("name", "Unknown Card")),
+        card_type=card.get("type", "UNKNOWN"),
+        last_four=(
+            card.get("partial_card_number", "")[-4:]
+            if card.get("partial_card_number")
+            else None
+        ),
+        issuer=card.get("card_issuer"),
+    )
+
+
+def _plan_connection(
+    connection: dict,
+    date_from: str = None,
+    date_to: str = None,
+    accounts: bool = True,
+    cards: bool = True,
+) -> tuple[list[SyncJob], list[dict]]:
     """
-    Sync transactions for all connected accounts of a user.
+    Prepare the sync jobs of one connection.
+
+    The token is refreshed and decrypted here, once for all of the
+    connection's accounts and cards (their clients refresh it again if a
+    request gets a 401); cards are discovered and saved.
+
+    Returns:
+        Tuple of (jobs to schedule, results of accounts that can't be synced)
+    """
+    connection_id = connection.get("id")
+    conn_status = connection.get("connection_status")
+    provider_id = connection.get("provider_id")
+    provider_name = connection.get("provider_name")
+
+    print(
+        f"   📍 Connection {connection_id} - Status: {conn_status}, Provider: {provider_id}/{provider_name}"
+    )
+
+    # Refresh token if expired
+    connection = refresh_token_if_needed(connection_id, connection)
+
+    db_accounts = database.get_connection_accounts(connection_id) if accounts else []
+    print(f"   📊 Found {len(db_accounts)} accounts for connection {connection_id}")
+
+    encrypted_token = connection.get("access_token")
+    if not encrypted_token:
+        print(f"     ❌ No access token found for connection {connection_id}")
+        return [], [
+            {
+                "account_id": account.get("account_id"),
+                "synced": 0,
+                "duplicates": 0,
+                "errors": 1,
+                "error_message": "No access token found",
+            }
+            for account in db_accounts
+        ]
+
+    access_token = decrypt_token(encrypted_token)
+    client = client_for_connection(connection_id, access_token)
+
+    # Update provider info if still set to 'truelayer' (legacy)
+    if provider_id == "truelayer" or provider_name == "TrueLayer":
+        try:
+            api_accounts = client.get_accounts()
+            if api_accounts:
+                provider_info = api_accounts[0].get("provider", {})
+                new_provider_id = provider_info.get("provider_id")
+                new_provider_name = provider_info.get("display_name")
+                if new_provider_id or new_provider_name:
+                    print(
+                        f"   🔄 Updating provider info: {new_provider_id} / {new_provider_name}"
+                    )
+                    database.update_connection_provider(
+                        connection_id, new_provider_id, new_provider_name
+                    )
+                    provider_id = new_provider_id or provider_id
+        except Exception as e:
+            print(f"   ⚠️ Could not update provider info: {e}")
+
+    jobs = [
+        SyncJob(
+            kind="account",
+            source_id=account.get("account_id"),
+            connection_id=connection_id,
+            provider_id=provider_id,
+            run=functools.partial(
+                sync_account_transactions,
+                connection_id=connection_id,
+                truelayer_account_id=account.get("account_id"),
+                db_account_id=account.get("id"),
+                access_token=access_token,
+                from_date=date_from,  # Pass date range from UI
+                to_date=date_to,  # Pass date range from UI
+            ),
+        )
+        for account in db_accounts
+    ]
+
+    if cards:
+        try:
+            api_cards = client.get_cards()
+        except Exception as e:
+            print(f"❌ Error discovering cards for connection {connection_id}: {e}")
+            api_cards = []
+
+        for card in api_cards:
+            truelayer_card_id = card.get("account_id") or card.get("id")
+            jobs.append(
+                SyncJob(
+                    kind="card",
+                    source_id=truelayer_card_id,
+                    connection_id=connection_id,
+                    provider_id=provider_id,
+                    run=functools.partial(
+                        sync_card_transactions,
+                        connection_id=connection_id,
+                        truelayer_card_id=truelayer_card_id,
+                        db_card_id=_save_card(connection_id, card),
+                        access_token=access_token,
+                    ),
+                )
+            )
+
+    return jobs, []
+
+
+def sync_all(
+    user_id: int,
+    date_from: str = None,
+    date_to: str = None,
+    accounts: bool = True,
+    cards: bool = True,
+    connection_id: int = None,
+) -> dict:
+    """
+    Sync the accounts and cards of a user's connections concurrently.
+
+    Tokens are refreshed once per connection (and again by a sync whose
+    token expires mid-run), then every account and card sync is run by
+    run_sync_jobs(): concurrently, with at most
+    TRUELAYER_PROVIDER_CONCURRENCY syncs per bank at a time.
 
     Args:
         user_id: User ID
-        date_from: Start date for sync (YYYY-MM-DD, optional)
-        date_to: End date for sync (YYYY-MM-DD, optional)
+        date_from: Start date for account sync (YYYY-MM-DD, optional)
+        date_to: End date for account sync (YYYY-MM-DD, optional)
+        accounts: Whether to sync accounts
+        cards: Whether to discover and sync cards
+        connection_id: Only sync this connection, if it is the user's and
+            active (default: all of the user's active connections)
 
     Returns:
-        Dictionary with aggregate sync results
+        Dictionary with aggregate results and per-account/per-card results
     """
     # Initialize performance tracker
     tracker = SyncPerformanceTracker()
@@ -469,136 +870,86 @@ def sync_all_accounts(user_id: int, date_from: str = None, date_to: str = None)
         print(f"🔄 Starting sync for user {user_id}...")
 
     # Get all active connections for user
-    connections = database.get_user_connections(user_id)
+    if connection_id:
+        connection = database.get_connection(connection_id)
+        if not connection or connection.get("user_id") != user_id:
+            print(f"⚠️  Connection {connection_id} not found for user {user_id}")
+            connection = None
+        elif connection.get("connection_status") != "active":
+            print(
+                f"⚠️  Skipping connection {connection_id}: "
+                f"{connection.get('connection_status')}"
+            )
+            connection = None
+        connections = [connection] if connection else []
+    else:
+        connections = database.get_user_connections(user_id)
 
     if not connections:
         print(f"⚠️  No active connections found for user {user_id}")
-        return {
-            "user_id": user_id,
-            "total_accounts": 0,
-            "total_synced": 0,
-            "accounts": [],
-        }
 
+    jobs = []
     account_results = []
-
     for connection in connections:
-        connection_id = connection.get("id")
-        user_id_from_conn = connection.get("user_id")
-        conn_status = connection.get("connection_status")
-        provider_id = connection.get("provider_id")
-        provider_name = connection.get("provider_name")
-
-        print(
-            f"   📍 Connection {connection_id} - Status: {conn_status}, Provider: {provider_id}/{provider_name}"
-        )
-
-        # Refresh token if expired
-        connection = refresh_token_if_needed(connection_id, connection)
-
-        # Get accounts for this connection
-        accounts = database.get_connection_accounts(connection_id)
-        print(f"   📊 Found {len(accounts)} accounts for connection {connection_id}")
-
-        # Update provider info if still set to 'truelayer' (legacy)
-        if provider_id == "truelayer" or provider_name == "TrueLayer":
-            try:
-                encrypted_token = connection.get("access_token")
-                if encrypted_token:
-                    access_token = decrypt_token(encrypted_token)
-                    client = TrueLayerClient(access_token)
-                    api_accounts = client.get_accounts()
-                    if api_accounts:
-                        provider_info = api_accounts[0].get("provider", {})
-                        new_provider_id = provider_info.get("provider_id")
-                        new_provider_name = provider_info.get("display_name")
-                        if new_provider_id or new_provider_name:
-                            print(
-                                f"   🔄 Updating provider info: {new_provider_id} / {new_provider_name}"
-                            )
-                            database.update_connection_provider(
-                                connection_id, new_provider_id, new_provider_name
-                            )
-            except Exception as e:
-                print(f"   ⚠️ Could not update provider info: {e}")
-
-        for account in accounts:
-            truelayer_account_id = account.get("account_id")
-            db_account_id = account.get("id")  # Database ID
-            account_display_name = account.get("display_name", "N/A")
-
-            print(
-                f"     🏦 Account: {account_display_name} (ID: {truelayer_account_id}, DB ID: {db_account_id})"
+        try:
+            connection_jobs, unsyncable = _plan_connection(
+                connection, date_from, date_to, accounts, cards
             )
-
-            try:
-                # Decrypt access token
-                encrypted_token = connection.get("access_token")
-                if not encrypted_token:
-                    print(
-                        f"     ❌ No access token found for connection {connection_id}"
-                    )
-                    account_results.append(
-                        {
-                            "account_id": truelayer_account_id,
-                            "synced": 0,
-                            "duplicates": 0,
-                            "errors": 1,
-                            "error_message": "No access token found",
-                        }
-                    )
-                    continue
-
-                access_token = decrypt_token(encrypted_token)
-                print(
-                    f"   ✅ Successfully decrypted access token for account {truelayer_account_id}"
-                )
-
-                result = sync_account_transactions(
-                    connection_id=connection_id,
-                    truelayer_account_id=truelayer_account_id,
-                    db_account_id=db_account_id,
-                    access_token=access_token,
-                    from_date=date_from,  # Pass date range from UI
-                    to_date=date_to,  # Pass date range from UI
-                )
-                account_results.append(result)
-            except Exception as e:
-                print(f"❌ Error processing account {truelayer_account_id}: {e}")
-                import traceback
-
-                traceback.print_exc()
-                account_results.append(
-                    {
-                        "account_id": truelayer_account_id,
-                        "synced": 0,
-                        "duplicates": 0,
-                        "errors": 1,
-                        "error_message": str(e),
-                    }
-                )
+        except Exception as e:
+            print(f"❌ Error preparing connection {connection.get('id')}: {e}")
+            continue
+        jobs.extend(connection_jobs)
+        account_results.extend(unsyncable)
+
+    results = run_sync_jobs(jobs)
+    account_results.extend(
+        result
+        for job, result in zip(jobs, results, strict=True)
+        if job.kind == "account"
+    )
+    card_results = [
+        result for job, result in zip(jobs, results, strict=True) if job.kind == "card"
+    ]
 
     # Aggregate results
-    total_synced = sum(r.get("synced", 0) for r in account_results)
-    total_duplicates = sum(r.get("duplicates", 0) for r in account_results)
-    total_errors = sum(r.get("errors", 0) for r in account_results)
+    all_results = account_results + card_results
+    total_synced = sum(r.get("synced", 0) for r in all_results)
+    total_duplicates = sum(r.get("duplicates", 0) for r in all_results)
+    total_errors = sum(r.get("errors", 0) for r in all_results)
 
     # Report performance metrics
     tracker.report(
-        account_count=len(account_results),
+        account_count=len(all_results),
         total_transactions=total_synced + total_duplicates,
     )
 
     return {
         "user_id": user_id,
         "total_accounts": len(account_results),
+        "total_cards": len(card_results),
         "total_synced": total_synced,
         "total_duplicates": total_duplicates,
         "total_errors": total_errors,
         "accounts": account_results,
+        "cards": card_results,
     }
 
 
+def sync_all_accounts(user_id: int, date_from: str = None, date_to: str = None) -> dict:
+    """
+    Sync transactions for all connected accounts of a user.
+
+    Args:
+        user_id: User ID
+        date_from: Start date for sync (YYYY-MM-DD, optional)
+        date_to: End date for sync (YYYY-MM-DD, optional)
+
+    Returns:
+        Dictionary with aggregate sync results
+    """
+    return sync_all(user_id, date_from, date_to, cards=False)
+
+
 def sync_card_transactions(
     connection_id: int,
     truelayer_card_id: str,
@@ -624,7 +975,7 @@ def sync_card_transactions(
     try:
         print(f"🔄 Syncing card {truelayer_card_id}...")
 
-        client = TrueLayerClient(access_token)
+        client = client_for_connection(connection_id, access_token)
 
         # Determine the sync window
         sync_days = days_back
@@ -634,8 +985,16 @@ def sync_card_transactions(
             # Find this specific card in the list
             card_record = next((c for c in card if c.get("id") == db_card_id), None)
             if card_record and card_record.get("last_synced_at"):
-                last_sync = datetime.fromisoformat(card_record["last_synced_at"])
-                days_since_sync = (datetime.utcnow() - last_sync).days
+                # Handle both string and datetime object formats
+                last_sync = card_record["last_synced_at"]
+                if isinstance(last_sync, str):
+                    last_sync = datetime.fromisoformat(last_sync)
+
+                # If last_sync is naive, assume UTC
+                if last_sync.tzinfo is None:
+                    last_sync = last_sync.replace(tzinfo=UTC)
+
+                days_since_sync = (datetime.now(UTC) - last_sync).days
                 sync_days = max(1, days_since_sync + 1)
                 print(
                     f"   📅 Incremental sync: last synced {days_since_sync} days ago, fetching {sync_days} days"
@@ -643,51 +1002,30 @@ def sync_card_transactions(
             else:
                 print(f"   📅 No previous sync found, fetching full {days_back} days")
 
-        # Fetch transactions from TrueLayer
-        transactions = client.fetch_all_card_transactions(truelayer_card_id, sync_days)
+        # Fetch and store transactions a page at a time
+        to_day = datetime.now(UTC).date()
+        from_day = to_day - timedelta(days=sync_days)
 
         synced_count = 0
         duplicate_count = 0
         error_count = 0
+        pages = 0
 
-        if transactions:
-            # Insert/update transactions in database
-            for txn in transactions:
-                try:
-                    # Check if transaction already exists (using normalised_provider_id)
-                    existing = database.get_card_transaction_by_id(
-                        txn.get("normalised_provider_id")
-                    )
-
-                    if existing:
-                        duplicate_count += 1
-                        continue
-
-                    # Insert new card transaction
-                    txn_id = database.insert_truelayer_card_transaction(
-                        card_id=db_card_id,
-                        transaction_id=txn.get("transaction_id"),
-                        normalised_provider_id=txn.get("normalised_provider_id"),
-                        timestamp=txn.get("date"),
-                        description=txn.get("description"),
-                        amount=txn.get("amount"),
-                        currency=txn.get("currency", "GBP"),
-                        transaction_type=txn.get("transaction_type"),
-                        transaction_category=txn.get("category"),
-                        merchant_name=txn.get("merchant_name"),
-                        running_balance=txn.get("running_balance"),
-                        metadata=txn.get("metadata", {}),
-                    )
-
-                    if txn_id:
-                        synced_count += 1
-                    else:
-                        error_count += 1
-
-                except Exception as e:
-                    print(f"❌ Error inserting card transaction: {e}")
-                    error_count += 1
-        else:
+        for raw_page, _ in client.iter_card_transaction_pages(
+            truelayer_card_id, from_day.isoformat(), to_day.isoformat()
+        ):
+            transactions, failed = _normalize_page(
+                client.normalize_card_transaction, raw_page
+            )
+            error_count += failed
+            for page in _pages(transactions):
+                page_result = store_card_transaction_page(db_card_id, page)
+                synced_count += page_result["synced"]
+                duplicate_count += page_result["duplicates"]
+                error_count += page_result["errors"]
+            pages += 1
+
+        if not pages:
             print(f"⚠️  No transactions found for card {truelayer_card_id}")
 
         # Update card-level sync timestamp
@@ -731,76 +1069,7 @@ def sync_all_cards(user_id: int) -> dict:
         Dictionary with aggregate sync results
     """
     print(f"🔄 Starting card sync for user {user_id}...")
-
-    # Get all active connections for user
-    connections = database.get_user_connections(user_id)
-
-    if not connections:
-        print(f"⚠️  No active connections found for user {user_id}")
-        return {"user_id": user_id, "total_cards": 0, "total_synced": 0, "cards": []}
-
-    card_results = []
-
-    for connection in connections:
-        connection_id = connection.get("id")
-        access_token = decrypt_token(connection.get("access_token"))
-
-        try:
-            client = TrueLayerClient(access_token)
-
-            # Discover cards for this connection
-            cards = client.get_cards()
-
-            if not cards:
-                print(f"⚠️  No cards found for connection {connection_id}")
-                continue
-
-            for card in cards:
-                truelayer_card_id = card.get("id")
-                card_name = card.get("display_name", card.get("name", "Unknown Card"))
-                card_type = card.get("type", "UNKNOWN")
-                last_four = (
-                    card.get("partial_card_number", "")[-4:]
-                    if card.get("partial_card_number")
-                    else None
-                )
-                issuer = card.get("card_issuer", None)
-
-                # Save or update card in database
-                db_card_id = database.save_connection_card(
-                    connection_id=connection_id,
-                    card_id=truelayer_card_id,
-                    card_name=card_name,
-                    card_type=card_type,
-                    last_four=last_four,
-                    issuer=issuer,
-                )
-
-                # Sync transactions for this card
-                result = sync_card_transactions(
-                    connection_id=connection_id,
-                    truelayer_card_id=truelayer_card_id,
-                    db_card_id=db_card_id,
-                    access_token=access_token,
-                )
-                card_results.append(result)
-
-        except Exception as e:
-            print(f"❌ Error syncing cards for connection {connection_id}: {e}")
-
-    # Aggregate results
-    total_synced = sum(r.get("synced", 0) for r in card_results)
-    total_duplicates = sum(r.get("duplicates", 0) for r in card_results)
-    total_errors = sum(r.get("errors", 0) for r in card_results)
-
-    return {
-        "user_id": user_id,
-        "total_cards": len(card_results),
-        "total_synced": total_synced,
-        "total_duplicates": total_duplicates,
-        "total_errors": total_errors,
-        "cards": card_results,
-    }
+    return sync_all(user_id, accounts=False)
 
 
 def handle_webhook_event(event_payload: dict) -> dict:
@@ -257,6 +257,7 @@ def start_sync():
         from_date (str): ISO format date (YYYY-MM-DD)
         to_date (str): ISO format date (YYYY-MM-DD)
         force_reparse (bool): Re-parse existing emails (default: false)
+        chunked (bool): Split a full sync into monthly chunk jobs (default: false)
 
     Returns:
         Job details with job_id and status
@@ -268,6 +269,7 @@ def start_sync():
         from_date = data.get("from_date")
         to_date = data.get("to_date")
         force_reparse = data.get("force_reparse", False)
+        chunked = data.get("chunked", False)
 
         result = gmail_service.start_sync(
             user_id=user_id,
@@ -275,6 +277,7 @@ def start_sync():
             from_date=from_date,
             to_date=to_date,
             force_reparse=force_reparse,
+            chunked=chunked,
         )
 
         return jsonify(result)
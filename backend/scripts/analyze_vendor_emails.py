@@ -2,11 +2,16 @@
 """Analyze vendor emails to create parsers"""
 
 import re
+import sys
 
 import psycopg2
 from bs4 import BeautifulSoup
 from psycopg2.extras import RealDictCursor
 
+sys.path.insert(0, "/home/kaihaan/prj/spending/backend")
+
+import database
+
 DB_CONFIG = {
     "host": "localhost",
     "port": "5433",
@@ -20,20 +25,33 @@ def connect_db():
     return psycopg2.connect(**DB_CONFIG)
 
 
+def fetch_email(cursor):
+    """Next selected receipt with its bodies from the body store (or None)."""
+    email = cursor.fetchone()
+    if not email:
+        return None
+    content = database.get_gmail_email_content(email["message_id"]) or {}
+    return {
+        **email,
+        "body_html": content.get("body_html"),
+        "body_text": content.get("body_text"),
+    }
+
+
 def analyze_charles_tyrwhitt():
     """Analyze Charles Tyrwhitt emails to understand format"""
     conn = connect_db()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     cursor.execute("""
-        SELECT gr.message_id, gr.subject, gec.body_html, gec.body_text
+        SELECT gr.message_id, gr.subject
         FROM gmail_receipts gr
         JOIN gmail_email_content gec ON gr.message_id = gec.message_id
         WHERE gr.merchant_name = 'Charles Tyrwhitt'
         LIMIT 1
     """)
 
-    email = cursor.fetchone()
+    email = fetch_email(cursor)
     if not email:
         print("No Charles Tyrwhitt emails found")
         return
@@ -80,14 +98,14 @@ def analyze_world_of_books():
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     cursor.execute("""
-        SELECT gr.message_id, gr.subject, gec.body_html, gec.body_text
+        SELECT gr.message_id, gr.subject
         FROM gmail_receipts gr
         JOIN gmail_email_content gec ON gr.message_id = gec.message_id
         WHERE gr.merchant_name = 'World of Books'
         LIMIT 1
     """)
 
-    email = cursor.fetchone()
+    email = fetch_email(cursor)
     if not email:
         print("No World of Books emails found")
         return
@@ -129,14 +147,14 @@ def analyze_uniqlo():
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     cursor.execute("""
-        SELECT gr.message_id, gr.subject, gec.body_html, gec.body_text
+        SELECT gr.message_id, gr.subject
         FROM gmail_receipts gr
         JOIN gmail_email_content gec ON gr.message_id = gec.message_id
         WHERE gr.merchant_name = 'Uniqlo'
         LIMIT 1
     """)
 
-    email = cursor.fetchone()
+    email = fetch_email(cursor)
     if not email:
         print("No Uniqlo emails found")
         return
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Gmail Sync End-to-End Benchmark
+
+Runs the real full and incremental syncs (listing, fetching, filtering,
+parsing, PDF processing and database writes) against mcp.gmail_api_standin
+instead of Gmail, so each configuration sees the same mailbox, latency and
+rate limiting and the numbers are comparable between runs and machines.
+
+For every combination of --workers, --latency-ms and --rate-limit a
+throwaway Gmail connection is created, synced in full, topped up with
+--incremental new messages, synced incrementally and deleted again
+(receipts cascade). PDF tasks run eagerly in-process.
+
+Needs the database (and MinIO for PDF storage) from docker-compose; nothing
+talks to Google.
+
+Usage:
+    python scripts/benchmark_gmail_sync.py --messages 500
+    python scripts/benchmark_gmail_sync.py --messages 1000 --workers 1 5 10 \\
+        --latency-ms 0 50 --rate-limit 0 0.05
+    python scripts/benchmark_gmail_sync.py --recording mailbox.json --json out.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from celery_app import celery_app
+
+import database
+from mcp import gmail_client, gmail_pdf_batch, gmail_sync
+from mcp.gmail_api_standin import GmailApiStandIn, generate_mailbox, load_recording
+
+FIXTURES_DIR = (
+    Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "sample_emails"
+)
+
+BENCHMARK_EMAIL = "benchmark@standin.example.com"
+
+
+def _fake_credentials(connection_id):
+    return "standin-access-token", "standin-refresh-token"
+
+
+class CapturingTracker(gmail_sync.SyncPerformanceTracker):
+    """SyncPerformanceTracker that remembers the last instance created."""
+
+    last = None
+
+    def __init__(self):
+        super().__init__()
+        CapturingTracker.last = self
+
+
+def build_mailbox(args, seed: int):
+    if args.recording:
+        return load_recording(args.recording)
+    return generate_mailbox(
+        args.messages,
+        pdf_ratio=args.pdf_ratio,
+        templates_dir=str(FIXTURES_DIR),
+        seed=seed,
+    )
+
+
+def run_config(args, workers: int, latency_ms: float, rate_limit: float) -> dict:
+    """
+    Benchmark one configuration.
+
+    Args:
+        args: Parsed command line arguments
+        workers: GMAIL_SYNC_WORKERS for this run
+        latency_ms: Stand-in latency per request
+        rate_limit: Fraction of requests answered with 429
+
+    Returns:
+        Result dictionary for the report
+    """
+    mailbox = build_mailbox(args, seed=args.seed)
+    result = {
+        "workers": workers,
+        "latency_ms": latency_ms,
+        "rate_limit": rate_limit,
+        "messages": len(mailbox.messages),
+    }
+
+    with GmailApiStandIn(
+        mailbox,
+        latency_ms=latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_rate=rate_limit,
+        seed=args.seed,
+    ) as standin:
+        gmail_client.GMAIL_API_BASE = standin.api_base
+        gmail_sync.GMAIL_SYNC_WORKERS = workers
+
+        connection_id = database.save_gmail_connection(
+            user_id=args.user_id,
+            email_address=BENCHMARK_EMAIL,
+            access_token="standin-access-token",
+            refresh_token="standin-refresh-token",
+            token_expires_at=None,
+            scopes="https://www.googleapis.com/auth/gmail.readonly",
+        )
+        try:
+            # Full sync
+            CapturingTracker.last = None
+            start = time.perf_counter()
+            final = None
+            for progress in gmail_sync.sync_receipts_full(
+                connection_id, force_reparse=True, resume=False
+            ):
+                final = progress
+            elapsed = time.perf_counter() - start
+            perf = CapturingTracker.last
+            result["full"] = {
+                "seconds": round(elapsed, 2),
+                "processed": final.get("processed", 0),
+                "parsed": final.get("parsed", 0),
+                "messages_per_second": round(final.get("processed", 0) / elapsed, 1),
+                "api_requests": standin.stats(),
+                "api_seconds": round(sum(perf.api_calls), 2) if perf else None,
+                "db_seconds": round(sum(perf.db_writes), 2) if perf else None,
+                "parse_seconds": round(sum(perf.parse_times), 2) if perf else None,
+            }
+
+            # Incremental sync over newly arrived messages
+            if args.incremental:
+                generate_mailbox(
+                    args.incremental,
+                    days=1,
+                    pdf_ratio=args.pdf_ratio,
+                    templates_dir=str(FIXTURES_DIR),
+                    seed=args.seed + 1,
+                    mailbox=mailbox,
+                )
+                standin.reset_stats()
+                start = time.perf_counter()
+                final = gmail_sync.sync_receipts_incremental(connection_id)
+                elapsed = time.perf_counter() - start
+                result["incremental"] = {
+                    "seconds": round(elapsed, 2),
+                    "new_messages": final.get("new_messages", 0),
+                    "parsed": final.get("parsed", 0),
+                    "messages_per_second": round(
+                        final.get("new_messages", 0) / elapsed, 1
+                    ),
+                    "api_requests": standin.stats(),
+                }
+        finally:
+            database.delete_gmail_connection(connection_id)
+
+    return result
+
+
+def print_report(results: list):
+    print(f"\n{'=' * 96}")
+    print("GMAIL SYNC BENCHMARK (stand-in API)")
+    print(f"{'=' * 96}")
+    print(
+        f"{'workers':>7} {'latency':>8} {'429s':>6} {'msgs':>6} "
+        f"{'full s':>8} {'msg/s':>7} {'api':>6} {'db s':>7} {'parse s':>8} "
+        f"{'incr s':>8} {'msg/s':>7} {'api':>6}"
+    )
+    for r in results:
+        full = r["full"]
+        incr = r.get("incremental", {})
+        print(
+            f"{r['workers']:>7} {r['latency_ms']:>6.0f}ms {r['rate_limit']:>6.0%} "
+            f"{r['messages']:>6} {full['seconds']:>8} "
+            f"{full['messages_per_second']:>7} "
+            f"{sum(full['api_requests'].values()):>6} "
+            f"{full['db_seconds'] or 0:>7} {full['parse_seconds'] or 0:>8} "
+            f"{incr.get('seconds', '-'):>8} {incr.get('messages_per_second', '-'):>7} "
+            f"{sum(incr.get('api_requests', {}).values()) if incr else '-':>6}"
+        )
+    print(f"{'=' * 96}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark Gmail sync against the offline Gmail API stand-in"
+    )
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--incremental", type=int, default=50)
+    parser.add_argument("--recording", help="Replay a mailbox from record_mailbox()")
+    parser.add_argument("--pdf-ratio", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[5])
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[20])
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--rate-limit", type=float, nargs="+", default=[0.0])
+    parser.add_argument(
+        "--request-delay",
+        type=float,
+        default=0.0,
+        help="Client-side delay between requests (production uses 0.1s)",
+    )
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    # Everything in-process: no Google credentials, PDF tasks run eagerly
+    gmail_sync.get_gmail_credentials = _fake_credentials
+    gmail_pdf_batch.get_gmail_credentials = _fake_credentials
+    gmail_sync.SyncPerformanceTracker = CapturingTracker
+    gmail_client.RATE_LIMIT_DELAY = args.request_delay
+    celery_app.conf.task_always_eager = True
+    os.environ.setdefault("GMAIL_PARALLEL_FETCH", "true")
+
+    results = []
+    for workers, latency_ms, rate_limit in itertools.product(
+        args.workers, args.latency_ms, args.rate_limit
+    ):
+        print(f"▶ workers={workers} latency={latency_ms}ms rate_limit={rate_limit:.0%}")
+        results.append(run_config(args, workers, latency_ms, rate_limit))
+
+    print_report(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
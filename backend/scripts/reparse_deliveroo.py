@@ -8,6 +8,7 @@ from psycopg2.extras import RealDictCursor
 
 sys.path.insert(0, "/home/kaihaan/prj/spending/backend")
 
+import database
 from mcp.gmail_parsing.orchestrator import parse_receipt_content
 
 DB_CONFIG = {
@@ -32,9 +33,7 @@ def reparse_deliveroo():
                 gr.message_id,
                 gr.subject,
                 gr.merchant_name,
-                gr.sender_email,
-                gec.body_html,
-                gec.body_text
+                gr.sender_email
             FROM gmail_receipts gr
             JOIN gmail_email_content gec ON gr.message_id = gec.message_id
             WHERE gr.merchant_name ILIKE '%deliveroo%'
@@ -58,9 +57,11 @@ def reparse_deliveroo():
                 if "@" in receipt["sender_email"]
                 else ""
             )
+            # Bodies live in the compressed body store (or inline on old rows)
+            content = database.get_gmail_email_content(receipt["message_id"]) or {}
             parsed_result = parse_receipt_content(
-                html_body=receipt["body_html"] or "",
-                text_body=receipt["body_text"] or "",
+                html_body=content.get("body_html") or "",
+                text_body=content.get("body_text") or "",
                 subject=receipt["subject"],
                 sender_email=receipt["sender_email"],
                 sender_domain=sender_domain,
@@ -35,8 +35,6 @@ def test_reparse_amazon():
             gr.message_id,
             gr.subject,
             gr.receipt_date as old_date,
-            gec.body_html,
-            gec.body_text,
             gec.received_at,
             gec.from_header,
             ''::text as from_name
@@ -67,13 +65,16 @@ def test_reparse_amazon():
             message_id,
             subject,
             old_date,
-            html,
-            text,
             received_at,
             from_email,
             from_name,
         ) = receipt
 
+        # Bodies live in the compressed body store (or inline on old rows)
+        content = database.get_gmail_email_content(message_id) or {}
+        html = content.get("body_html")
+        text = content.get("body_text")
+
         # Extract sender domain
         sender_domain = from_email.split("@")[-1] if "@" in from_email else ""
 
@@ -44,8 +44,6 @@ def test_brand_extraction():
             gr.parse_method,
             gr.subject,
             gr.line_items,
-            gec.body_html,
-            gec.body_text,
             gec.received_at,
             gec.from_header
         FROM gmail_receipts gr
@@ -81,12 +79,15 @@ def test_brand_extraction():
             parse_method,
             subject,
             old_items,
-            html,
-            text,
             received_at,
             from_header,
         ) = receipt
 
+        # Bodies live in the compressed body store (or inline on old rows)
+        content = database.get_gmail_email_content(message_id) or {}
+        html = content.get("body_html")
+        text = content.get("body_text")
+
         # Extract sender domain
         sender_domain = from_header.split("@")[-1] if "@" in from_header else ""
 
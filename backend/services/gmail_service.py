@@ -5,9 +5,15 @@ Orchestrates Gmail integration including OAuth, sync, parsing, and matching.
 Separates business logic from HTTP routing concerns.
 """
 
+import logging
+from datetime import datetime, timedelta
+
 from database import gmail
 from mcp import gmail_llm_queue, gmail_sync
-from tasks.gmail_tasks import sync_gmail_receipts_task
+from mcp.gmail_parsing import learn_template_from_receipt
+from tasks.gmail_tasks import sync_gmail_chunk_task, sync_gmail_receipts_task
+
+logger = logging.getLogger(__name__)
 
 
 def start_sync(
@@ -16,6 +22,7 @@ def start_sync(
     from_date: str = None,
     to_date: str = None,
     force_reparse: bool = False,
+    chunked: bool = False,
 ) -> dict:
     """
     Start a Gmail receipt sync job asynchronously.
@@ -26,6 +33,8 @@ def start_sync(
         from_date: ISO format date string (YYYY-MM-DD)
         to_date: ISO format date string (YYYY-MM-DD)
         force_reparse: Whether to re-parse existing emails
+        chunked: Split a full sync into per-month chunk jobs that run and
+            retry independently
 
     Returns:
         Job details dict with job_id and status
@@ -47,6 +56,11 @@ def start_sync(
     if from_date or to_date:
         gmail.update_gmail_sync_job_dates(job_id, from_date, to_date)
 
+    if chunked and sync_type == "full":
+        return _start_chunked_sync(
+            connection, job_id, from_date, to_date, force_reparse
+        )
+
     # Dispatch async task
     sync_gmail_receipts_task.delay(
         connection_id, sync_type, job_id, from_date, to_date, force_reparse
@@ -68,6 +82,65 @@ def start_sync(
     }
 
 
+def _start_chunked_sync(
+    connection: dict,
+    job_id: int,
+    from_date: str,
+    to_date: str,
+    force_reparse: bool,
+) -> dict:
+    """
+    Fan a full sync out into one chunk job per calendar month.
+
+    Args:
+        connection: Gmail connection dict
+        job_id: Parent job ID
+        from_date: ISO format date string (YYYY-MM-DD) or None
+        to_date: ISO format date string (YYYY-MM-DD) or None
+        force_reparse: Whether to re-parse existing emails
+
+    Returns:
+        Job details dict with parent job_id and chunk job IDs
+    """
+    connection_id = connection["id"]
+
+    if from_date:
+        start = datetime.fromisoformat(from_date)
+    elif connection.get("sync_from_date"):
+        start = datetime.fromisoformat(str(connection["sync_from_date"]))
+    else:
+        start = datetime.utcnow() - timedelta(days=gmail_sync.DEFAULT_SYNC_MONTHS * 30)
+    end = datetime.fromisoformat(to_date) if to_date else None
+
+    chunk_job_ids = []
+    for chunk_from, chunk_to in gmail_sync.plan_sync_chunks(start, end):
+        chunk_job_id = gmail.create_gmail_sync_job(
+            connection_id, job_type="chunk", parent_job_id=job_id
+        )
+        gmail.update_gmail_sync_job_dates(chunk_job_id, chunk_from, chunk_to)
+        sync_gmail_chunk_task.delay(
+            connection_id, chunk_job_id, job_id, chunk_from, chunk_to, force_reparse
+        )
+        chunk_job_ids.append(chunk_job_id)
+
+    logger.info(
+        f"Gmail chunked sync queued: job_id={job_id}, "
+        f"{len(chunk_job_ids)} monthly chunks, force_reparse={force_reparse}"
+    )
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "sync_type": "full",
+        "from_date": from_date,
+        "to_date": to_date,
+        "force_reparse": force_reparse,
+        "connection_id": connection_id,
+        "chunked": True,
+        "chunk_job_ids": chunk_job_ids,
+    }
+
+
 def get_sync_status(user_id: int) -> dict:
     """
     Get Gmail sync status for a user.
@@ -223,13 +296,22 @@ def confirm_match(match_id: int) -> bool:
     """
     Confirm a Gmail receipt match.
 
+    The confirmed receipt's amount, date and order ID also teach the
+    sender's receipt template, so later emails with the same layout are
+    parsed without the LLM.
+
     Args:
         match_id: Match ID
 
     Returns:
         True if confirmed successfully
     """
-    return gmail.confirm_gmail_match(match_id)
+    confirmed = gmail.confirm_gmail_match(match_id)
+    if confirmed:
+        receipt_id = gmail.get_gmail_match_receipt_id(match_id)
+        if receipt_id:
+            learn_template_from_receipt(receipt_id, source="user")
+    return confirmed
 
 
 def delete_match(match_id: int) -> bool:
@@ -200,6 +200,13 @@ def clear_testing_data(data_types: list[str]) -> dict:
                 cleared_counts[data_type] = row_count
                 session.commit()
 
+                if data_type == "gmail_email_content":
+                    # Bodies are shared by hash, so drop the unreferenced ones
+                    database.delete_orphaned_email_bodies()
+                elif data_type in ("gmail_receipts", "gmail_transaction_matches"):
+                    # Bulk clears bypass the summary maintenance
+                    database.rebuild_gmail_merchant_summary()
+
             except Exception as e:
                 # Fail-fast: stop on first error
                 session.rollback()
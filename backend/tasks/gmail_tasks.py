@@ -176,6 +176,88 @@ def sync_gmail_receipts_task(
         }
 
 
+@celery_app.task(bind=True, time_limit=1800, soft_time_limit=1700, max_retries=3)
+def sync_gmail_chunk_task(
+    self,
+    connection_id: int,
+    job_id: int,
+    parent_job_id: int,
+    from_date_str: str,
+    to_date_str: str,
+    force_reparse: bool = False,
+):
+    """
+    Celery task to sync one month-sized chunk of a chunked full sync.
+
+    Each chunk has its own job and checkpoint, so a retry picks up where the
+    failed attempt stopped and never touches other chunks.
+    Chunks leave the connection's history ID alone; the parent sets it
+    once every chunk has finished.
+
+    Args:
+        connection_id: Gmail connection ID
+        job_id: Chunk job ID
+        parent_job_id: Parent sync job ID (progress is rolled up into it)
+        from_date_str: Chunk start date (YYYY-MM-DD, inclusive)
+        to_date_str: Chunk end date (YYYY-MM-DD, exclusive)
+        force_reparse: If True, re-parse existing emails (bypass duplicate check)
+
+    Returns:
+        dict: Chunk sync statistics
+    """
+    from mcp.gmail_sync import sync_receipts_full
+
+    results = {}
+    try:
+        for progress in sync_receipts_full(
+            connection_id,
+            from_date=datetime.fromisoformat(from_date_str),
+            to_date=datetime.fromisoformat(to_date_str),
+            job_id=job_id,
+            force_reparse=force_reparse,
+            update_history=False,
+        ):
+            if progress.get("status") == "processing":
+                self.update_state(
+                    state="PROGRESS",
+                    meta={
+                        "status": "processing",
+                        "job_id": job_id,
+                        "parent_job_id": parent_job_id,
+                        "processed": progress.get("processed", 0),
+                        "parsed": progress.get("parsed", 0),
+                    },
+                )
+            elif progress.get("status") == "completed":
+                results = progress
+
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            # Checkpoint is intact - the retry resumes it. Until then the
+            # chunk counts as pending, so the parent isn't finalized early.
+            db.mark_gmail_sync_job_retrying(job_id, str(e))
+            raise self.retry(exc=e, countdown=30 * 2**self.request.retries) from e
+
+        db.finalize_gmail_parent_sync_job(parent_job_id)
+        return {"status": "failed", "error": str(e), "job_id": job_id}
+
+    db.finalize_gmail_parent_sync_job(parent_job_id)
+
+    return {
+        "status": "completed",
+        "job_id": job_id,
+        "parent_job_id": parent_job_id,
+        "stats": {
+            "total_messages": results.get("total_messages", 0),
+            "processed": results.get("processed", 0),
+            "parsed": results.get("parsed", 0),
+            "failed": results.get("failed", 0),
+            "duplicates": results.get("duplicates", 0),
+        },
+        "completed_at": datetime.now().isoformat(),
+    }
+
+
 @celery_app.task(bind=True, time_limit=600, soft_time_limit=550)
 def parse_gmail_receipts_task(self, connection_id: int, limit: int = 100):
     """
@@ -204,6 +286,95 @@ def parse_gmail_receipts_task(self, connection_id: int, limit: int = 100):
     }
 
 
+@celery_app.task(bind=True, time_limit=3600, soft_time_limit=3500)
+def reparse_gmail_receipts_task(self, connection_id: int = None):
+    """
+    Celery task to reparse stored receipts after a parser change.
+
+    Only receipts whose applicable parser version changed are reparsed, and
+    content already parsed under the current version comes from the cache.
+    Parses serially: prefork workers are daemonic and can't start a process
+    pool. Run python -m mcp.gmail_parsing.reparse to reparse in parallel.
+
+    Args:
+        connection_id: Gmail connection ID (all connections if None)
+
+    Returns:
+        dict: Reparse statistics
+    """
+    try:
+        from mcp.gmail_parsing.reparse import reparse_changed_receipts
+
+        self.update_state(
+            state="STARTED",
+            meta={"status": "reparsing", "connection_id": connection_id},
+        )
+
+        stats = reparse_changed_receipts(
+            connection_id,
+            workers=1,
+            progress_callback=lambda progress: self.update_state(
+                state="PROGRESS",
+                meta={
+                    "status": "reparsing",
+                    "connection_id": connection_id,
+                    "stale": progress.get("stale", 0),
+                    "processed": progress.get("processed", 0),
+                    "reparsed": progress.get("reparsed", 0),
+                    "cache_hits": progress.get("cache_hits", 0),
+                },
+            ),
+        )
+
+        return {
+            "status": "completed",
+            "stats": stats,
+            "completed_at": datetime.now().isoformat(),
+        }
+
+    except Exception as e:
+        return {"status": "failed", "error": str(e)}
+
+
+@celery_app.task(bind=True, time_limit=3600, soft_time_limit=3500)
+def backfill_gmail_receipt_duplicates_task(self, batch_size: int = 1000):
+    """
+    Celery task to flag duplicate receipts stored before detection ran.
+
+    Uses the same blocking keys and MinHash comparison as the sync, which
+    flags new receipts as they are saved.
+
+    Args:
+        batch_size: Receipts per transaction
+
+    Returns:
+        dict: Backfill statistics
+    """
+    try:
+        self.update_state(state="STARTED", meta={"status": "backfilling"})
+
+        stats = db.backfill_receipt_duplicates(
+            batch_size,
+            progress_callback=lambda progress: self.update_state(
+                state="PROGRESS",
+                meta={
+                    "status": "backfilling",
+                    "receipts": progress["receipts"],
+                    "changed": progress["changed"],
+                },
+            ),
+        )
+
+        return {
+            "status": "completed",
+            "stats": stats,
+            "completed_at": datetime.now().isoformat(),
+        }
+
+    except Exception as e:
+        return {"status": "failed", "error": str(e)}
+
+
 @celery_app.task(bind=True, time_limit=600, soft_time_limit=550)
 def match_gmail_receipts_task(self, user_id: int = 1):
     """
@@ -249,6 +420,7 @@ def cleanup_old_gmail_receipts_task(self, days: int = 90):
     - Are older than the specified days
     - Are NOT matched to a transaction
     - Have parsing_status of 'unparseable'
+    - Have no stored PDF attachments
 
     Args:
         days: Number of days to retain (default 90)
@@ -280,6 +452,70 @@ def cleanup_old_gmail_receipts_task(self, days: int = 90):
         return {"status": "failed", "error": str(e)}
 
 
+@celery_app.task(bind=True, time_limit=3600, soft_time_limit=3500)
+def apply_retention_policies_task(self, policies: list = None):
+    """
+    Celery task to delete rows past their retention period.
+
+    Covers receipts, email content and bodies, parse statistics, processing
+    errors, finished sync jobs, expired OAuth states and processed webhook
+    events. Rows are deleted in small throttled chunks so the purge never
+    holds long locks; scheduled daily by celery beat.
+
+    Args:
+        policies: Policy names to apply (default: all)
+
+    Returns:
+        dict: Rows deleted per policy
+    """
+    try:
+        self.update_state(state="STARTED", meta={"status": "purging"})
+
+        stats = db.run_retention(
+            policies,
+            progress_callback=lambda policy, deleted: self.update_state(
+                state="PROGRESS",
+                meta={"status": "purging", "policy": policy, "deleted": deleted},
+            ),
+        )
+
+        return {
+            "status": "completed",
+            "stats": stats,
+            "completed_at": datetime.now().isoformat(),
+        }
+
+    except Exception as e:
+        return {"status": "failed", "error": str(e)}
+
+
+@celery_app.task(bind=True, time_limit=600, soft_time_limit=550)
+def rebuild_gmail_merchant_summary_task(self):
+    """
+    Celery task to re-aggregate the Gmail merchant summary from receipts.
+
+    Receipt and match writers keep the summary current; this corrects rows
+    changed behind their back (retention purges, bulk clears) and is
+    scheduled daily by celery beat, after the retention purge.
+
+    Returns:
+        dict: Summary row count
+    """
+    try:
+        self.update_state(state="STARTED", meta={"status": "rebuilding"})
+
+        stats = db.rebuild_gmail_merchant_summary()
+
+        return {
+            "status": "completed",
+            "stats": stats,
+            "completed_at": datetime.now().isoformat(),
+        }
+
+    except Exception as e:
+        return {"status": "failed", "error": str(e)}
+
+
 @celery_app.task(bind=True, time_limit=900, soft_time_limit=850)
 def full_gmail_pipeline_task(self, connection_id: int, user_id: int = 1):
     """
@@ -378,7 +614,8 @@ def process_pdf_receipt_task(
     Process PDF receipt asynchronously (Phase 2 Optimization).
 
     Downloads PDF attachment, parses it, uploads to MinIO, and updates receipt.
-    Runs in background to avoid blocking sync loop.
+    Runs in background to avoid blocking sync loop. A PDF whose content hash
+    is already known reuses the stored parse result and MinIO object.
 
     Args:
         receipt_id: Gmail receipt ID
@@ -459,11 +696,17 @@ def process_pdf_receipt_task(
         if not pdf_bytes:
             raise Exception("PDF bytes are empty")
 
-        # 2. Parse PDF with pdfplumber
+        from mcp.minio_client import compute_pdf_hash
+
+        content_hash = compute_pdf_hash(pdf_bytes)
+
+        # 2. Parse PDF with pdfplumber (cached by content hash)
         parse_start = time.time()
-        from mcp.gmail_pdf_parser import parse_receipt_pdf
+        from mcp.gmail_pdf_parser import parse_receipt_pdf_cached
 
-        pdf_result = parse_receipt_pdf(pdf_bytes, sender_domain, filename)
+        pdf_result = parse_receipt_pdf_cached(
+            pdf_bytes, sender_domain, filename, content_hash=content_hash
+        )
         parse_time = time.time() - parse_start
         logger.info(f"[PERF] PDF parse for receipt {receipt_id}: {parse_time:.3f}s")
 
@@ -519,7 +762,10 @@ def process_pdf_receipt_task(
                         etag=minio_result["etag"],
                     )
                     minio_object_key = minio_result["object_key"]
-                    logger.info(f"[PDF] Stored to MinIO: {minio_object_key}")
+                    if minio_result.get("deduplicated"):
+                        logger.info(f"[PDF] Reused stored PDF: {minio_object_key}")
+                    else:
+                        logger.info(f"[PDF] Stored to MinIO: {minio_object_key}")
         except Exception as e:
             # MinIO failure is non-fatal, continue with receipt update
             logger.warning(f"[PDF] MinIO storage failed (non-fatal): {e}")
@@ -565,3 +811,96 @@ def process_pdf_receipt_task(
             "error": error_msg,
             "duration": time.time() - task_start,
         }
+
+
+@celery_app.task(bind=True, time_limit=900, soft_time_limit=870, max_retries=3)
+def process_pdf_receipts_batch_task(self, connection_id: int, jobs: list):
+    """
+    Process a batch of PDF receipts from one connection asynchronously.
+
+    One task downloads, parses and stores up to GMAIL_PDF_BATCH_SIZE PDFs
+    over a single Gmail session, with the database updates issued in bulk
+    (see mcp.gmail_pdf_batch). Receipts that fail individually are marked
+    'failed' inside the batch; the task only retries when the batch as a
+    whole could not run.
+
+    Args:
+        connection_id: Gmail connection ID (for API access)
+        jobs: List of dicts with receipt_id, message_id, attachment_info,
+            sender_domain and optional received_date
+
+    Returns:
+        dict: Processing result with per-stage stats
+    """
+    import time
+
+    from celery.utils.log import get_task_logger
+
+    from mcp.gmail_pdf_batch import process_pdf_batch
+
+    logger = get_task_logger(__name__)
+    task_start = time.time()
+
+    try:
+        stats = process_pdf_batch(connection_id, jobs)
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"[PDF] Batch of {len(jobs)} failed: {error_msg}")
+        db.update_gmail_receipts_pdf_status_bulk(
+            [
+                {"id": job["receipt_id"], "status": "failed", "error": error_msg}
+                for job in jobs
+            ]
+        )
+
+        # Retry with exponential backoff
+        if self.request.retries < self.max_retries:
+            countdown = 2**self.request.retries  # 1, 2, 4 seconds
+            raise self.retry(exc=e, countdown=countdown) from e
+
+        return {
+            "status": "failed",
+            "error": error_msg,
+            "duration": time.time() - task_start,
+        }
+
+    total_time = time.time() - task_start
+    logger.info(
+        f"[PERF] PDF batch for connection {connection_id}: "
+        f"{stats['completed']}/{stats['total']} completed in {total_time:.3f}s"
+    )
+    return {
+        "status": "completed",
+        "duration": total_time,
+        **stats,
+    }
+
+
+@celery_app.task(bind=True, time_limit=1800, soft_time_limit=1700)
+def reconcile_pdf_storage_stats_task(self):
+    """
+    Celery task to recount the receipts bucket into the storage counters.
+
+    store_pdf() and delete_pdf() keep the counters current; this corrects
+    any drift and is scheduled daily by celery beat.
+
+    Returns:
+        dict: Reconciled storage statistics
+    """
+    from mcp.minio_client import is_available, reconcile_storage_stats
+
+    if not is_available():
+        return {"status": "skipped", "reason": "minio_unavailable"}
+
+    stats = reconcile_storage_stats()
+    if stats is None:
+        return {"status": "failed", "error": "Reconciliation failed"}
+
+    return {
+        "status": "completed",
+        "stats": {
+            "object_count": stats["object_count"],
+            "total_size_bytes": stats["total_size_bytes"],
+        },
+        "completed_at": datetime.now().isoformat(),
+    }
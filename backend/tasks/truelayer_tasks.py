@@ -18,6 +18,9 @@ def sync_truelayer_task(
     """
     Celery task to sync TrueLayer transactions in the background.
 
+    Accounts and cards of all connections (or the given one) are synced
+    concurrently, within per-provider limits (see mcp.truelayer_scheduler).
+
     Args:
         user_id: User ID to sync transactions for
         connection_id: Optional specific connection to sync (if None, syncs all)
@@ -34,7 +37,7 @@ def sync_truelayer_task(
         dict: Sync statistics
     """
     try:
-        from mcp.truelayer_sync import sync_all_accounts
+        from mcp.truelayer_sync import sync_all
 
         # Initial state
         self.update_state(
@@ -51,7 +54,7 @@ def sync_truelayer_task(
         # Get connection count for progress tracking
         if connection_id:
             conn = db.get_connection(connection_id)
-            if not conn:
+            if not conn or conn.get("user_id") != user_id:
                 return {"status": "failed", "error": "Connection not found"}
             connections = [conn]
         else:
@@ -93,8 +96,11 @@ def sync_truelayer_task(
         )
 
         # Execute sync
-        result = sync_all_accounts(
-            user_id=user_id, date_from=date_from, date_to=date_to
+        result = sync_all(
+            user_id=user_id,
+            date_from=date_from,
+            date_to=date_to,
+            connection_id=connection_id,
         )
 
         # Final progress update with results
@@ -118,11 +124,13 @@ def sync_truelayer_task(
             "status": "completed",
             "stats": {
                 "total_accounts": result.get("total_accounts", 0),
+                "total_cards": result.get("total_cards", 0),
                 "total_synced": result.get("total_synced", 0),
                 "total_duplicates": result.get("total_duplicates", 0),
                 "total_errors": result.get("total_errors", 0),
             },
             "accounts": result.get("accounts", []),
+            "cards": result.get("cards", []),
             "completed_at": datetime.now().isoformat(),
         }
 
@@ -0,0 +1,186 @@
+"""Integration tests for the offline Gmail API stand-in.
+
+Runs the real gmail_client functions over HTTP against
+mcp.gmail_api_standin, so the stand-in stays faithful to the payloads the
+sync parses:
+- Listing with date queries and pagination
+- Full and metadata message fetches, attachments
+- History (incremental) pages, de-duplication and expiry
+- 429 responses retried by fetch_with_backoff
+- Batch requests
+"""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import requests
+
+from mcp import gmail_client
+from mcp.gmail_api_standin import GmailApiStandIn, generate_mailbox
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    """Stand-in serving 30 synthetic messages, a third with PDF invoices."""
+    mailbox = generate_mailbox(30, days=30, pdf_ratio=0.34, seed=7)
+    with GmailApiStandIn(mailbox) as server:
+        monkeypatch.setattr(gmail_client, "GMAIL_API_BASE", server.api_base)
+        monkeypatch.setattr(gmail_client, "RATE_LIMIT_DELAY", 0)
+        yield server
+
+
+def test_list_and_fetch_messages(standin):
+    """Test listing pages through every message and fetches decode."""
+    session = requests.Session()
+    ids = []
+    page_token = None
+    while True:
+        page = gmail_client.list_receipt_messages(
+            session, query="after:2000/01/01", page_token=page_token, max_results=10
+        )
+        ids.extend(m["id"] for m in page["messages"])
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+    assert sorted(ids) == sorted(standin.mailbox.messages)
+    assert standin.stats()["messages.list"] == 3
+
+    with_pdf = next(
+        i
+        for i in ids
+        if any(
+            p.get("filename") for p in standin.mailbox.messages[i]["payload"]["parts"]
+        )
+    )
+    message = gmail_client.get_message_content(session, with_pdf)
+    assert "<html>" in message["body_html"]
+    assert message["received_at"] is not None
+    assert message["attachments"][0]["filename"].endswith(".pdf")
+
+    pdf = gmail_client.get_attachment_content(
+        session, with_pdf, message["attachments"][0]["attachment_id"]
+    )
+    assert pdf.startswith(b"%PDF")
+
+    metadata = gmail_client.get_message_metadata(session, with_pdf)
+    assert metadata["subject"] == message["subject"]
+    assert "body_html" not in metadata
+
+
+def test_date_query_filters_messages(standin):
+    """Test after:/before: restrict listing to the received date range."""
+    cutoff = datetime.now(UTC) - timedelta(days=10)
+    query = f"after:{cutoff:%Y/%m/%d}"
+    page = gmail_client.list_receipt_messages(
+        requests.Session(), query=query, max_results=500
+    )
+
+    floor = datetime(cutoff.year, cutoff.month, cutoff.day, tzinfo=UTC)
+    expected = [
+        m["id"]
+        for m in standin.mailbox.messages.values()
+        if int(m["internalDate"]) >= floor.timestamp() * 1000
+    ]
+    assert sorted(m["id"] for m in page["messages"]) == sorted(expected)
+
+
+def test_history_changes_and_expiry(standin):
+    """Test history returns only messages added after the start ID."""
+    session = requests.Session()
+    start = gmail_client.get_user_profile(session)["history_id"]
+    generate_mailbox(5, seed=8, mailbox=standin.mailbox)
+
+    changes = gmail_client.get_history_changes(session, start)
+    assert len(changes["new_message_ids"]) == 5
+    assert changes["latest_history_id"] == str(standin.mailbox.history_id)
+
+    expired = gmail_client.get_history_changes(session, "1")
+    assert expired["full_sync_required"] is True
+
+
+def test_history_pages_stream_deduplicated_ids(standin):
+    """Test history pages are de-duplicated and carry resumable checkpoints."""
+    session = requests.Session()
+    start = gmail_client.get_user_profile(session)["history_id"]
+    mailbox = standin.mailbox
+    generate_mailbox(150, seed=9, mailbox=mailbox)
+    # A message appearing in a second history record (e.g. relabelled)
+    relabelled = mailbox.history[-150][1]
+    mailbox.history.append((mailbox.history_id + 1, relabelled))
+    mailbox.history_id += 1
+
+    pages = list(gmail_client.iter_history_pages(session, start))
+
+    assert len(pages) == 2
+    ids = [i for page in pages for i in page["message_ids"]]
+    assert len(ids) == len(set(ids)) == 150
+    assert pages[-1]["history_id"] == str(mailbox.history_id)
+
+    # Resuming from the first page's checkpoint yields only the rest (the
+    # relabelled message again, left to the sync's known-ID check)
+    resumed = gmail_client.get_history_changes(session, pages[0]["history_id"])
+    assert resumed["new_message_ids"] == pages[1]["message_ids"] + [relabelled]
+
+
+def test_history_dedupe_keeps_only_the_previous_page(standin):
+    """Test repeats two pages apart are streamed, and collected only once."""
+    session = requests.Session()
+    start = gmail_client.get_user_profile(session)["history_id"]
+    mailbox = standin.mailbox
+    generate_mailbox(250, seed=10, mailbox=mailbox)
+    # The first new message shows up again in a record on the third page
+    relabelled = mailbox.history[-250][1]
+    mailbox.history.append((mailbox.history_id + 1, relabelled))
+    mailbox.history_id += 1
+
+    pages = list(gmail_client.iter_history_pages(session, start))
+
+    assert len(pages) == 3
+    assert relabelled in pages[0]["message_ids"]
+    assert relabelled in pages[2]["message_ids"]
+
+    changes = gmail_client.get_history_changes(session, start)
+    assert len(changes["new_message_ids"]) == len(set(changes["new_message_ids"]))
+    assert len(changes["new_message_ids"]) == 250
+
+
+def test_rate_limited_requests_are_retried(standin, monkeypatch):
+    """Test 429s from the stand-in are retried by fetch_with_backoff."""
+    monkeypatch.setattr(gmail_client.time, "sleep", lambda seconds: None)
+    standin.rate_limit_rate = 0.5
+
+    session = requests.Session()
+    exhausted = []
+    for message_id in list(standin.mailbox.messages)[:10]:
+        try:
+            gmail_client.get_message_metadata(session, message_id)
+        except requests.HTTPError as e:
+            # Three 429s in a row exhaust the retries
+            exhausted.append(e.response.status_code)
+
+    assert set(exhausted) <= {429}
+    stats = standin.stats()
+    assert stats["rate_limited"] > 0
+    assert stats["messages.get"] + stats["rate_limited"] > 10
+
+
+def test_batch_request(standin):
+    """Test a multipart batch answers every inner request."""
+    ids = list(standin.mailbox.messages)[:3] + ["missing"]
+    body = "".join(
+        f"--b\r\nContent-Type: application/http\r\nContent-ID: <{n}>\r\n\r\n"
+        f"GET /gmail/v1/users/me/messages/{message_id}?format=metadata\r\n\r\n"
+        for n, message_id in enumerate(ids)
+    )
+    response = requests.post(
+        f"{standin.base_url}/batch/gmail/v1",
+        data=f"{body}--b--\r\n",
+        headers={"Content-Type": "multipart/mixed; boundary=b"},
+        timeout=10,
+    )
+
+    assert response.status_code == 200
+    assert response.text.count("HTTP/1.1 200 OK") == 3
+    assert "HTTP/1.1 404" in response.text
+    assert "Content-ID: <response-3>" in response.text
+    assert standin.stats()["batch"] == 1
@@ -0,0 +1,229 @@
+"""Integration tests for chunked, checkpointed Gmail full sync.
+
+The Gmail API, message processing and the database are replaced by
+in-memory fakes so the tests cover how plan_sync_chunks() splits a date
+range into monthly chunks, and how sync_receipts_full() checkpoints a
+chunk after every committed batch and resumes it after a failure, without
+network or database access.
+"""
+
+from datetime import datetime
+
+import pytest
+
+import database
+from mcp import gmail_sync, statistics_tracker
+
+
+def test_plan_sync_chunks_splits_on_month_boundaries():
+    """Test chunks are half-open calendar months clipped to the range."""
+    chunks = gmail_sync.plan_sync_chunks(
+        datetime(2024, 11, 15, 13, 30), datetime(2025, 2, 10)
+    )
+
+    assert chunks == [
+        ("2024-11-15", "2024-12-01"),
+        ("2024-12-01", "2025-01-01"),
+        ("2025-01-01", "2025-02-01"),
+        ("2025-02-01", "2025-02-10"),
+    ]
+
+
+def test_plan_sync_chunks_single_and_empty_ranges():
+    """Test a range within one month is one chunk and an empty range none."""
+    assert gmail_sync.plan_sync_chunks(datetime(2024, 3, 1), datetime(2024, 4, 1)) == [
+        ("2024-03-01", "2024-04-01")
+    ]
+    assert gmail_sync.plan_sync_chunks(datetime(2024, 3, 5), datetime(2024, 3, 6)) == [
+        ("2024-03-05", "2024-03-06")
+    ]
+
+    assert gmail_sync.plan_sync_chunks(datetime(2024, 3, 5), datetime(2024, 3, 5)) == []
+    assert gmail_sync.plan_sync_chunks(datetime(2024, 3, 5), datetime(2024, 2, 1)) == []
+
+
+class FakeStatistics:
+    """GmailSyncStatistics that records nothing."""
+
+    def __init__(self, connection_id, sync_job_id):
+        pass
+
+    def flush(self):
+        pass
+
+    def get_summary(self):
+        return ""
+
+
+@pytest.fixture
+def chunk_sync(monkeypatch):
+    """Fake mailbox of 120 messages on one listing page, and a fake jobs table."""
+    message_ids = [f"msg-{number:03d}" for number in range(120)]
+    jobs = {7: {"status": "queued", "checkpoint": None, "dates": None}}
+    batches = []
+    fail_on_batch = {"number": None}
+    profile = {"email_address": "me@example.com", "history_id": "42"}
+    history_updates = []
+
+    def process_batch(connection_id, batch_ids, job_id, perf, stats, **kwargs):
+        if len(batches) + 1 == fail_on_batch["number"]:
+            fail_on_batch["number"] = None
+            raise RuntimeError("Gmail API unavailable")
+        batches.append(batch_ids)
+        return {
+            "processed": len(batch_ids),
+            "parsed": len(batch_ids),
+            "failed": 0,
+            "duplicates": 0,
+            "filtered": 0,
+            "oldest_received_at": datetime(2024, 1, 20),
+        }
+
+    def resumable_checkpoint(connection_id, from_date, to_date, job_id=None):
+        checkpoint = jobs[job_id]["checkpoint"]
+        if not checkpoint or checkpoint["to_date"] != to_date:
+            return None
+        if from_date is None:
+            if not checkpoint["default_range"]:
+                return None
+        elif checkpoint["default_range"] or checkpoint["from_date"] != from_date:
+            return None
+        return {**checkpoint, "resumed_from_job_id": job_id}
+
+    def save_dates(job_id, from_date, to_date):
+        jobs[job_id]["dates"] = (from_date, to_date)
+        return True
+
+    def save_checkpoint(job_id, checkpoint):
+        jobs[job_id]["checkpoint"] = checkpoint
+        return True
+
+    def complete_job(job_id, status="completed", error=None):
+        jobs[job_id]["status"] = status
+        return True
+
+    monkeypatch.setattr(
+        database, "get_gmail_connection_by_id", lambda connection_id: {"id": 1}
+    )
+    monkeypatch.setattr(
+        database, "get_resumable_gmail_sync_checkpoint", resumable_checkpoint
+    )
+    monkeypatch.setattr(database, "update_gmail_sync_job_checkpoint", save_checkpoint)
+    monkeypatch.setattr(database, "update_gmail_sync_job_dates", save_dates)
+    monkeypatch.setattr(
+        database, "update_gmail_sync_job_progress", lambda *args, **kwargs: True
+    )
+    monkeypatch.setattr(database, "complete_gmail_sync_job", complete_job)
+    monkeypatch.setattr(
+        database,
+        "update_gmail_history_id",
+        lambda connection_id, history_id: history_updates.append(history_id),
+    )
+    monkeypatch.setattr(database, "update_gmail_connection_status", lambda *args: True)
+    monkeypatch.setattr(statistics_tracker, "GmailSyncStatistics", FakeStatistics)
+    monkeypatch.setattr(
+        gmail_sync, "get_gmail_credentials", lambda connection_id: ("at", "rt")
+    )
+    monkeypatch.setattr(gmail_sync, "build_gmail_service", lambda *args: object())
+    monkeypatch.setattr(gmail_sync, "get_user_profile", lambda service: dict(profile))
+    monkeypatch.setattr(
+        gmail_sync,
+        "list_receipt_messages",
+        lambda service, query, page_token=None, max_results=100: {
+            "messages": [{"id": msg_id} for msg_id in message_ids],
+            "resultSizeEstimate": len(message_ids),
+        },
+    )
+    monkeypatch.setattr(
+        gmail_sync,
+        "split_known_message_ids",
+        lambda connection_id, ids: (list(ids), set()),
+    )
+    monkeypatch.setattr(gmail_sync, "_process_sync_batch", process_batch)
+
+    def run(**kwargs):
+        kwargs.setdefault("from_date", datetime(2024, 1, 1))
+        kwargs.setdefault("to_date", datetime(2024, 2, 1))
+        results = list(gmail_sync.sync_receipts_full(1, job_id=7, **kwargs))
+        return results[-1]
+
+    return {
+        "run": run,
+        "jobs": jobs,
+        "batches": batches,
+        "fail_on_batch": fail_on_batch,
+        "message_ids": message_ids,
+        "profile": profile,
+        "history_updates": history_updates,
+    }
+
+
+def test_chunk_sync_resumes_from_checkpoint_after_failure(chunk_sync):
+    """Test a retried chunk skips committed batches and finishes the rest."""
+    chunk_sync["fail_on_batch"]["number"] = 2
+
+    with pytest.raises(RuntimeError):
+        chunk_sync["run"]()
+
+    job = chunk_sync["jobs"][7]
+    assert job["status"] == "failed"
+    assert job["checkpoint"]["page_offset"] == gmail_sync.BATCH_SIZE
+    assert job["checkpoint"]["processed"] == gmail_sync.BATCH_SIZE
+    assert job["checkpoint"]["cursor_date"] == "2024-01-20"
+
+    result = chunk_sync["run"]()
+
+    assert result["status"] == "completed"
+    assert result["processed"] == len(chunk_sync["message_ids"])
+    assert result["parsed"] == len(chunk_sync["message_ids"])
+    assert job["status"] == "completed"
+
+    # Every message was processed exactly once across both runs
+    processed_ids = [msg_id for batch in chunk_sync["batches"] for msg_id in batch]
+    assert processed_ids == chunk_sync["message_ids"]
+
+
+def test_resumed_sync_keeps_history_id_from_first_start(chunk_sync):
+    """Test the history ID saved when the sync first started survives a resume."""
+    chunk_sync["fail_on_batch"]["number"] = 2
+
+    with pytest.raises(RuntimeError):
+        chunk_sync["run"]()
+
+    assert chunk_sync["jobs"][7]["checkpoint"]["history_id"] == "42"
+
+    # Mail arrived while the job was down - the mailbox has moved on
+    chunk_sync["profile"]["history_id"] = "99"
+    result = chunk_sync["run"]()
+
+    assert result["history_id"] == "42"
+    assert chunk_sync["history_updates"] == ["42"]
+
+
+def test_chunk_sync_leaves_history_id_to_parent(chunk_sync):
+    """Test a sync run with update_history=False doesn't touch the connection."""
+    result = chunk_sync["run"](update_history=False)
+
+    assert result["status"] == "completed"
+    assert chunk_sync["history_updates"] == []
+    assert chunk_sync["jobs"][7]["checkpoint"]["history_id"] == "42"
+
+
+def test_default_range_sync_resumes_on_a_later_day(chunk_sync):
+    """Test the default range resumes with the start date it was begun with."""
+    chunk_sync["fail_on_batch"]["number"] = 2
+
+    with pytest.raises(RuntimeError):
+        chunk_sync["run"](from_date=None, to_date=None)
+
+    # Pretend the failed run started on an earlier day
+    job = chunk_sync["jobs"][7]
+    assert job["checkpoint"]["default_range"] is True
+    job["checkpoint"]["from_date"] = "2023-06-01"
+
+    result = chunk_sync["run"](from_date=None, to_date=None)
+
+    assert result["status"] == "completed"
+    assert job["dates"] == ("2023-06-01", None)
+    processed_ids = [msg_id for batch in chunk_sync["batches"] for msg_id in batch]
+    assert processed_ids == chunk_sync["message_ids"]
@@ -7,11 +7,15 @@ Tests critical integration points:
 - Error response handling (401 token expiry, 429 rate limits)
 """
 
+import asyncio
+from collections import Counter
+
+import httpx
 import pytest
 import responses
 from requests import HTTPError
 
-from mcp.truelayer_client import TrueLayerClient
+from mcp.truelayer_client import TrueLayerClient, fetch_connections_data
 
 # ============================================================================
 # PAGINATION TESTS (TIER 1 CRITICAL)
@@ -116,12 +120,7 @@ def test_get_transactions_empty_results():
 
 @responses.activate
 def test_401_token_expiry_raises_error():
-    """Test that 401 token expiry error is properly raised.
-
-    Note: Current implementation doesn't handle token refresh automatically.
-    This test validates that the error is raised so callers can implement
-    token refresh logic.
-    """
+    """Test that 401 token expiry error is raised without a refresh callback."""
     responses.add(
         responses.GET,
         "https://api.truelayer.com/data/v1/accounts",
@@ -140,6 +139,39 @@ def test_401_token_expiry_raises_error():
     assert exc_info.value.response.status_code == 401
 
 
+@responses.activate
+def test_401_retried_once_with_refreshed_token():
+    """Test a 401 asks on_unauthorized for a token and retries once with it."""
+    url = "https://api.truelayer.com/data/v1/accounts"
+    expired = {"error": "invalid_token", "error_description": "expired"}
+    responses.add(responses.GET, url, json=expired, status=401)
+    responses.add(
+        responses.GET,
+        url,
+        json={"results": [{"account_id": "acc-1"}], "status": "Succeeded"},
+        status=200,
+    )
+    rejected = []
+
+    def refresh(token):
+        rejected.append(token)
+        return "fresh-token"
+
+    client = TrueLayerClient("expired-token", on_unauthorized=refresh)
+
+    assert client.get_accounts() == [{"account_id": "acc-1"}]
+    assert rejected == ["expired-token"]
+    assert responses.calls[1].request.headers["Authorization"] == "Bearer fresh-token"
+
+    # A fresh token that is rejected too is not refreshed again
+    responses.reset()
+    responses.add(responses.GET, url, json=expired, status=401)
+    responses.add(responses.GET, url, json=expired, status=401)
+    with pytest.raises(HTTPError):
+        client.get_accounts()
+    assert rejected == ["expired-token", "fresh-token"]
+
+
 @responses.activate
 def test_429_rate_limit_retry_with_backoff():
     """Test that 429 rate limit errors trigger retry with exponential backoff.
@@ -264,6 +296,63 @@ def test_get_transactions_partial_last_page():
     assert len(responses.calls) == 2
 
 
+@responses.activate
+def test_iter_transaction_pages_resumes_from_cursor():
+    """Test pages come with their next cursor and iteration can start from one."""
+    responses.add(
+        responses.GET,
+        "https://api.truelayer.com/data/v1/accounts/acc-123/transactions",
+        json={
+            "results": [{"transaction_id": "txn-2"}],
+            "next_cursor": "cursor_page3",
+            "status": "Succeeded",
+        },
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        "https://api.truelayer.com/data/v1/accounts/acc-123/transactions",
+        json={"results": [{"transaction_id": "txn-3"}], "status": "Succeeded"},
+        status=200,
+    )
+
+    client = TrueLayerClient("test-access-token")
+    pages = list(client.iter_transaction_pages("acc-123", cursor="cursor_page2"))
+
+    assert pages == [
+        ([{"transaction_id": "txn-2"}], "cursor_page3"),
+        ([{"transaction_id": "txn-3"}], None),
+    ]
+    assert responses.calls[0].request.params["cursor"] == "cursor_page2"
+    assert responses.calls[1].request.params["cursor"] == "cursor_page3"
+
+
+@responses.activate
+def test_get_transactions_raises_when_a_page_fails():
+    """Test a failed page raises instead of returning a truncated list."""
+    responses.add(
+        responses.GET,
+        "https://api.truelayer.com/data/v1/accounts/acc-123/transactions",
+        json={
+            "results": [{"transaction_id": "txn-1"}],
+            "next_cursor": "cursor_page2",
+            "status": "Succeeded",
+        },
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        "https://api.truelayer.com/data/v1/accounts/acc-123/transactions",
+        json={"error": "internal_server_error"},
+        status=500,
+    )
+
+    client = TrueLayerClient("test-access-token")
+
+    with pytest.raises(HTTPError):
+        client.get_transactions("acc-123")
+
+
 @responses.activate
 def test_get_transactions_with_date_filters():
     """Test transaction fetching with date range filters."""
@@ -299,6 +388,98 @@ def test_get_transactions_with_date_filters():
     assert request_params["to"] == "2025-01-31"
 
 
+# ============================================================================
+# TRANSPORT TESTS
+# ============================================================================
+
+
+@responses.activate
+def test_requests_use_client_timeout():
+    """Test requests go through the shared session with the client's timeout."""
+    responses.add(
+        responses.GET,
+        "https://api.truelayer.com/data/v1/cards",
+        json={"results": [], "status": "Succeeded"},
+        status=200,
+    )
+
+    client = TrueLayerClient("test-access-token", timeout=5)
+    client.get_cards()
+
+    assert responses.calls[0].request.req_kwargs["timeout"] == 5
+    assert responses.calls[0].request.headers["Authorization"] == (
+        "Bearer test-access-token"
+    )
+
+
+def test_fetch_connections_data_caps_requests_per_provider():
+    """Test many accounts are fetched concurrently within per-provider limits."""
+    in_flight = Counter()
+    peak = Counter()
+
+    async def handler(request):
+        # Tokens start with their provider's letter
+        provider = request.headers["Authorization"].removeprefix("Bearer ")[0]
+        in_flight[provider] += 1
+        peak[provider] = max(peak[provider], in_flight[provider])
+        await asyncio.sleep(0.01)
+        in_flight[provider] -= 1
+
+        path = request.url.path
+        if path == "/data/v1/cards":
+            return httpx.Response(200, json={"results": [{"account_id": "card-4"}]})
+        if path == "/data/v1/cards/card-1/balance":
+            return httpx.Response(500, json={"error": "internal_server_error"})
+        if path.endswith("/balance"):
+            return httpx.Response(200, json={"results": [{"current": 10.0}]})
+        if path.endswith("/pending"):
+            return httpx.Response(200, json={"results": []})
+        return httpx.Response(200, json={"results": [{"transaction_id": path}]})
+
+    connections = [
+        {"id": 1, "access_token": "a1", "provider_id": "bank-a"},
+        {"id": 2, "access_token": "a2", "provider_id": "bank-a", "card_ids": []},
+        {
+            "id": 3,
+            "access_token": "b1",
+            "provider_id": "bank-b",
+            "account_ids": ["acc-9"],
+            "card_ids": ["card-1"],
+        },
+    ]
+    for connection in connections[:2]:
+        connection["account_ids"] = ["acc-1", "acc-2"]
+    connections[0]["card_ids"] = None
+
+    results = fetch_connections_data(
+        connections,
+        from_date="2025-01-01",
+        to_date="2025-01-31",
+        concurrency=2,
+        transport=httpx.MockTransport(handler),
+    )
+
+    # bank-a's 17 requests overlapped, but never more than 2 at once
+    assert peak["a"] == 2
+    assert peak["b"] <= 2
+
+    acc_1 = results[0]["accounts"]["acc-1"]
+    assert acc_1["balance"] == {"current": 10.0}
+    assert acc_1["pending"] == []
+    assert acc_1["transactions"] == [
+        {"transaction_id": "/data/v1/accounts/acc-1/transactions"}
+    ]
+    # Cards of connection 1 were discovered, connection 2 has none
+    assert list(results[0]["cards"]) == ["card-4"]
+    assert results[1]["cards"] == {}
+    # A failed request doesn't fail the rest of the card
+    card = results[2]["cards"]["card-1"]
+    assert "500" in card["balance"]["error"]
+    assert card["transactions"] == [
+        {"transaction_id": "/data/v1/cards/card-1/transactions"}
+    ]
+
+
 # ============================================================================
 # TRANSACTION NORMALIZATION TESTS
 # ============================================================================
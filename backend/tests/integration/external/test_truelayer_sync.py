@@ -0,0 +1,426 @@
+"""Integration tests for TrueLayer transaction sync.
+
+The TrueLayer API and the database are replaced by in-memory fakes so the
+tests cover paging, merchant identification, duplicate counting and
+checkpointed resumption in sync_account_transactions(), the incremental
+window of sync_card_transactions(), and the scheduling of sync_all(),
+without network or database access.
+"""
+
+import functools
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+import database
+from mcp import pre_enrichment_detector, truelayer_scheduler, truelayer_sync
+
+
+def transaction(number, description="TESCO STORES 1234, LONDON"):
+    """Raw transaction as returned by the TrueLayer API."""
+    return {
+        "timestamp": "2024-03-05T10:30:00Z",
+        "description": description,
+        "transaction_type": "DEBIT",
+        "amount": -12.5,
+        "currency": "GBP",
+        "transaction_id": f"txn-{number}",
+        "normalised_provider_transaction_id": f"norm-{number}",
+        "transaction_category": "PURCHASE",
+    }
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """In-memory transactions table keyed like the unique index."""
+    rows = {}
+    statements = []
+
+    def insert_bulk(transactions):
+        statements.append(len(transactions))
+        inserted = []
+        for t in transactions:
+            key = t["normalised_provider_id"]
+            if key not in rows:
+                rows[key] = t
+                inserted.append((len(rows), key))
+        return inserted
+
+    monkeypatch.setattr(database, "insert_truelayer_transactions_bulk", insert_bulk)
+    monkeypatch.setattr(database, "update_account_last_synced", lambda *a: True)
+    monkeypatch.setattr(database, "update_connection_last_synced", lambda *a: True)
+    return rows, statements
+
+
+@pytest.fixture
+def checkpoints(monkeypatch):
+    """In-memory import progress checkpoints keyed by (job, account)."""
+    saved = {}
+    monkeypatch.setattr(
+        database,
+        "get_import_checkpoint",
+        lambda job_id, account_id: saved.get((job_id, account_id)),
+    )
+    monkeypatch.setattr(
+        database,
+        "update_import_checkpoint",
+        lambda job_id, account_id, checkpoint: saved.__setitem__(
+            (job_id, account_id), checkpoint
+        ),
+    )
+    return saved
+
+
+def fake_api(monkeypatch, pages, failing=()):
+    """Serve pages (cursor -> (transactions, next cursor)) to the sync.
+
+    Returns the list of (from, to, cursor) requests made; requests for a
+    cursor in failing raise like a dropped connection.
+    """
+    requests_made = []
+
+    def iter_transaction_pages(
+        self, account_id, from_date=None, to_date=None, limit=100, cursor=None
+    ):
+        while True:
+            requests_made.append((from_date, to_date, cursor))
+            if cursor in failing:
+                raise ConnectionError("connection reset")
+            page, cursor = pages[cursor]
+            yield page, cursor
+            if not cursor:
+                return
+
+    monkeypatch.setattr(
+        truelayer_sync.TrueLayerClient, "iter_transaction_pages", iter_transaction_pages
+    )
+    return requests_made
+
+
+def test_sync_inserts_pages_and_counts_duplicates(stored, monkeypatch):
+    """Test each page is one insert and stored transactions count as duplicates."""
+    rows, statements = stored
+    rows["norm-1"] = transaction(1)
+    fetched = [transaction(n) for n in range(1, 6)]
+    # Repeated within the fetched data
+    fetched.append(transaction(5))
+    # No provider ID: cannot be deduplicated or stored
+    fetched.append({**transaction(7), "normalised_provider_transaction_id": None})
+
+    fake_api(monkeypatch, {None: (fetched, None)})
+    monkeypatch.setattr(truelayer_sync, "TRUELAYER_SYNC_PAGE_SIZE", 3)
+
+    result = truelayer_sync.sync_account_transactions(
+        connection_id=1,
+        truelayer_account_id="acc-1",
+        db_account_id=10,
+        access_token="token",
+        use_incremental=False,
+    )
+
+    assert result["synced"] == 4
+    assert result["duplicates"] == 2
+    assert result["errors"] == 1
+    assert statements == [3, 3]
+
+    # Merchant identified from the description for the whole page
+    assert rows["norm-2"]["merchant_name"] == "TESCO STORES 1234"
+    assert rows["norm-2"]["account_id"] == 10
+
+
+def test_long_range_is_fetched_in_date_windows(stored, monkeypatch):
+    """Test an explicit date range is requested window by window."""
+    requests_made = fake_api(monkeypatch, {None: ([transaction(1)], None)})
+    monkeypatch.setattr(truelayer_sync, "TRUELAYER_SYNC_WINDOW_DAYS", 30)
+
+    result = truelayer_sync.sync_account_transactions(
+        connection_id=1,
+        truelayer_account_id="acc-1",
+        db_account_id=10,
+        access_token="token",
+        from_date="2024-01-01",
+        to_date="2024-03-01",
+    )
+
+    assert requests_made == [
+        ("2024-01-01", "2024-01-31", None),
+        ("2024-01-31", "2024-03-01", None),
+    ]
+    # The same transaction in both windows is stored once
+    assert result["synced"] == 1
+    assert result["duplicates"] == 1
+
+
+def test_failed_import_resumes_from_checkpoint(stored, checkpoints, monkeypatch):
+    """Test a rerun of a failed import continues after the last stored page."""
+    rows, _ = stored
+    pages = {
+        None: ([transaction(1), transaction(2)], "cursor-2"),
+        "cursor-2": ([transaction(3)], "cursor-3"),
+        "cursor-3": ([transaction(4)], None),
+    }
+    sync = functools.partial(
+        truelayer_sync.sync_account_transactions,
+        connection_id=1,
+        truelayer_account_id="acc-1",
+        db_account_id=10,
+        access_token="token",
+        from_date="2024-01-01",
+        to_date="2024-03-01",
+        import_job_id=5,
+    )
+
+    fake_api(monkeypatch, pages, failing={"cursor-3"})
+    result = sync()
+
+    # Pages stored before the failure are kept and checkpointed
+    assert "connection reset" in result["error_message"]
+    assert result["synced"] == 3
+    assert checkpoints[(5, 10)]["cursor"] == "cursor-3"
+    assert checkpoints[(5, 10)]["pages"] == 2
+
+    requests_made = fake_api(monkeypatch, pages)
+    result = sync()
+
+    assert requests_made == [("2024-01-01", "2024-03-01", "cursor-3")]
+    assert "error_message" not in result
+    assert result["synced"] == 4
+    assert set(rows) == {"norm-1", "norm-2", "norm-3", "norm-4"}
+    assert checkpoints[(5, 10)]["cursor"] is None
+
+
+def test_bad_rows_and_failed_page_insert_keep_good_rows(stored, monkeypatch):
+    """Test a bad row counts as an error and a failed page is stored row by row."""
+    rows, _ = stored
+    rows["norm-2"] = transaction(2)
+    detect = pre_enrichment_detector.detect_pre_enrichment_status
+
+    def detect_or_fail(description, merchant_name, transaction_type):
+        if description == "CORRUPT":
+            raise ValueError("unreadable description")
+        return detect(description, merchant_name, transaction_type)
+
+    def insert_bulk(transactions):
+        raise RuntimeError("value out of range for column amount")
+
+    def insert_one(**row):
+        if row["normalised_provider_id"] == "norm-4":
+            return None
+        rows[row["normalised_provider_id"]] = row
+        return len(rows)
+
+    monkeypatch.setattr(
+        pre_enrichment_detector, "detect_pre_enrichment_status", detect_or_fail
+    )
+    monkeypatch.setattr(database, "insert_truelayer_transactions_bulk", insert_bulk)
+    monkeypatch.setattr(database, "insert_truelayer_transaction", insert_one)
+    monkeypatch.setattr(
+        database, "get_truelayer_transaction_by_id", lambda key: rows.get(key)
+    )
+
+    page = [
+        {"normalised_provider_id": f"norm-{n}", "description": "TESCO STORES 1234"}
+        for n in range(1, 5)
+    ]
+    page.append({"normalised_provider_id": "norm-5", "description": "CORRUPT"})
+
+    result = truelayer_sync.store_transaction_page(10, page)
+
+    # norm-1 and norm-3 stored, norm-2 already stored, norm-4 and norm-5 failed
+    assert result == {"synced": 2, "duplicates": 1, "errors": 2}
+    assert {"norm-1", "norm-3"} <= set(rows)
+    assert "norm-5" not in rows
+
+
+@pytest.mark.parametrize(
+    "last_synced_at",
+    [
+        datetime.now() - timedelta(days=3),
+        datetime.now(UTC) - timedelta(days=3),
+        (datetime.now() - timedelta(days=3)).isoformat(),
+    ],
+)
+def test_card_incremental_sync_accepts_datetime_last_synced(
+    last_synced_at, monkeypatch
+):
+    """Test a card's last sync time works as a datetime or an ISO string."""
+    requests_made = []
+
+    def iter_card_transaction_pages(
+        self, card_id, from_date=None, to_date=None, limit=100, cursor=None
+    ):
+        requests_made.append((from_date, to_date))
+        return iter(())
+
+    monkeypatch.setattr(
+        truelayer_sync.TrueLayerClient,
+        "iter_card_transaction_pages",
+        iter_card_transaction_pages,
+    )
+    monkeypatch.setattr(
+        database,
+        "get_connection_cards",
+        lambda connection_id: [{"id": 20, "last_synced_at": last_synced_at}],
+    )
+    monkeypatch.setattr(database, "update_card_last_synced", lambda *a: True)
+
+    result = truelayer_sync.sync_card_transactions(
+        connection_id=1,
+        truelayer_card_id="card-1",
+        db_card_id=20,
+        access_token="token",
+    )
+
+    assert "error_message" not in result
+    assert result["errors"] == 0
+    # Three days since the last sync, plus a day's overlap
+    today = datetime.now(UTC).date()
+    assert requests_made == [
+        ((today - timedelta(days=4)).isoformat(), today.isoformat())
+    ]
+
+
+def test_sync_all_runs_accounts_and_cards_within_provider_limits(monkeypatch):
+    """Test accounts and cards sync concurrently, at most 2 per bank at once."""
+    connections = [
+        {"id": 1, "provider_id": "bank-a", "access_token": "enc-1"},
+        {"id": 2, "provider_id": "bank-a", "access_token": "enc-2"},
+        {"id": 3, "provider_id": "bank-b", "access_token": "enc-3"},
+    ]
+    refreshed = []
+    lock = threading.Lock()
+    in_flight = Counter()
+    peak = Counter()
+
+    def refresh(connection_id, connection):
+        refreshed.append(connection_id)
+        return connection
+
+    def fake_sync(provider_id, key, **kwargs):
+        with lock:
+            in_flight[provider_id] += 1
+            peak[provider_id] = max(peak[provider_id], in_flight[provider_id])
+        time.sleep(0.05)
+        with lock:
+            in_flight[provider_id] -= 1
+        if kwargs.get(key) == "acc-2-1":
+            raise RuntimeError("bank unavailable")
+        return {key: kwargs[key], "synced": 1, "duplicates": 0, "errors": 0}
+
+    def sync_account(**kwargs):
+        provider = "bank-b" if kwargs["connection_id"] == 3 else "bank-a"
+        return fake_sync(provider, "truelayer_account_id", **kwargs)
+
+    def sync_card(**kwargs):
+        provider = "bank-b" if kwargs["connection_id"] == 3 else "bank-a"
+        return fake_sync(provider, "truelayer_card_id", **kwargs)
+
+    monkeypatch.setattr(database, "get_user_connections", lambda user_id: connections)
+    monkeypatch.setattr(
+        database,
+        "get_connection_accounts",
+        lambda connection_id: [
+            {"id": 10 * connection_id + n, "account_id": f"acc-{connection_id}-{n}"}
+            for n in range(2)
+        ],
+    )
+    monkeypatch.setattr(database, "save_connection_card", lambda **kwargs: 99)
+    monkeypatch.setattr(truelayer_sync, "refresh_token_if_needed", refresh)
+    monkeypatch.setattr(truelayer_sync, "decrypt_token", lambda token: token)
+    monkeypatch.setattr(truelayer_sync, "sync_account_transactions", sync_account)
+    monkeypatch.setattr(truelayer_sync, "sync_card_transactions", sync_card)
+    monkeypatch.setattr(
+        truelayer_sync.TrueLayerClient,
+        "get_cards",
+        lambda self: [{"account_id": f"card-{self.access_token}"}],
+    )
+    monkeypatch.setattr(truelayer_scheduler, "TRUELAYER_PROVIDER_CONCURRENCY", 2)
+
+    result = truelayer_sync.sync_all(user_id=1)
+
+    # One token refresh per connection, not per account or card
+    assert refreshed == [1, 2, 3]
+    assert peak["bank-a"] == 2
+    assert peak["bank-b"] == 2
+
+    assert result["total_accounts"] == 6
+    assert result["total_cards"] == 3
+    assert result["total_synced"] == 8
+    assert result["total_errors"] == 1
+    failed = result["accounts"][3]
+    assert failed["account_id"] == "acc-2-1"
+    assert failed["error_message"] == "bank unavailable"
+    assert [c["truelayer_card_id"] for c in result["cards"]] == [
+        "card-enc-1",
+        "card-enc-2",
+        "card-enc-3",
+    ]
+
+
+def test_sync_all_skips_other_users_and_inactive_connections(monkeypatch):
+    """Test a connection_id sync only runs the user's own active connection."""
+    connections = {
+        1: {"id": 1, "user_id": 1, "connection_status": "active"},
+        2: {"id": 2, "user_id": 2, "connection_status": "active"},
+        3: {"id": 3, "user_id": 1, "connection_status": "expired"},
+    }
+    planned = []
+
+    def plan(connection, *args):
+        planned.append(connection["id"])
+        return [], []
+
+    monkeypatch.setattr(database, "get_connection", connections.get)
+    monkeypatch.setattr(truelayer_sync, "_plan_connection", plan)
+
+    for connection_id in (1, 2, 3, 4):
+        truelayer_sync.sync_all(user_id=1, connection_id=connection_id)
+
+    assert planned == [1]
+
+
+def test_rejected_token_is_refreshed_once_across_syncs(monkeypatch):
+    """Test concurrent 401s refresh a connection's token once, then reuse it."""
+    stored = {"access_token": "token-1", "refresh_token": "refresh-1"}
+    refreshes = []
+
+    def refresh_access_token(refresh_token):
+        refreshes.append(refresh_token)
+        time.sleep(0.05)
+        number = len(refreshes) + 1
+        return {
+            "access_token": f"token-{number}",
+            "refresh_token": f"refresh-{number}",
+            "expires_at": None,
+        }
+
+    def update_tokens(connection_id, access_token, refresh_token, expires_at):
+        stored.update(access_token=access_token, refresh_token=refresh_token)
+
+    monkeypatch.setattr(
+        database, "get_connection", lambda connection_id: {"id": 7, **stored}
+    )
+    monkeypatch.setattr(database, "update_connection_tokens", update_tokens)
+    monkeypatch.setattr(truelayer_sync, "refresh_access_token", refresh_access_token)
+    monkeypatch.setattr(truelayer_sync, "decrypt_token", lambda token: token)
+    monkeypatch.setattr(truelayer_sync, "encrypt_token", lambda token: token)
+
+    tokens = []
+    threads = [
+        threading.Thread(
+            target=lambda: tokens.append(
+                truelayer_sync.current_access_token(7, rejected_token="token-1")
+            )
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert refreshes == ["refresh-1"]
+    assert tokens == ["token-2"] * 3
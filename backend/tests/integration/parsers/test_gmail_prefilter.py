@@ -0,0 +1,84 @@
+"""Integration tests for metadata-first Gmail pre-filtering.
+
+The sync fetches headers and snippet (format=metadata) before downloading
+full message bodies. These tests pin down which decisions are safe to make
+from metadata alone, so that no real receipt is dropped before its body has
+been checked.
+"""
+
+from mcp.gmail_sync import should_fetch_full_message, should_import_email
+
+# ============================================================================
+# HEADER-LEVEL REJECTIONS
+# ============================================================================
+
+
+def test_personal_domain_rejected_from_metadata():
+    """Test forwarded mail from personal domains is rejected without a body."""
+    should_fetch, reason = should_fetch_full_message(
+        "Fwd: your receipt", "friend@gmail.com", "Here is the receipt"
+    )
+
+    assert should_fetch is False
+    assert "Personal email domain" in reason
+
+
+def test_shipping_subject_rejected_from_metadata():
+    """Test shipping notifications are rejected from the subject alone."""
+    should_fetch, _ = should_fetch_full_message(
+        "Your order has shipped", "orders@example-shop.com", ""
+    )
+
+    assert should_fetch is False
+
+
+def test_amazon_shipment_rejected_from_metadata():
+    """Test Amazon dispatch notifications are rejected from the subject."""
+    should_fetch, reason = should_fetch_full_message(
+        "Dispatched: 'USB-C cable'", "shipment-tracking@amazon.co.uk", ""
+    )
+
+    assert should_fetch is False
+    assert "shipment" in reason.lower()
+
+
+# ============================================================================
+# AMAZON SNIPPET HEURISTIC
+# ============================================================================
+
+
+def test_amazon_snippet_indicator_accepts():
+    """Test an Amazon receipt indicator in the snippet is enough to accept."""
+    should_fetch, _ = should_fetch_full_message(
+        "Your Amazon.co.uk order.",
+        "auto-confirm@amazon.co.uk",
+        "Thanks for your order, John. Arriving Friday",
+    )
+
+    assert should_fetch is True
+
+
+def test_amazon_without_snippet_indicator_deferred_to_full_fetch():
+    """Test Amazon mail is not rejected just because the snippet is short.
+
+    CRITICAL: The full-body filter rejects Amazon mail with no receipt
+    indicator, but the indicator may sit past the snippet. Rejecting here
+    would silently drop real receipts.
+    """
+    subject = "Your Amazon.co.uk order."
+    sender = "auto-confirm@amazon.co.uk"
+
+    assert should_import_email(subject, sender, "Hello John,")[0] is False
+
+    should_fetch, _ = should_fetch_full_message(subject, sender, "Hello John,")
+
+    assert should_fetch is True
+
+
+def test_generic_sender_passes_to_full_fetch():
+    """Test unknown senders are fetched in full for generic parsing."""
+    should_fetch, _ = should_fetch_full_message(
+        "Your receipt from Bax Music", "info@bax-shop.co.uk", "Invoice INV-123"
+    )
+
+    assert should_fetch is True
@@ -0,0 +1,154 @@
+"""Integration tests for known-message filtering in Gmail sync.
+
+Covers the message ID Bloom filter (no false negatives, false positive rate
+at its sized capacity) and split_known_message_ids() with the filter off
+and on, against a faked message ID lookup.
+"""
+
+import threading
+
+import pytest
+
+import database
+from mcp import gmail_known_messages
+from mcp.gmail_known_messages import (
+    MessageIdBloomFilter,
+    remember_message_ids,
+    split_known_message_ids,
+)
+
+
+def message_ids(prefix: str, count: int) -> list:
+    """Gmail-style message IDs."""
+    return [f"{prefix}{number:012x}" for number in range(count)]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test every added ID is reported present, even past capacity."""
+    bloom = MessageIdBloomFilter(500)
+    ids = message_ids("18d", 1500)
+    for message_id in ids:
+        bloom.add(message_id)
+
+    assert bloom.count == 1500
+    assert all(message_id in bloom for message_id in ids)
+
+
+def test_bloom_filter_false_positive_rate_when_sized_for_n():
+    """Test the false positive rate stays near the target at capacity."""
+    bloom = MessageIdBloomFilter(5000, false_positive_rate=0.01)
+    for message_id in message_ids("18d", 5000):
+        bloom.add(message_id)
+
+    probes = message_ids("19e", 20000)
+    false_positives = sum(1 for message_id in probes if message_id in bloom)
+
+    assert bloom.num_hashes == 7
+    assert false_positives / len(probes) < 0.02
+
+
+def test_bloom_filter_sizes_for_tiny_capacity():
+    """Test a filter for zero or one items is still usable."""
+    bloom = MessageIdBloomFilter(0)
+    assert bloom.capacity == 1
+    assert bloom.num_bits >= 8
+    assert "18d000000000001" not in bloom
+
+    bloom.add("18d000000000001")
+    assert "18d000000000001" in bloom
+
+
+@pytest.fixture
+def stored_ids(monkeypatch):
+    """Faked message ID lookups over a set of stored IDs, recording queries."""
+    stored = set(message_ids("18d", 40))
+    queries = []
+
+    def existing(candidates):
+        queries.append(list(candidates))
+        return {message_id for message_id in candidates if message_id in stored}
+
+    monkeypatch.setattr(database, "get_existing_gmail_message_ids", existing)
+    monkeypatch.setattr(
+        database,
+        "get_gmail_message_ids_for_connection",
+        lambda connection_id: iter(stored),
+    )
+    monkeypatch.setattr(gmail_known_messages, "_filters", {})
+    monkeypatch.setattr(gmail_known_messages, "_pending_ids", {})
+    monkeypatch.setattr(gmail_known_messages, "_build_locks", {})
+    return {"stored": stored, "queries": queries}
+
+
+def test_split_known_message_ids_preserves_listing_order(stored_ids, monkeypatch):
+    """Test stored IDs are split off and new IDs keep their order."""
+    monkeypatch.setattr(gmail_known_messages, "GMAIL_KNOWN_ID_BLOOM", False)
+    page = message_ids("19e", 3)[::-1] + message_ids("18d", 5)
+
+    new_ids, known_ids = split_known_message_ids(1, page)
+
+    assert new_ids == message_ids("19e", 3)[::-1]
+    assert known_ids == set(message_ids("18d", 5))
+    assert stored_ids["queries"] == [page]
+
+    assert split_known_message_ids(1, []) == ([], set())
+    assert len(stored_ids["queries"]) == 1
+
+
+def test_split_known_message_ids_with_bloom_skips_unseen_ids(stored_ids, monkeypatch):
+    """Test the Bloom filter keeps unseen IDs out of the database query."""
+    monkeypatch.setattr(gmail_known_messages, "GMAIL_KNOWN_ID_BLOOM", True)
+    new = message_ids("19e", 50)
+    page = new + message_ids("18d", 10)
+
+    new_ids, known_ids = split_known_message_ids(1, page)
+
+    assert new_ids == new
+    assert known_ids == set(message_ids("18d", 10))
+    queried = stored_ids["queries"][0]
+    assert set(message_ids("18d", 10)) <= set(queried)
+    assert len(queried) < len(page)
+
+    # IDs stored by this worker are remembered without a rebuild
+    remember_message_ids(1, new[:5])
+    stored_ids["stored"].update(new[:5])
+    new_ids, known_ids = split_known_message_ids(1, new[:5])
+    assert new_ids == []
+    assert known_ids == set(new[:5])
+
+
+def test_filter_build_blocks_only_its_own_connection(stored_ids, monkeypatch):
+    """Test a slow filter build doesn't hold up other connections."""
+    monkeypatch.setattr(gmail_known_messages, "GMAIL_KNOWN_ID_BLOOM", True)
+    streaming = threading.Event()
+    release = threading.Event()
+
+    def ids_for_connection(connection_id):
+        if connection_id == 1:
+            streaming.set()
+            assert release.wait(5)
+        return iter(stored_ids["stored"])
+
+    monkeypatch.setattr(
+        database, "get_gmail_message_ids_for_connection", ids_for_connection
+    )
+
+    slow = threading.Thread(target=split_known_message_ids, args=(1, ["19e0"]))
+    slow.start()
+    try:
+        assert streaming.wait(5)
+
+        # Another connection builds and answers while connection 1 streams
+        new_ids, known_ids = split_known_message_ids(2, message_ids("18d", 3))
+        assert new_ids == []
+        assert known_ids == set(message_ids("18d", 3))
+
+        # Stored mid-build, possibly after the stream read past it
+        remember_message_ids(1, ["19e0", "19e1"])
+    finally:
+        release.set()
+        slow.join(5)
+
+    bloom = gmail_known_messages._filters[1].bloom
+    assert "19e0" in bloom
+    assert "19e1" in bloom
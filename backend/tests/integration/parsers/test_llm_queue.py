@@ -0,0 +1,171 @@
+"""Integration tests for the batched LLM receipt queue.
+
+The database and the LLM provider are replaced by in-memory fakes so the
+tests cover body loading, batching, cost splitting and status updates in
+process_llm_queue() without a database or API key.
+"""
+
+import json
+import re
+
+import pytest
+
+import database
+from config.llm_config import LLMConfig, LLMProvider
+from mcp import gmail_llm_queue
+from mcp.gmail_parsing import orchestrator, template_cache
+from mcp.gmail_parsing.llm_extraction import extract_batch_with_llm
+from mcp.llm_providers.base_provider import LLMResponse
+
+
+def receipt_html(order_id, total):
+    """Receipt email with a long tracking link."""
+    return (
+        f"<html><body><h1>Thanks for your order</h1><p>Order number: {order_id}</p>"
+        f"<p>Order Total: &pound;{total}</p>"
+        f'<a href="https://click.shop.example.com/track?id={"x" * 300}">'
+        "View your order</a></body></html>"
+    )
+
+
+class FakeProvider:
+    """Answers batched prompts from the order IDs in each email."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def complete(self, prompt, system_prompt=None):
+        self.prompts.append(prompt)
+        emails = re.findall(r"=== Email (\d+) ===[^=]*?Order number: (\S+)", prompt)
+        answers = [
+            {
+                "email": int(number),
+                "merchant_name": "Example Shop",
+                "order_id": order_id,
+                "total_amount": float(order_id.split("-")[1]),
+                "currency_code": "GBP",
+                "receipt_date": "2024-03-05",
+                "line_items": None,
+            }
+            for number, order_id in reversed(emails)
+        ]
+        return LLMResponse(content=json.dumps(answers), cost=0.04)
+
+
+@pytest.fixture
+def queue_db(monkeypatch):
+    """In-memory receipts, email content and templates."""
+    receipts = {
+        receipt_id: {
+            "id": receipt_id,
+            "message_id": f"msg-{receipt_id}",
+            "subject": "Your order confirmation",
+            "sender_email": "orders@shop.example.com",
+            "merchant_domain": "shop.example.com",
+            "gmail_connection_id": 1,
+            "from_header": "Example Shop <orders@shop.example.com>",
+            "list_unsubscribe": None,
+            "body_html": receipt_html(f"ORD-{receipt_id}0", f"{receipt_id}0.00"),
+            "body_text": None,
+        }
+        for receipt_id in range(1, 5)
+    }
+    # Body never stored: fetched from Gmail
+    receipts[3]["body_html"] = None
+    # A newsletter is pre-filtered without the LLM
+    receipts[4]["subject"] = "Our summer sale newsletter"
+    receipts[4]["body_html"] = "<p>50% off everything this weekend</p>"
+    receipts[4]["list_unsubscribe"] = "<mailto:unsubscribe@shop.example.com>"
+
+    updates = {}
+    saved_content = []
+    monkeypatch.setattr(
+        database,
+        "get_receipts_for_llm_processing",
+        lambda ids: [dict(receipts[i]) for i in ids if i in receipts],
+    )
+    monkeypatch.setattr(database, "set_receipts_llm_status", lambda ids, status: None)
+    monkeypatch.setattr(
+        database,
+        "update_receipt_llm_status",
+        lambda receipt_id, status, **kwargs: updates.update(
+            {receipt_id: {"status": status, **kwargs}}
+        ),
+    )
+    monkeypatch.setattr(database, "save_gmail_email_content_bulk", saved_content.extend)
+    monkeypatch.setattr(database, "save_gmail_receipt_template", lambda t: 1)
+    monkeypatch.setattr(database, "get_gmail_receipt_templates", lambda domain: [])
+    monkeypatch.setattr(
+        gmail_llm_queue, "get_gmail_credentials", lambda connection_id: ("a", "r")
+    )
+    monkeypatch.setattr(gmail_llm_queue, "build_gmail_service", lambda a, r: object())
+    monkeypatch.setattr(
+        gmail_llm_queue,
+        "get_message_batch",
+        lambda service, ids: [
+            {
+                "message_id": message_id,
+                "from": "orders@shop.example.com",
+                "body_html": receipt_html("ORD-30", "30.00"),
+            }
+            for message_id in ids
+        ],
+    )
+    # Pattern extraction would otherwise accept these simple receipts
+    monkeypatch.setattr(orchestrator, "extract_with_patterns", lambda **kwargs: None)
+    template_cache.invalidate_templates()
+    yield updates, saved_content
+    template_cache.invalidate_templates()
+
+
+def test_queue_batches_receipts_and_splits_cost(queue_db, monkeypatch):
+    """Test receipts share LLM requests and each records its cost and latency."""
+    updates, saved_content = queue_db
+    provider = FakeProvider()
+    monkeypatch.setattr(
+        gmail_llm_queue,
+        "load_llm_config",
+        lambda: LLMConfig(
+            provider=LLMProvider.ANTHROPIC, model="claude-3-haiku", api_key="k"
+        ),
+    )
+    monkeypatch.setattr(gmail_llm_queue, "build_llm_provider", lambda config: provider)
+    monkeypatch.setattr(gmail_llm_queue, "LLM_QUEUE_BATCH_SIZE", 2)
+
+    progress = list(gmail_llm_queue.process_llm_queue([1, 2, 3, 4, 99]))
+    final = progress[-1]
+
+    assert final["processed"] == 5
+    assert final["succeeded"] == 3
+    assert {r["receipt_id"] for r in final["results"] if not r["success"]} == {4, 99}
+
+    # Three receipts need the LLM: two requests of up to two receipts
+    assert len(provider.prompts) == 2
+    assert all("https://" not in prompt for prompt in provider.prompts)
+
+    # Missing body fetched from Gmail once and stored
+    assert [m["message_id"] for m in saved_content] == ["msg-3"]
+
+    for receipt_id in (1, 2, 3):
+        update = updates[receipt_id]
+        assert update["status"] == "completed"
+        assert update["parsed_data"]["total_amount"] == receipt_id * 10
+        assert update["latency_ms"] is not None
+    # 4 cents per request, split across the receipts it parsed
+    assert sum(updates[i]["actual_cost"] for i in (1, 2, 3)) == 8
+    assert updates[4]["status"] == "failed"
+
+
+def test_batch_answers_matched_by_email_number():
+    """Test out-of-order and missing answers map to the right emails."""
+    provider = FakeProvider()
+    emails = [
+        {"subject": "Order", "sender": "a@x.com", "body_text": "Order number: A-1"},
+        {"subject": "Order", "sender": "b@x.com", "body_text": "No order here"},
+        {"subject": "Order", "sender": "c@x.com", "body_text": "Order number: C-3"},
+    ]
+
+    results = extract_batch_with_llm(emails, provider)
+
+    assert [r["order_id"] if r else None for r, _ in results] == ["A-1", None, "C-3"]
+    assert sum(cost for _, cost in results) == 4
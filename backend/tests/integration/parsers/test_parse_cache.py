@@ -0,0 +1,55 @@
+"""Integration tests for parser versioning and content hashing."""
+
+from datetime import datetime
+
+from mcp.gmail_parsers import get_vendor_parser
+from mcp.gmail_parsing import parse_cache
+from mcp.gmail_parsing.parse_cache import (
+    compute_content_hash,
+    get_parser_version,
+)
+
+
+def test_parser_version_tracks_stage_and_vendor_versions(monkeypatch):
+    """Test the version string changes only with the parsers that apply."""
+    amazon_version = get_parser_version("amazon.co.uk")
+    uber_version = get_parser_version("uber.com")
+    generic_version = get_parser_version("example.com")
+
+    assert "parse_amazon_receipt:" in amazon_version
+    assert "llm" not in generic_version
+    assert "llm:" in get_parser_version("example.com", skip_llm=False)
+
+    amazon_parser = get_vendor_parser("amazon.co.uk")
+    monkeypatch.setattr(
+        amazon_parser, "parser_version", amazon_parser.parser_version + 1
+    )
+    assert get_parser_version("amazon.co.uk") != amazon_version
+    assert get_parser_version("uber.com") == uber_version
+
+    monkeypatch.setitem(parse_cache.PARSER_STAGE_VERSIONS, "pattern", 99)
+    assert get_parser_version("example.com") != generic_version
+
+
+def test_content_hash_covers_parser_inputs():
+    """Test the content hash changes with any input the parser reads."""
+    inputs = {
+        "html_body": "<p>Total £10.00</p>",
+        "text_body": None,
+        "subject": "Your receipt",
+        "sender_email": "orders@example.com",
+        "received_at": datetime(2024, 1, 15, 10, 0, 0),
+    }
+    base = compute_content_hash(**inputs)
+
+    assert compute_content_hash(**inputs) == base
+    assert compute_content_hash(**{**inputs, "text_body": ""}) == base
+    # Only the date of received_at feeds the parser
+    assert (
+        compute_content_hash(
+            **{**inputs, "received_at": datetime(2024, 1, 15, 18, 30, 0)}
+        )
+        == base
+    )
+    assert compute_content_hash(**{**inputs, "subject": "Your order"}) != base
+    assert compute_content_hash(**{**inputs, "html_body": "<p>£11</p>"}) != base
@@ -0,0 +1,90 @@
+"""Integration tests for the shared parse-once email view.
+
+ParsedEmail replaces the separate BeautifulSoup/extruct parses done by text
+rendering, Schema.org extraction and the vendor parsers. These tests check
+that it renders the same text as before and that every stage reuses the
+single tree instead of building its own.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from mcp.gmail_parsers.base import get_soup, get_vendor_parser
+from mcp.gmail_parsing.parsed_email import ParsedEmail
+from mcp.gmail_parsing.schema_extraction import extract_schema_org
+from mcp.gmail_parsing.utilities import html_to_text
+
+FIXTURES = Path(__file__).parent.parent.parent / "fixtures" / "sample_emails"
+
+ORDER_HTML = """
+<html><head><title>Receipt</title>
+<script type="application/ld+json">
+{"@context": "http://schema.org", "@type": "Order",
+ "merchant": {"@type": "Organization", "name": "Example Shop"},
+ "orderNumber": "A-1001", "price": "12.50", "priceCurrency": "GBP"}
+</script>
+<style>p { color: red; }</style></head>
+<body><p>Thanks for your <b>order</b></p><script>var x = 1;</script></body></html>
+"""
+
+
+@pytest.fixture
+def amazon_business_html():
+    """Load Amazon Business email fixture."""
+    with open(FIXTURES / "amazon_business.html", encoding="utf-8") as f:
+        return f.read()
+
+
+# ============================================================================
+# TEXT RENDERING
+# ============================================================================
+
+
+def test_text_skips_non_visible_elements():
+    """Test script, style and head content is excluded from the text."""
+    parsed = ParsedEmail(ORDER_HTML)
+
+    assert parsed.text == "Thanks for your order"
+    assert html_to_text(ORDER_HTML) == parsed.text
+
+
+def test_text_leaves_shared_tree_intact():
+    """Test rendering text does not strip scripts from the shared tree.
+
+    CRITICAL: The old html_to_text decomposed <script> elements. Doing that
+    on the shared tree would hide JSON-LD from Schema.org extraction.
+    """
+    parsed = ParsedEmail(ORDER_HTML)
+    _ = parsed.text
+
+    assert parsed.soup.find("script", type="application/ld+json") is not None
+    assert parsed.json_ld[0]["orderNumber"] == "A-1001"
+
+
+# ============================================================================
+# SHARED TREE
+# ============================================================================
+
+
+def test_schema_extraction_uses_cached_json_ld():
+    """Test Schema.org extraction reads the JSON-LD blocks from ParsedEmail."""
+    parsed = ParsedEmail(ORDER_HTML)
+
+    result = extract_schema_org(ORDER_HTML, parsed)
+
+    assert result["merchant_name"] == "Example Shop"
+    assert result["order_id"] == "A-1001"
+    assert "json_ld" in parsed.__dict__  # Cached on the shared object
+
+
+def test_vendor_parser_reuses_shared_tree(amazon_business_html):
+    """Test vendor parsers get the orchestrator's tree via the parsed param."""
+    parsed = ParsedEmail(amazon_business_html)
+    parser = get_vendor_parser("amazon.co.uk")
+
+    with_shared = parser(amazon_business_html, "", "Your Amazon order", parsed=parsed)
+    standalone = parser(amazon_business_html, "", "Your Amazon order")
+
+    assert get_soup(amazon_business_html, parsed) is parsed.soup
+    assert with_shared == standalone
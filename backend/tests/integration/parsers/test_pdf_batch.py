@@ -0,0 +1,168 @@
+"""Integration tests for the batched PDF receipt worker.
+
+Gmail, MinIO, the PDF parser and the database functions used by
+process_pdf_batch are faked so the tests can count sessions, downloads,
+parses, uploads and database writes per batch.
+"""
+
+import pytest
+
+import database
+from mcp import gmail_pdf_batch
+from mcp.gmail_pdf_batch import chunk_pdf_jobs, process_pdf_batch
+
+
+class FakeBatchBackend:
+    """In-memory stand-in for Gmail, MinIO and the receipt tables."""
+
+    def __init__(self, attachments):
+        self.attachments = attachments
+        self.statuses = {}
+        self.errors = {}
+        self.receipts = {}
+        self.attachment_rows = []
+        self.cache = {}
+        self.sessions = 0
+        self.downloads = []
+        self.parses = []
+        self.uploads = []
+        self.status_calls = 0
+
+    def get_gmail_credentials(self, connection_id):
+        return "access", "refresh"
+
+    def build_gmail_service(self, access_token, refresh_token):
+        self.sessions += 1
+        return object()
+
+    def get_attachment_content(self, session, message_id, attachment_id):
+        self.downloads.append(attachment_id)
+        return self.attachments[attachment_id]
+
+    def parse_receipt_pdf(self, pdf_bytes, sender_domain=None, filename=None):
+        self.parses.append(pdf_bytes)
+        if not pdf_bytes.startswith(b"total="):
+            return None
+        return {"total_amount": float(pdf_bytes[6:]), "merchant_name": "Example"}
+
+    def store_pdf(self, pdf_bytes, message_id, filename, received_date, metadata):
+        self.uploads.append(message_id)
+        return {
+            "bucket_name": "receipts",
+            "object_key": f"{message_id}/{filename}",
+            "filename": filename,
+            "content_hash": gmail_pdf_batch.compute_pdf_hash(pdf_bytes),
+            "size_bytes": len(pdf_bytes),
+            "etag": "etag",
+        }
+
+    def update_gmail_receipts_pdf_status_bulk(self, updates):
+        self.status_calls += 1
+        for update in updates:
+            self.statuses[update["id"]] = update["status"]
+            if update.get("error"):
+                self.errors[update["id"]] = update["error"]
+        return len(updates)
+
+    def update_gmail_receipts_from_pdf_bulk(self, pdf_results):
+        self.receipts.update(pdf_results)
+        return len(pdf_results)
+
+    def save_pdf_attachments_bulk(self, attachments):
+        self.attachment_rows.extend(attachments)
+        return len(attachments)
+
+    def get_gmail_parse_results(self, keys):
+        return {key: self.cache[key] for key in keys if key in self.cache}
+
+    def save_gmail_parse_results(self, results):
+        for content_hash, parser_version, parse_result in results:
+            self.cache.setdefault((content_hash, parser_version), parse_result)
+        return len(results)
+
+
+def make_job(receipt_id, attachment_id):
+    """Build a job for an attachment on message msg-<receipt_id>."""
+    return {
+        "receipt_id": receipt_id,
+        "message_id": f"msg-{receipt_id}",
+        "attachment_info": {"attachment_id": attachment_id, "filename": "inv.pdf"},
+        "sender_domain": "billing.example.com",
+        "received_date": "2024-01-15T10:00:00Z",
+    }
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Two copies of one invoice, a second invoice and an unparseable PDF."""
+    fake = FakeBatchBackend(
+        {
+            "a": b"total=12.34",
+            "a-copy": b"total=12.34",
+            "b": b"total=5.00",
+            "junk": b"not a receipt",
+        }
+    )
+    for name in (
+        "get_gmail_credentials",
+        "build_gmail_service",
+        "get_attachment_content",
+        "parse_receipt_pdf",
+        "store_pdf",
+    ):
+        monkeypatch.setattr(gmail_pdf_batch, name, getattr(fake, name))
+    monkeypatch.setattr(gmail_pdf_batch, "is_available", lambda: True)
+    for name in (
+        "update_gmail_receipts_pdf_status_bulk",
+        "update_gmail_receipts_from_pdf_bulk",
+        "save_pdf_attachments_bulk",
+        "get_gmail_parse_results",
+        "save_gmail_parse_results",
+    ):
+        monkeypatch.setattr(database, name, getattr(fake, name))
+    return fake
+
+
+def test_batch_shares_session_and_parses_each_pdf_once(backend):
+    """Test one batch uses one session and handles identical PDFs once."""
+    jobs = [
+        make_job(1, "a"),
+        make_job(2, "a-copy"),
+        make_job(3, "b"),
+        make_job(4, "junk"),
+        make_job(5, "missing"),
+    ]
+    stats = process_pdf_batch(connection_id=1, jobs=jobs, workers=1)
+
+    assert backend.sessions == 1
+    assert sorted(backend.downloads) == ["a", "a-copy", "b", "junk", "missing"]
+    assert len(backend.parses) == 3  # Receipt 2's PDF is receipt 1's
+    assert sorted(backend.uploads) == ["msg-1", "msg-3"]
+    assert backend.status_calls == 2  # 'processing', then the final statuses
+
+    assert stats["completed"] == 3
+    assert stats["failed"] == 2
+    assert backend.statuses == {
+        1: "completed",
+        2: "completed",
+        3: "completed",
+        4: "failed",
+        5: "failed",
+    }
+    assert backend.errors[4] == "PDF parsing returned no data"
+    assert backend.receipts[2]["total_amount"] == 12.34
+    assert {row["gmail_receipt_id"] for row in backend.attachment_rows} == {1, 2, 3}
+
+    # A retry of the same PDFs comes entirely from the parse result cache
+    backend.parses.clear()
+    stats = process_pdf_batch(connection_id=1, jobs=jobs[:3], workers=1)
+    assert backend.parses == []
+    assert stats["cache_hits"] == 3
+
+
+def test_chunk_pdf_jobs():
+    """Test jobs are split into batches of the configured size."""
+    jobs = [make_job(i, "a") for i in range(5)]
+
+    assert [len(chunk) for chunk in chunk_pdf_jobs(jobs, batch_size=2)] == [2, 2, 1]
+    assert chunk_pdf_jobs([], batch_size=2) == []
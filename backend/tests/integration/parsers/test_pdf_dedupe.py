@@ -0,0 +1,142 @@
+"""Integration tests for hash-deduplicated PDF receipt parsing.
+
+Each PDF is opened once however many parsers look at it, and the parse
+result for identical content is reused from the (faked) parse result cache.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pdfplumber
+import pytest
+
+import database
+from mcp import gmail_pdf_parser
+from mcp.gmail_pdf_parser import (
+    extract_text_from_pdf,
+    get_pdf_parser_version,
+    parse_receipt_pdf_cached,
+)
+
+
+def make_pdf(*pages: str) -> bytes:
+    """Build a minimal PDF with one line of Helvetica text per page."""
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+        + b"] /Count %d >>" % len(pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, text in zip(page_ids, pages, strict=True):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode("latin-1") + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (page_id + 1)
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    pdf += b"startxref\n%d\n%%%%EOF\n" % xref
+    return pdf
+
+
+@pytest.fixture
+def pdf_opens(monkeypatch):
+    """Count pdfplumber.open calls, starting from an empty text cache."""
+    monkeypatch.setattr(gmail_pdf_parser, "_text_cache", OrderedDict())
+    calls = []
+    real_open = pdfplumber.open
+
+    def counting_open(*args, **kwargs):
+        calls.append(args)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(pdfplumber, "open", counting_open)
+    return calls
+
+
+@pytest.fixture
+def parse_results(monkeypatch):
+    """In-memory stand-in for the gmail_parse_results cache."""
+    cache = {}
+
+    def get_results(keys):
+        return {key: cache[key] for key in keys if key in cache}
+
+    def save_results(results):
+        for content_hash, parser_version, parse_result in results:
+            cache.setdefault((content_hash, parser_version), parse_result)
+        return len(results)
+
+    monkeypatch.setattr(database, "get_gmail_parse_results", get_results)
+    monkeypatch.setattr(database, "save_gmail_parse_results", save_results)
+    return cache
+
+
+def test_text_extracted_once_per_pdf(pdf_opens):
+    """Test repeated extraction of the same content reuses the text."""
+    pdf = make_pdf("Invoice No: INV-42 Total: $12.34")
+
+    assert "Total: $12.34" in extract_text_from_pdf(pdf)
+    assert "Total: $12.34" in extract_text_from_pdf(bytes(pdf))
+    assert len(pdf_opens) == 1
+
+    extract_text_from_pdf(make_pdf("Invoice No: INV-43 Total: $1.00"))
+    assert len(pdf_opens) == 2
+
+
+def test_text_cache_shared_across_threads(pdf_opens, monkeypatch):
+    """Test concurrent extractions keep the cache consistent and bounded."""
+    monkeypatch.setattr(gmail_pdf_parser, "PDF_TEXT_CACHE_SIZE", 4)
+    pdfs = [make_pdf(f"Invoice No: INV-{number} Total: $1.00") for number in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        texts = list(executor.map(extract_text_from_pdf, pdfs * 4))
+
+    assert all(f"INV-{number % 8}" in text for number, text in enumerate(texts))
+    assert len(gmail_pdf_parser._text_cache) == 4
+
+
+def test_text_extraction_capped_by_pages(pdf_opens, monkeypatch):
+    """Test pages past PDF_MAX_PAGES are not read."""
+    monkeypatch.setattr(gmail_pdf_parser, "PDF_MAX_PAGES", 2)
+    text = extract_text_from_pdf(make_pdf("Page one", "Page two", "Page three"))
+
+    assert "Page two" in text
+    assert "Page three" not in text
+
+
+def test_identical_pdf_parsed_once(pdf_opens, parse_results, monkeypatch):
+    """Test identical PDFs reuse the stored parse result."""
+    pdf = make_pdf("Invoice No: INV-42 Total: $12.34")
+
+    first = parse_receipt_pdf_cached(pdf, "billing.example.com", "invoice.pdf")
+    assert first["total_amount"] == 12.34
+    assert first["order_id"] == "INV-42"
+
+    # Same content from another email: cache hit, PDF never opened again
+    monkeypatch.setattr(gmail_pdf_parser, "_text_cache", OrderedDict())
+    second = parse_receipt_pdf_cached(bytes(pdf), "billing.example.com", "copy.pdf")
+    assert second == first
+    assert len(pdf_opens) == 1
+
+    # A parser version bump invalidates the stored result
+    old_version = get_pdf_parser_version("billing.example.com")
+    monkeypatch.setattr(gmail_pdf_parser, "PDF_PARSER_VERSION", 99)
+    assert get_pdf_parser_version("billing.example.com") != old_version
+    parse_receipt_pdf_cached(pdf, "billing.example.com", "invoice.pdf")
+    assert len(pdf_opens) == 2
+    assert len(parse_results) == 2
@@ -0,0 +1,57 @@
+"""Integration tests for the sender-dispatched receipt pre-filters.
+
+is_likely_receipt and should_import_email only run the vendor filters whose
+sender pattern matches, instead of calling every filter for every email.
+prefilter_corpus.json holds decisions recorded from the original call-every-
+filter implementation; these tests check the dispatch returns exactly the
+same (decision, reason, confidence) for each case.
+"""
+
+import json
+from pathlib import Path
+
+from mcp.gmail_parsing.filtering import (
+    IMPORT_FILTERS,
+    LIKELY_RECEIPT_FILTERS,
+    is_likely_receipt,
+)
+from mcp.gmail_sync import should_import_email
+
+FIXTURES = Path(__file__).parent.parent.parent / "fixtures" / "sample_emails"
+
+CORPUS = json.loads((FIXTURES / "prefilter_corpus.json").read_text(encoding="utf-8"))
+
+
+def test_is_likely_receipt_matches_recorded_decisions():
+    """Test is_likely_receipt reproduces every recorded decision."""
+    assert len(CORPUS["cases"]) > 500
+
+    for subject, sender, body_idx, unsubscribe, has_schema, expected, _ in CORPUS[
+        "cases"
+    ]:
+        body = CORPUS["bodies"][body_idx]
+        domain = sender.split("@")[-1].rstrip(">").lower()
+        result = is_likely_receipt(
+            subject, body, sender, domain, unsubscribe, has_schema
+        )
+        assert result == tuple(expected), (subject, sender)
+
+
+def test_should_import_email_matches_recorded_decisions():
+    """Test should_import_email reproduces every recorded decision."""
+    for subject, sender, body_idx, _, _, _, expected in CORPUS["cases"]:
+        body = CORPUS["bodies"][body_idx]
+        result = should_import_email(subject, sender, body)
+        assert result == tuple(expected), (subject, sender)
+
+
+def test_unrelated_sender_runs_no_vendor_filter():
+    """Test a sender matching no vendor pattern skips the vendor filters."""
+    applicable = LIKELY_RECEIPT_FILTERS.filters_for_sender("orders@shop-example.com")
+    assert [func.__name__ for func, _ in applicable] == ["is_non_receipt_notification"]
+    assert IMPORT_FILTERS.filters_for_sender("orders@shop-example.com") == ()
+
+    applicable = IMPORT_FILTERS.filters_for_sender("auto-confirm@amazon.co.uk")
+    assert [(func.__name__, takes_body) for func, takes_body in applicable] == [
+        ("is_amazon_receipt_email", True)
+    ]
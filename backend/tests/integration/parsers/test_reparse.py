@@ -0,0 +1,187 @@
+"""Integration tests for the streaming bulk reparse.
+
+The database functions used by reparse_changed_receipts are replaced with an
+in-memory store so the tests can count what gets loaded, parsed and written.
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+import database
+from mcp.gmail_parsers import get_vendor_parser
+from mcp.gmail_parsing.parse_cache import get_parser_version
+from mcp.gmail_parsing.reparse import _sender_domain, reparse_changed_receipts
+
+FIXTURES = Path(__file__).parent.parent.parent / "fixtures" / "sample_emails"
+
+
+class FakeReceiptStore:
+    """In-memory stand-in for the receipt, content and cache tables."""
+
+    def __init__(self, receipts):
+        self.receipts = {r["id"]: r for r in receipts}
+        self.cache = {}
+        self.loaded_ids = []
+        self.updated_ids = []
+        self.update_calls = 0
+
+    def _is_stale(self, receipt, current_versions):
+        return (
+            receipt["parser_version"] is None
+            or current_versions.get(_sender_domain(receipt))
+            != receipt["parser_version"]
+        )
+
+    def get_gmail_reparse_domains(self, connection_id=None):
+        return sorted({_sender_domain(r) for r in self.receipts.values()})
+
+    def count_gmail_receipts_for_reparse(
+        self, connection_id=None, current_versions=None
+    ):
+        return {
+            "total": len(self.receipts),
+            "stale": sum(
+                self._is_stale(r, current_versions or {})
+                for r in self.receipts.values()
+            ),
+        }
+
+    def iter_gmail_receipts_for_reparse(
+        self, connection_id=None, current_versions=None, batch_size=500
+    ):
+        stale = [
+            dict(r)
+            for r in self.receipts.values()
+            if self._is_stale(r, current_versions or {})
+        ]
+        for i in range(0, len(stale), batch_size):
+            batch = stale[i : i + batch_size]
+            self.loaded_ids.extend(r["id"] for r in batch)
+            yield batch
+
+    def get_gmail_parse_results(self, keys):
+        return {key: self.cache[key] for key in keys if key in self.cache}
+
+    def save_gmail_parse_results(self, results):
+        for content_hash, parser_version, parse_result in results:
+            self.cache.setdefault((content_hash, parser_version), parse_result)
+        return len(results)
+
+    def update_gmail_receipts_parsed_bulk(self, updates):
+        self.update_calls += 1
+        for update in updates:
+            self.updated_ids.append(update["id"])
+            self.receipts[update["id"]].update(update)
+        return len(updates)
+
+
+def make_receipt(receipt_id, html_body, sender_email, subject):
+    """Build a stored receipt row that has never been stamped."""
+    return {
+        "id": receipt_id,
+        "subject": subject,
+        "sender_email": sender_email,
+        "sender_name": None,
+        "merchant_domain": sender_email.split("@")[-1],
+        "received_at": datetime(2024, 1, 15, 10, 0, 0),
+        "content_hash": None,
+        "parser_version": None,
+        "body_html": html_body,
+        "body_text": None,
+        "list_unsubscribe": None,
+    }
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Two Amazon receipts with identical content and one Uber receipt."""
+    amazon_html = (FIXTURES / "amazon_fresh.html").read_text(encoding="utf-8")
+    uber_html = (FIXTURES / "uber_receipt.html").read_text(encoding="utf-8")
+    fake = FakeReceiptStore(
+        [
+            make_receipt(
+                1, amazon_html, "auto-confirm@amazon.co.uk", "Your Amazon.co.uk order"
+            ),
+            make_receipt(
+                2, amazon_html, "auto-confirm@amazon.co.uk", "Your Amazon.co.uk order"
+            ),
+            make_receipt(
+                3, uber_html, "noreply@uber.com", "Your Tuesday trip with Uber"
+            ),
+        ]
+    )
+    for name in (
+        "get_gmail_reparse_domains",
+        "count_gmail_receipts_for_reparse",
+        "iter_gmail_receipts_for_reparse",
+        "get_gmail_parse_results",
+        "save_gmail_parse_results",
+        "update_gmail_receipts_parsed_bulk",
+    ):
+        monkeypatch.setattr(database, name, getattr(fake, name))
+    return fake
+
+
+def test_reparse_only_touches_changed_receipts(store, monkeypatch):
+    """Test reparse skips current receipts and reuses identical content."""
+    stats = reparse_changed_receipts(workers=1)
+
+    assert stats["reparsed"] == 3
+    assert stats["parsed"] == 2  # Receipt 2 shares receipt 1's content
+    assert stats["cache_hits"] == 1
+    assert store.update_calls == 1  # One bulk UPDATE for the whole batch
+    assert store.receipts[1]["parser_version"] == get_parser_version("amazon.co.uk")
+    assert store.receipts[1]["total_amount"] == store.receipts[2]["total_amount"]
+    assert stats["vendor_timings"]["parse_amazon_receipt"]["count"] == 1
+
+    # Nothing changed: no receipt content is even loaded
+    store.loaded_ids.clear()
+    stats = reparse_changed_receipts(workers=1)
+    assert stats["unchanged"] == 3
+    assert store.loaded_ids == []
+
+    # Bumping the Amazon parser only revisits the Amazon receipts
+    amazon_parser = get_vendor_parser("amazon.co.uk")
+    monkeypatch.setattr(
+        amazon_parser, "parser_version", amazon_parser.parser_version + 1
+    )
+    store.updated_ids.clear()
+    stats = reparse_changed_receipts(workers=1)
+    assert sorted(store.updated_ids) == [1, 2]
+    assert stats["unchanged"] == 1
+    assert stats["parsed"] == 1
+
+
+def test_process_pool_matches_in_process_parse(store):
+    """Test parsing in worker processes gives the in-process results."""
+    progress = []
+    pooled = reparse_changed_receipts(
+        workers=2, batch_size=2, progress_callback=progress.append
+    )
+    pooled_rows = {rid: dict(r) for rid, r in store.receipts.items()}
+
+    for receipt in store.receipts.values():
+        receipt["parser_version"] = None
+    store.cache.clear()
+    reparse_changed_receipts(workers=1)
+
+    assert pooled["reparsed"] == 3
+    assert [p["processed"] for p in progress] == [2, 3]
+    assert pooled_rows == store.receipts
+
+
+def test_receipts_without_merchant_domain_are_counted_once(store):
+    """Test a receipt without a merchant domain isn't streamed once current."""
+    store.receipts[3]["merchant_domain"] = None
+
+    stats = reparse_changed_receipts(workers=1)
+    assert stats["reparsed"] == 3
+    assert store.receipts[3]["parser_version"] == get_parser_version("uber.com")
+
+    store.loaded_ids.clear()
+    stats = reparse_changed_receipts(workers=1)
+    assert stats["unchanged"] == 3
+    assert stats["stale"] == 0
+    assert store.loaded_ids == []
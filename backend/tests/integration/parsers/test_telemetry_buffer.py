@@ -0,0 +1,79 @@
+"""Integration tests for buffered parse statistics and error sinks.
+
+The bulk insert functions are replaced with recorders so the tests can count
+how many database writes a batch of parse attempts costs.
+"""
+
+import pytest
+
+import database
+from mcp import error_tracking
+from mcp.error_tracking import ErrorStage, ErrorType, GmailError
+from mcp.statistics_tracker import GmailSyncStatistics
+from mcp.telemetry_buffer import BufferedSink
+
+
+@pytest.fixture
+def bulk_writes(monkeypatch):
+    """Record each bulk insert as (table, rows)."""
+    calls = []
+
+    def recorder(table):
+        def write(rows):
+            calls.append((table, list(rows)))
+            return len(rows)
+
+        return write
+
+    monkeypatch.setattr(
+        database, "save_gmail_parse_statistics_bulk", recorder("statistics")
+    )
+    monkeypatch.setattr(database, "save_gmail_errors_bulk", recorder("errors"))
+    error_tracking.flush_errors()
+    calls.clear()
+    return calls
+
+
+def test_batch_of_parse_attempts_written_once(bulk_writes):
+    """Test statistics and errors of a batch cost one insert each."""
+    stats = GmailSyncStatistics(connection_id=1, sync_job_id=7)
+    for i in range(20):
+        stats.record_parse_attempt(
+            message_id=f"msg-{i}",
+            sender_domain="amazon.co.uk",
+            parse_result={"parse_method": "vendor_amazon", "total_amount": 9.99},
+            duration_ms=5,
+        )
+    GmailError(
+        stage=ErrorStage.STORAGE,
+        error_type=ErrorType.DB_ERROR,
+        message="save failed",
+        context={"message_id": "msg-3", "received_at": object()},
+    ).log(connection_id=1, sync_job_id=7)
+
+    assert bulk_writes == []  # Nothing written from inside the loop
+
+    stats.flush_buffers()
+    assert [(table, len(rows)) for table, rows in bulk_writes] == [
+        ("statistics", 20),
+        ("errors", 1),
+    ]
+    assert bulk_writes[0][1][0]["amount_extracted"] is True
+    assert isinstance(bulk_writes[1][1][0]["error_context"]["received_at"], str)
+
+
+def test_sink_is_bounded():
+    """Test a full buffer flushes and a failed write drops its rows."""
+    written = []
+    sink = BufferedSink("test", written.append, max_rows=3, max_age_seconds=60)
+    for i in range(7):
+        sink.add({"i": i})
+    assert [len(rows) for rows in written] == [3, 3]
+    assert len(sink) == 1
+
+    def fail(rows):
+        raise RuntimeError("database down")
+
+    sink.writer = fail
+    assert sink.flush() == 0
+    assert len(sink) == 0
@@ -0,0 +1,174 @@
+"""Integration tests for learned receipt templates.
+
+The template table is replaced by an in-memory list so the tests cover
+fingerprinting, learning from an LLM parse, template extraction in
+parse_receipt_content() and the template digest in the parser version
+without a database.
+"""
+
+import pytest
+
+import database
+from mcp.gmail_parsing import orchestrator, template_cache
+from mcp.gmail_parsing.parse_cache import get_parser_version
+from mcp.gmail_parsing.parsed_email import ParsedEmail
+
+SENDER_DOMAIN = "shop.example.com"
+
+
+def receipt_html(order_id, date, items, total):
+    """Receipt email of a merchant without a vendor parser."""
+    rows = "".join(
+        f'<tr class="item"><td class="name">{name}</td>'
+        f'<td class="price">&pound;{price}</td></tr>'
+        for name, price in items
+    )
+    return (
+        '<html><body><div class="header h1234"><h1>Thanks for your order</h1>'
+        f"<p>Order number: {order_id}</p><p>Placed on {date}</p></div>"
+        f'<table class="items">{rows}<tr class="total"><td>Order Total</td>'
+        f"<td>&pound;{total}</td></tr></table>"
+        "<p>Questions? Reply to this email.</p></body></html>"
+    )
+
+
+@pytest.fixture
+def templates(monkeypatch):
+    """In-memory gmail_receipt_templates."""
+    rows = []
+
+    def save(template):
+        rows.append({**template, "id": len(rows) + 1})
+        return len(rows)
+
+    monkeypatch.setattr(database, "save_gmail_receipt_template", save)
+    monkeypatch.setattr(
+        database,
+        "get_gmail_receipt_templates",
+        lambda domain: [r for r in rows if r["sender_domain"] == domain],
+    )
+    template_cache.invalidate_templates()
+    yield rows
+    template_cache.invalidate_templates()
+
+
+def test_fingerprint_ignores_values_and_repeated_rows():
+    """Test emails from one template share a fingerprint, other layouts don't."""
+    first = ParsedEmail(
+        receipt_html("AB-123456", "5 March 2024", [("Tea", "2.50")], "2.50")
+    )
+    second = ParsedEmail(
+        receipt_html(
+            "CD-654321", "9 May 2024", [("Jam", "3.00"), ("Cake", "4.00")], "7.00"
+        )
+    )
+    other = ParsedEmail("<html><body><div><span>Total 2.50</span></div></body></html>")
+
+    fingerprint, _ = template_cache.fingerprint_email(first)
+    assert template_cache.fingerprint_email(second)[0] == fingerprint
+    assert template_cache.fingerprint_email(other)[0] != fingerprint
+
+
+def test_learned_template_extracts_shifted_layout(templates):
+    """Test a template learned from one email parses a longer one."""
+    learned = ParsedEmail(
+        receipt_html("AB-123456", "5 March 2024", [("Tea", "12.50")], "12.50")
+    )
+    template_id = template_cache.learn_template(
+        SENDER_DOMAIN,
+        learned,
+        {
+            "total_amount": 12.5,
+            "receipt_date": "2024-03-05",
+            "order_id": "AB-123456",
+            "merchant_name": "Example Shop",
+        },
+    )
+    assert template_id == 1
+    assert templates[0]["field_paths"]["total_amount"]["label"] == "Order Total"
+
+    later = ParsedEmail(
+        receipt_html(
+            "CD-987654",
+            "17 April 2024",
+            [("Tea", "3.00"), ("Cake", "4.25"), ("Hamper", "1,200.00")],
+            "1,207.25",
+        )
+    )
+    result = template_cache.extract_with_template(SENDER_DOMAIN, later)
+
+    assert result["total_amount"] == 1207.25
+    assert result["order_id"] == "CD-987654"
+    assert result["receipt_date"] == "2024-04-17"
+    assert result["merchant_name"] == "Example Shop"
+    assert result["parse_method"] == "template"
+
+    # No template for another sender
+    assert template_cache.extract_with_template("other.example.com", later) is None
+
+
+def test_llm_parse_teaches_template_for_next_email(templates, monkeypatch):
+    """Test an LLM parse is learned and the next email skips the LLM."""
+    llm_calls = []
+
+    def fake_llm(subject, sender, body_text):
+        llm_calls.append(subject)
+        return {
+            "merchant_name": "Example Shop",
+            "merchant_name_normalized": "example_shop",
+            "order_id": "AB-123456",
+            "total_amount": 12.5,
+            "currency_code": "GBP",
+            "receipt_date": "2024-03-05",
+            "line_items": None,
+            "parse_method": "llm",
+            "parse_confidence": 70,
+            "parsing_status": "parsed",
+        }
+
+    monkeypatch.setattr(orchestrator, "extract_with_llm", fake_llm)
+    # Pattern extraction would otherwise accept these simple receipts
+    monkeypatch.setattr(orchestrator, "extract_with_patterns", lambda **kwargs: None)
+
+    def parse(html):
+        return orchestrator.parse_receipt_content(
+            html_body=html,
+            text_body=None,
+            subject="Your order confirmation",
+            sender_email=f"orders@{SENDER_DOMAIN}",
+            skip_llm=False,
+        )
+
+    first = parse(
+        receipt_html("AB-123456", "5 March 2024", [("Tea", "12.50")], "12.50")
+    )
+    assert first["parse_method"] == "llm"
+    assert len(templates) == 1
+
+    second = parse(receipt_html("EF-111222", "1 June 2024", [("Mug", "8.00")], "8.00"))
+    assert second["parse_method"] == "template"
+    assert second["total_amount"] == 8.0
+    assert second["order_id"] == "EF-111222"
+    assert len(llm_calls) == 1
+
+
+def test_learned_template_changes_parser_version(templates):
+    """Test learning a template invalidates cached parses of that sender only."""
+    before = get_parser_version(SENDER_DOMAIN)
+    other_before = get_parser_version("other.example.com")
+    assert "template:1," in before
+
+    html = receipt_html("AB-123456", "5 March 2024", [("Tea", "12.50")], "12.50")
+    template_cache.learn_template(
+        SENDER_DOMAIN,
+        ParsedEmail(html),
+        {"total_amount": 12.5, "order_id": "AB-123456", "merchant_name": "Shop"},
+    )
+    learned = get_parser_version(SENDER_DOMAIN)
+    assert learned != before
+    assert get_parser_version("other.example.com") == other_before
+
+    # A refreshed template (same fingerprint, new updated_at) changes it again
+    templates[0]["updated_at"] = "2024-06-01T00:00:00+00:00"
+    template_cache.invalidate_templates(SENDER_DOMAIN)
+    assert get_parser_version(SENDER_DOMAIN) != learned
@@ -0,0 +1,106 @@
+"""Integration tests for the precompiled vendor parser pattern tables.
+
+Vendor parsers, the shared extraction utilities and the receipt filter keep
+their regular expressions in module-level compiled tables. These tests check
+that parsing an email never goes back through the module-level re.* helpers,
+which would recompile (or at best look up) the pattern on every call.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+from mcp.gmail_parsers import VENDOR_PARSERS
+from mcp.gmail_parsers.base import parse_amount, parse_date_text
+from mcp.gmail_parsing.filtering import is_likely_receipt
+from mcp.gmail_parsing.parsed_email import ParsedEmail
+from mcp.gmail_parsing.schema_extraction import (
+    infer_category_from_name,
+    infer_description_from_name,
+)
+from mcp.gmail_parsing.utilities import (
+    extract_amount,
+    extract_date,
+    extract_merchant_from_text,
+    extract_order_id,
+    normalize_merchant_name,
+    parse_date_string,
+)
+
+FIXTURES = Path(__file__).parent.parent.parent / "fixtures" / "sample_emails"
+
+PARSING_MODULES = ("mcp.gmail_parsers", "mcp.gmail_parsing")
+
+RE_HELPERS = (
+    "compile",
+    "search",
+    "match",
+    "fullmatch",
+    "findall",
+    "finditer",
+    "sub",
+    "subn",
+    "split",
+)
+
+SAMPLE_TEXT = (
+    "Thanks for your order from Example Shop. Order #ABC12345 placed on "
+    "15/01/2024. Order Total: £12.34 (incl. VAT £2.06)"
+)
+
+
+@pytest.fixture
+def re_calls(monkeypatch):
+    """Record parsing-module callers of the module-level re helpers."""
+    callers = []
+
+    for name in RE_HELPERS:
+        original = getattr(re, name)
+
+        def wrapper(*args, _original=original, _name=name, **kwargs):
+            module = sys._getframe(1).f_globals.get("__name__", "")
+            if module.startswith(PARSING_MODULES):
+                callers.append(f"{module}: re.{_name}({args[0]!r})")
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(re, name, wrapper)
+
+    return callers
+
+
+def test_vendor_parsers_use_precompiled_patterns(re_calls):
+    """Test no vendor parser compiles a pattern while parsing an email."""
+    emails = [path.read_text(encoding="utf-8") for path in FIXTURES.glob("*.html")]
+    assert emails
+
+    for html_body in emails:
+        parsed = ParsedEmail(html_body)
+        _ = parsed.soup
+        for parser in set(VENDOR_PARSERS.values()):
+            parser(html_body, SAMPLE_TEXT, "Your order confirmation", parsed=parsed)
+            parser("", SAMPLE_TEXT, "Your order confirmation")
+
+    assert re_calls == []
+
+
+def test_shared_extraction_uses_precompiled_patterns(re_calls):
+    """Test the fallback extractors and receipt filter use compiled tables."""
+    assert parse_amount("£1,234.56") == 1234.56
+    assert parse_date_text("15 January 2024") == "2024-01-15"
+    assert extract_amount(SAMPLE_TEXT) == (12.34, "GBP")
+    assert extract_date(SAMPLE_TEXT) == "2024-01-15"
+    assert extract_order_id(SAMPLE_TEXT) == "ABC12345"
+    assert normalize_merchant_name("Example  Shop! Ltd") == "example shop"
+    assert parse_date_string("2024-01-15T10:00:00") == "2024-01-15"
+    assert infer_description_from_name("USB-C charger") is not None
+    assert infer_category_from_name("Paperback novel") == "entertainment"
+    extract_merchant_from_text(
+        "Your order from Example Shop", "orders@example.com", "example.com"
+    )
+    is_likely_receipt(
+        "Your order confirmation", SAMPLE_TEXT, "orders@example.com", "example.com"
+    )
+
+    assert re_calls == []
@@ -0,0 +1,66 @@
+"""Integration tests for vendor parser registration and domain lookup.
+
+get_vendor_parser resolves sender domains through a reversed-label suffix
+trie and loads the vendor modules on first use. These tests pin down the
+matching rules and check that importing the parsing package stays cheap.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from mcp.gmail_parsers import VENDOR_PARSERS, get_vendor_parser
+from mcp.gmail_parsers.amazon import parse_amazon_receipt
+from mcp.gmail_parsers.travel import parse_british_airways_receipt
+
+BACKEND_DIR = Path(__file__).parent.parent.parent.parent
+
+
+def test_exact_and_subdomain_match():
+    """Test registered domains and their subdomains resolve to the parser."""
+    assert get_vendor_parser("amazon.co.uk") is parse_amazon_receipt
+    assert get_vendor_parser("Email.Amazon.co.uk") is parse_amazon_receipt
+    assert get_vendor_parser("crm.ba.com") is parse_british_airways_receipt
+    assert get_vendor_parser("news.crm.ba.com") is parse_british_airways_receipt
+
+
+def test_match_is_label_aligned():
+    """Test a registered domain only matches on whole labels.
+
+    CRITICAL: The old substring scan sent 'eba.com' and 'alibaba.com' to the
+    British Airways parser because 'ba.com' appears inside them.
+    """
+    assert get_vendor_parser("eba.com") is None
+    assert get_vendor_parser("alibaba.com") is None
+    assert get_vendor_parser("amazon.co.uk.example.com") is None
+    assert get_vendor_parser("co.uk") is None
+    assert get_vendor_parser("") is None
+    assert get_vendor_parser(None) is None
+
+
+def test_every_registered_domain_resolves():
+    """Test each registry entry resolves to its own parser."""
+    assert VENDOR_PARSERS
+    for domain, parser in VENDOR_PARSERS.items():
+        assert get_vendor_parser(domain) is parser
+        assert get_vendor_parser(f"mail.{domain}") is parser
+
+
+def test_vendor_modules_load_lazily():
+    """Test importing the parsing package does not import vendor modules."""
+    code = (
+        "import sys\n"
+        "import mcp.gmail_parsing\n"
+        "from mcp.gmail_parsers import get_vendor_parser\n"
+        "assert 'mcp.gmail_parsers.amazon' not in sys.modules\n"
+        "assert get_vendor_parser('amazon.co.uk') is not None\n"
+        "assert 'mcp.gmail_parsers.amazon' in sys.modules\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
@@ -4,19 +4,42 @@
 Uses test database from conftest.py with "leave no trace" cleanup pattern.
 """
 
+import threading
+import time
 import uuid
-from datetime import UTC, date, datetime
+from dataclasses import replace
+from datetime import UTC, date, datetime, timedelta
 from decimal import Decimal
 
 import pytest
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
+from database.base import get_session
+from database.email_bodies import load_email_bodies, store_email_bodies
+from database.gmail import (
+    cleanup_stale_gmail_jobs,
+    finalize_gmail_parent_sync_job,
+    mark_gmail_sync_job_retrying,
+    save_gmail_receipt_bulk,
+    soft_delete_gmail_receipt,
+)
+from database.gmail_merchant_summary import refresh_receipt_merchants
 from database.models.gmail import (
     GmailConnection,
+    GmailEmailBody,
     GmailEmailContent,
+    GmailMerchantSummary,
+    GmailParseResult,
+    GmailParseStatistic,
     GmailReceipt,
+    GmailSyncJob,
     PDFAttachment,
+    PDFStorageStat,
 )
+from database.pdf import get_pdf_storage_counters, update_pdf_storage_stats
+from database.receipt_duplicates import duplicate_keys, flag_receipt_duplicates
+from database.retention import RETENTION_POLICIES, RetentionPolicy, purge_policy
 
 
 def test_create_gmail_connection(db_session):
@@ -553,3 +576,685 @@ def test_pdf_attachment_cascade_delete(db_session):
         if existing:
             db_session.delete(existing)
             db_session.commit()
+
+
+def test_gmail_sync_job_chunk_checkpoint(db_session):
+    """Test chunk jobs store a checkpoint and link to their parent job."""
+    unique_user_id = 900000 + (uuid.uuid4().int % 100000)
+    unique_email = f"test_{uuid.uuid4().hex[:8]}@gmail.com"
+
+    connection = GmailConnection(
+        user_id=unique_user_id,
+        email_address=unique_email,
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    try:
+        parent = GmailSyncJob(connection_id=connection.id, job_type="full")
+        db_session.add(parent)
+        db_session.commit()
+
+        chunk = GmailSyncJob(
+            connection_id=connection.id,
+            job_type="chunk",
+            parent_job_id=parent.id,
+            checkpoint={
+                "from_date": "2024-01-01",
+                "to_date": "2024-02-01",
+                "page_token": "token-2",
+                "page_offset": 50,
+                "cursor_date": "2024-01-17",
+            },
+        )
+        db_session.add(chunk)
+        db_session.commit()
+
+        db_session.refresh(chunk)
+        assert chunk.parent_job_id == parent.id
+        assert chunk.checkpoint["page_offset"] == 50
+
+        # Deleting the parent removes its chunks
+        chunk_id = chunk.id
+        db_session.delete(parent)
+        db_session.commit()
+        db_session.expire_all()
+        assert db_session.get(GmailSyncJob, chunk_id) is None
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_parent_sync_job_waits_for_retrying_chunks(db_session):
+    """Test a parent job stays running while a chunk waits for its retry."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    try:
+        parent = GmailSyncJob(connection_id=connection.id, job_type="full")
+        db_session.add(parent)
+        db_session.commit()
+
+        done, retrying = (
+            GmailSyncJob(
+                connection_id=connection.id,
+                job_type="chunk",
+                parent_job_id=parent.id,
+                status=status,
+                processed_messages=processed,
+            )
+            for status, processed in (("completed", 80), ("failed", 30))
+        )
+        db_session.add_all([done, retrying])
+        db_session.commit()
+
+        assert mark_gmail_sync_job_retrying(retrying.id, "Gmail API unavailable")
+        summary = finalize_gmail_parent_sync_job(parent.id)
+        assert summary["status"] == "running"
+        assert summary["pending_chunks"] == 1
+        assert summary["processed_messages"] == 110
+
+        # The retry resumes and completes the chunk
+        db_session.expire_all()
+        retrying.status = "completed"
+        db_session.commit()
+        summary = finalize_gmail_parent_sync_job(parent.id)
+        assert summary["status"] == "completed"
+        assert summary["failed_chunks"] == 0
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_completed_parent_sets_history_id_from_earliest_chunk(db_session):
+    """Test the parent sets the history ID the first chunk started from."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+        history_id="10",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    try:
+        parent = GmailSyncJob(connection_id=connection.id, job_type="full")
+        db_session.add(parent)
+        db_session.commit()
+
+        db_session.add_all(
+            GmailSyncJob(
+                connection_id=connection.id,
+                job_type="chunk",
+                parent_job_id=parent.id,
+                status="completed",
+                checkpoint={"history_id": history_id},
+            )
+            for history_id in ("120", "95", "101")
+        )
+        db_session.commit()
+
+        summary = finalize_gmail_parent_sync_job(parent.id)
+        assert summary["status"] == "completed"
+
+        db_session.expire_all()
+        assert db_session.get(GmailConnection, connection.id).history_id == "95"
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_stale_cleanup_finalizes_parent_of_killed_chunk(db_session):
+    """Test cleanup resolves a parent whose last chunk was hard-killed."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    try:
+        long_ago = datetime.now() - timedelta(hours=1)
+        parent = GmailSyncJob(
+            connection_id=connection.id,
+            job_type="full",
+            status="running",
+            started_at=long_ago,
+        )
+        db_session.add(parent)
+        db_session.commit()
+
+        done, killed = (
+            GmailSyncJob(
+                connection_id=connection.id,
+                job_type="chunk",
+                parent_job_id=parent.id,
+                status=status,
+                started_at=long_ago,
+            )
+            for status in ("completed", "running")
+        )
+        db_session.add_all([done, killed])
+        db_session.commit()
+
+        assert cleanup_stale_gmail_jobs(running_timeout_minutes=10) >= 1
+
+        db_session.expire_all()
+        assert db_session.get(GmailSyncJob, killed.id).status == "failed"
+        # The parent is finalized rather than timed out on its own
+        parent = db_session.get(GmailSyncJob, parent.id)
+        assert parent.status == "failed"
+        assert parent.error_message == "1 chunk(s) failed"
+        assert parent.completed_at is not None
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_gmail_parse_result_keyed_by_hash_and_version(db_session):
+    """Test parse results are cached per (content_hash, parser_version)."""
+    content_hash = uuid.uuid4().hex + uuid.uuid4().hex
+
+    v1 = GmailParseResult(
+        content_hash=content_hash,
+        parser_version="pre_filter:1,schema_org:1,pattern:1",
+        parse_result={"merchant_name": "Example", "total_amount": 12.34},
+    )
+    v2 = GmailParseResult(
+        content_hash=content_hash,
+        parser_version="pre_filter:2,schema_org:1,pattern:1",
+        parse_result={"merchant_name": "Example", "total_amount": 12.35},
+    )
+    db_session.add_all([v1, v2])
+    db_session.commit()
+
+    try:
+        assert v1.created_at is not None
+        cached = db_session.get(
+            GmailParseResult, (content_hash, "pre_filter:2,schema_org:1,pattern:1")
+        )
+        assert cached.parse_result["total_amount"] == 12.35
+
+        duplicate = GmailParseResult(
+            content_hash=content_hash,
+            parser_version="pre_filter:1,schema_org:1,pattern:1",
+            parse_result={},
+        )
+        db_session.add(duplicate)
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+    finally:
+        for result in db_session.query(GmailParseResult).filter_by(
+            content_hash=content_hash
+        ):
+            db_session.delete(result)
+        db_session.commit()
+
+
+def test_gmail_email_bodies_stored_once_per_content(db_session):
+    """Test identical bodies share one compressed row in the body store."""
+    body = f"<html><body>Receipt template {uuid.uuid4().hex}</body></html>" * 50
+
+    hashes = store_email_bodies(db_session, [body, body, None, ""])
+    db_session.commit()
+
+    try:
+        assert hashes[0] == hashes[1]
+        assert hashes[2:] == [None, None]
+
+        stored = db_session.get(GmailEmailBody, hashes[0])
+        assert stored.raw_size == len(body)
+        assert stored.stored_size < stored.raw_size
+        assert load_email_bodies(db_session, hashes) == {hashes[0]: body}
+
+        # Storing the same body again adds nothing
+        assert store_email_bodies(db_session, [body]) == [hashes[0]]
+        db_session.commit()
+        assert (
+            db_session.query(GmailEmailBody).filter_by(content_hash=hashes[0]).count()
+            == 1
+        )
+    finally:
+        db_session.query(GmailEmailBody).filter_by(content_hash=hashes[0]).delete()
+        db_session.commit()
+
+
+def test_email_body_stored_again_survives_concurrent_purge(db_session):
+    """Test a purge running while a writer reuses an expired body keeps it."""
+    body = f"<html><body>Reused template {uuid.uuid4().hex}</body></html>"
+    (content_hash,) = store_email_bodies(db_session, [body])
+    db_session.query(GmailEmailBody).filter_by(content_hash=content_hash).update(
+        {"last_seen_at": datetime.now(UTC) - timedelta(days=7)}
+    )
+    db_session.commit()
+
+    # Scoped to this body so other rows in the database are untouched
+    bodies_policy = RETENTION_POLICIES["gmail_email_bodies"]
+    policy = replace(
+        bodies_policy,
+        conditions=lambda: [
+            *bodies_policy.conditions(),
+            GmailEmailBody.content_hash == content_hash,
+        ],
+    )
+    purged = []
+    message_id = f"msg_{uuid.uuid4().hex[:12]}"
+
+    try:
+        # Writer stores the same body again, its content row not yet committed
+        assert store_email_bodies(db_session, [body]) == [content_hash]
+        db_session.add(
+            GmailEmailContent(message_id=message_id, body_html_hash=content_hash)
+        )
+        db_session.flush()
+
+        purge = threading.Thread(
+            target=lambda: purged.append(purge_policy(policy, throttle_seconds=0))
+        )
+        purge.start()
+
+        # Wait until the purge's DELETE is blocked on the writer's row lock
+        deadline = time.monotonic() + 10
+        with get_session() as monitor:
+            while purge.is_alive() and time.monotonic() < deadline:
+                waiting = monitor.execute(
+                    text(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE wait_event_type = 'Lock' "
+                        "AND query LIKE 'DELETE FROM gmail_email_bodies%'"
+                    )
+                ).scalar()
+                if waiting:
+                    break
+                time.sleep(0.05)
+
+        db_session.commit()
+        purge.join(timeout=10)
+
+        assert purged == [0]
+        db_session.expire_all()
+        assert load_email_bodies(db_session, [content_hash]) == {content_hash: body}
+    finally:
+        db_session.rollback()
+        db_session.query(GmailEmailContent).filter_by(message_id=message_id).delete()
+        db_session.query(GmailEmailBody).filter_by(content_hash=content_hash).delete()
+        db_session.commit()
+
+
+def test_pdf_storage_counters_track_stores_and_deletes(db_session):
+    """Test store/delete deltas move the total, vendor and month counters."""
+    vendor = f"test-vendor-{uuid.uuid4().hex[:8]}"
+    month = f"test-{uuid.uuid4().hex[:8]}"
+    before = get_pdf_storage_counters()
+
+    update_pdf_storage_stats(1, 1000, vendor, month)
+    update_pdf_storage_stats(1, 500, vendor, month)
+    update_pdf_storage_stats(-1, -1000, vendor, month)
+
+    try:
+        counters = get_pdf_storage_counters()
+        assert counters["by_vendor"][vendor] == {
+            "object_count": 1,
+            "total_size_bytes": 500,
+        }
+        assert counters["by_month"][month]["object_count"] == 1
+        assert counters["object_count"] == (before["object_count"] if before else 0) + 1
+    finally:
+        update_pdf_storage_stats(-1, -500, vendor, month)
+        db_session.query(PDFStorageStat).filter(
+            PDFStorageStat.scope_key.in_([vendor, month])
+        ).delete(synchronize_session=False)
+        if before is None:
+            db_session.query(PDFStorageStat).filter_by(scope="total").delete()
+        db_session.commit()
+
+
+def test_receipt_duplicates_flagged_within_block(db_session):
+    """Test a repeat of a purchase minutes later is flagged, others are not."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    merchant = f"test_shop_{uuid.uuid4().hex[:8]}"
+    items = [{"name": "Blue Ceramic Mug", "price": 8.5}]
+
+    def receipt(minute, line_items):
+        data = {
+            "total_amount": Decimal("8.50"),
+            "received_at": datetime(2025, 1, 15, 10, minute, 0, tzinfo=UTC),
+            "line_items": line_items,
+        }
+        row = GmailReceipt(
+            connection_id=connection.id,
+            message_id=f"msg_{uuid.uuid4().hex[:12]}",
+            sender_email="orders@shop.example.com",
+            merchant_name_normalized=merchant,
+            parse_confidence=80,
+            **data,
+            **duplicate_keys(data),
+        )
+        db_session.add(row)
+        return row
+
+    try:
+        # Order confirmation at 10:03 straddles a bucket boundary with its
+        # dispatch note at 10:06; a different item of the same price follows
+        original = receipt(3, items)
+        dispatch = receipt(6, items)
+        other = receipt(7, [{"name": "Red Teapot", "price": 8.5}])
+        db_session.commit()
+
+        ids = [original.id, dispatch.id, other.id]
+        assert flag_receipt_duplicates(db_session, ids) == 1
+        db_session.commit()
+        db_session.expire_all()
+
+        assert original.duplicate_of_id is None
+        assert dispatch.duplicate_of_id == original.id
+        assert other.duplicate_of_id is None
+
+        # Checking again changes nothing
+        assert flag_receipt_duplicates(db_session, ids) == 0
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def duplicate_receipts(db_session, connection, minutes, parsing_status="parsed"):
+    """Receipts of one purchase received at the given minutes past 10:00."""
+    merchant = f"test_shop_{uuid.uuid4().hex[:8]}"
+    rows = []
+    for minute in minutes:
+        data = {
+            "total_amount": Decimal("8.50"),
+            "received_at": datetime(2025, 1, 15, 10, minute, 0, tzinfo=UTC),
+            "line_items": [{"name": "Blue Ceramic Mug", "price": 8.5}],
+        }
+        row = GmailReceipt(
+            connection_id=connection.id,
+            message_id=f"msg_{uuid.uuid4().hex[:12]}",
+            sender_email="orders@shop.example.com",
+            merchant_name_normalized=merchant,
+            parse_confidence=80,
+            parsing_status=parsing_status,
+            **data,
+            **duplicate_keys(data),
+        )
+        db_session.add(row)
+        rows.append(row)
+    db_session.commit()
+    flag_receipt_duplicates(db_session, [row.id for row in rows])
+    db_session.commit()
+    return rows
+
+
+def test_soft_deleted_original_promotes_earliest_duplicate(db_session):
+    """Test the duplicates of a soft-deleted original re-point at the next one."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    try:
+        original, dispatch, invoice = duplicate_receipts(
+            db_session, connection, [3, 6, 7]
+        )
+        assert dispatch.duplicate_of_id == original.id
+        assert invoice.duplicate_of_id == original.id
+
+        assert soft_delete_gmail_receipt(original.id)
+        db_session.expire_all()
+
+        assert dispatch.duplicate_of_id is None
+        assert invoice.duplicate_of_id == dispatch.id
+        summary = db_session.get(
+            GmailMerchantSummary, (connection.id, dispatch.merchant_key)
+        )
+        assert summary.receipt_count == 1
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_purged_original_promotes_earliest_duplicate(db_session):
+    """Test the duplicates of a purged original re-point at the next one."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    try:
+        original, dispatch, invoice = duplicate_receipts(
+            db_session, connection, [3, 6, 7]
+        )
+        original.parsing_status = "unparseable"
+        db_session.commit()
+
+        # Scoped to this connection so other receipts in the database stay
+        receipts_policy = RETENTION_POLICIES["gmail_receipts"]
+        policy = replace(
+            receipts_policy,
+            conditions=lambda: [
+                *receipts_policy.conditions(),
+                GmailReceipt.connection_id == connection.id,
+            ],
+        )
+        deleted = purge_policy(
+            policy, cutoff=datetime.now(UTC) + timedelta(days=1), throttle_seconds=0
+        )
+        db_session.expire_all()
+
+        assert deleted == 1
+        assert dispatch.duplicate_of_id is None
+        assert invoice.duplicate_of_id == dispatch.id
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_retention_purges_expired_rows_in_chunks(db_session):
+    """Test a purge deletes only expired rows, one chunk at a time."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    now = datetime.now(UTC)
+    for age_days in (200, 150, 120, 100, 10):
+        db_session.add(
+            GmailParseStatistic(
+                connection_id=connection.id,
+                message_id=f"msg_{uuid.uuid4().hex[:12]}",
+                sender_domain="shop.example.com",
+                created_at=now - timedelta(days=age_days),
+            )
+        )
+    db_session.commit()
+
+    # Scoped to this connection so other rows in the database are untouched
+    policy = RetentionPolicy(
+        name="test_parse_statistics",
+        model=GmailParseStatistic,
+        key=GmailParseStatistic.id,
+        timestamp=GmailParseStatistic.created_at,
+        days=90,
+        conditions=lambda: [GmailParseStatistic.connection_id == connection.id],
+    )
+    progress = []
+
+    try:
+        deleted = purge_policy(
+            policy,
+            chunk_size=3,
+            throttle_seconds=0,
+            progress_callback=lambda name, count: progress.append(count),
+        )
+
+        assert deleted == 4
+        assert progress == [3, 4]
+        remaining = (
+            db_session.query(GmailParseStatistic)
+            .filter_by(connection_id=connection.id)
+            .all()
+        )
+        assert len(remaining) == 1
+    finally:
+        db_session.query(GmailParseStatistic).filter_by(
+            connection_id=connection.id
+        ).delete()
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_merchant_summary_follows_receipt_writes(db_session):
+    """Test saved and deleted receipts update their merchant's summary row."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    shop = f"shop{uuid.uuid4().hex[:8]}"
+
+    def receipt(day, amount, merchant_name_normalized=None):
+        return (
+            connection.id,
+            f"msg_{uuid.uuid4().hex[:12]}",
+            {
+                "sender_email": f"orders@{shop}.example.com",
+                "received_at": datetime(2025, 1, day, 10, 0, 0, tzinfo=UTC),
+                "merchant_name_normalized": merchant_name_normalized,
+                "total_amount": Decimal(amount),
+                "parse_method": "pattern",
+                "parse_confidence": 80,
+            },
+        )
+
+    try:
+        receipts = [
+            receipt(10, "5.00"),
+            receipt(12, "7.50"),
+            receipt(14, "1.00", "other"),
+        ]
+        ids = save_gmail_receipt_bulk(receipts)["message_to_id"]
+
+        def summary(merchant):
+            db_session.expire_all()
+            return db_session.get(GmailMerchantSummary, (connection.id, merchant))
+
+        # Without a normalised name the first label of the sender domain is used
+        row = summary(shop)
+        assert row.receipt_count == 2
+        assert row.parsed_count == 2
+        assert row.pattern_parsed_count == 2
+        assert row.total_amount == Decimal("12.50")
+        assert row.merchant_domain == f"{shop}.example.com"
+        assert summary("other").receipt_count == 1
+
+        soft_delete_gmail_receipt(ids[receipts[0][1]])
+        assert summary(shop).receipt_count == 1
+        soft_delete_gmail_receipt(ids[receipts[2][1]])
+        assert summary("other") is None
+    finally:
+        db_session.delete(connection)
+        db_session.commit()
+
+
+def test_concurrent_merchant_summary_writers_both_counted(db_session):
+    """Test a writer refreshing a merchant waits for the one before it."""
+    connection = GmailConnection(
+        user_id=900000 + (uuid.uuid4().int % 100000),
+        email_address=f"test_{uuid.uuid4().hex[:8]}@gmail.com",
+        access_token="token",
+        refresh_token="refresh",
+    )
+    db_session.add(connection)
+    db_session.commit()
+
+    shop = f"shop{uuid.uuid4().hex[:8]}"
+
+    def receipt_data(day):
+        return {
+            "sender_email": f"orders@{shop}.example.com",
+            "received_at": datetime(2025, 1, day, 10, 0, 0, tzinfo=UTC),
+            "total_amount": Decimal("5.00"),
+            "parse_method": "pattern",
+            "parse_confidence": 80,
+        }
+
+    try:
+        # First writer has refreshed the merchant but not committed yet
+        first = GmailReceipt(
+            connection_id=connection.id,
+            message_id=f"msg_{uuid.uuid4().hex[:12]}",
+            **receipt_data(10),
+        )
+        db_session.add(first)
+        db_session.flush()
+        refresh_receipt_merchants(db_session, [first.id])
+
+        second = threading.Thread(
+            target=lambda: save_gmail_receipt_bulk(
+                [(connection.id, f"msg_{uuid.uuid4().hex[:12]}", receipt_data(12))]
+            )
+        )
+        second.start()
+
+        # Wait until the second writer is blocked on the merchant's lock
+        deadline = time.monotonic() + 10
+        with get_session() as monitor:
+            while second.is_alive() and time.monotonic() < deadline:
+                waiting = monitor.execute(
+                    text(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE wait_event_type = 'Lock' "
+                        "AND wait_event = 'advisory'"
+                    )
+                ).scalar()
+                if waiting:
+                    break
+                time.sleep(0.05)
+
+        db_session.commit()
+        second.join(timeout=10)
+
+        db_session.expire_all()
+        row = db_session.get(GmailMerchantSummary, (connection.id, shop))
+        assert row.receipt_count == 2
+        assert row.total_amount == Decimal("10.00")
+    finally:
+        db_session.rollback()
+        db_session.delete(connection)
+        db_session.commit()